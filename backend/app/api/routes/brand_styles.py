@@ -24,11 +24,16 @@ from app.schemas.brand_style import (
 from app.services.pipeline.brand_style_extractor import extract_brand_style, VISION_MODEL_COST_PER_IMAGE
 from app.services.cost_tracking import track_vision_llm_cost
 from app.db.models.brand_style import ExtractionStatus
+from app.services.media.image_ingest import (
+    get_thumbnail_url,
+    ingest_uploaded_images,
+    remove_orphaned_derivatives,
+    resolve_model_input,
+)
 from app.utils.storage import (
     MAX_FOLDER_SIZE_BYTES,
     MAX_IMAGES_PER_FOLDER,
     delete_user_folder,
-    save_uploaded_images,
     validate_folder_size,
     validate_image_count,
     validate_image_file,
@@ -132,9 +137,9 @@ async def upload_brand_styles(
                 logger.warning(f"Error deleting existing brand style folder: {e}")
 
         # Save uploaded images to disk
-        saved_paths = await save_uploaded_images(current_user.id, files, "brand_styles")
+        ingested_images = await ingest_uploaded_images(current_user.id, files, "brand_styles")
 
-        if not saved_paths:
+        if not ingested_images:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -148,31 +153,32 @@ async def upload_brand_styles(
         # Create BrandStyleFolder record
         brand_style_folder = BrandStyleFolder(
             user_id=current_user.id,
-            image_count=len(saved_paths),
+            image_count=len(ingested_images),
         )
         db.add(brand_style_folder)
         db.flush()  # Flush to get folder ID
 
         # Create UploadedImage records for each saved file
-        for saved_path in saved_paths:
-            file_path = Path(saved_path)
+        for ingested in ingested_images:
             uploaded_image = UploadedImage(
                 folder_id=brand_style_folder.id,
                 folder_type="brand_style",
-                filename=file_path.name,
-                file_path=saved_path,
-                file_size=file_path.stat().st_size if file_path.exists() else 0,
+                filename=ingested.path.name,
+                file_path=ingested.relative_path,
+                file_size=ingested.file_size,
+                content_hash=ingested.content_hash,
+                perceptual_hash=ingested.perceptual_hash,
             )
             db.add(uploaded_image)
 
         db.commit()
         db.refresh(brand_style_folder)
 
-        logger.info(f"Brand style images uploaded successfully for user {current_user.id}: {len(saved_paths)} images")
+        logger.info(f"Brand style images uploaded successfully for user {current_user.id}: {len(ingested_images)} images")
 
         return BrandStyleUploadResponse(
-            message=f"Brand style images uploaded successfully ({len(saved_paths)} images)",
-            count=len(saved_paths),
+            message=f"Brand style images uploaded successfully ({len(ingested_images)} images)",
+            count=len(ingested_images),
         )
 
     except HTTPException:
@@ -241,6 +247,7 @@ async def get_brand_styles(
                     id=image.id,
                     filename=actual_filename,  # Use actual filename that matches the saved file
                     url=image_url,
+                    thumbnail_url=get_thumbnail_url(current_user.id, image.content_hash),
                     uploaded_at=image.uploaded_at,
                 )
             )
@@ -298,6 +305,7 @@ async def delete_brand_styles(
         # Delete physical folder from disk
         try:
             delete_user_folder(current_user.id, "brand_styles")
+            remove_orphaned_derivatives(current_user.id)
         except Exception as e:
             logger.warning(f"Error deleting brand style folder from disk: {e}")
 
@@ -391,8 +399,11 @@ async def extract_brand_style_endpoint(
                 },
             )
         
-        # Get image file paths
-        image_paths = [Path(img.file_path) for img in uploaded_images]
+        # Get image file paths (pre-generated model-input derivatives where available)
+        image_paths = [
+            resolve_model_input(current_user.id, img.file_path, img.content_hash)
+            for img in uploaded_images
+        ]
         
         # Update status to pending
         brand_style_folder.extraction_status = ExtractionStatus.PENDING
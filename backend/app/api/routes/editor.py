@@ -7,7 +7,9 @@ from datetime import datetime
 from uuid import uuid4
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
 from app.api.deps import get_current_user
 from app.db.models.generation import Generation
@@ -36,6 +38,7 @@ from app.schemas.editor import (
 from app.services.editor.editor_service import (
     extract_clips_from_generation,
     get_or_create_editing_session,
+    probe_clip_durations,
     get_full_url,
 )
 from app.services.editor.trim_service import apply_trim_to_editing_session
@@ -43,8 +46,9 @@ from app.services.editor.split_service import apply_split_to_editing_session
 from app.services.editor.merge_service import apply_merge_to_editing_session
 from app.services.editor.position_service import update_clip_position
 from app.services.editor.save_service import save_editing_session
-from app.services.editor.export_service import export_edited_video, EXPORT_STAGES
+from app.services.editor.export_service import export_edited_video, render_clip_preview, EXPORT_STAGES
 from app.services.pipeline.progress_tracking import update_generation_progress, update_generation_status
+from app.services.storage.janitor import remove_temp_dir
 
 logger = logging.getLogger(__name__)
 
@@ -161,7 +165,8 @@ async def get_editor_data(
         
         # Extract original scene clips from generation
         try:
-            original_clips = extract_clips_from_generation(generation, db)
+            durations = await probe_clip_durations(generation)
+            original_clips = extract_clips_from_generation(generation, db, durations)
         except Exception as e:
             logger.error(f"Error extracting clips from generation {generation_id}: {e}", exc_info=True)
             raise HTTPException(
@@ -179,7 +184,8 @@ async def get_editor_data(
             editing_session = get_or_create_editing_session(
                 generation=generation,
                 user_id=current_user.id,
-                db=db
+                db=db,
+                durations=durations
             )
         except Exception as e:
             logger.error(f"Error creating/loading editing session for generation {generation_id}: {e}", exc_info=True)
@@ -271,6 +277,7 @@ async def get_editor_data(
                         end_time=end_time,
                         thumbnail_url=original_clip.thumbnail_url,
                         text_overlay=clip_state.get("text_overlay") or original_clip.text_overlay,
+                        media=original_clip.media,
                     )
                 else:
                     # Fallback for split clips that don't match original clips
@@ -293,6 +300,7 @@ async def get_editor_data(
                     if matching_original:
                         clip_info.clip_url = matching_original.clip_url
                         clip_info.thumbnail_url = matching_original.thumbnail_url
+                        clip_info.media = matching_original.media
                         if not clip_info.scene_number:
                             clip_info.scene_number = matching_original.scene_number
                 
@@ -319,6 +327,7 @@ async def get_editor_data(
                 end_time=clip.end_time,
                 thumbnail_url=clip.thumbnail_url,
                 text_overlay=clip.text_overlay,
+                media=clip.media,
             ) for clip in original_clips]
             
             for clip_state in clips_state:
@@ -348,6 +357,7 @@ async def get_editor_data(
                             end_time=clip_start_time + trimmed_duration,
                             thumbnail_url=original_clip.thumbnail_url,
                             text_overlay=original_clip.text_overlay,
+                            media=original_clip.media,
                         )
                     
                     # Extract trim state for UI (use original duration for trimEnd default)
@@ -994,6 +1004,108 @@ async def save_editing_session_endpoint(
         )
 
 
+@router.get("/editor/{generation_id}/clips/{clip_id}/preview", status_code=status.HTTP_200_OK)
+async def preview_clip(
+    generation_id: str,
+    clip_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> FileResponse:
+    """
+    Stream a clip with its edits applied.
+
+    The processed clip is shared with export through the processed clip cache,
+    so only clips whose edits changed since the last preview or export are
+    re-rendered.
+
+    Args:
+        generation_id: UUID of the generation being edited
+        clip_id: ID of the clip to preview
+        current_user: Authenticated user (from JWT)
+        db: Database session
+
+    Returns:
+        FileResponse with the processed clip (video/mp4)
+
+    Raises:
+        HTTPException: 404 if generation, editing session or clip not found
+        HTTPException: 403 if user doesn't own the generation
+    """
+    generation = db.query(Generation).filter(Generation.id == generation_id).first()
+
+    if not generation:
+        logger.warning(f"Generation {generation_id} not found")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": {
+                    "code": "GENERATION_NOT_FOUND",
+                    "message": "Generation not found"
+                }
+            }
+        )
+
+    if generation.user_id != current_user.id:
+        logger.warning(
+            f"User {current_user.id} attempted to preview clip in generation {generation_id} "
+            f"owned by {generation.user_id}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": {
+                    "code": "FORBIDDEN",
+                    "message": "You don't have permission to access this generation"
+                }
+            }
+        )
+
+    editing_session = (
+        db.query(EditingSession)
+        .filter(
+            EditingSession.generation_id == generation_id,
+            EditingSession.user_id == current_user.id,
+        )
+        .first()
+    )
+
+    if not editing_session:
+        logger.error(f"Editing session not found for generation {generation_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": {
+                    "code": "EDITING_SESSION_NOT_FOUND",
+                    "message": "Editing session not found",
+                }
+            },
+        )
+
+    fallback_video_path = generation.video_path or f"output/videos/{generation_id}.mp4"
+
+    try:
+        preview_path, temp_dir = await asyncio.to_thread(
+            render_clip_preview, editing_session, clip_id, fallback_video_path
+        )
+    except ValueError as e:
+        logger.warning(f"Cannot preview clip {clip_id} in generation {generation_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": {
+                    "code": "CLIP_NOT_FOUND",
+                    "message": str(e)
+                }
+            }
+        )
+
+    return FileResponse(
+        preview_path,
+        media_type="video/mp4",
+        background=BackgroundTask(remove_temp_dir, temp_dir),
+    )
+
+
 def process_export_task(
     export_id: str,
     editing_session_id: str,
@@ -3,13 +3,14 @@ Video generation route handlers.
 """
 
 import asyncio
+import copy
 import logging
 import os
 import shutil
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional
 
 from fastapi import (
     APIRouter,
@@ -25,7 +26,7 @@ from fastapi import (
 )
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
 
 from app.api.deps import get_current_user
 from app.db.models.generation import Generation, GenerationGroup
@@ -49,6 +50,8 @@ from app.schemas.generation import (
     StatusResponse,
     VariationDetail,
 )
+from app.core.config import settings
+from app.core.tracing import load_trace, trace
 from app.services.coherence_settings import apply_defaults, get_settings_metadata, validate_settings
 from app.services.cost_tracking import (
     track_video_generation_cost,
@@ -59,10 +62,13 @@ from app.services.cancellation import request_cancellation, handle_cancellation
 from app.services.pipeline.progress_tracking import update_generation_progress, update_generation_status
 from app.services.pipeline.llm_enhancement import enhance_prompt_with_llm
 from app.services.pipeline.overlays import add_overlays_to_clips, extract_brand_name, add_brand_overlay_to_final_video
+from app.services.editor.media_precompute import precompute_editor_media_in_session
 from app.services.pipeline.scene_planning import plan_scenes, create_basic_scene_plan_from_prompt
 from app.services.pipeline.stitching import stitch_video_clips
 from app.services.pipeline.audio import add_audio_layer
 from app.services.pipeline.export import export_final_video
+from app.services.media.packaging import package_for_delivery
+from app.services.storage.upload_manager import get_upload_manager
 from app.services.pipeline.cache import get_cached_clip, cache_clip, should_cache_prompt
 from app.services.pipeline.video_generation import (
     generate_video_clip,
@@ -73,17 +79,89 @@ from app.services.video_generation_standalone import (
     REPLICATE_MODELS
 )
 from app.services.pipeline.seed_manager import get_seed_for_generation
+from app.services.pipeline.stage_dag import ModelCheckpointStore, Stage, StageExecutor, StageGraph
 from app.services.pipeline.quality_control import evaluate_and_store_quality, regenerate_clip
-from app.services.pipeline.time_estimation import estimate_generation_time, format_estimated_time
+from app.services.pipeline.time_estimation import (
+    estimate_generation_time,
+    estimate_queue_etas,
+    format_estimated_time,
+    record_generation_timings,
+)
 
 logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/api", tags=["generations"])
 
+
+def _get_hls_master(generation: Generation) -> Optional[str]:
+    """Stored path of the generation's HLS master playlist, or None if it was not packaged with HLS."""
+    delivery = generation.delivery if isinstance(generation.delivery, dict) else {}
+    hls = delivery.get("hls")
+    return hls["master"] if hls else None
+
+
+# Generation columns read by the live ETA estimate (estimate_queue_etas)
+QUEUE_ETA_COLUMNS = (
+    Generation.id, Generation.status, Generation.created_at, Generation.model, Generation.aspect_ratio,
+    Generation.duration, Generation.num_scenes, Generation.num_clips, Generation.pipeline_checkpoint,
+)
+
+
+def _load_queue_ahead(db: Session, created_until: Optional[datetime]) -> List[Any]:
+    """
+    Load the active generations (of all users) that can delay pending ones created up to created_until.
+
+    Processing generations hold slots and all count; pending generations queued
+    later cannot delay an earlier one, so they are left out. Only the columns
+    the ETA estimate reads are selected.
+
+    Args:
+        db: Database session
+        created_until: Creation time of the last pending generation to estimate
+            (None when only processing generations are estimated)
+
+    Returns:
+        Rows with the QUEUE_ETA_COLUMNS attributes
+    """
+    ahead = Generation.status == "processing"
+    if created_until is not None:
+        ahead = or_(ahead, and_(
+            Generation.status == "pending",
+            or_(Generation.created_at <= created_until, Generation.created_at.is_(None)),
+        ))
+    return db.query(*QUEUE_ETA_COLUMNS).filter(ahead).all()
+
+
 # Text overlays are enabled - font loading uses system fonts with graceful fallback
 TEXT_OVERLAYS_ENABLED = True
 
+# Stages before clip generation; their errors are reported with the generic user-facing message
+PLANNING_STAGES = ("storyboard", "images", "video_style", "scene_plan")
+
+
+def _storyboard_scene_fields(storyboard_plan: dict) -> dict:
+    """Per-scene prompt fields of a storyboard plan, as lists in scene order."""
+    scenes = sorted(storyboard_plan.get("scenes", []), key=lambda x: x.get("scene_number", 0))
+    return {
+        # Detailed prompts for video generation (keep for backward compatibility)
+        "detailed_prompts": [scene.get("detailed_prompt", "") for scene in scenes],
+        # Enhanced image generation prompts, falling back to the detailed prompt
+        "image_generation_prompts": [
+            scene.get("image_generation_prompt") or scene.get("detailed_prompt", "") for scene in scenes
+        ],
+        # Continuity notes and consistency guidelines for enhanced prompts
+        "continuity_notes": [scene.get("image_continuity_notes", "") for scene in scenes],
+        "consistency_guidelines": [scene.get("visual_consistency_guidelines", "") for scene in scenes],
+        "transition_notes": [scene.get("scene_transition_notes", "") for scene in scenes],
+        # Start and end image prompts for Kling 2.5 Turbo
+        "start_prompts": [scene.get("start_image_prompt", "") for scene in scenes],
+        "end_prompts": [scene.get("end_image_prompt", "") for scene in scenes],
+        # Subject presence ("full" by default for backward compatibility)
+        "subject_presence": [scene.get("subject_presence", "full") for scene in scenes],
+        "subject_timing": [scene.get("subject_appearance_timing", "") for scene in scenes],
+    }
+
 
 async def process_generation(
     generation_id: str,
@@ -103,6 +181,7 @@ async def process_generation(
     advanced_image_quality_threshold: float = 30.0,
     advanced_image_num_variations: int = 4,
     advanced_image_max_enhancement_iterations: int = 4,
+    reference_topology: str = "chain",
 ):
     """
     Background task to process video generation.
@@ -122,6 +201,7 @@ async def process_generation(
     logger.info(f"[{generation_id}]   - top_note: {top_note}")
     logger.info(f"[{generation_id}]   - heart_note: {heart_note}")
     logger.info(f"[{generation_id}]   - base_note: {base_note}")
+    logger.info(f"[{generation_id}]   - reference_topology: {reference_topology}")
     
     # Track generation start time
     generation_start_time = time.time()
@@ -150,8 +230,6 @@ async def process_generation(
         logger.info(f"[{generation_id}] Basic settings: model={preferred_model}, target_duration={target_duration_seconds}s, use_llm={use_llm}")
         
         try:
-            # STEP 1: Plan detailed storyboard using LLM
-            # This creates detailed prompts for each scene that will be used for both images and videos
             from app.services.pipeline.storyboard_planner import plan_storyboard
             from app.services.pipeline.image_generation import generate_image
             from app.services.pipeline.image_generation_batch import (
@@ -159,711 +237,698 @@ async def process_generation(
                 generate_enhanced_reference_images_with_sequential_references,
                 _build_enhanced_image_prompt
             )
+            from app.services.pipeline.image_quality_scoring import score_image_consistency
+
+            # Setup temp storage directory
+            temp_dir = Path("output/temp")
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            temp_output_dir = str(temp_dir / generation_id)
             
-            storyboard_plan = None
-            consistency_markers = None
-            scene_detailed_prompts = []
+            # Create cancellation check function
+            def check_cancellation() -> bool:
+                db.refresh(generation)
+                return generation.cancellation_requested if generation else False
             
-            if use_llm:
-                # Update status to storyboard planning
-                update_generation_progress(
-                    db=db,
-                    generation_id=generation_id,
-                    progress=5,
-                    current_step="Storyboard Planning",
-                    status="processing"
-                )
-                logger.info(f"[{generation_id}] Status updated: processing (5%) - Storyboard Planning")
-                
-                logger.info(f"[{generation_id}] Planning detailed storyboard with LLM...")
-                
-                # Determine pipeline type based on preferred_model (use V2 for KLING models)
-                pipeline_type = "default"
-                if preferred_model:
-                    # Check if the model is a KLING model
-                    kling_models = [
-                        "kling", "kling_2_5", "kwaivgi/kling-v2.5-turbo-pro",
-                        "kwaivgi/kling-v2.1", "klingai/kling-video",
-                        "klingai/kling-2.5-turbo"
-                    ]
-                    if any(kling_model.lower() in preferred_model.lower() for kling_model in kling_models):
-                        pipeline_type = "kling"
-                        logger.info(f"[{generation_id}] Detected KLING model '{preferred_model}', using V2 storyboard prompt")
-                
-                logger.info(f"[{generation_id}] Calling plan_storyboard with:")
-                logger.info(f"[{generation_id}]   - user_prompt: {prompt[:100]}...")
-                logger.info(f"[{generation_id}]   - reference_image_path: {image_path}")
-                logger.info(f"[{generation_id}]   - target_duration: {target_duration_seconds}")
-                logger.info(f"[{generation_id}]   - pipeline_type: {pipeline_type}")
-                try:
-                    # LLM will decide number of scenes based on target_duration
-                    logger.info(f"[{generation_id}] ⏳ Awaiting plan_storyboard()...")
-                    storyboard_plan = await plan_storyboard(
-                        user_prompt=prompt,
-                        reference_image_path=image_path,
-                        target_duration=target_duration_seconds,
-                        pipeline_type=pipeline_type,
+            def cancel_if_requested(before: str) -> None:
+                """Mark the generation cancelled and stop the pipeline if the user asked to cancel."""
+                if check_cancellation():
+                    logger.info(f"[{generation_id}] Generation cancelled before {before}")
+                    update_generation_status(
+                        db=db,
+                        generation_id=generation_id,
+                        status="failed",
+                        error_message="Cancelled by user"
                     )
-                    logger.info(f"[{generation_id}] ✅ plan_storyboard() completed successfully")
-                    logger.info(f"[{generation_id}] Storyboard plan keys: {list(storyboard_plan.keys()) if storyboard_plan else 'None'}")
-                    
-                    # Log storyboard plan summary for this generation
-                    if storyboard_plan:
-                        scenes = storyboard_plan.get("scenes", [])
-                        consistency_markers = storyboard_plan.get("consistency_markers", {})
-                        logger.info(f"[{generation_id}] 📋 Storyboard Plan Summary:")
-                        logger.info(f"[{generation_id}]   - Number of scenes: {len(scenes)}")
-                        logger.info(f"[{generation_id}]   - Consistency markers: {list(consistency_markers.keys())}")
-                        for idx, scene in enumerate(scenes, 1):
-                            scene_num = scene.get("scene_number", idx)
-                            duration = scene.get("duration_seconds", 0)
-                            aida = scene.get("aida_stage", "N/A")
-                            detailed_prompt = scene.get("detailed_prompt", "")[:100] + "..." if len(scene.get("detailed_prompt", "")) > 100 else scene.get("detailed_prompt", "")
-                            logger.info(f"[{generation_id}]   - Scene {scene_num} ({aida}): {duration}s - {detailed_prompt}")
-                    
-                    # Extract consistency markers and detailed prompts
-                    consistency_markers = storyboard_plan.get("consistency_markers", {})
-                    scenes = storyboard_plan.get("scenes", [])
-                    
-                    # Extract detailed prompts for video generation (keep for backward compatibility)
-                    scene_detailed_prompts = [
-                        scene.get("detailed_prompt", "") 
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
-                    
-                    # Extract enhanced image generation prompts (new detailed prompts for better cohesion)
-                    # Fallback to detailed_prompt if image_generation_prompt not available
-                    scene_image_generation_prompts = [
-                        scene.get("image_generation_prompt") or scene.get("detailed_prompt", "")
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
-                    
-                    # Extract continuity notes and consistency guidelines for enhanced prompts
-                    scene_continuity_notes = [
-                        scene.get("image_continuity_notes", "")
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
-                    scene_consistency_guidelines = [
-                        scene.get("visual_consistency_guidelines", "")
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
-                    scene_transition_notes = [
-                        scene.get("scene_transition_notes", "")
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
-                    
-                    # Extract start and end image prompts for Kling 2.5 Turbo
-                    scene_start_prompts = [
-                        scene.get("start_image_prompt", "") 
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
-                    scene_end_prompts = [
-                        scene.get("end_image_prompt", "") 
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
+                    raise RuntimeError("Generation cancelled by user")
+
+            # STEP 1: Plan detailed storyboard using LLM
+            # This creates detailed prompts for each scene that will be used for both images and videos
+            async def storyboard_stage(inputs: dict) -> dict:
+                storyboard_plan = None
+                consistency_markers = None
+                
+                if use_llm:
+                    # Update status to storyboard planning
+                    update_generation_progress(
+                        db=db,
+                        generation_id=generation_id,
+                        progress=5,
+                        current_step="Storyboard Planning",
+                        status="processing"
+                    )
+                    logger.info(f"[{generation_id}] Status updated: processing (5%) - Storyboard Planning")
                     
-                    # Extract subject presence information for each scene
-                    scene_subject_presence = [
-                        scene.get("subject_presence", "full")  # Default to "full" for backward compatibility
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
-                    scene_subject_timing = [
-                        scene.get("subject_appearance_timing", "")
-                        for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                    ]
+                    logger.info(f"[{generation_id}] Planning detailed storyboard with LLM...")
                     
-                    logger.info(f"[{generation_id}] ✅ Storyboard plan created with {len(scenes)} detailed scenes")
-                    logger.info(f"[{generation_id}] Consistency markers: {consistency_markers}")
+                    # Determine pipeline type based on preferred_model (use V2 for KLING models)
+                    pipeline_type = "default"
+                    if preferred_model:
+                        # Check if the model is a KLING model
+                        kling_models = [
+                            "kling", "kling_2_5", "kwaivgi/kling-v2.5-turbo-pro",
+                            "kwaivgi/kling-v2.1", "klingai/kling-video",
+                            "klingai/kling-2.5-turbo"
+                        ]
+                        if any(kling_model.lower() in preferred_model.lower() for kling_model in kling_models):
+                            pipeline_type = "kling"
+                            logger.info(f"[{generation_id}] Detected KLING model '{preferred_model}', using V2 storyboard prompt")
                     
-                    # OPTIONAL REFINEMENT STEP: Refine specific scenes or prompts if requested
-                    # This allows fine-tuning before generating images/videos
-                    # Can be triggered via API parameter or manual review
-                    if refinement_instructions:
-                        logger.info(f"[{generation_id}] Refining storyboard based on instructions: {refinement_instructions}")
-                        from app.services.pipeline.storyboard_planner import refine_storyboard_prompts
-                        try:
-                            storyboard_plan = await refine_storyboard_prompts(
-                                storyboard_plan=storyboard_plan,
-                                refinement_instructions=refinement_instructions,
-                                max_retries=2,
-                            )
-                            # Re-extract prompts after refinement
+                    logger.info(f"[{generation_id}] Calling plan_storyboard with:")
+                    logger.info(f"[{generation_id}]   - user_prompt: {prompt[:100]}...")
+                    logger.info(f"[{generation_id}]   - reference_image_path: {image_path}")
+                    logger.info(f"[{generation_id}]   - target_duration: {target_duration_seconds}")
+                    logger.info(f"[{generation_id}]   - pipeline_type: {pipeline_type}")
+                    try:
+                        # LLM will decide number of scenes based on target_duration
+                        logger.info(f"[{generation_id}] ⏳ Awaiting plan_storyboard()...")
+                        storyboard_plan = await plan_storyboard(
+                            user_prompt=prompt,
+                            reference_image_path=image_path,
+                            target_duration=target_duration_seconds,
+                            pipeline_type=pipeline_type,
+                        )
+                        logger.info(f"[{generation_id}] ✅ plan_storyboard() completed successfully")
+                        logger.info(f"[{generation_id}] Storyboard plan keys: {list(storyboard_plan.keys()) if storyboard_plan else 'None'}")
+                        
+                        # Log storyboard plan summary for this generation
+                        if storyboard_plan:
                             scenes = storyboard_plan.get("scenes", [])
-                            scene_detailed_prompts = [
-                                scene.get("detailed_prompt", "") 
-                                for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                            ]
-                            scene_image_generation_prompts = [
-                                scene.get("image_generation_prompt") or scene.get("detailed_prompt", "")
-                                for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                            ]
-                            scene_continuity_notes = [
-                                scene.get("image_continuity_notes", "")
-                                for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                            ]
-                            scene_consistency_guidelines = [
-                                scene.get("visual_consistency_guidelines", "")
-                                for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                            ]
-                            scene_transition_notes = [
-                                scene.get("scene_transition_notes", "")
-                                for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                            ]
-                            scene_start_prompts = [
-                                scene.get("start_image_prompt", "") 
-                                for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                            ]
-                            scene_end_prompts = [
-                                scene.get("end_image_prompt", "") 
-                                for scene in sorted(scenes, key=lambda x: x.get("scene_number", 0))
-                            ]
-                            logger.info(f"[{generation_id}] ✅ Storyboard refined successfully")
-                        except Exception as e:
-                            logger.warning(f"[{generation_id}] Storyboard refinement failed: {e}. Continuing with original storyboard.")
-                    
-                    # Store storyboard plan and markers
-                    if generation.coherence_settings is None:
-                        generation.coherence_settings = {}
-                    generation.coherence_settings["consistency_markers"] = consistency_markers
-                    generation.coherence_settings["storyboard_plan"] = storyboard_plan
-                    db.commit()
-                    logger.info(f"[{generation_id}] ✅ Storyboard plan saved to coherence_settings with {len(scenes)} scenes")
-                    
-                except Exception as e:
-                    logger.error(f"[{generation_id}] ❌ Failed to plan storyboard: {e}", exc_info=True)
-                    logger.error(f"[{generation_id}] Exception type: {type(e).__name__}")
-                    logger.error(f"[{generation_id}] Exception message: {str(e)}")
-                    logger.warning(f"[{generation_id}] Falling back to basic scene plan without LLM enhancement")
-                    # Fall through to basic scene plan creation below
-                    storyboard_plan = None
-                    consistency_markers = None
-                    scene_detailed_prompts = []
-                    scene_start_prompts = []
-                    scene_end_prompts = []
-            
+                            consistency_markers = storyboard_plan.get("consistency_markers", {})
+                            logger.info(f"[{generation_id}] 📋 Storyboard Plan Summary:")
+                            logger.info(f"[{generation_id}]   - Number of scenes: {len(scenes)}")
+                            logger.info(f"[{generation_id}]   - Consistency markers: {list(consistency_markers.keys())}")
+                            for idx, scene in enumerate(scenes, 1):
+                                scene_num = scene.get("scene_number", idx)
+                                duration = scene.get("duration_seconds", 0)
+                                aida = scene.get("aida_stage", "N/A")
+                                detailed_prompt = scene.get("detailed_prompt", "")[:100] + "..." if len(scene.get("detailed_prompt", "")) > 100 else scene.get("detailed_prompt", "")
+                                logger.info(f"[{generation_id}]   - Scene {scene_num} ({aida}): {duration}s - {detailed_prompt}")
+                        
+                        # Extract consistency markers and detailed prompts
+                        consistency_markers = storyboard_plan.get("consistency_markers", {})
+                        scenes = storyboard_plan.get("scenes", [])
+                        
+                        logger.info(f"[{generation_id}] ✅ Storyboard plan created with {len(scenes)} detailed scenes")
+                        logger.info(f"[{generation_id}] Consistency markers: {consistency_markers}")
+                        
+                        # OPTIONAL REFINEMENT STEP: Refine specific scenes or prompts if requested
+                        # This allows fine-tuning before generating images/videos
+                        # Can be triggered via API parameter or manual review
+                        if refinement_instructions:
+                            logger.info(f"[{generation_id}] Refining storyboard based on instructions: {refinement_instructions}")
+                            from app.services.pipeline.storyboard_planner import refine_storyboard_prompts
+                            try:
+                                storyboard_plan = await refine_storyboard_prompts(
+                                    storyboard_plan=storyboard_plan,
+                                    refinement_instructions=refinement_instructions,
+                                    max_retries=2,
+                                )
+                                scenes = storyboard_plan.get("scenes", [])
+                                logger.info(f"[{generation_id}] ✅ Storyboard refined successfully")
+                            except Exception as e:
+                                logger.warning(f"[{generation_id}] Storyboard refinement failed: {e}. Continuing with original storyboard.")
+                        
+                        # Store storyboard plan and markers
+                        if generation.coherence_settings is None:
+                            generation.coherence_settings = {}
+                        generation.coherence_settings["consistency_markers"] = consistency_markers
+                        generation.coherence_settings["storyboard_plan"] = storyboard_plan
+                        db.commit()
+                        logger.info(f"[{generation_id}] ✅ Storyboard plan saved to coherence_settings with {len(scenes)} scenes")
+                        
+                    except Exception as e:
+                        logger.error(f"[{generation_id}] ❌ Failed to plan storyboard: {e}", exc_info=True)
+                        logger.error(f"[{generation_id}] Exception type: {type(e).__name__}")
+                        logger.error(f"[{generation_id}] Exception message: {str(e)}")
+                        logger.warning(f"[{generation_id}] Falling back to basic scene plan without LLM enhancement")
+                        # Fall through to basic scene plan creation below
+                        storyboard_plan = None
+                        consistency_markers = None
+                
+                return {"storyboard_plan": storyboard_plan, "consistency_markers": consistency_markers}
+
             # STEP 2: Generate images (reference, start, end) using detailed prompts + markers + sequential references
-            if storyboard_plan and scene_detailed_prompts:
-                update_generation_progress(
-                    db=db,
-                    generation_id=generation_id,
-                    progress=15,
-                    current_step="Generating Reference Images",
-                    status="processing"
-                )
-                logger.info(f"[{generation_id}] Status updated: processing (15%) - Generating Reference Images")
-                
-                # Setup image output directory
-                image_dir = Path("output/temp/images") / generation_id
-                image_dir.mkdir(parents=True, exist_ok=True)
-                
-                logger.info(f"[{generation_id}] Generating {len(scene_image_generation_prompts)} enhanced reference images with prompt enhancement and quality scoring...")
-                try:
-                    # Generate enhanced reference images with prompt enhancement, quality scoring, and sequential chaining
-                    # STEP: Use user's provided image as the FIRST reference image directly
-                    # All subsequent images will be generated using sequential chaining starting from user's image
-                    user_initial_reference = image_path if image_path else None
+            async def images_stage(inputs: dict) -> dict:
+                # Work on a copy so a restored storyboard checkpoint is never mutated
+                storyboard_plan = copy.deepcopy(inputs["storyboard_plan"])
+                consistency_markers = inputs["consistency_markers"]
+                fields = _storyboard_scene_fields(storyboard_plan or {})
+                scene_detailed_prompts = fields["detailed_prompts"]
+                scene_image_generation_prompts = fields["image_generation_prompts"]
+                scene_continuity_notes = fields["continuity_notes"]
+                scene_consistency_guidelines = fields["consistency_guidelines"]
+                scene_transition_notes = fields["transition_notes"]
+                scene_start_prompts = fields["start_prompts"]
+                scene_end_prompts = fields["end_prompts"]
+                scene_subject_presence = fields["subject_presence"]
+                scene_subject_timing = fields["subject_timing"]
+                reference_image_paths, start_image_paths, end_image_paths = [], [], []
+                
+                if storyboard_plan and scene_detailed_prompts:
+                    update_generation_progress(
+                        db=db,
+                        generation_id=generation_id,
+                        progress=15,
+                        current_step="Generating Reference Images",
+                        status="processing"
+                    )
+                    logger.info(f"[{generation_id}] Status updated: processing (15%) - Generating Reference Images")
                     
-                    # Enhance reference image prompts based on subject_presence
-                    enhanced_reference_prompts = []
-                    for idx, prompt in enumerate(scene_image_generation_prompts):
-                        subject_presence = scene_subject_presence[idx] if idx < len(scene_subject_presence) else "full"
-                        if subject_presence == "none":
-                            # Add instruction that this scene does NOT include the subject
-                            enhanced_prompt = f"{prompt} | IMPORTANT: This scene does NOT include the main subject. Focus on environment, atmosphere, and supporting elements. Maintain visual style consistency with other scenes."
-                            enhanced_reference_prompts.append(enhanced_prompt)
-                        else:
-                            # Subject is present - use original prompt
-                            enhanced_reference_prompts.append(prompt)
+                    # Setup image output directory
+                    image_dir = Path("output/temp/images") / generation_id
+                    image_dir.mkdir(parents=True, exist_ok=True)
                     
-                    # Generate reference images for each scene
-                    # If user provided an image, use it directly as the first reference image
-                    # Then generate remaining images using sequential chaining starting from user's image
-                    if user_initial_reference:
-                        logger.info(f"[{generation_id}] User provided reference image - using it directly as first scene reference image")
-                        logger.info(f"[{generation_id}] All subsequent reference images will be generated using sequential chaining for consistency")
+                    logger.info(f"[{generation_id}] Generating {len(scene_image_generation_prompts)} enhanced reference images with prompt enhancement and quality scoring...")
+                    try:
+                        # Generate enhanced reference images with prompt enhancement, quality scoring, and sequential chaining
+                        # STEP: Use user's provided image as the FIRST reference image directly
+                        # All subsequent images will be generated using sequential chaining starting from user's image
+                        user_initial_reference = image_path if image_path else None
                         
-                        # Copy user's image to the first scene reference image location
-                        user_ref_path = Path(user_initial_reference)
-                        if user_ref_path.exists():
-                            # Copy user's image to scene 1 reference location
-                            first_scene_ref_path = image_dir / f"{generation_id}_scene_1.png"
-                            shutil.copy2(user_ref_path, first_scene_ref_path)
-                            first_reference_image = str(first_scene_ref_path)
-                            logger.info(f"[{generation_id}] ✅ Copied user's reference image to first scene: {first_reference_image}")
+                        # Enhance reference image prompts based on subject_presence
+                        enhanced_reference_prompts = []
+                        for idx, image_prompt in enumerate(scene_image_generation_prompts):
+                            subject_presence = scene_subject_presence[idx] if idx < len(scene_subject_presence) else "full"
+                            if subject_presence == "none":
+                                # Add instruction that this scene does NOT include the subject
+                                enhanced_prompt = f"{image_prompt} | IMPORTANT: This scene does NOT include the main subject. Focus on environment, atmosphere, and supporting elements. Maintain visual style consistency with other scenes."
+                                enhanced_reference_prompts.append(enhanced_prompt)
+                            else:
+                                # Subject is present - use original prompt
+                                enhanced_reference_prompts.append(image_prompt)
+                        
+                        # Generate reference images for each scene
+                        # If user provided an image, use it directly as the first reference image
+                        # Then generate remaining images using sequential chaining starting from user's image
+                        if user_initial_reference:
+                            logger.info(f"[{generation_id}] User provided reference image - using it directly as first scene reference image")
+                            logger.info(f"[{generation_id}] All subsequent reference images will be generated using sequential chaining for consistency")
                             
-                            # Generate remaining reference images (scenes 2, 3, etc.) using sequential chaining
-                            # Start the chain with the user's image
-                            if len(enhanced_reference_prompts) > 1:
-                                remaining_prompts = enhanced_reference_prompts[1:]  # Skip first prompt (using user's image)
+                            # Copy user's image to the first scene reference image location
+                            user_ref_path = Path(user_initial_reference)
+                            if user_ref_path.exists():
+                                # Copy user's image to scene 1 reference location
+                                first_scene_ref_path = image_dir / f"{generation_id}_scene_1.png"
+                                shutil.copy2(user_ref_path, first_scene_ref_path)
+                                first_reference_image = str(first_scene_ref_path)
+                                logger.info(f"[{generation_id}] ✅ Copied user's reference image to first scene: {first_reference_image}")
                                 
-                                if use_advanced_image_generation:
-                                    logger.info(f"[{generation_id}] 🚀 ADVANCED IMAGE GENERATION enabled for remaining scenes...")
-                                    remaining_reference_images = await generate_enhanced_reference_images_with_sequential_references(
-                                        prompts=remaining_prompts,
-                                        output_dir=str(image_dir),
-                                        generation_id=generation_id,
-                                        consistency_markers=consistency_markers,
-                                        continuity_notes=scene_continuity_notes[1:] if scene_continuity_notes and len(scene_continuity_notes) > 1 else None,
-                                        consistency_guidelines=scene_consistency_guidelines[1:] if scene_consistency_guidelines and len(scene_consistency_guidelines) > 1 else None,
-                                        transition_notes=scene_transition_notes[1:] if scene_transition_notes and len(scene_transition_notes) > 1 else None,
-                                        initial_reference_image=first_reference_image,  # Start chain with user's image
-                                        cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
-                                        quality_threshold=advanced_image_quality_threshold,
-                                        num_variations=advanced_image_num_variations,
-                                        max_enhancement_iterations=advanced_image_max_enhancement_iterations,
-                                        scene_offset=1,  # Start from scene 2 (idx 1)
-                                    )
-                                    logger.info(f"[{generation_id}] ✅ Generated {len(remaining_reference_images)} remaining reference images with ADVANCED mode")
+                                # Generate remaining reference images (scenes 2, 3, etc.) using sequential chaining
+                                # Start the chain with the user's image
+                                if len(enhanced_reference_prompts) > 1:
+                                    remaining_prompts = enhanced_reference_prompts[1:]  # Skip first prompt (using user's image)
+                                    
+                                    if use_advanced_image_generation:
+                                        logger.info(f"[{generation_id}] 🚀 ADVANCED IMAGE GENERATION enabled for remaining scenes...")
+                                        remaining_reference_images = await generate_enhanced_reference_images_with_sequential_references(
+                                            prompts=remaining_prompts,
+                                            output_dir=str(image_dir),
+                                            generation_id=generation_id,
+                                            consistency_markers=consistency_markers,
+                                            continuity_notes=scene_continuity_notes[1:] if scene_continuity_notes and len(scene_continuity_notes) > 1 else None,
+                                            consistency_guidelines=scene_consistency_guidelines[1:] if scene_consistency_guidelines and len(scene_consistency_guidelines) > 1 else None,
+                                            transition_notes=scene_transition_notes[1:] if scene_transition_notes and len(scene_transition_notes) > 1 else None,
+                                            initial_reference_image=first_reference_image,  # Start chain with user's image
+                                            cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
+                                            quality_threshold=advanced_image_quality_threshold,
+                                            num_variations=advanced_image_num_variations,
+                                            max_enhancement_iterations=advanced_image_max_enhancement_iterations,
+                                            scene_offset=1,  # Start from scene 2 (idx 1)
+                                            topology=reference_topology,
+                                        )
+                                        logger.info(f"[{generation_id}] ✅ Generated {len(remaining_reference_images)} remaining reference images with ADVANCED mode")
+                                    else:
+                                        remaining_reference_images = await generate_images_with_sequential_references(
+                                            prompts=remaining_prompts,
+                                            output_dir=str(image_dir),
+                                            generation_id=generation_id,
+                                            consistency_markers=consistency_markers,
+                                            continuity_notes=scene_continuity_notes[1:] if scene_continuity_notes and len(scene_continuity_notes) > 1 else None,
+                                            consistency_guidelines=scene_consistency_guidelines[1:] if scene_consistency_guidelines and len(scene_consistency_guidelines) > 1 else None,
+                                            transition_notes=scene_transition_notes[1:] if scene_transition_notes and len(scene_transition_notes) > 1 else None,
+                                            initial_reference_image=first_reference_image,  # Start chain with user's image
+                                            cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
+                                            scene_offset=1,  # Start from scene 2 (idx 1)
+                                            topology=reference_topology,
+                                        )
+                                        logger.info(f"[{generation_id}] ✅ Generated {len(remaining_reference_images)} remaining reference images with sequential chaining")
+                                    
+                                    # Combine: user's image (first) + generated images (remaining)
+                                    reference_image_paths = [first_reference_image] + remaining_reference_images
                                 else:
-                                    remaining_reference_images = await generate_images_with_sequential_references(
-                                        prompts=remaining_prompts,
-                                        output_dir=str(image_dir),
-                                        generation_id=generation_id,
-                                        consistency_markers=consistency_markers,
-                                        continuity_notes=scene_continuity_notes[1:] if scene_continuity_notes and len(scene_continuity_notes) > 1 else None,
-                                        consistency_guidelines=scene_consistency_guidelines[1:] if scene_consistency_guidelines and len(scene_consistency_guidelines) > 1 else None,
-                                        transition_notes=scene_transition_notes[1:] if scene_transition_notes and len(scene_transition_notes) > 1 else None,
-                                        initial_reference_image=first_reference_image,  # Start chain with user's image
-                                        cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
-                                        scene_offset=1,  # Start from scene 2 (idx 1)
-                                    )
-                                    logger.info(f"[{generation_id}] ✅ Generated {len(remaining_reference_images)} remaining reference images with sequential chaining")
+                                    # Only one scene - just use user's image
+                                    reference_image_paths = [first_reference_image]
                                 
-                                # Combine: user's image (first) + generated images (remaining)
-                                reference_image_paths = [first_reference_image] + remaining_reference_images
+                                logger.info(f"[{generation_id}] ✅ Total {len(reference_image_paths)} reference images: user's image (scene 1) + {len(reference_image_paths) - 1} generated images")
                             else:
-                                # Only one scene - just use user's image
-                                reference_image_paths = [first_reference_image]
-                            
-                            logger.info(f"[{generation_id}] ✅ Total {len(reference_image_paths)} reference images: user's image (scene 1) + {len(reference_image_paths) - 1} generated images")
+                                logger.warning(f"[{generation_id}] User reference image not found: {user_initial_reference}, falling back to sequential generation")
+                                user_initial_reference = None  # Fall through to sequential generation
                         else:
-                            logger.warning(f"[{generation_id}] User reference image not found: {user_initial_reference}, falling back to sequential generation")
-                            user_initial_reference = None  # Fall through to sequential generation
-                    else:
-                        # Story 9.4: Always use enhanced reference image generation with prompt enhancement and quality scoring
-                        # No toggle required - feature is always enabled by default
-                        logger.info(f"[{generation_id}] 🚀 Using enhanced reference image generation (prompt enhancement + quality scoring)...")
-                        logger.info(f"[{generation_id}] Settings: num_variations=4, quality_threshold=30.0, max_iterations=4")
-                        
-                        # Determine initial reference image: use user's reference if first scene has subject
-                        initial_ref = None
-                        if user_initial_reference and first_scene_subject_presence != "none":
-                            initial_ref = user_initial_reference
-                            logger.info(f"[{generation_id}] Using user-provided reference image as base for first scene: {initial_ref}")
-                        elif user_initial_reference and first_scene_subject_presence == "none":
-                            logger.info(f"[{generation_id}] First scene has subject_presence='none', not using user's reference image")
-                        
-                        reference_image_paths = await generate_enhanced_reference_images_with_sequential_references(
-                            prompts=enhanced_reference_prompts,  # Use enhanced prompts that respect subject_presence
-                            output_dir=str(image_dir),
-                            generation_id=generation_id,
-                            consistency_markers=consistency_markers,
-                            continuity_notes=scene_continuity_notes,
-                            consistency_guidelines=scene_consistency_guidelines,
-                            transition_notes=scene_transition_notes,
-                            initial_reference_image=initial_ref,  # Use user's reference image as base (only if first scene has subject)
-                            cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
-                            quality_threshold=30.0,  # Story 9.4: Minimum quality score (proceed with warning if below)
-                            num_variations=4,  # Story 9.4: 4 variations per scene
-                            max_enhancement_iterations=4,  # Story 9.4: 4 enhancement iterations
-                        )
+                            # Story 9.4: Always use enhanced reference image generation with prompt enhancement and quality scoring
+                            # No toggle required - feature is always enabled by default
+                            logger.info(f"[{generation_id}] 🚀 Using enhanced reference image generation (prompt enhancement + quality scoring)...")
+                            logger.info(f"[{generation_id}] Settings: num_variations=4, quality_threshold=30.0, max_iterations=4")
+                            
+                            # Determine initial reference image: use user's reference if first scene has subject
+                            initial_ref = None
+                            if user_initial_reference and first_scene_subject_presence != "none":
+                                initial_ref = user_initial_reference
+                                logger.info(f"[{generation_id}] Using user-provided reference image as base for first scene: {initial_ref}")
+                            elif user_initial_reference and first_scene_subject_presence == "none":
+                                logger.info(f"[{generation_id}] First scene has subject_presence='none', not using user's reference image")
+                            
+                            reference_image_paths = await generate_enhanced_reference_images_with_sequential_references(
+                                prompts=enhanced_reference_prompts,  # Use enhanced prompts that respect subject_presence
+                                output_dir=str(image_dir),
+                                generation_id=generation_id,
+                                consistency_markers=consistency_markers,
+                                continuity_notes=scene_continuity_notes,
+                                consistency_guidelines=scene_consistency_guidelines,
+                                transition_notes=scene_transition_notes,
+                                initial_reference_image=initial_ref,  # Use user's reference image as base (only if first scene has subject)
+                                cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
+                                quality_threshold=30.0,  # Story 9.4: Minimum quality score (proceed with warning if below)
+                                num_variations=4,  # Story 9.4: 4 variations per scene
+                                max_enhancement_iterations=4,  # Story 9.4: 4 enhancement iterations
+                                topology=reference_topology,
+                            )
+                            
+                            logger.info(f"[{generation_id}] ✅ Generated {len(reference_image_paths)} reference images with enhanced mode (prompt enhancement + quality scoring + best selection)")
                         
-                        logger.info(f"[{generation_id}] ✅ Generated {len(reference_image_paths)} reference images with enhanced mode (prompt enhancement + quality scoring + best selection)")
-                    
-                    # Generate start images (for Kling 2.5 Turbo) - SEQUENTIALLY for visual cohesion
-                    # CRITICAL: Generate ALL start images in one sequential batch to maintain visual cohesion
-                    # Start Image 1 → Start Image 2 → Start Image 3 → Start Image 4 (each uses previous as reference)
-                    # Strategy: Start with Scene 1's reference image, then chain start images sequentially
-                    # IMPORTANT: Respect subject_presence - enhance prompts accordingly
-                    start_image_paths = []
-                    if scene_start_prompts:
-                        logger.info(f"[{generation_id}] Generating {len(scene_start_prompts)} start images SEQUENTIALLY (unique moments, visually cohesive)...")
+                        # Generate start images (for Kling 2.5 Turbo) - SEQUENTIALLY for visual cohesion
+                        # CRITICAL: Generate ALL start images in one sequential batch to maintain visual cohesion
+                        # Start Image 1 → Start Image 2 → Start Image 3 → Start Image 4 (each uses previous as reference)
+                        # Strategy: Start with Scene 1's reference image, then chain start images sequentially
+                        # IMPORTANT: Respect subject_presence - enhance prompts accordingly
+                        start_image_paths = []
+                        if scene_start_prompts:
+                            logger.info(f"[{generation_id}] Generating {len(scene_start_prompts)} start images SEQUENTIALLY (unique moments, visually cohesive)...")
+                            
+                            # Build enhanced prompts for all start images
+                            enhanced_start_prompts = []
+                            for idx, start_prompt in enumerate(scene_start_prompts):
+                                subject_presence = scene_subject_presence[idx] if idx < len(scene_subject_presence) else "full"
+                                subject_timing = scene_subject_timing[idx] if idx < len(scene_subject_timing) else ""
+                                
+                                # Determine if subject should be in start image based on subject_presence
+                                subject_in_start = subject_presence in ("full", "appears_at_start", "appears_mid_scene") or (
+                                    subject_presence == "partial" and "start" in subject_timing.lower()
+                                )
+                                
+                                if subject_in_start:
+                                    logger.info(f"[{generation_id}] Start image {idx+1} - subject appears at start, maintaining visual cohesion")
+                                    enhanced_start_prompt = f"{start_prompt} | CRITICAL: Maintain exact visual consistency with the reference image - same subject appearance, same colors, same lighting, same style. This is a different moment/pose but must look like it's from the same visual universe."
+                                else:
+                                    logger.info(f"[{generation_id}] Start image {idx+1} - subject does NOT appear at start (subject_presence: {subject_presence})")
+                                    # Subject not in start frame - emphasize style consistency but no subject
+                                    enhanced_start_prompt = f"{start_prompt} | CRITICAL: Maintain exact visual consistency with the reference image for style, colors, lighting, and environment - but this frame does NOT include the subject. This is an establishing shot or scene before subject appears."
+                                
+                                enhanced_start_prompts.append(enhanced_start_prompt)
+                            
+                            # Generate ALL start images sequentially in one batch
+                            # Use Scene 1's reference image (user's image if provided) as the initial reference to start the chain
+                            initial_start_reference = reference_image_paths[0] if reference_image_paths else None
+                            if user_initial_reference and initial_start_reference:
+                                # If user provided image, use it directly as initial reference for start images
+                                # This ensures start images are consistent with user's image
+                                initial_start_reference = reference_image_paths[0]  # This is the user's image (copied to scene 1 location)
+                                logger.info(f"[{generation_id}] Using user's reference image as initial reference for start images")
+                            start_image_paths = await generate_images_with_sequential_references(
+                                prompts=enhanced_start_prompts,  # All start prompts at once
+                                output_dir=str(image_dir / "start"),
+                                generation_id=generation_id,
+                                consistency_markers=consistency_markers,
+                                continuity_notes=None,  # Start frames don't need continuity notes
+                                consistency_guidelines=scene_consistency_guidelines if scene_consistency_guidelines else None,
+                                transition_notes=None,  # Start frames don't need transition notes
+                                initial_reference_image=initial_start_reference,  # Use Scene 1's reference (user's image) to start the chain
+                                cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
+                                scene_offset=0,  # Start from 1 (idx+1 happens inside generate_images_with_sequential_references)
+                                topology=reference_topology,
+                            )
+                            logger.info(f"[{generation_id}] ✅ Generated {len(start_image_paths)} start images SEQUENTIALLY (unique moments, visually cohesive, subject presence respected)")
                         
-                        # Build enhanced prompts for all start images
-                        enhanced_start_prompts = []
-                        for idx, start_prompt in enumerate(scene_start_prompts):
-                            subject_presence = scene_subject_presence[idx] if idx < len(scene_subject_presence) else "full"
-                            subject_timing = scene_subject_timing[idx] if idx < len(scene_subject_timing) else ""
+                        # Generate end images (for Kling 2.5 Turbo) - SEQUENTIALLY for visual cohesion
+                        # CRITICAL: Generate ALL end images in one sequential batch to maintain visual cohesion
+                        # End Image 1 → End Image 2 → End Image 3 → End Image 4 (each uses previous as reference)
+                        # Strategy: Start with Scene 1's reference image, then chain end images sequentially
+                        # IMPORTANT: Respect subject_presence - enhance prompts accordingly
+                        end_image_paths = []
+                        if scene_end_prompts:
+                            logger.info(f"[{generation_id}] Generating {len(scene_end_prompts)} end images SEQUENTIALLY (unique moments, visually cohesive)...")
+                            
+                            # Build enhanced prompts for all end images
+                            enhanced_end_prompts = []
+                            for idx, end_prompt in enumerate(scene_end_prompts):
+                                subject_presence = scene_subject_presence[idx] if idx < len(scene_subject_presence) else "full"
+                                subject_timing = scene_subject_timing[idx] if idx < len(scene_subject_timing) else ""
+                                
+                                # Determine if subject should be in end image based on subject_presence
+                                subject_in_end = subject_presence in ("full", "appears_at_end", "appears_mid_scene") or (
+                                    subject_presence == "partial" and ("end" in subject_timing.lower() or "until end" in subject_timing.lower())
+                                )
+                                
+                                if subject_in_end:
+                                    logger.info(f"[{generation_id}] End image {idx+1} - subject appears at end, maintaining visual cohesion")
+                                    enhanced_end_prompt = f"{end_prompt} | CRITICAL: Maintain exact visual consistency with the reference image - same subject appearance, same colors, same lighting, same style. This is a different moment/pose but must look like it's from the same visual universe."
+                                else:
+                                    logger.info(f"[{generation_id}] End image {idx+1} - subject does NOT appear at end (subject_presence: {subject_presence})")
+                                    # Subject not in end frame - emphasize style consistency but no subject
+                                    enhanced_end_prompt = f"{end_prompt} | CRITICAL: Maintain exact visual consistency with the reference image for style, colors, lighting, and environment - but this frame does NOT include the subject. This is a scene after subject has exited or before subject appears."
+                                
+                                enhanced_end_prompts.append(enhanced_end_prompt)
                             
-                            # Determine if subject should be in start image based on subject_presence
-                            subject_in_start = subject_presence in ("full", "appears_at_start", "appears_mid_scene") or (
-                                subject_presence == "partial" and "start" in subject_timing.lower()
+                            # Generate ALL end images sequentially in one batch
+                            # Use Scene 1's reference image (user's image if provided) as the initial reference to start the chain
+                            initial_end_reference = reference_image_paths[0] if reference_image_paths else None
+                            if user_initial_reference and initial_end_reference:
+                                # If user provided image, use it directly as initial reference for end images
+                                # This ensures end images are consistent with user's image
+                                initial_end_reference = reference_image_paths[0]  # This is the user's image (copied to scene 1 location)
+                                logger.info(f"[{generation_id}] Using user's reference image as initial reference for end images")
+                            end_image_paths = await generate_images_with_sequential_references(
+                                prompts=enhanced_end_prompts,  # All end prompts at once
+                                output_dir=str(image_dir / "end"),
+                                generation_id=generation_id,
+                                consistency_markers=consistency_markers,
+                                continuity_notes=None,  # End frames don't need continuity notes
+                                consistency_guidelines=scene_consistency_guidelines if scene_consistency_guidelines else None,
+                                transition_notes=None,  # End frames don't need transition notes
+                                initial_reference_image=initial_end_reference,  # Use Scene 1's reference (user's image) to start the chain
+                                cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
+                                scene_offset=0,  # Start from 1 (idx+1 happens inside generate_images_with_sequential_references)
+                                topology=reference_topology,
                             )
+                            logger.info(f"[{generation_id}] ✅ Generated {len(end_image_paths)} end images SEQUENTIALLY (unique moments, visually cohesive, subject presence respected)")
+                        
+                        # Store image paths and enhanced prompts in storyboard plan
+                        import os
+                        
+                        def normalize_path(path: str) -> str:
+                            """Convert absolute path to relative path for storage."""
+                            if not path:
+                                return path
+                            # If already relative, return as-is
+                            if not os.path.isabs(path):
+                                return path
+                            # Convert absolute path to relative
+                            # Paths are like: D:\gauntlet-ai\ad-mint-ai\backend\output\temp\images\...
+                            # We want: output/temp/images/...
+                            backend_dir = Path(__file__).parent.parent.parent  # backend directory
+                            try:
+                                relative_path = os.path.relpath(path, backend_dir)
+                                # Normalize to forward slashes for URLs
+                                return relative_path.replace("\\", "/")
+                            except ValueError:
+                                # If path is on different drive (Windows), extract the relative part
+                                # Find "output" in the path and take everything from there
+                                if "output" in path:
+                                    idx = path.find("output")
+                                    return path[idx:].replace("\\", "/")
+                                return path.replace("\\", "/")
+                        
+                        for idx, scene in enumerate(storyboard_plan.get("scenes", [])):
+                            if idx < len(reference_image_paths):
+                                scene["reference_image_path"] = normalize_path(reference_image_paths[idx])
+                                # Store the actual enhanced prompt used for image generation
+                                # Use image_generation_prompt if available, otherwise fallback to detailed_prompt
+                                base_prompt = scene.get("image_generation_prompt") or scene.get("detailed_prompt", "")
+                                continuity_note = scene_continuity_notes[idx] if idx < len(scene_continuity_notes) else None
+                                consistency_guideline = scene_consistency_guidelines[idx] if idx < len(scene_consistency_guidelines) else None
+                                transition_note = scene_transition_notes[idx] if idx < len(scene_transition_notes) else None
+                                scene["reference_image_prompt"] = _build_enhanced_image_prompt(
+                                    base_prompt=base_prompt,
+                                    consistency_markers=consistency_markers,
+                                    continuity_note=continuity_note,
+                                    consistency_guideline=consistency_guideline,
+                                    transition_note=transition_note,
+                                    scene_number=idx + 1,
+                                )
                             
-                            if subject_in_start:
-                                logger.info(f"[{generation_id}] Start image {idx+1} - subject appears at start, maintaining visual cohesion")
-                                enhanced_start_prompt = f"{start_prompt} | CRITICAL: Maintain exact visual consistency with the reference image - same subject appearance, same colors, same lighting, same style. This is a different moment/pose but must look like it's from the same visual universe."
-                            else:
-                                logger.info(f"[{generation_id}] Start image {idx+1} - subject does NOT appear at start (subject_presence: {subject_presence})")
-                                # Subject not in start frame - emphasize style consistency but no subject
-                                enhanced_start_prompt = f"{start_prompt} | CRITICAL: Maintain exact visual consistency with the reference image for style, colors, lighting, and environment - but this frame does NOT include the subject. This is an establishing shot or scene before subject appears."
+                            if idx < len(start_image_paths):
+                                scene["start_image_path"] = normalize_path(start_image_paths[idx])
+                                # Store the actual enhanced prompt used for start image generation
+                                base_prompt = scene.get("start_image_prompt", "")
+                                consistency_guideline = scene_consistency_guidelines[idx] if idx < len(scene_consistency_guidelines) else None
+                                scene["start_image_enhanced_prompt"] = _build_enhanced_image_prompt(
+                                    base_prompt=base_prompt,
+                                    consistency_markers=consistency_markers,
+                                    continuity_note=None,  # Start frames don't need continuity
+                                    consistency_guideline=consistency_guideline,
+                                    transition_note=None,  # Start frames don't need transition
+                                    scene_number=idx + 1,
+                                )
                             
-                            enhanced_start_prompts.append(enhanced_start_prompt)
+                            if idx < len(end_image_paths):
+                                scene["end_image_path"] = normalize_path(end_image_paths[idx])
+                                # Store the actual enhanced prompt used for end image generation
+                                base_prompt = scene.get("end_image_prompt", "")
+                                consistency_guideline = scene_consistency_guidelines[idx] if idx < len(scene_consistency_guidelines) else None
+                                scene["end_image_enhanced_prompt"] = _build_enhanced_image_prompt(
+                                    base_prompt=base_prompt,
+                                    consistency_markers=consistency_markers,
+                                    continuity_note=None,  # End frames don't need continuity
+                                    consistency_guideline=consistency_guideline,
+                                    transition_note=None,  # End frames don't need transition
+                                    scene_number=idx + 1,
+                                )
                         
-                        # Generate ALL start images sequentially in one batch
-                        # Use Scene 1's reference image (user's image if provided) as the initial reference to start the chain
-                        initial_start_reference = reference_image_paths[0] if reference_image_paths else None
-                        if user_initial_reference and initial_start_reference:
-                            # If user provided image, use it directly as initial reference for start images
-                            # This ensures start images are consistent with user's image
-                            initial_start_reference = reference_image_paths[0]  # This is the user's image (copied to scene 1 location)
-                            logger.info(f"[{generation_id}] Using user's reference image as initial reference for start images")
-                        start_image_paths = await generate_images_with_sequential_references(
-                            prompts=enhanced_start_prompts,  # All start prompts at once
-                            output_dir=str(image_dir / "start"),
-                            generation_id=generation_id,
-                            consistency_markers=consistency_markers,
-                            continuity_notes=None,  # Start frames don't need continuity notes
-                            consistency_guidelines=scene_consistency_guidelines if scene_consistency_guidelines else None,
-                            transition_notes=None,  # Start frames don't need transition notes
-                            initial_reference_image=initial_start_reference,  # Use Scene 1's reference (user's image) to start the chain
-                            cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
-                            scene_offset=0,  # Start from 1 (idx+1 happens inside generate_images_with_sequential_references)
-                        )
-                        logger.info(f"[{generation_id}] ✅ Generated {len(start_image_paths)} start images SEQUENTIALLY (unique moments, visually cohesive, subject presence respected)")
-                    
-                    # Generate end images (for Kling 2.5 Turbo) - SEQUENTIALLY for visual cohesion
-                    # CRITICAL: Generate ALL end images in one sequential batch to maintain visual cohesion
-                    # End Image 1 → End Image 2 → End Image 3 → End Image 4 (each uses previous as reference)
-                    # Strategy: Start with Scene 1's reference image, then chain end images sequentially
-                    # IMPORTANT: Respect subject_presence - enhance prompts accordingly
-                    end_image_paths = []
-                    if scene_end_prompts:
-                        logger.info(f"[{generation_id}] Generating {len(scene_end_prompts)} end images SEQUENTIALLY (unique moments, visually cohesive)...")
+                        # Score how consistent a non-default topology kept the reference images
+                        if reference_topology != "chain" and len(reference_image_paths) > 1:
+                            try:
+                                reference_consistency = await score_image_consistency(
+                                    reference_image_paths, anchor_path=user_initial_reference
+                                )
+                                storyboard_plan["reference_topology"] = {
+                                    "topology": reference_topology,
+                                    "consistency": reference_consistency,
+                                }
+                                logger.info(f"[{generation_id}] Reference consistency ({reference_topology}): {reference_consistency}")
+                            except Exception as e:
+                                logger.warning(f"[{generation_id}] Reference consistency scoring failed: {e}")
                         
-                        # Build enhanced prompts for all end images
-                        enhanced_end_prompts = []
-                        for idx, end_prompt in enumerate(scene_end_prompts):
-                            subject_presence = scene_subject_presence[idx] if idx < len(scene_subject_presence) else "full"
-                            subject_timing = scene_subject_timing[idx] if idx < len(scene_subject_timing) else ""
+                        # Ensure coherence_settings exists before updating
+                        if generation.coherence_settings is None:
+                            generation.coherence_settings = {}
+                        generation.coherence_settings["storyboard_plan"] = storyboard_plan
+                        db.commit()
+                        logger.info(f"[{generation_id}] ✅ Storyboard plan updated with image paths and saved to coherence_settings")
+                        
+                    except Exception as e:
+                        logger.error(f"[{generation_id}] Failed to generate images: {e}", exc_info=True)
+                        raise
+                
+                return {
+                    "storyboard_with_images": storyboard_plan,
+                    "image_paths": reference_image_paths + start_image_paths + end_image_paths,
+                }
+
+            # STEP 3: Load brand/product style and scent profile for video prompt enhancement
+            # Needs only the storyboard, so it runs concurrently with image generation
+            async def video_style_stage(inputs: dict) -> dict:
+                storyboard_plan = inputs["storyboard_plan"]
+                brand_style_json = None
+                product_style_json = None
+                scent_profile = None
+                if storyboard_plan:
+                    # Load brand style JSON if user_id is available
+                    if user_id:
+                        try:
+                            from app.db.models.brand_style import BrandStyleFolder
+                            brand_folder = db.query(BrandStyleFolder).filter(
+                                BrandStyleFolder.user_id == user_id
+                            ).first()
+                            if brand_folder and brand_folder.extracted_style_json:
+                                brand_style_json = brand_folder.extracted_style_json
+                                logger.info(f"[{generation_id}] ✅ Loaded brand style JSON for user {user_id}")
+                            else:
+                                logger.debug(f"[{generation_id}] No brand style JSON found for user {user_id}")
+                        except Exception as e:
+                            logger.warning(f"[{generation_id}] Failed to load brand style JSON: {e}. Continuing without brand style.")
+                    
+                    # Load product style JSON if product_image_id is available
+                    if product_image_id:
+                        try:
+                            from app.db.models.uploaded_image import UploadedImage
+                            product_image = db.query(UploadedImage).filter(
+                                UploadedImage.id == product_image_id,
+                                UploadedImage.folder_type == "product"
+                            ).first()
+                            if product_image and product_image.extracted_product_style_json:
+                                product_style_json = product_image.extracted_product_style_json
+                                logger.info(f"[{generation_id}] ✅ Loaded product style JSON for product image {product_image_id}")
+                            else:
+                                logger.debug(f"[{generation_id}] No product style JSON found for product image {product_image_id}")
+                        except Exception as e:
+                            logger.warning(f"[{generation_id}] Failed to load product style JSON: {e}. Continuing without product style.")
+                    
+                    # Generate scent profile if fragrance notes are provided (store for video generation enhancement)
+                    if top_note or heart_note or base_note:
+                        logger.info(f"[{generation_id}] Generating scent profile from fragrance notes...")
+                        try:
+                            from app.services.pipeline.kling_stage3_prompt_enhancer import generate_scent_profile
                             
-                            # Determine if subject should be in end image based on subject_presence
-                            subject_in_end = subject_presence in ("full", "appears_at_end", "appears_mid_scene") or (
-                                subject_presence == "partial" and ("end" in subject_timing.lower() or "until end" in subject_timing.lower())
+                            scent_profile = await generate_scent_profile(
+                                top_note=top_note,
+                                heart_note=heart_note,
+                                base_note=base_note,
+                                model="gpt-4o",
                             )
                             
-                            if subject_in_end:
-                                logger.info(f"[{generation_id}] End image {idx+1} - subject appears at end, maintaining visual cohesion")
-                                enhanced_end_prompt = f"{end_prompt} | CRITICAL: Maintain exact visual consistency with the reference image - same subject appearance, same colors, same lighting, same style. This is a different moment/pose but must look like it's from the same visual universe."
+                            if scent_profile:
+                                logger.info(f"[{generation_id}] ✅ Scent profile generated successfully")
                             else:
-                                logger.info(f"[{generation_id}] End image {idx+1} - subject does NOT appear at end (subject_presence: {subject_presence})")
-                                # Subject not in end frame - emphasize style consistency but no subject
-                                enhanced_end_prompt = f"{end_prompt} | CRITICAL: Maintain exact visual consistency with the reference image for style, colors, lighting, and environment - but this frame does NOT include the subject. This is a scene after subject has exited or before subject appears."
-                            
-                            enhanced_end_prompts.append(enhanced_end_prompt)
+                                logger.warning(f"[{generation_id}] Scent profile generation returned None")
+                        except Exception as e:
+                            logger.error(f"[{generation_id}] Failed to generate scent profile: {e}", exc_info=True)
+                            logger.warning(f"[{generation_id}] Continuing without scent profile")
+                    
+                    # Store scent profile, brand style, and product style for video generation enhancement (NOT storyboard)
+                    # These will be used to enhance visual_prompt at video generation time
+                    if scent_profile or brand_style_json or product_style_json:
+                        if generation.coherence_settings is None:
+                            generation.coherence_settings = {}
+                        if scent_profile:
+                            generation.coherence_settings["scent_profile"] = scent_profile
+                        if brand_style_json:
+                            generation.coherence_settings["brand_style_json"] = brand_style_json
+                        if product_style_json:
+                            generation.coherence_settings["product_style_json"] = product_style_json
+                        db.commit()
+                        logger.info(f"[{generation_id}] ✅ Stored scent profile, brand style, and product style for video generation enhancement")
+                
+                return {
+                    "video_style": {
+                        "brand_style_json": brand_style_json,
+                        "product_style_json": product_style_json,
+                        "scent_profile": scent_profile,
+                    }
+                }
+
+            # STEP 4: Create scene plan from storyboard for video generation
+            async def scene_plan_stage(inputs: dict) -> dict:
+                storyboard_plan = inputs["storyboard_with_images"]
+                if storyboard_plan:
+                    scenes_data = storyboard_plan.get("scenes", [])
+                    scenes = []
+                    
+                    for scene_data in scenes_data:
+                        detailed_prompt = scene_data.get("detailed_prompt", "")
+                        reference_image_path = scene_data.get("reference_image_path")
+                        start_image_path = scene_data.get("start_image_path")
+                        end_image_path = scene_data.get("end_image_path")
                         
-                        # Generate ALL end images sequentially in one batch
-                        # Use Scene 1's reference image (user's image if provided) as the initial reference to start the chain
-                        initial_end_reference = reference_image_paths[0] if reference_image_paths else None
-                        if user_initial_reference and initial_end_reference:
-                            # If user provided image, use it directly as initial reference for end images
-                            # This ensures end images are consistent with user's image
-                            initial_end_reference = reference_image_paths[0]  # This is the user's image (copied to scene 1 location)
-                            logger.info(f"[{generation_id}] Using user's reference image as initial reference for end images")
-                        end_image_paths = await generate_images_with_sequential_references(
-                            prompts=enhanced_end_prompts,  # All end prompts at once
-                            output_dir=str(image_dir / "end"),
-                            generation_id=generation_id,
-                            consistency_markers=consistency_markers,
-                            continuity_notes=None,  # End frames don't need continuity notes
-                            consistency_guidelines=scene_consistency_guidelines if scene_consistency_guidelines else None,
-                            transition_notes=None,  # End frames don't need transition notes
-                            initial_reference_image=initial_end_reference,  # Use Scene 1's reference (user's image) to start the chain
-                            cancellation_check=lambda: db.query(Generation).filter(Generation.id == generation_id).first().cancellation_requested if db.query(Generation).filter(Generation.id == generation_id).first() else False,
-                            scene_offset=0,  # Start from 1 (idx+1 happens inside generate_images_with_sequential_references)
+                        # Create Scene object with detailed prompt and images
+                        scenes.append(
+                            Scene(
+                                scene_number=scene_data.get("scene_number", 0),
+                                scene_type=scene_data.get("aida_stage", "Scene"),
+                                visual_prompt=detailed_prompt,  # Use detailed prompt from storyboard
+                                model_prompts={},  # Can be populated later if needed
+                                reference_image_path=reference_image_path,  # Generated reference image
+                                start_image_path=start_image_path,  # Generated start image (for Kling 2.5 Turbo)
+                                end_image_path=end_image_path,  # Generated end image (for Kling 2.5 Turbo)
+                                text_overlay=None,  # Can be added later
+                                duration=int(scene_data.get("duration_seconds", 4)),
+                                sound_design=None,  # Can be added later
+                                transition_to_next=scene_data.get("transition_to_next", "crossfade"),  # LLM-selected transition
+                            )
                         )
-                        logger.info(f"[{generation_id}] ✅ Generated {len(end_image_paths)} end images SEQUENTIALLY (unique moments, visually cohesive, subject presence respected)")
                     
-                    # Store image paths and enhanced prompts in storyboard plan
-                    from app.services.pipeline.image_generation_batch import _build_enhanced_image_prompt
-                    import os
+                    scene_plan = ScenePlan(
+                        scenes=scenes,
+                        total_duration=sum(s.duration for s in scenes),
+                        framework="AIDA",
+                    )
                     
-                    def normalize_path(path: str) -> str:
-                        """Convert absolute path to relative path for storage."""
-                        if not path:
-                            return path
-                        # If already relative, return as-is
-                        if not os.path.isabs(path):
-                            return path
-                        # Convert absolute path to relative
-                        # Paths are like: D:\gauntlet-ai\ad-mint-ai\backend\output\temp\images\...
-                        # We want: output/temp/images/...
-                        backend_dir = Path(__file__).parent.parent.parent  # backend directory
-                        try:
-                            relative_path = os.path.relpath(path, backend_dir)
-                            # Normalize to forward slashes for URLs
-                            return relative_path.replace("\\", "/")
-                        except ValueError:
-                            # If path is on different drive (Windows), extract the relative part
-                            # Find "output" in the path and take everything from there
-                            if "output" in path:
-                                idx = path.find("output")
-                                return path[idx:].replace("\\", "/")
-                            return path.replace("\\", "/")
+                    logger.info(f"[{generation_id}] Scene plan created from storyboard: {len(scenes)} scenes")
+                else:
+                    # Fallback: Create basic scene plan without LLM (when storyboard planning fails or use_llm is False)
+                    logger.info(f"[{generation_id}] Creating basic scene plan without LLM enhancement")
+                    update_generation_progress(
+                        db=db,
+                        generation_id=generation_id,
+                        progress=10,
+                        current_step="Creating Basic Scene Plan",
+                        status="processing"
+                    )
                     
-                    for idx, scene in enumerate(storyboard_plan.get("scenes", [])):
-                        if idx < len(reference_image_paths):
-                            scene["reference_image_path"] = normalize_path(reference_image_paths[idx])
-                            # Store the actual enhanced prompt used for image generation
-                            # Use image_generation_prompt if available, otherwise fallback to detailed_prompt
-                            base_prompt = scene.get("image_generation_prompt") or scene.get("detailed_prompt", "")
-                            continuity_note = scene_continuity_notes[idx] if idx < len(scene_continuity_notes) else None
-                            consistency_guideline = scene_consistency_guidelines[idx] if idx < len(scene_consistency_guidelines) else None
-                            transition_note = scene_transition_notes[idx] if idx < len(scene_transition_notes) else None
-                            scene["reference_image_prompt"] = _build_enhanced_image_prompt(
-                                base_prompt=base_prompt,
-                                consistency_markers=consistency_markers,
-                                continuity_note=continuity_note,
-                                consistency_guideline=consistency_guideline,
-                                transition_note=transition_note,
-                                scene_number=idx + 1,
-                            )
-                        
-                        if idx < len(start_image_paths):
-                            scene["start_image_path"] = normalize_path(start_image_paths[idx])
-                            # Store the actual enhanced prompt used for start image generation
-                            base_prompt = scene.get("start_image_prompt", "")
-                            consistency_guideline = scene_consistency_guidelines[idx] if idx < len(scene_consistency_guidelines) else None
-                            scene["start_image_enhanced_prompt"] = _build_enhanced_image_prompt(
-                                base_prompt=base_prompt,
-                                consistency_markers=consistency_markers,
-                                continuity_note=None,  # Start frames don't need continuity
-                                consistency_guideline=consistency_guideline,
-                                transition_note=None,  # Start frames don't need transition
-                                scene_number=idx + 1,
-                            )
-                        
-                        if idx < len(end_image_paths):
-                            scene["end_image_path"] = normalize_path(end_image_paths[idx])
-                            # Store the actual enhanced prompt used for end image generation
-                            base_prompt = scene.get("end_image_prompt", "")
-                            consistency_guideline = scene_consistency_guidelines[idx] if idx < len(scene_consistency_guidelines) else None
-                            scene["end_image_enhanced_prompt"] = _build_enhanced_image_prompt(
-                                base_prompt=base_prompt,
-                                consistency_markers=consistency_markers,
-                                continuity_note=None,  # End frames don't need continuity
-                                consistency_guideline=consistency_guideline,
-                                transition_note=None,  # End frames don't need transition
-                                scene_number=idx + 1,
-                            )
+                    # Create basic scene plan from prompt
+                    # For basic scene plan (fallback), use target_duration
+                    scene_plan = create_basic_scene_plan_from_prompt(
+                        prompt=prompt,
+                        target_duration=target_duration_seconds,
+                        num_scenes=None  # Let it decide based on target_duration
+                    )
+                    logger.info(f"[{generation_id}] Basic scene plan created: {len(scene_plan.scenes)} scenes")
                     
-                    # Ensure coherence_settings exists before updating
-                    if generation.coherence_settings is None:
-                        generation.coherence_settings = {}
-                    generation.coherence_settings["storyboard_plan"] = storyboard_plan
+                    # Store basic specification
+                    generation.framework = scene_plan.framework
+                    generation.llm_specification = None  # No LLM spec when disabled
                     db.commit()
-                    logger.info(f"[{generation_id}] ✅ Storyboard plan updated with image paths and saved to coherence_settings")
-                    
-                except Exception as e:
-                    logger.error(f"[{generation_id}] Failed to generate images: {e}", exc_info=True)
-                    raise
-            
-            # STEP 3: Enhance storyboard prompts with brand/product style (LLM Scene Assembler)
-            # This happens AFTER image generation so it can use Stage 2 control frames as context
-            if storyboard_plan:
-                # Load brand/product style JSON
-                brand_style_json = None
-                product_style_json = None
                 
-                # Load brand style JSON if user_id is available
-                if user_id:
-                    try:
-                        from app.db.models.brand_style import BrandStyleFolder
-                        brand_folder = db.query(BrandStyleFolder).filter(
-                            BrandStyleFolder.user_id == user_id
-                        ).first()
-                        if brand_folder and brand_folder.extracted_style_json:
-                            brand_style_json = brand_folder.extracted_style_json
-                            logger.info(f"[{generation_id}] ✅ Loaded brand style JSON for user {user_id}")
-                        else:
-                            logger.debug(f"[{generation_id}] No brand style JSON found for user {user_id}")
-                    except Exception as e:
-                        logger.warning(f"[{generation_id}] Failed to load brand style JSON: {e}. Continuing without brand style.")
+                logger.info(f"[{generation_id}] Scene planning completed - {len(scene_plan.scenes)} scenes planned, total duration: {scene_plan.total_duration}s")
                 
-                # Load product style JSON if product_image_id is available
-                if product_image_id:
-                    try:
-                        from app.db.models.uploaded_image import UploadedImage
-                        product_image = db.query(UploadedImage).filter(
-                            UploadedImage.id == product_image_id,
-                            UploadedImage.folder_type == "product"
-                        ).first()
-                        if product_image and product_image.extracted_product_style_json:
-                            product_style_json = product_image.extracted_product_style_json
-                            logger.info(f"[{generation_id}] ✅ Loaded product style JSON for product image {product_image_id}")
-                        else:
-                            logger.debug(f"[{generation_id}] No product style JSON found for product image {product_image_id}")
-                    except Exception as e:
-                        logger.warning(f"[{generation_id}] Failed to load product style JSON: {e}. Continuing without product style.")
+                # No need to limit scenes - LLM has already decided based on target_duration
+                logger.info(f"[{generation_id}] Using {len(scene_plan.scenes)} scenes as planned by LLM, total duration: {scene_plan.total_duration}s")
                 
-                # Generate scent profile if fragrance notes are provided (store for video generation enhancement)
-                scent_profile = None
-                if top_note or heart_note or base_note:
-                    logger.info(f"[{generation_id}] Generating scent profile from fragrance notes...")
+                # Store scene plan
+                scene_plan_dict = scene_plan.model_dump()
+                
+                # Story 9.4: Enhanced image generation is always enabled by default
+                # Add metadata to scene plan to track that enhanced generation was used
+                scene_plan_dict['advanced_image_generation_used'] = True  # Always enabled per Story 9.4
+                scene_plan_dict['advanced_image_settings'] = {
+                    'quality_threshold': 30.0,  # Story 9.4 default
+                    'num_variations': 4,  # Story 9.4 default
+                    'max_enhancement_iterations': 4  # Story 9.4 default
+                }
+                
+                generation.scene_plan = scene_plan_dict
+                generation.num_scenes = len(scene_plan.scenes)
+                db.commit()
+                logger.info(f"[{generation_id}] Scene plan stored in database")
+                
+                # Seed Control: Generate and store seed if seed_control is enabled
+                seed = None
+                coherence_settings_dict = generation.coherence_settings or {}
+                seed_control_enabled = coherence_settings_dict.get("seed_control", True)  # Default to True
+                
+                if seed_control_enabled:
+                    logger.info(f"[{generation_id}] Seed control enabled - generating seed for visual consistency")
                     try:
-                        from app.services.pipeline.kling_stage3_prompt_enhancer import generate_scent_profile
-                        
-                        scent_profile = await generate_scent_profile(
-                            top_note=top_note,
-                            heart_note=heart_note,
-                            base_note=base_note,
-                            model="gpt-4o",
-                        )
-                        
-                        if scent_profile:
-                            logger.info(f"[{generation_id}] ✅ Scent profile generated successfully")
+                        seed = get_seed_for_generation(db, generation_id)
+                        if seed:
+                            logger.info(f"[{generation_id}] Using seed {seed} for all scenes in this generation")
                         else:
-                            logger.warning(f"[{generation_id}] Scent profile generation returned None")
+                            logger.warning(f"[{generation_id}] Seed control enabled but seed generation returned None - continuing without seed")
                     except Exception as e:
-                        logger.error(f"[{generation_id}] Failed to generate scent profile: {e}", exc_info=True)
-                        logger.warning(f"[{generation_id}] Continuing without scent profile")
-                
-                # Store scent profile, brand style, and product style for video generation enhancement (NOT storyboard)
-                # These will be used to enhance visual_prompt at video generation time
-                if scent_profile or brand_style_json or product_style_json:
-                    if generation.coherence_settings is None:
-                        generation.coherence_settings = {}
-                    if scent_profile:
-                        generation.coherence_settings["scent_profile"] = scent_profile
-                    if brand_style_json:
-                        generation.coherence_settings["brand_style_json"] = brand_style_json
-                    if product_style_json:
-                        generation.coherence_settings["product_style_json"] = product_style_json
-                    db.commit()
-                    logger.info(f"[{generation_id}] ✅ Stored scent profile, brand style, and product style for video generation enhancement")
-            
-            # STEP 4: Create scene plan from storyboard for video generation
-            if storyboard_plan:
-                scenes_data = storyboard_plan.get("scenes", [])
-                scenes = []
-                
-                for scene_data in scenes_data:
-                    detailed_prompt = scene_data.get("detailed_prompt", "")
-                    reference_image_path = scene_data.get("reference_image_path")
-                    start_image_path = scene_data.get("start_image_path")
-                    end_image_path = scene_data.get("end_image_path")
-                    
-                    # Create Scene object with detailed prompt and images
-                    scenes.append(
-                        Scene(
-                            scene_number=scene_data.get("scene_number", 0),
-                            scene_type=scene_data.get("aida_stage", "Scene"),
-                            visual_prompt=detailed_prompt,  # Use detailed prompt from storyboard
-                            model_prompts={},  # Can be populated later if needed
-                            reference_image_path=reference_image_path,  # Generated reference image
-                            start_image_path=start_image_path,  # Generated start image (for Kling 2.5 Turbo)
-                            end_image_path=end_image_path,  # Generated end image (for Kling 2.5 Turbo)
-                            text_overlay=None,  # Can be added later
-                            duration=int(scene_data.get("duration_seconds", 4)),
-                            sound_design=None,  # Can be added later
-                            transition_to_next=scene_data.get("transition_to_next", "crossfade"),  # LLM-selected transition
+                        # Seed generation is enhancement, not critical - continue without seed if it fails
+                        logger.error(
+                            f"[{generation_id}] Error generating seed for generation (database error or other issue): {e}. "
+                            f"Continuing generation without seed control.",
+                            exc_info=True
                         )
-                    )
-                
-                scene_plan = ScenePlan(
-                    scenes=scenes,
-                    total_duration=sum(s.duration for s in scenes),
-                    framework="AIDA",
-                )
-                
-                logger.info(f"[{generation_id}] Scene plan created from storyboard: {len(scenes)} scenes")
-            else:
-                # Fallback: Create basic scene plan without LLM (when storyboard planning fails or use_llm is False)
-                logger.info(f"[{generation_id}] Creating basic scene plan without LLM enhancement")
-                update_generation_progress(
-                    db=db,
-                    generation_id=generation_id,
-                    progress=10,
-                    current_step="Creating Basic Scene Plan",
-                    status="processing"
-                )
-                
-                # Create basic scene plan from prompt
-                # For basic scene plan (fallback), use target_duration
-                from app.services.pipeline.scene_planning import create_basic_scene_plan_from_prompt
-                scene_plan = create_basic_scene_plan_from_prompt(
-                    prompt=prompt,
-                    target_duration=target_duration_seconds,
-                    num_scenes=None  # Let it decide based on target_duration
-                )
-                logger.info(f"[{generation_id}] Basic scene plan created: {len(scene_plan.scenes)} scenes")
+                        seed = None  # Explicitly set to None to ensure no seed is used
+                else:
+                    logger.info(f"[{generation_id}] Seed control disabled - each scene will use different random seed")
                 
-                # Store basic specification
-                generation.framework = scene_plan.framework
-                generation.llm_specification = None  # No LLM spec when disabled
-                db.commit()
-            
-            logger.info(f"[{generation_id}] Scene planning completed - {len(scene_plan.scenes)} scenes planned, total duration: {scene_plan.total_duration}s")
-            
-            # No need to limit scenes - LLM has already decided based on target_duration
-            logger.info(f"[{generation_id}] Using {len(scene_plan.scenes)} scenes as planned by LLM, total duration: {scene_plan.total_duration}s")
-            
-            # Store scene plan
-            scene_plan_dict = scene_plan.model_dump()
-            
-            # Story 9.4: Enhanced image generation is always enabled by default
-            # Add metadata to scene plan to track that enhanced generation was used
-            scene_plan_dict['advanced_image_generation_used'] = True  # Always enabled per Story 9.4
-            scene_plan_dict['advanced_image_settings'] = {
-                'quality_threshold': 30.0,  # Story 9.4 default
-                'num_variations': 4,  # Story 9.4 default
-                'max_enhancement_iterations': 4  # Story 9.4 default
-            }
-            
-            generation.scene_plan = scene_plan_dict
-            generation.num_scenes = len(scene_plan.scenes)
-            db.commit()
-            logger.info(f"[{generation_id}] Scene plan stored in database")
-            
-            # Seed Control: Generate and store seed if seed_control is enabled
-            seed = None
-            coherence_settings_dict = generation.coherence_settings or {}
-            seed_control_enabled = coherence_settings_dict.get("seed_control", True)  # Default to True
-            
-            if seed_control_enabled:
-                logger.info(f"[{generation_id}] Seed control enabled - generating seed for visual consistency")
-                try:
-                    seed = get_seed_for_generation(db, generation_id)
-                    if seed:
-                        logger.info(f"[{generation_id}] Using seed {seed} for all scenes in this generation")
-                    else:
-                        logger.warning(f"[{generation_id}] Seed control enabled but seed generation returned None - continuing without seed")
-                except Exception as e:
-                    # Seed generation is enhancement, not critical - continue without seed if it fails
-                    logger.error(
-                        f"[{generation_id}] Error generating seed for generation (database error or other issue): {e}. "
-                        f"Continuing generation without seed control.",
-                        exc_info=True
-                    )
-                    seed = None  # Explicitly set to None to ensure no seed is used
-            else:
-                logger.info(f"[{generation_id}] Seed control disabled - each scene will use different random seed")
-            
+                return {"scene_plan": scene_plan_dict, "seed": seed}
+
             # Video Generation Stage (30-70% progress)
-            logger.info(f"[{generation_id}] Starting video generation stage (30-70% progress)")
-            logger.info(f"[{generation_id}] Will generate {len(scene_plan.scenes)} video clips")
-            
-            # Load brand/product style and scent profile from coherence_settings for video prompt enhancement
-            # (These were stored earlier and are used to enhance visual_prompt at video generation time)
-            video_enhancement_brand_style = None
-            video_enhancement_product_style = None
-            video_enhancement_scent_profile = None
-            if generation.coherence_settings:
-                video_enhancement_brand_style = generation.coherence_settings.get("brand_style_json")
-                video_enhancement_product_style = generation.coherence_settings.get("product_style_json")
-                video_enhancement_scent_profile = generation.coherence_settings.get("scent_profile")
-            
-            # Setup temp storage directory
-            temp_dir = Path("output/temp")
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            temp_output_dir = str(temp_dir / generation_id)
-            
-            # Create cancellation check function
-            def check_cancellation() -> bool:
-                db.refresh(generation)
-                return generation.cancellation_requested if generation else False
-            
-            try:
+            async def clips_stage(inputs: dict) -> dict:
+                scene_plan = ScenePlan(**inputs["scene_plan"])
+                seed = inputs["seed"]
+                storyboard_plan = inputs["storyboard_with_images"]
+                consistency_markers = inputs["consistency_markers"]
+                logger.info(f"[{generation_id}] Starting video generation stage (30-70% progress)")
+                logger.info(f"[{generation_id}] Will generate {len(scene_plan.scenes)} video clips")
+                
+                # Brand/product style and scent profile enhance visual_prompt at video generation time
+                video_enhancement_brand_style = inputs["video_style"]["brand_style_json"]
+                video_enhancement_product_style = inputs["video_style"]["product_style_json"]
+                video_enhancement_scent_profile = inputs["video_style"]["scent_profile"]
+                
                 # Generate all video clips in parallel
                 num_scenes = len(scene_plan.scenes)
                 progress_start = 30
@@ -1197,7 +1262,6 @@ async def process_generation(
                                 status="failed",
                                 error_message="Cancelled by user"
                             )
-                            return
                         raise result
                     
                     clip_path, model_used, clip_cost, scene_number = result
@@ -1247,17 +1311,22 @@ async def process_generation(
                 )
                 logger.info(f"[{generation_id}] All {len(clip_paths)} video clips generated, progress: 70% - Adding text overlays")
                 
+                return {"clip_paths": clip_paths, "total_video_cost": total_video_cost}
+
+            async def overlays_stage(inputs: dict) -> dict:
+                clip_paths = inputs["clip_paths"]
                 if TEXT_OVERLAYS_ENABLED:
                     # Add text overlays to all video clips (with error handling)
                     logger.info(f"[{generation_id}] Starting text overlay addition for {len(clip_paths)} clips...")
                     try:
-                        scene_plan_obj = ScenePlan(**generation.scene_plan)
+                        scene_plan_obj = ScenePlan(**inputs["scene_plan"])
                         overlay_output_dir = str(temp_dir / f"{generation_id}_overlays")
                         logger.info(f"[{generation_id}] Overlay output directory: {overlay_output_dir}")
                         overlay_paths = add_overlays_to_clips(
                             clip_paths=clip_paths,
                             scene_plan=scene_plan_obj,
-                            output_dir=overlay_output_dir
+                            output_dir=overlay_output_dir,
+                            cancellation_check=check_cancellation
                         )
                         logger.info(f"[{generation_id}] Text overlays added successfully to all clips")
                     except Exception as e:
@@ -1279,16 +1348,12 @@ async def process_generation(
                 )
                 logger.info(f"[{generation_id}] Progress: 80% - Stitching video clips")
                 
-                # Check cancellation before stitching
-                if check_cancellation():
-                    logger.info(f"[{generation_id}] Generation cancelled before stitching")
-                    update_generation_status(
-                        db=db,
-                        generation_id=generation_id,
-                        status="failed",
-                        error_message="Cancelled by user"
-                    )
-                    return
+                return {"overlay_paths": overlay_paths}
+
+            async def stitch_stage(inputs: dict) -> dict:
+                overlay_paths = inputs["overlay_paths"]
+                scene_plan_obj = ScenePlan(**inputs["scene_plan"])
+                cancel_if_requested("stitching")
                 
                 # Video Stitching Stage (80% progress)
                 logger.info(f"[{generation_id}] Stitching {len(overlay_paths)} video clips together...")
@@ -1326,16 +1391,11 @@ async def process_generation(
                 )
                 logger.info(f"[{generation_id}] Progress: 90% - Adding audio layer")
                 
-                # Check cancellation before audio
-                if check_cancellation():
-                    logger.info(f"[{generation_id}] Generation cancelled before audio")
-                    update_generation_status(
-                        db=db,
-                        generation_id=generation_id,
-                        status="failed",
-                        error_message="Cancelled by user"
-                    )
-                    return
+                return {"stitched_video_path": stitched_video_path}
+
+            async def audio_stage(inputs: dict) -> dict:
+                stitched_video_path = inputs["stitched_video_path"]
+                cancel_if_requested("audio")
                 
                 # Audio Layer Stage (85-90% progress)
                 logger.info(f"[{generation_id}] Starting audio layer addition...")
@@ -1352,7 +1412,7 @@ async def process_generation(
                 logger.info(f"[{generation_id}] Audio output path: {audio_output_path}")
                 
                 # Pass scene plan for transition detection
-                scene_plan_obj = ScenePlan(**generation.scene_plan) if generation.scene_plan else None
+                scene_plan_obj = ScenePlan(**inputs["scene_plan"])
                 
                 # Pass LLM specification to audio layer for sound_design extraction
                 llm_spec = generation.llm_specification if generation.llm_specification else None
@@ -1373,16 +1433,13 @@ async def process_generation(
                     # Fallback: use stitched video without audio
                     video_with_audio = stitched_video_path
                 
-                # Check cancellation before brand overlay
-                if check_cancellation():
-                    logger.info(f"[{generation_id}] Generation cancelled before brand overlay")
-                    update_generation_status(
-                        db=db,
-                        generation_id=generation_id,
-                        status="failed",
-                        error_message="Cancelled by user"
-                    )
-                    return
+                return {"video_with_audio": video_with_audio}
+
+            async def brand_overlay_stage(inputs: dict) -> dict:
+                video_with_audio = inputs["video_with_audio"]
+                audio_output_dir = str(temp_dir / f"{generation_id}_audio")
+                overlay_brand_name = brand_name
+                cancel_if_requested("brand overlay")
                 
                 # Brand Overlay Stage (after audio, before export)
                 logger.info(f"[{generation_id}] Adding brand overlay to final video...")
@@ -1395,24 +1452,24 @@ async def process_generation(
                 
                 # ALWAYS prioritize user-provided brand name
                 # Only extract from prompt if user did NOT provide a brand name
-                if brand_name:
-                    logger.info(f"[{generation_id}] Using user-provided brand name: {brand_name}")
+                if overlay_brand_name:
+                    logger.info(f"[{generation_id}] Using user-provided brand name: {overlay_brand_name}")
                 else:
                     # Only try extraction if user didn't provide one
                     extracted_brand = extract_brand_name(prompt)
                     if extracted_brand:
-                        brand_name = extracted_brand
-                        logger.info(f"[{generation_id}] Extracted brand name from prompt: {brand_name}")
+                        overlay_brand_name = extracted_brand
+                        logger.info(f"[{generation_id}] Extracted brand name from prompt: {overlay_brand_name}")
                     else:
                         logger.info(f"[{generation_id}] No brand name provided and none found in prompt - skipping brand overlay")
                 
                 # Add brand overlay if brand name found (with error handling)
-                if brand_name:
+                if overlay_brand_name:
                     try:
                         brand_overlay_output_path = str(Path(audio_output_dir) / "with_brand_overlay.mp4")
                         video_with_brand = add_brand_overlay_to_final_video(
                             video_path=video_with_audio,
-                            brand_name=brand_name,
+                            brand_name=overlay_brand_name,
                             output_path=brand_overlay_output_path,
                             duration=2.0  # Show brand for 2 seconds at the end
                         )
@@ -1425,16 +1482,11 @@ async def process_generation(
                     logger.info(f"[{generation_id}] No brand name found in prompt, skipping brand overlay")
                     video_for_export = video_with_audio
                 
-                # Check cancellation before export
-                if check_cancellation():
-                    logger.info(f"[{generation_id}] Generation cancelled before export")
-                    update_generation_status(
-                        db=db,
-                        generation_id=generation_id,
-                        status="failed",
-                        error_message="Cancelled by user"
-                    )
-                    return
+                return {"video_for_export": video_for_export}
+
+            async def export_stage(inputs: dict) -> dict:
+                video_for_export = inputs["video_for_export"]
+                cancel_if_requested("export")
                 
                 # Post-Processing and Export Stage
                 logger.info(f"[{generation_id}] Starting final video export...")
@@ -1455,7 +1507,9 @@ async def process_generation(
                 output_base_dir = "output"
                 logger.info(f"[{generation_id}] Exporting to: {output_base_dir}")
                 
-                video_url, thumbnail_url = export_final_video(
+                # Export and upload run off the event loop
+                video_url, thumbnail_url = await asyncio.to_thread(
+                    export_final_video,
                     video_path=video_for_export,
                     brand_style=brand_style,
                     output_dir=output_base_dir,
@@ -1465,6 +1519,107 @@ async def process_generation(
                 )
                 logger.info(f"[{generation_id}] Final video exported - Video URL: {video_url}, Thumbnail URL: {thumbnail_url}")
                 
+                # Delivery packaging (fast-start check, optional HLS ladder); the export thumbnail is the poster
+                try:
+                    delivery = await asyncio.to_thread(
+                        package_for_delivery,
+                        video_path=str(Path(output_base_dir) / "videos" / f"{generation_id}.mp4"),
+                        output_dir=str(Path(settings.DELIVERY_DIR) / generation_id),
+                        storage_prefix=f"delivery/{generation_id}",
+                        s3_prefix=f"delivery/{generation_id}",
+                        poster=False,
+                        generation_id=generation_id,
+                    )
+                    delivery["mp4"] = video_url
+                    delivery["poster"] = thumbnail_url
+                    generation.delivery = delivery
+                except Exception as e:
+                    logger.warning(f"[{generation_id}] Delivery packaging failed, serving the MP4 only: {e}")
+                
+                return {"video_url": video_url, "thumbnail_url": thumbnail_url}
+
+            # Arguments of this run, stored with the checkpoint so the generation can be resumed
+            run_inputs = {
+                "generation_id": generation_id,
+                "prompt": prompt,
+                "preferred_model": preferred_model,
+                "target_duration": target_duration,
+                "use_llm": use_llm,
+                "image_path": image_path,
+                "refinement_instructions": refinement_instructions,
+                "brand_name": brand_name,
+                "product_image_id": product_image_id,
+                "user_id": user_id,
+                "top_note": top_note,
+                "heart_note": heart_note,
+                "base_note": base_note,
+                "use_advanced_image_generation": use_advanced_image_generation,
+                "advanced_image_quality_threshold": advanced_image_quality_threshold,
+                "advanced_image_num_variations": advanced_image_num_variations,
+                "advanced_image_max_enhancement_iterations": advanced_image_max_enhancement_iterations,
+                "reference_topology": reference_topology,
+            }
+            stages = [
+                Stage("storyboard", storyboard_stage, outputs=("storyboard_plan", "consistency_markers")),
+                Stage(
+                    "images", images_stage,
+                    inputs=("storyboard_plan", "consistency_markers"),
+                    outputs=("storyboard_with_images", "image_paths"),
+                    files=("image_paths",),
+                ),
+                Stage("video_style", video_style_stage, inputs=("storyboard_plan",), outputs=("video_style",)),
+                Stage("scene_plan", scene_plan_stage, inputs=("storyboard_with_images",), outputs=("scene_plan", "seed")),
+                Stage(
+                    "clips", clips_stage,
+                    inputs=("scene_plan", "seed", "storyboard_with_images", "consistency_markers", "video_style"),
+                    outputs=("clip_paths", "total_video_cost"),
+                    files=("clip_paths",),
+                ),
+                Stage(
+                    "overlays", overlays_stage,
+                    inputs=("clip_paths", "scene_plan"), outputs=("overlay_paths",), files=("overlay_paths",),
+                ),
+                Stage(
+                    "stitch", stitch_stage,
+                    inputs=("overlay_paths", "scene_plan"), outputs=("stitched_video_path",), files=("stitched_video_path",),
+                ),
+                Stage(
+                    "audio", audio_stage,
+                    inputs=("stitched_video_path", "scene_plan"), outputs=("video_with_audio",), files=("video_with_audio",),
+                ),
+                Stage(
+                    "brand_overlay", brand_overlay_stage,
+                    inputs=("video_with_audio",), outputs=("video_for_export",), files=("video_for_export",),
+                ),
+                Stage("export", export_stage, inputs=("video_for_export",), outputs=("video_url", "thumbnail_url")),
+            ]
+            # Checkpoints live on the generation row, so a retry or restart resumes from the last completed stage
+            executor = StageExecutor(
+                StageGraph(stages),
+                store=ModelCheckpointStore(db, generation, "pipeline_checkpoint"),
+                label=generation_id,
+            )
+            
+            try:
+                # Stage, LLM, prediction, encode and DB spans of this run are saved as the generation's trace
+                with trace(generation_id, "generation", model=generation.model or preferred_model):
+                    values = await executor.run(run_inputs)
+                total_video_cost = values["total_video_cost"]
+                video_url = values["video_url"]
+                thumbnail_url = values["thumbnail_url"]
+                logger.info(
+                    f"[{generation_id}] Stage timings: "
+                    + ", ".join(f"{name}={seconds:.1f}s" for name, seconds in executor.timings.items())
+                )
+                # Stages restored from a checkpoint did not run now, so only fresh timings feed the ETAs
+                record_generation_timings(
+                    {name: seconds for name, seconds in executor.timings.items() if name not in executor.restored},
+                    model=generation.model or preferred_model,
+                    resolution=generation.aspect_ratio,
+                    duration=generation.duration,
+                    clips=generation.num_scenes,
+                )
+                
                 # Calculate generation time
                 generation_elapsed = int(time.time() - generation_start_time)
                 
@@ -1487,6 +1642,13 @@ async def process_generation(
                 )
                 logger.info(f"[{generation_id}] Generation marked as completed in database")
                 
+                # Precompute editor timeline media while the clips still exist (off the event loop)
+                try:
+                    await asyncio.to_thread(precompute_editor_media_in_session, generation_id)
+                    db.refresh(generation)
+                except Exception as e:
+                    logger.warning(f"[{generation_id}] Editor media precompute failed: {e}")
+                
                 # Clean up temp files
                 logger.info(f"[{generation_id}] Starting cleanup of temporary files...")
                 try:
@@ -1526,6 +1688,9 @@ async def process_generation(
                 )
                 
             except RuntimeError as e:
+                if executor.failed_stage in PLANNING_STAGES:
+                    # Planning errors get the user-friendly message of the generic handler below
+                    raise
                 if "cancelled" in str(e).lower():
                     # Already handled above
                     return
@@ -1581,9 +1746,61 @@ async def process_generation(
                 error_message=user_error
             )
     finally:
+        get_upload_manager().clear_progress(generation_id)
         db.close()
 
 
+async def resume_generation(generation_id: str) -> None:
+    """
+    Run a generation again from its checkpoint, reusing the stages that completed.
+
+    Args:
+        generation_id: UUID of a generation with a pipeline checkpoint
+    """
+    db = SessionLocal()
+    try:
+        generation = db.query(Generation).filter(Generation.id == generation_id).first()
+        checkpoint = generation.pipeline_checkpoint if generation else None
+        if not checkpoint or "inputs" not in checkpoint:
+            logger.warning(f"[{generation_id}] No pipeline checkpoint to resume from")
+            return
+        run_inputs = dict(checkpoint["inputs"])
+    finally:
+        db.close()
+    logger.info(f"[{generation_id}] Resuming generation after stages: {', '.join(checkpoint.get('stages', {})) or 'none'}")
+    await process_generation(**run_inputs)
+
+
+# Resume tasks started at boot (referenced so they are not garbage collected)
+_resume_tasks = set()
+
+
+async def resume_interrupted_generations() -> int:
+    """
+    Resume generations left pending/processing by a previous process.
+
+    Returns:
+        Number of generations resumed
+    """
+    db = SessionLocal()
+    try:
+        interrupted = db.query(Generation).filter(Generation.status.in_(["pending", "processing"])).all()
+        generation_ids = [
+            g.id for g in interrupted
+            if isinstance(g.pipeline_checkpoint, dict) and "inputs" in g.pipeline_checkpoint
+        ]
+    finally:
+        db.close()
+
+    for generation_id in generation_ids:
+        task = asyncio.create_task(resume_generation(generation_id))
+        _resume_tasks.add(task)
+        task.add_done_callback(_resume_tasks.discard)
+    if generation_ids:
+        logger.info(f"Resuming {len(generation_ids)} interrupted generation(s) from their checkpoints")
+    return len(generation_ids)
+
+
 @router.post("/generate", status_code=status.HTTP_202_ACCEPTED)
 async def create_generation(
     request: GenerateRequest,
@@ -1629,6 +1846,7 @@ async def create_generation(
         try:
             from app.db.models.uploaded_image import UploadedImage
             from app.db.models.product_image import ProductImageFolder
+            from app.services.media.image_ingest import resolve_model_input
             
             # Query product image and validate it belongs to current user
             product_image = db.query(UploadedImage).filter(
@@ -1663,8 +1881,11 @@ async def create_generation(
                     }
                 )
             
-            # Get the file path
-            product_image_path = product_image.file_path
+            # Send the model-input derivative (the scene 1 reference, the Stage 1 vision
+            # call and every image/video model downstream) instead of the full-size upload
+            product_image_path = str(
+                resolve_model_input(current_user.id, product_image.file_path, product_image.content_hash)
+            )
             logger.info(f"Loaded product image path: {product_image_path} for product_image_id: {request.product_image_id}")
             
         except HTTPException:
@@ -1738,6 +1959,7 @@ async def create_generation(
         request.advanced_image_quality_threshold or 30.0,  # Quality threshold
         request.advanced_image_num_variations or 4,  # Number of variations
         request.advanced_image_max_enhancement_iterations or 4,  # Max enhancement iterations
+        request.reference_topology or "chain",  # Consistency topology for reference/start/end images
     )
     logger.info(f"[{generation_id}] ✅ Background task added successfully")
     
@@ -2002,7 +2224,8 @@ async def get_generation_queue(
         Dict with active generations grouped by status, showing:
         - pending: Generations waiting to start
         - processing: Generations currently being processed
-        - Each generation shows: id, title, prompt preview, progress, current_step, created_at
+        - Each generation shows: id, title, prompt preview, progress, current_step, created_at,
+          and a live ETA (including the wait behind generations queued ahead)
     """
     # Get active generations for the user (limit to most recent for performance)
     active_generations = db.query(Generation).filter(
@@ -2010,6 +2233,10 @@ async def get_generation_queue(
         Generation.status.in_(["pending", "processing"])
     ).order_by(Generation.created_at.desc()).limit(limit).all()
     
+    # Live ETAs need the queue ahead of these generations (all users)
+    pending_created = [gen.created_at for gen in active_generations if gen.status == "pending" and gen.created_at]
+    etas = estimate_queue_etas(_load_queue_ahead(db, max(pending_created, default=None)))
+    
     # Group by status
     pending = []
     processing = []
@@ -2025,6 +2252,7 @@ async def get_generation_queue(
             "created_at": gen.created_at.isoformat() if gen.created_at else None,
             "num_scenes": gen.num_scenes,
             "generation_group_id": gen.generation_group_id,
+            "eta": etas.get(gen.id),
         }
         
         if gen.status == "pending":
@@ -2286,6 +2514,15 @@ async def get_generation_status(
     if generation.scene_plan and isinstance(generation.scene_plan, dict):
         advanced_image_generation_used = generation.scene_plan.get('advanced_image_generation_used', False)
     
+    # Live ETA, counting the active generations (of all users) queued ahead of this one
+    eta = None
+    if generation.status == "processing":
+        # Running generations do not wait for a slot
+        eta = estimate_queue_etas([generation]).get(generation.id)
+    elif generation.status == "pending":
+        queue_ahead = _load_queue_ahead(db, generation.created_at or datetime.max)
+        eta = estimate_queue_etas(queue_ahead).get(generation.id)
+    
     return StatusResponse(
         generation_id=generation.id,
         status=generation.status,
@@ -2298,7 +2535,9 @@ async def get_generation_status(
         available_clips=available_clips,
         seed_value=generation.seed_value,
         storyboard_plan=storyboard_plan,
-        advanced_image_generation_used=advanced_image_generation_used
+        advanced_image_generation_used=advanced_image_generation_used,
+        upload_progress=get_upload_manager().get_progress(generation.id),
+        eta=eta
     )
 
 
@@ -2399,6 +2638,90 @@ async def cancel_generation(
     )
 
 
+@router.post("/generations/{generation_id}/retry", status_code=status.HTTP_202_ACCEPTED)
+async def retry_generation(
+    generation_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> StatusResponse:
+    """
+    Retry a failed generation from its last completed pipeline stage.
+    
+    Args:
+        generation_id: UUID of the generation
+        current_user: Authenticated user (from JWT)
+        db: Database session
+    
+    Returns:
+        StatusResponse with updated status
+    
+    Raises:
+        HTTPException: 404 if generation not found
+        HTTPException: 403 if user doesn't own the generation
+        HTTPException: 400 if generation is not failed or has no checkpoint to resume from
+    """
+    generation = db.query(Generation).filter(Generation.id == generation_id).first()
+    
+    if not generation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": {
+                    "code": "GENERATION_NOT_FOUND",
+                    "message": "Generation not found"
+                }
+            }
+        )
+    
+    if generation.user_id != current_user.id:
+        logger.warning(f"User {current_user.id} attempted to retry generation {generation_id} owned by {generation.user_id}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": {
+                    "code": "FORBIDDEN",
+                    "message": "You don't have permission to retry this generation"
+                }
+            }
+        )
+    
+    checkpoint = generation.pipeline_checkpoint
+    if generation.status != "failed" or not isinstance(checkpoint, dict) or "inputs" not in checkpoint:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": {
+                    "code": "CANNOT_RETRY",
+                    "message": f"Cannot retry generation with status '{generation.status}'"
+                    + ("" if checkpoint else " (no pipeline checkpoint)")
+                }
+            }
+        )
+    
+    generation.status = "processing"
+    generation.cancellation_requested = False
+    generation.error_message = None
+    db.commit()
+    background_tasks.add_task(resume_generation, generation_id)
+    
+    completed = len(checkpoint.get("stages", {}))
+    logger.info(f"User {current_user.id} retried generation {generation_id} ({completed} stages checkpointed)")
+    
+    return StatusResponse(
+        generation_id=generation.id,
+        status=generation.status,
+        progress=generation.progress,
+        current_step=generation.current_step,
+        video_url=generation.video_url,
+        cost=generation.cost,
+        error=generation.error_message,
+        num_scenes=generation.num_scenes,
+        available_clips=len(generation.temp_clip_paths) if generation.temp_clip_paths else 0,
+        seed_value=generation.seed_value
+    )
+
+
 @router.get("/comparison/{group_id}", response_model=ComparisonGroupResponse, status_code=status.HTTP_200_OK)
 async def get_comparison_group(
     group_id: str,
@@ -2739,6 +3062,7 @@ async def get_generations(
                 status=gen.status,
                 video_url=get_full_url(gen.video_url, skip_s3=skip_s3_urls),
                 thumbnail_url=get_full_url(gen.thumbnail_url, skip_s3=skip_s3_urls),
+                hls_url=get_full_url(_get_hls_master(gen), skip_s3=skip_s3_urls),
                 duration=gen.duration,
                 cost=gen.cost,
                 created_at=gen.created_at,
@@ -2895,6 +3219,7 @@ async def get_generation(
         status=generation.status,
         video_url=get_full_url(generation.video_url, skip_s3=skip_s3_urls),
         thumbnail_url=get_full_url(generation.thumbnail_url, skip_s3=skip_s3_urls),  # Fixed: was using video_url instead of thumbnail_url
+        hls_url=get_full_url(_get_hls_master(generation), skip_s3=skip_s3_urls),
         duration=generation.duration,
         cost=generation.cost,
         created_at=generation.created_at,
@@ -3000,6 +3325,67 @@ async def download_clip(
     )
 
 
+@router.get("/generations/{generation_id}/trace", status_code=status.HTTP_200_OK)
+async def get_generation_trace(
+    generation_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the trace of a generation's last pipeline run (debug view).
+    
+    Args:
+        generation_id: UUID of the generation
+        current_user: Authenticated user (from JWT)
+        db: Database session
+    
+    Returns:
+        Trace JSON: spans (stage, llm, prediction, encode, db, s3) with start
+        offsets, durations, parents and attributes, plus seconds per kind
+    
+    Raises:
+        HTTPException: 404 if the generation or its trace is not found
+        HTTPException: 403 if user doesn't own the generation
+    """
+    generation = db.query(Generation).filter(Generation.id == generation_id).first()
+    
+    if not generation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": {
+                    "code": "GENERATION_NOT_FOUND",
+                    "message": "Generation not found"
+                }
+            }
+        )
+    
+    if generation.user_id != current_user.id:
+        logger.warning(f"User {current_user.id} attempted to access trace for generation {generation_id} owned by {generation.user_id}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": {
+                    "code": "FORBIDDEN",
+                    "message": "You can only access traces of your own generations"
+                }
+            }
+        )
+    
+    trace_data = load_trace(generation_id)
+    if trace_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": {
+                    "code": "TRACE_NOT_FOUND",
+                    "message": "No trace recorded for this generation"
+                }
+            }
+        )
+    return trace_data
+
+
 @router.get("/generations/{generation_id}/quality", response_model=QualityMetricsResponse, status_code=status.HTTP_200_OK)
 async def get_generation_quality_metrics(
     generation_id: str,
@@ -3354,6 +3740,13 @@ async def process_single_clip_generation(
                 status="completed"
             )
             
+            # Precompute editor timeline media for the generated clips (off the event loop)
+            try:
+                await asyncio.to_thread(precompute_editor_media_in_session, generation_id)
+                db.refresh(generation)
+            except Exception as e:
+                logger.warning(f"[{generation_id}] Editor media precompute failed: {e}")
+            
             # Update total cost (single clip generation doesn't use LLM, so llm_cost=0)
             track_complete_generation_cost(
                 db=db,
@@ -30,6 +30,7 @@ from app.schemas.interactive import (
     ManualReferenceUploadResponse,
 )
 from app.services.pipeline.interactive_pipeline import get_orchestrator
+from app.services.pipeline.session_storage import SessionConflictError
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -140,7 +141,7 @@ async def get_session_status(
     logger.info(f"Getting session status: {session_id}")
 
     orchestrator = get_orchestrator()
-    session = await orchestrator.get_session(session_id)
+    session = await orchestrator.get_session(session_id, include_conversation=False)
 
     if not session:
         raise HTTPException(
@@ -197,6 +198,7 @@ async def approve_stage(
     - **404**: Session not found
     - **403**: Session belongs to different user
     - **400**: Stage mismatch (trying to approve wrong stage)
+    - **409**: Session was modified concurrently (e.g. parallel approve/regenerate)
     """
     logger.info(f"Approving stage '{request.stage}' for session {session_id}")
 
@@ -227,6 +229,11 @@ async def approve_stage(
 
         return StageApprovalResponse(**result)
 
+    except SessionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -271,6 +278,7 @@ async def regenerate_stage(
     - **404**: Session not found
     - **403**: Session belongs to different user
     - **400**: Stage mismatch or invalid modifications
+    - **409**: Session was modified concurrently (e.g. parallel approve/regenerate)
     """
     logger.info(f"Regenerating stage '{request.stage}' for session {session_id}")
     if request.feedback:
@@ -305,6 +313,11 @@ async def regenerate_stage(
 
         return RegenerateResponse(**result)
 
+    except SessionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,9 +1,9 @@
 """
 Master Mode API routes for simplified video generation.
 """
+import asyncio
 import logging
 import os
-import re
 import shutil
 import uuid
 from datetime import datetime
@@ -18,7 +18,11 @@ from app.db.models.user import User
 from app.db.models.generation import Generation
 from app.db.session import get_db
 from app.core.config import settings
+from app.core.tracing import span, start_trace
 from app.services.master_mode import convert_scenes_to_video_prompts, generate_and_stitch_videos
+from app.services.media.packaging import package_for_delivery
+from app.services.pipeline.text_analysis import analyze_prompt
+from app.services.storage.upload_manager import get_upload_manager
 from app.services.master_mode.streaming_wrapper import (
     generate_story_iterative_with_streaming,
     generate_scenes_with_streaming
@@ -51,25 +55,14 @@ def extract_target_duration_from_prompt(prompt: str) -> Optional[int]:
     Returns:
         Duration in seconds if found, None otherwise
     """
-    prompt_lower = prompt.lower()
-    
-    # Pattern 1: "X second(s)" or "X-second"
-    patterns = [
-        r'(\d+)\s*[-\s]?seconds?(?:\s+(?:video|ad|advertisement|commercial))?',
-        r'(\d+)s(?:\s+(?:video|ad|advertisement|commercial))?',
-        r'(?:video|ad|advertisement|commercial)\s+(?:of|with)?\s*(\d+)\s*seconds?',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, prompt_lower)
-        if match:
-            duration = int(match.group(1))
-            # Validate reasonable range (Veo 3.1 constraints: 12-60 seconds is practical)
-            if 12 <= duration <= 60:
-                logger.info(f"[Master Mode] Extracted target duration from prompt: {duration}s")
-                return duration
-            else:
-                logger.warning(f"[Master Mode] Found duration {duration}s in prompt but outside valid range (12-60s), using default")
+    # "X second(s)", "X-second", "Xs", "video of X seconds", in order of preference
+    for duration in analyze_prompt(prompt).duration_mentions:
+        # Validate reasonable range (Veo 3.1 constraints: 12-60 seconds is practical)
+        if 12 <= duration <= 60:
+            logger.info(f"[Master Mode] Extracted target duration from prompt: {duration}s")
+            return duration
+        else:
+            logger.warning(f"[Master Mode] Found duration {duration}s in prompt but outside valid range (12-60s), using default")
     
     return None
 
@@ -96,6 +89,7 @@ async def generate_story(
         # Generate unique ID for this generation (use client-provided ID if available)
         generation_id = client_generation_id or str(uuid.uuid4())
         start_time = datetime.utcnow()
+        active_trace = start_trace(generation_id, "master_mode")
         
         logger.info(f"[Master Mode] Story generation requested by user {current_user.id}, generation_id: {generation_id}")
         
@@ -168,14 +162,15 @@ async def generate_story(
         # Generate story iteratively with reference images
         await send_progress_update(generation_id, "story", "in_progress", 15, "Generating story with vision-enhanced AI...")
         
-        story_result: StoryGenerationResult = await generate_story_iterative_with_streaming(
-            user_prompt=prompt,
-            generation_id=generation_id,
-            max_iterations=max_iterations,
-            reference_image_paths=saved_image_paths if saved_image_paths else None,
-            brand_name=brand_name,
-            target_duration=target_duration  # Pass the extracted duration
-        )
+        with span("story", "stage"):
+            story_result: StoryGenerationResult = await generate_story_iterative_with_streaming(
+                user_prompt=prompt,
+                generation_id=generation_id,
+                max_iterations=max_iterations,
+                reference_image_paths=saved_image_paths if saved_image_paths else None,
+                brand_name=brand_name,
+                target_duration=target_duration  # Pass the extracted duration
+            )
         
         await send_progress_update(generation_id, "story", "completed", 30, f"Story generated (score: {story_result.final_score}/100)")
         
@@ -229,13 +224,14 @@ async def generate_story(
             if story_result.expected_scene_count:
                 logger.info(f"[Master Mode] Expected scene count: {story_result.expected_scene_count}")
             
-            scenes_result: ScenesGenerationResult = await generate_scenes_with_streaming(
-                story=story_result.final_story,
-                generation_id=generation_id,
-                max_iterations_per_scene=3,
-                max_cohesor_iterations=2,
-                expected_scene_count=story_result.expected_scene_count  # Pass expected scene count
-            )
+            with span("scenes", "stage"):
+                scenes_result: ScenesGenerationResult = await generate_scenes_with_streaming(
+                    story=story_result.final_story,
+                    generation_id=generation_id,
+                    max_iterations_per_scene=3,
+                    max_cohesor_iterations=2,
+                    expected_scene_count=story_result.expected_scene_count  # Pass expected scene count
+                )
             
             await send_progress_update(generation_id, "scenes", "completed", 55, f"Generated {scenes_result.total_scenes} scenes (cohesion: {scenes_result.cohesion_score}/100)")
             
@@ -319,15 +315,32 @@ async def generate_story(
                 video_output_dir = temp_dir / "scene_videos"
                 final_output_path = temp_dir / f"final_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
                 
+                # In S3 mode, each scene video starts uploading as soon as it is generated
+                base_s3_prefix = f"master_mode/{current_user.id}/{generation_id}"
+                upload_manager = get_upload_manager()
+                scene_uploads = {}
+                
+                def start_scene_upload(scene_path: str) -> None:
+                    if settings.STORAGE_MODE == "s3":
+                        scene_name = Path(scene_path).name
+                        scene_uploads[scene_name] = upload_manager.submit(
+                            scene_path,
+                            f"{base_s3_prefix}/scene_videos/{scene_name}",
+                            content_type="video/mp4",
+                            generation_id=generation_id
+                        )
+                
                 # Generate and stitch videos
-                final_video_path = await generate_and_stitch_videos(
-                    video_params_list=video_params_list,
-                    cohesion_analysis=scenes_result.cohesion_analysis.model_dump(),
-                    output_dir=video_output_dir,
-                    final_output_path=final_output_path,
-                    generation_id=generation_id,
-                    max_parallel=4
-                )
+                with span("videos", "stage"):
+                    final_video_path = await generate_and_stitch_videos(
+                        video_params_list=video_params_list,
+                        cohesion_analysis=scenes_result.cohesion_analysis.model_dump(),
+                        output_dir=video_output_dir,
+                        final_output_path=final_output_path,
+                        generation_id=generation_id,
+                        max_parallel=4,
+                        on_video_ready=start_scene_upload
+                    )
                 
                 if final_video_path:
                     logger.info(f"[Master Mode] Final video created: {final_video_path}")
@@ -372,6 +385,22 @@ async def generate_story(
                         [p for p in video_output_dir.glob("scene_*.mp4") if p.is_file()],
                         key=lambda p: p.name
                     )
+
+                    # Delivery packaging before upload: fast-start remux, poster, optional HLS ladder
+                    delivery = None
+                    delivery_dir = Path(final_video_path).parent / "delivery"
+                    try:
+                        delivery = await asyncio.to_thread(
+                            package_for_delivery,
+                            video_path=str(final_video_path),
+                            output_dir=str(delivery_dir),
+                            storage_prefix=path_to_url(str(delivery_dir)),
+                            s3_prefix=f"{base_s3_prefix}/delivery",
+                            generation_id=generation_id,
+                        )
+                    except Exception as e:
+                        logger.warning(f"[Master Mode] Delivery packaging failed, serving the MP4 only: {e}")
+
                     final_video_url = path_to_url(final_video_path)
                     scene_video_urls = [path_to_url(path) for path in scene_local_paths]
 
@@ -382,11 +411,12 @@ async def generate_story(
                         try:
                             from app.services.storage.s3_storage import get_s3_storage
                             s3_storage = get_s3_storage()
-                            base_s3_prefix = f"master_mode/{current_user.id}/{generation_id}"
 
                             final_s3_key = f"{base_s3_prefix}/{Path(final_video_path).name}"
                             try:
-                                s3_storage.upload_file(final_video_path, final_s3_key, content_type="video/mp4")
+                                await upload_manager.upload(
+                                    final_video_path, final_s3_key, content_type="video/mp4", generation_id=generation_id
+                                )
                                 storage_final_video_path = final_s3_key
                                 final_video_url = s3_storage.generate_presigned_url(final_s3_key, expiration=86400)
                                 try:
@@ -401,7 +431,10 @@ async def generate_story(
                             for scene_path in scene_local_paths:
                                 scene_s3_key = f"{base_s3_prefix}/scene_videos/{scene_path.name}"
                                 try:
-                                    s3_storage.upload_file(str(scene_path), scene_s3_key, content_type="video/mp4")
+                                    scene_upload = scene_uploads.get(scene_path.name) or upload_manager.submit(
+                                        str(scene_path), scene_s3_key, content_type="video/mp4", generation_id=generation_id
+                                    )
+                                    await asyncio.wrap_future(scene_upload)
                                     storage_scene_paths.append(scene_s3_key)
                                     scene_video_urls.append(
                                         s3_storage.generate_presigned_url(scene_s3_key, expiration=86400)
@@ -435,6 +468,10 @@ async def generate_story(
                     db_generation.video_path = storage_final_video_path
                     db_generation.video_url = storage_final_video_path
                     db_generation.temp_clip_paths = storage_scene_paths
+                    if delivery:
+                        delivery["mp4"] = storage_final_video_path
+                        db_generation.delivery = delivery
+                        db_generation.thumbnail_url = delivery["poster"]
                     db_generation.num_scenes = len(video_params_list)
                     db_generation.num_clips = len(video_params_list)
                     db_generation.status = "completed"
@@ -452,6 +489,7 @@ async def generate_story(
                         clear_conversation_history(generation_id)
                     
                     db.commit()
+                    upload_manager.clear_progress(generation_id)
                     logger.info(f"[Master Mode] Updated database record with video information")
                 else:
                     logger.error(f"[Master Mode] Video generation failed")
@@ -506,11 +544,14 @@ async def generate_story(
         
         await send_progress_update(generation_id, "complete", "completed", 100, "Generation complete!", completion_data)
         await close_progress_queue(generation_id)
+        active_trace.finish("ok")
         
         return response
         
     except Exception as e:
         logger.error(f"[Master Mode] Error generating story: {str(e)}", exc_info=True)
+        if 'active_trace' in locals():
+            active_trace.finish("error")
         
         # Update database record with error
         try:
@@ -18,10 +18,14 @@ from app.schemas.product_image import (
     ProductImageUploadResponse,
 )
 from app.schemas.brand_style import UploadedImageResponse
+from app.services.media.image_ingest import (
+    get_thumbnail_url,
+    ingest_uploaded_images,
+    remove_orphaned_derivatives,
+)
 from app.utils.storage import (
     MAX_IMAGES_PER_FOLDER,
     delete_user_folder,
-    save_uploaded_images,
     validate_folder_size,
     validate_image_count,
     validate_image_file,
@@ -125,9 +129,9 @@ async def upload_product_images(
                 logger.warning(f"Error deleting existing product folder: {e}")
 
         # Save uploaded images to disk
-        saved_paths = await save_uploaded_images(current_user.id, files, "products")
+        ingested_images = await ingest_uploaded_images(current_user.id, files, "products")
 
-        if not saved_paths:
+        if not ingested_images:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -141,31 +145,32 @@ async def upload_product_images(
         # Create ProductImageFolder record
         product_image_folder = ProductImageFolder(
             user_id=current_user.id,
-            image_count=len(saved_paths),
+            image_count=len(ingested_images),
         )
         db.add(product_image_folder)
         db.flush()  # Flush to get folder ID
 
         # Create UploadedImage records for each saved file
-        for saved_path in saved_paths:
-            file_path = Path(saved_path)
+        for ingested in ingested_images:
             uploaded_image = UploadedImage(
                 folder_id=product_image_folder.id,
                 folder_type="product",
-                filename=file_path.name,
-                file_path=saved_path,
-                file_size=file_path.stat().st_size if file_path.exists() else 0,
+                filename=ingested.path.name,
+                file_path=ingested.relative_path,
+                file_size=ingested.file_size,
+                content_hash=ingested.content_hash,
+                perceptual_hash=ingested.perceptual_hash,
             )
             db.add(uploaded_image)
 
         db.commit()
         db.refresh(product_image_folder)
 
-        logger.info(f"Product images uploaded successfully for user {current_user.id}: {len(saved_paths)} images")
+        logger.info(f"Product images uploaded successfully for user {current_user.id}: {len(ingested_images)} images")
 
         return ProductImageUploadResponse(
-            message=f"Product images uploaded successfully ({len(saved_paths)} images)",
-            count=len(saved_paths),
+            message=f"Product images uploaded successfully ({len(ingested_images)} images)",
+            count=len(ingested_images),
         )
 
     except HTTPException:
@@ -234,6 +239,7 @@ async def get_product_images(
                     id=image.id,
                     filename=actual_filename,  # Use actual filename that matches the saved file
                     url=image_url,
+                    thumbnail_url=get_thumbnail_url(current_user.id, image.content_hash),
                     uploaded_at=image.uploaded_at,
                 )
             )
@@ -291,6 +297,7 @@ async def delete_product_images(
         # Delete physical folder from disk
         try:
             delete_user_folder(current_user.id, "products")
+            remove_orphaned_derivatives(current_user.id)
         except Exception as e:
             logger.warning(f"Error deleting product folder from disk: {e}")
 
@@ -6,6 +6,9 @@ Handles bi-directional communication between frontend and backend:
 - Backend processes via ConversationHandler
 - Backend sends LLM responses and stage updates
 - Heartbeat/ping-pong for connection health
+
+Session messages are fanned out through a pub/sub backplane (Redis when
+configured), so any API worker can notify clients connected to another.
 """
 
 import asyncio
@@ -16,6 +19,7 @@ from datetime import datetime
 from typing import Dict, Set, Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from app.core.config import settings
 from app.schemas.interactive import (
     WSErrorMessage,
     WSFeedbackMessage,
@@ -25,6 +29,7 @@ from app.schemas.interactive import (
 )
 from app.services.pipeline.conversation_handler import get_conversation_handler
 from app.services.pipeline.interactive_pipeline import get_orchestrator
+from app.services.websocket_backplane import WebSocketBackplane, get_backplane
 
 logger = logging.getLogger(__name__)
 
@@ -53,29 +58,114 @@ ACK_MESSAGES = {
 # WebSocket Connection Manager
 # ============================================================================
 
+class _ConnectionSender:
+    """
+    Per-connection outbound queue drained by a dedicated writer task.
+
+    Producers never await the socket: a slow client only fills its own queue
+    and cannot delay other subscribers.
+    """
+
+    def __init__(self, websocket: WebSocket, session_id: str, queue_size: int):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, message_json: str) -> bool:
+        """Enqueue a message without blocking. Returns False if the queue is full."""
+        try:
+            self.queue.put_nowait(message_json)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
 class ConnectionManager:
     """
     Manages WebSocket connections for interactive pipeline sessions.
 
     Responsibilities:
-    - Track active connections per session
-    - Send messages to specific sessions
-    - Handle connection lifecycle (connect, disconnect, cleanup)
-    - Implement heartbeat for connection health
+    - Track active connections per session (local to this worker)
+    - Fan out session messages via the pub/sub backplane so every worker
+      holding a connection for the session delivers it
+    - Send through bounded per-connection queues; slow consumers are closed
+    - Send heartbeats to all connections from a single shared task
     """
 
-    def __init__(self, heartbeat_interval: int = 30):
+    def __init__(
+        self,
+        heartbeat_interval: int = 30,
+        backplane: Optional[WebSocketBackplane] = None,
+        send_queue_size: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+    ):
         """
         Initialize connection manager.
 
         Args:
             heartbeat_interval: Heartbeat interval in seconds
+            backplane: Pub/sub backplane (default: from get_backplane())
+            send_queue_size: Max queued messages per connection before it is closed
+            send_timeout: Max seconds a single send may take before the connection is closed
         """
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         self.heartbeat_interval = heartbeat_interval
-        self.heartbeat_tasks: Dict[str, asyncio.Task] = {}
+        self.send_queue_size = send_queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.send_timeout = send_timeout or settings.WS_SEND_TIMEOUT_SECONDS
+        self._backplane = backplane
+        self._backplane_started = False
+        self._backplane_lock: Optional[asyncio.Lock] = None
+        # Serializes backplane subscribe/unsubscribe so a reconnect cannot be
+        # overtaken by the unsubscribe of the connection it replaces
+        self._subscription_lock: Optional[asyncio.Lock] = None
+        self._subscribed: Set[str] = set()
+        self._senders: Dict[int, _ConnectionSender] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
         logger.info(f"ConnectionManager initialized (heartbeat: {heartbeat_interval}s)")
 
+    async def _ensure_backplane(self) -> WebSocketBackplane:
+        """Start the backplane on first use."""
+        if self._backplane_started:
+            return self._backplane
+        if self._backplane_lock is None:
+            self._backplane_lock = asyncio.Lock()
+        async with self._backplane_lock:
+            if not self._backplane_started:
+                if self._backplane is None:
+                    self._backplane = get_backplane()
+                await self._backplane.start(self._deliver_local)
+                self._backplane_started = True
+        return self._backplane
+
+    async def _subscribe(self, session_id: str) -> None:
+        """Subscribe this worker to a session's messages (no-op if already subscribed)."""
+        if self._subscription_lock is None:
+            self._subscription_lock = asyncio.Lock()
+        backplane = await self._ensure_backplane()
+        async with self._subscription_lock:
+            if session_id not in self._subscribed:
+                await backplane.subscribe(session_id)
+                self._subscribed.add(session_id)
+
+    async def _unsubscribe_if_unused(self, session_id: str) -> None:
+        """Unsubscribe from a session unless a client has reconnected to it meanwhile."""
+        async with self._subscription_lock:
+            if session_id in self.active_connections or session_id not in self._subscribed:
+                return
+            self._subscribed.discard(session_id)
+            try:
+                await self._backplane.unsubscribe(session_id)
+            except Exception as e:
+                logger.warning(f"WebSocket backplane unsubscribe failed for session {session_id}: {e}")
+
+    def _spawn(self, coro) -> None:
+        """Run a coroutine in the background, keeping a reference until done."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
     async def connect(self, websocket: WebSocket, session_id: str):
         """
         Accept new WebSocket connection.
@@ -85,17 +175,23 @@ class ConnectionManager:
             session_id: Pipeline session ID
         """
         await websocket.accept()
+        self.active_connections.setdefault(session_id, set()).add(websocket)
 
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = set()
+        try:
+            await self._subscribe(session_id)
+        except Exception as e:
+            # Same fallback as _publish: messages published by this worker still reach the client
+            logger.error(f"WebSocket backplane subscribe failed, delivering locally only: {e}")
 
-        self.active_connections[session_id].add(websocket)
+        sender = _ConnectionSender(websocket, session_id, self.send_queue_size)
+        sender.task = asyncio.create_task(self._sender_loop(sender))
+        self._senders[id(websocket)] = sender
 
         logger.info(f"✅ WebSocket connected: session={session_id}, total={len(self.active_connections[session_id])}")
 
-        # Start heartbeat for this connection
-        heartbeat_task = asyncio.create_task(self._heartbeat_loop(websocket, session_id))
-        self.heartbeat_tasks[id(websocket)] = heartbeat_task
+        # Start shared heartbeat if this is the first connection
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
     def disconnect(self, websocket: WebSocket, session_id: str):
         """
@@ -110,67 +206,130 @@ class ConnectionManager:
 
             if not self.active_connections[session_id]:
                 del self.active_connections[session_id]
+                if session_id in self._subscribed:
+                    self._spawn(self._unsubscribe_if_unused(session_id))
+
+        # Stop this connection's writer
+        sender = self._senders.pop(id(websocket), None)
+        if sender is not None and sender.task is not None and sender.task is not asyncio.current_task():
+            sender.task.cancel()
 
-        # Cancel heartbeat task
-        task_id = id(websocket)
-        if task_id in self.heartbeat_tasks:
-            self.heartbeat_tasks[task_id].cancel()
-            del self.heartbeat_tasks[task_id]
+        if not self._senders and self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
 
         logger.info(f"❌ WebSocket disconnected: session={session_id}")
 
+    async def close(self):
+        """Stop heartbeats, writers and the backplane (application shutdown)."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        for sender in list(self._senders.values()):
+            if sender.task is not None:
+                sender.task.cancel()
+        self._senders.clear()
+        self.active_connections.clear()
+        self._subscribed.clear()
+        if self._backplane_started:
+            await self._backplane.close()
+            self._backplane_started = False
+
     async def send_message(self, session_id: str, message: dict):
         """
-        Send message to all connections for a session.
+        Send message to all connections for a session, on any worker.
 
         Args:
             session_id: Pipeline session ID
             message: Message dict to send
         """
-        if session_id not in self.active_connections:
-            logger.warning(f"No active connections for session {session_id}")
-            return
-
-        message_json = json.dumps(message, default=str)
-        dead_connections = set()
+        await self._publish(session_id, json.dumps(message, default=str))
 
-        for websocket in list(self.active_connections[session_id]):
-            try:
-                await websocket.send_text(message_json)
-            except Exception as e:
-                logger.error(f"Failed to send message: {e}")
-                dead_connections.add(websocket)
+    async def broadcast(self, message: dict):
+        """Broadcast message to all active connections on all workers."""
+        await self._publish(None, json.dumps(message, default=str))
 
-        # Cleanup dead connections
-        for websocket in dead_connections:
-            self.disconnect(websocket, session_id)
+    async def _publish(self, session_id: Optional[str], message_json: str):
+        """
+        Publish through the backplane; sends stay fire-and-forget for callers.
 
-    async def broadcast(self, message: dict):
-        """Broadcast message to all active connections."""
-        for session_id in list(self.active_connections.keys()):
-            await self.send_message(session_id, message)
+        If the backplane fails (Redis down, timeout), the message is delivered
+        to this worker's connections only.
+        """
+        try:
+            backplane = await self._ensure_backplane()
+            await backplane.publish(session_id, message_json)
+        except Exception as e:
+            logger.error(f"WebSocket backplane publish failed, delivering locally only: {e}")
+            self._deliver_local(session_id, message_json)
 
-    async def _heartbeat_loop(self, websocket: WebSocket, session_id: str):
+    def _deliver_local(self, session_id: Optional[str], message_json: str):
         """
-        Send periodic heartbeats to maintain connection.
+        Enqueue a backplane message for this worker's connections (non-blocking).
 
         Args:
-            websocket: WebSocket connection
-            session_id: Session ID
+            session_id: Target session, or None for a broadcast
+            message_json: Serialized message
         """
+        if session_id is None:
+            websockets = [ws for conns in self.active_connections.values() for ws in conns]
+        else:
+            websockets = list(self.active_connections.get(session_id, ()))
+            if not websockets:
+                logger.debug(f"No local connections for session {session_id}")
+                return
+
+        for websocket in websockets:
+            sender = self._senders.get(id(websocket))
+            if sender is not None and not sender.offer(message_json):
+                self._drop_slow_consumer(sender)
+
+    def _drop_slow_consumer(self, sender: _ConnectionSender):
+        """Close a connection whose outbound queue is full."""
+        logger.warning(
+            f"Closing slow WebSocket consumer: session={sender.session_id}, "
+            f"queued={sender.queue.qsize()}"
+        )
+        self.disconnect(sender.websocket, sender.session_id)
+        self._spawn(self._close_quietly(sender.websocket, code=1013, reason="Consumer too slow"))
+
+    async def _close_quietly(self, websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    async def _sender_loop(self, sender: _ConnectionSender):
+        """Drain a connection's queue to its socket."""
+        try:
+            while True:
+                message_json = await sender.queue.get()
+                await asyncio.wait_for(
+                    sender.websocket.send_text(message_json), timeout=self.send_timeout
+                )
+        except asyncio.CancelledError:
+            pass  # Task cancelled on disconnect
+        except Exception as e:
+            logger.error(f"Failed to send message: session={sender.session_id}: {e}")
+            self.disconnect(sender.websocket, sender.session_id)
+            await self._close_quietly(sender.websocket, code=1011, reason="Send failed")
+
+    async def _heartbeat_loop(self):
+        """Send periodic heartbeats to all local connections (one shared task)."""
         try:
             while True:
                 await asyncio.sleep(self.heartbeat_interval)
 
-                heartbeat = WSHeartbeatMessage()
                 # Use mode='json' to ensure datetime is serialized to ISO string
-                await websocket.send_json(heartbeat.model_dump(mode='json'))
+                heartbeat_json = json.dumps(WSHeartbeatMessage().model_dump(mode='json'))
+
+                # Heartbeats are droppable: a full queue already means the
+                # client is behind and will be closed by the next real message.
+                for sender in list(self._senders.values()):
+                    sender.offer(heartbeat_json)
 
         except asyncio.CancelledError:
-            pass  # Task cancelled on disconnect
-        except Exception as e:
-            logger.error(f"Heartbeat failed for session {session_id}: {e}")
-            self.disconnect(websocket, session_id)
+            pass  # Task cancelled when the last connection closes
 
 
 # Global connection manager
@@ -64,6 +64,13 @@ class Settings:
     # Storage mode: 'local' for local disk, 's3' for S3 storage
     STORAGE_MODE: str = os.getenv("STORAGE_MODE", "local")
     
+    # S3 transfers: multipart part size/threshold, parallel parts per file, files uploading at once
+    S3_MULTIPART_THRESHOLD_MB: int = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16"))
+    S3_MULTIPART_CHUNK_MB: int = int(os.getenv("S3_MULTIPART_CHUNK_MB", "16"))
+    S3_MAX_CONCURRENCY: int = int(os.getenv("S3_MAX_CONCURRENCY", "8"))
+    S3_UPLOAD_WORKERS: int = int(os.getenv("S3_UPLOAD_WORKERS", "4"))
+    S3_VERIFY_ETAG: bool = os.getenv("S3_VERIFY_ETAG", "true").lower() == "true"
+    
     # Quality control thresholds (VBench metrics)
     QUALITY_THRESHOLD_TEMPORAL: float = float(os.getenv("QUALITY_THRESHOLD_TEMPORAL", "70.0"))
     QUALITY_THRESHOLD_FRAME_WISE: float = float(os.getenv("QUALITY_THRESHOLD_FRAME_WISE", "70.0"))
@@ -78,5 +85,98 @@ class Settings:
     # Redis configuration (for session storage)
     REDIS_URL: Optional[str] = os.getenv("REDIS_URL")  # e.g., "redis://localhost:6379/0"
 
+    # Interactive session expiry (PostgreSQL session storage background cleanup)
+    SESSION_CLEANUP_INTERVAL_SECONDS: int = int(os.getenv("SESSION_CLEANUP_INTERVAL_SECONDS", "300"))
+    SESSION_CLEANUP_BATCH_SIZE: int = int(os.getenv("SESSION_CLEANUP_BATCH_SIZE", "500"))
+
+    # WebSocket fan-out (slow consumers are closed when their queue fills)
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+    WS_SEND_TIMEOUT_SECONDS: float = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+
+    # Editor export: re-encode partial GOPs at trim boundaries (False = snap cuts to keyframes)
+    EDITOR_FRAME_ACCURATE_CUTS: bool = os.getenv("EDITOR_FRAME_ACCURATE_CUTS", "true").lower() == "true"
+
+    # Editor processed-clip cache (reused across exports and previews; LRU-evicted by size)
+    EDITOR_CLIP_CACHE_DIR: str = os.getenv(
+        "EDITOR_CLIP_CACHE_DIR", str(BACKEND_DIR / "output" / "editor_cache")
+    )
+    EDITOR_CLIP_CACHE_MAX_MB: int = int(os.getenv("EDITOR_CLIP_CACHE_MAX_MB", "2048"))
+
+    # Precomputed editor timeline media (proxies, sprite sheets, waveforms); under the /output mount
+    EDITOR_MEDIA_DIR: str = os.getenv("EDITOR_MEDIA_DIR", "output/editor_media")
+
+    # Decoded PCM and metadata for the indexed music/SFX library
+    AUDIO_CACHE_DIR: str = os.getenv("AUDIO_CACHE_DIR", str(BACKEND_DIR / "output" / "audio_cache"))
+
+    # Memoized media probes (stream metadata, keyframes), kept in the user cache directory rather than the
+    # source tree; at most MEDIA_PROBE_CONCURRENCY probes run at once
+    MEDIA_PROBE_CACHE_DIR: str = os.getenv(
+        "MEDIA_PROBE_CACHE_DIR",
+        str(Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "ad-mint-ai" / "probe_cache"),
+    )
+    MEDIA_PROBE_CONCURRENCY: int = int(os.getenv("MEDIA_PROBE_CONCURRENCY", "4"))
+
+    # Delivery packaging of finished ads: poster + optional HLS ladder (360p/720p/1080p) under the /output mount
+    DELIVERY_DIR: str = os.getenv("DELIVERY_DIR", "output/delivery")
+    DELIVERY_HLS_ENABLED: bool = os.getenv("DELIVERY_HLS_ENABLED", "false").lower() == "true"
+    DELIVERY_HLS_SEGMENT_SECONDS: int = int(os.getenv("DELIVERY_HLS_SEGMENT_SECONDS", "4"))
+
+    # Storage janitor: retention per artifact class (hours since last write; <= 0 disables the class)
+    JANITOR_INTERVAL_SECONDS: int = int(os.getenv("JANITOR_INTERVAL_SECONDS", "900"))
+    JANITOR_GENERATION_TEMP_HOURS: float = float(os.getenv("JANITOR_GENERATION_TEMP_HOURS", "24"))
+    JANITOR_CLIP_CACHE_HOURS: float = float(os.getenv("JANITOR_CLIP_CACHE_HOURS", "72"))
+    JANITOR_INTERACTIVE_HOURS: float = float(os.getenv("JANITOR_INTERACTIVE_HOURS", "168"))
+    JANITOR_MASTER_MODE_HOURS: float = float(os.getenv("JANITOR_MASTER_MODE_HOURS", "168"))
+    JANITOR_EXPORT_TMP_HOURS: float = float(os.getenv("JANITOR_EXPORT_TMP_HOURS", "6"))
+    JANITOR_EDITOR_CACHE_HOURS: float = float(os.getenv("JANITOR_EDITOR_CACHE_HOURS", "168"))
+    JANITOR_PROBE_CACHE_HOURS: float = float(os.getenv("JANITOR_PROBE_CACHE_HOURS", "720"))
+    JANITOR_AUDIO_CACHE_HOURS: float = float(os.getenv("JANITOR_AUDIO_CACHE_HOURS", "720"))
+    JANITOR_TRACE_HOURS: float = float(os.getenv("JANITOR_TRACE_HOURS", "720"))
+    # Delivery packages are only collected in S3 storage mode (locally they are the served ads)
+    JANITOR_DELIVERY_HOURS: float = float(os.getenv("JANITOR_DELIVERY_HOURS", "168"))
+    # Above the high-water mark (% of the output disk), least recently written artifacts are evicted down to the low-water mark
+    JANITOR_HIGH_WATER_PERCENT: float = float(os.getenv("JANITOR_HIGH_WATER_PERCENT", "90"))
+    JANITOR_LOW_WATER_PERCENT: float = float(os.getenv("JANITOR_LOW_WATER_PERCENT", "80"))
+    JANITOR_DELETE_BATCH: int = int(os.getenv("JANITOR_DELETE_BATCH", "50"))
+
+    # Resume generations interrupted by a restart from their last completed stage (disable when several
+    # API workers share the database, or each of them would resume the same generations)
+    PIPELINE_RESUME_ON_STARTUP: bool = os.getenv("PIPELINE_RESUME_ON_STARTUP", "true").lower() == "true"
+
+    # Provider calls in flight across all interactive sessions: storyboard frame images and video clips
+    STORYBOARD_CLIP_CONCURRENCY: int = int(os.getenv("STORYBOARD_CLIP_CONCURRENCY", "3"))
+    VIDEO_CLIP_CONCURRENCY: int = int(os.getenv("VIDEO_CLIP_CONCURRENCY", "2"))
+
+    # Recorded stage timings behind generation ETAs; slots = generations the providers work through at once
+    STAGE_TIMING_PATH: str = os.getenv("STAGE_TIMING_PATH", str(BACKEND_DIR / "output" / "stage_timings.json"))
+    GENERATION_ETA_SLOTS: int = int(os.getenv("GENERATION_ETA_SLOTS", "4"))
+
+    # Per-generation trace JSON (spans of stages, LLM calls, predictions, encodes, DB writes, uploads); empty disables
+    TRACE_DIR: str = os.getenv("TRACE_DIR", str(BACKEND_DIR / "output" / "traces"))
+
+    # Shared image-scoring service (warm CLIP/PickScore/aesthetic models, micro-batched requests) on a Unix
+    # socket; empty scores in-process. A batch closes at SCORING_BATCH_SIZE requests or after SCORING_BATCH_WAIT_MS
+    SCORING_SERVICE_SOCKET: str = os.getenv("SCORING_SERVICE_SOCKET", "")
+    SCORING_BATCH_SIZE: int = int(os.getenv("SCORING_BATCH_SIZE", "16"))
+    SCORING_BATCH_WAIT_MS: float = float(os.getenv("SCORING_BATCH_WAIT_MS", "10"))
+    SCORING_SERVICE_TIMEOUT_SECONDS: float = float(os.getenv("SCORING_SERVICE_TIMEOUT_SECONDS", "120"))
+
+    # Image-scorer runtime: "auto" (quantized ONNX Runtime on CPU-only hosts with onnxruntime installed and
+    # real calibration images in SCORING_CALIBRATION_DIR), "onnx" or "torch". Quantized scorers are used only
+    # within SCORING_ONNX_TOLERANCE points of PyTorch on the calibration images (empty dir: synthetic, onnx only)
+    SCORING_RUNTIME: str = os.getenv("SCORING_RUNTIME", "auto")
+    SCORING_ONNX_DIR: str = os.getenv("SCORING_ONNX_DIR", str(BACKEND_DIR / "output" / "onnx_scorers"))
+    SCORING_ONNX_TOLERANCE: float = float(os.getenv("SCORING_ONNX_TOLERANCE", "2.0"))
+    SCORING_CALIBRATION_DIR: str = os.getenv("SCORING_CALIBRATION_DIR", "")
+
+    # Worker processes of the shared media pool (overlays, editor export, video scoring); 0 = one per CPU, 1 = inline
+    MEDIA_POOL_WORKERS: int = int(os.getenv("MEDIA_POOL_WORKERS", "0"))
+
+    # Video quality scoring runs in the shared media pool; evaluations running in it at once,
+    # 0 = no limit of its own (up to every media pool worker), 1 = in a thread.
+    # Clips are decoded once, downscaled to VIDEO_SCORING_MAX_SIDE pixels on the long side (0 = full resolution)
+    VIDEO_SCORING_WORKERS: int = int(os.getenv("VIDEO_SCORING_WORKERS", "0"))
+    VIDEO_SCORING_MAX_SIDE: int = int(os.getenv("VIDEO_SCORING_MAX_SIDE", "640"))
+
 settings = Settings()
 
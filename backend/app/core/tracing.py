@@ -0,0 +1,400 @@
+"""
+Per-stage tracing and metrics.
+
+Instrumented operations (pipeline stages, LLM calls, provider predictions,
+media encodes, DB writes, S3 uploads) are recorded as spans:
+
+- Every span is observed in the span_seconds histogram, labelled with
+  pipeline, kind, name, model and status. The histogram is exported in the
+  Prometheus text format at /metrics.
+- Spans opened while a trace is active (one per generation or session) are
+  also collected into the trace. When the trace finishes, it is written as
+  JSON under TRACE_DIR for the generation debug view.
+
+The active trace and parent span are held in context variables, so they
+follow the work into asyncio tasks and asyncio.to_thread calls started inside
+the trace. Work handed to a thread or process pool directly (S3 upload
+workers, media pool) still feeds the histograms, but is not attached to the
+trace.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the histogram buckets; spans range from DB writes to multi-minute renders
+SPAN_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# Spans kept per trace; later ones still feed the histograms
+MAX_TRACE_SPANS = 5000
+
+SPAN_LABELS = ("pipeline", "kind", "name", "model", "status")
+
+
+class Histogram:
+    """Cumulative histogram with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(label) or "") for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted(self._series.items())
+            for key, series in series_items:
+                labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key))
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-2]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+                lines.append(f"{self.name}_count{{{labels}}} {series[-2]}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+span_seconds = Histogram(
+    "admint_span_seconds",
+    "Duration of instrumented pipeline operations in seconds",
+    SPAN_LABELS,
+    SPAN_BUCKETS,
+)
+
+
+class Trace:
+    """Spans of one generation or session run."""
+
+    def __init__(self, trace_id: str, pipeline: str, model: Optional[str] = None):
+        self.trace_id = trace_id
+        self.pipeline = pipeline
+        self.model = model
+        self.spans: List[Dict[str, Any]] = []
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+        self._token = None
+        self.status: Optional[str] = None
+
+    def offset(self) -> float:
+        """Seconds since the trace started."""
+        return time.perf_counter() - self._started
+
+    def add(self, span: Dict[str, Any]) -> None:
+        if len(self.spans) < MAX_TRACE_SPANS:
+            self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span["kind"]] = round(totals.get(span["kind"], 0.0) + span["seconds"], 3)
+        return {
+            "trace_id": self.trace_id,
+            "pipeline": self.pipeline,
+            "model": self.model,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "seconds": round(self.offset(), 3),
+            "seconds_by_kind": totals,  # summed span time, overlapping spans counted in full
+            "spans": sorted(self.spans, key=lambda span: span["start"]),
+        }
+
+    def finish(self, status: str = "ok") -> None:
+        """Detach the trace from the current context and write it under TRACE_DIR."""
+        self.status = status
+        if self._token is not None:
+            try:
+                _current_trace.reset(self._token)
+            except ValueError:
+                # Finished from another context than the one that started it
+                _current_trace.set(None)
+            self._token = None
+        save_trace(self)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_trace(trace_id: str, pipeline: str, model: Optional[str] = None) -> Trace:
+    """
+    Start collecting spans of the current context into a new trace.
+
+    Call finish() on the returned trace when the run ends (or use trace()).
+    """
+    active = Trace(trace_id, pipeline, model)
+    active._token = _current_trace.set(active)
+    return active
+
+
+@contextmanager
+def trace(trace_id: str, pipeline: str, model: Optional[str] = None) -> Iterator[Trace]:
+    """Collect the spans of the enclosed block into a trace saved on exit."""
+    active = start_trace(trace_id, pipeline, model)
+    try:
+        yield active
+    except BaseException:
+        active.finish("error")
+        raise
+    active.finish("ok")
+
+
+def _trace_path(trace_id: str) -> Optional[Path]:
+    if not settings.TRACE_DIR:
+        return None
+    safe_id = "".join(ch for ch in trace_id if ch.isalnum() or ch in "-_")
+    return Path(settings.TRACE_DIR) / f"{safe_id}.json" if safe_id else None
+
+
+def save_trace(active: Trace) -> None:
+    path = _trace_path(active.trace_id)
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+        temp_path.write_text(json.dumps(active.to_dict(), default=str))
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.debug(f"Could not write trace {active.trace_id}: {e}")
+
+
+def load_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    """Saved trace JSON of a generation or session, or None."""
+    path = _trace_path(trace_id)
+    if path is None or not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def record_span(
+    name: str,
+    kind: str,
+    seconds: float,
+    model: Optional[str] = None,
+    status: str = "ok",
+    start: Optional[float] = None,
+    **attributes: Any,
+) -> None:
+    """
+    Record an operation whose duration is already known.
+
+    Args:
+        name: Operation name (e.g. stage name, "video.run")
+        kind: Category: stage, llm, prediction, encode, db, s3
+        seconds: Duration
+        model: Model label (defaults to the active trace's model)
+        status: "ok" or "error"
+        start: Start offset within the active trace (defaults to now - seconds)
+        **attributes: Extra fields stored with the span in the trace
+    """
+    active = _current_trace.get()
+    model = model or (active.model if active else None)
+    span_seconds.observe(
+        seconds, pipeline=active.pipeline if active else None, kind=kind, name=name, model=model, status=status
+    )
+    if active is not None:
+        active.add({
+            "id": uuid.uuid4().hex[:12],
+            "parent": _current_span.get(),
+            "name": name,
+            "kind": kind,
+            "model": model,
+            "status": status,
+            "start": round(start if start is not None else max(0.0, active.offset() - seconds), 3),
+            "seconds": round(seconds, 3),
+            "attributes": attributes,
+        })
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", model: Optional[str] = None, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed block as one span; nested spans become its children.
+
+    Yields the span's attribute dict, so the block can add fields (token
+    counts, sizes) before it ends.
+    """
+    active = _current_trace.get()
+    span_id = uuid.uuid4().hex[:12]
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    start = active.offset() if active else 0.0
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException as e:
+        status = "error"
+        attributes.setdefault("error", f"{type(e).__name__}: {e}"[:300])
+        raise
+    finally:
+        _current_span.reset(token)
+        seconds = time.perf_counter() - started
+        model = model or (active.model if active else None)
+        span_seconds.observe(
+            seconds, pipeline=active.pipeline if active else None, kind=kind, name=name, model=model, status=status
+        )
+        if active is not None:
+            active.add({
+                "id": span_id,
+                "parent": parent,
+                "name": name,
+                "kind": kind,
+                "model": model,
+                "status": status,
+                "start": round(start, 3),
+                "seconds": round(seconds, 3),
+                "attributes": attributes,
+            })
+
+
+def traced(kind: str, name: Optional[str] = None) -> Callable:
+    """Decorator: run each call of a sync or async function inside span(name or function name, kind)."""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def record_prediction(prediction: Any, model: Optional[str], name: str = "prediction") -> None:
+    """
+    Record the queue and run phases of a finished Replicate prediction.
+
+    Replicate stamps created_at (submitted), started_at (picked up by a
+    worker) and completed_at on the prediction. Queue time is created ->
+    started, run time is started -> completed. Downloads are timed separately
+    by the caller.
+
+    Args:
+        prediction: Prediction in a terminal state
+        model: Replicate model name
+        name: Prefix of the span names ("video" -> video.queue, video.run)
+    """
+    created = _parse_time(getattr(prediction, "created_at", None))
+    started = _parse_time(getattr(prediction, "started_at", None))
+    completed = _parse_time(getattr(prediction, "completed_at", None))
+    status = "ok" if getattr(prediction, "status", None) == "succeeded" else "error"
+    prediction_id = getattr(prediction, "id", None)
+    try:
+        if created and started:
+            record_span(f"{name}.queue", "prediction", max(0.0, (started - created).total_seconds()),
+                        model=model, prediction_id=prediction_id)
+        if started and completed:
+            record_span(f"{name}.run", "prediction", max(0.0, (completed - started).total_seconds()),
+                        model=model, status=status, prediction_id=prediction_id)
+    except TypeError:
+        # Mixed naive/aware timestamps; the phases are unknown
+        pass
+
+
+def instrument_llm_clients() -> None:
+    """
+    Time every OpenAI chat completion call, whichever module created the client.
+
+    Wraps the SDK's sync and async chat.completions.create once per process.
+    For streamed calls, the span ends when the stream opens.
+    """
+    try:
+        from openai.resources.chat import completions
+    except ImportError:
+        return
+
+    def record_usage(attributes: Dict[str, Any], response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            attributes["prompt_tokens"] = getattr(usage, "prompt_tokens", None)
+            attributes["completion_tokens"] = getattr(usage, "completion_tokens", None)
+
+    sync_create = completions.Completions.create
+    if not getattr(sync_create, "_traced", False):
+        @functools.wraps(sync_create)
+        def create(self, *args, **kwargs):
+            with span("chat.completions", "llm", model=kwargs.get("model"), stream=bool(kwargs.get("stream"))) as attributes:
+                response = sync_create(self, *args, **kwargs)
+                record_usage(attributes, response)
+                return response
+        create._traced = True
+        completions.Completions.create = create
+
+    async_create = completions.AsyncCompletions.create
+    if not getattr(async_create, "_traced", False):
+        @functools.wraps(async_create)
+        async def async_create_traced(self, *args, **kwargs):
+            with span("chat.completions", "llm", model=kwargs.get("model"), stream=bool(kwargs.get("stream"))) as attributes:
+                response = await async_create(self, *args, **kwargs)
+                record_usage(attributes, response)
+                return response
+        async_create_traced._traced = True
+        completions.AsyncCompletions.create = async_create_traced
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return span_seconds.render()
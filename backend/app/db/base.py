@@ -27,3 +27,41 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+
+# Shared async engine for async services (e.g. interactive session storage).
+# Created lazily so sync-only deployments and tests never need an async driver.
+_async_engine = None
+
+
+def get_async_engine():
+    """
+    Get the shared pooled async engine (created on first use).
+
+    Converts a sync PostgreSQL URL to the asyncpg driver.
+    """
+    global _async_engine
+
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        db_url = settings.DATABASE_URL
+        if db_url.startswith("postgresql://"):
+            db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+        _async_engine = create_async_engine(
+            db_url,
+            echo=settings.DEBUG,
+            pool_size=10,
+            max_overflow=10,
+            pool_pre_ping=True,
+        )
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close all pooled connections of the shared async engine."""
+    global _async_engine
+
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
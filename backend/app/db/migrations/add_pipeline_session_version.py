@@ -0,0 +1,87 @@
+"""
+Database migration script to add optimistic-concurrency and expiry support
+to the interactive pipeline session table.
+
+This migration adds to pipeline_sessions:
+- version: Integer field (not null, default 1) incremented on every save
+- ix_pipeline_sessions_expires_at: Index on expires_at for batched expiry
+
+The per-stage output and message tables are created by the session storage
+on startup and need no migration.
+
+Run this script to update existing databases:
+    python -m app.db.migrations.add_pipeline_session_version
+
+Note: pipeline_sessions only exists on PostgreSQL deployments (SQLite uses
+Redis or in-memory session storage), so this migration is a no-op on SQLite.
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.base import engine
+
+
+def run_migration():
+    """
+    Run migration to add version column and expires_at index.
+
+    This migration is idempotent - it can be run multiple times safely.
+    """
+    print("🔄 Starting migration: Add version and expires_at index to pipeline_sessions")
+
+    # Check database type
+    db_url = settings.DATABASE_URL
+    is_sqlite = db_url.startswith("sqlite")
+    is_postgres = "postgresql" in db_url or "postgres" in db_url
+
+    try:
+        if is_sqlite:
+            print("ℹ️  SQLite does not use pipeline_sessions, skipping")
+
+        elif is_postgres:
+            # PostgreSQL: use begin() for proper transaction handling (SQLAlchemy 2.0)
+            with engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT to_regclass('public.pipeline_sessions') IS NOT NULL"
+                )).scalar()
+                if not exists:
+                    print("ℹ️  pipeline_sessions table not created yet, skipping")
+                else:
+                    conn.execute(text(
+                        "ALTER TABLE pipeline_sessions "
+                        "ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1"
+                    ))
+                    print("✅ Added version column (or already exists)")
+                    conn.execute(text(
+                        "CREATE INDEX IF NOT EXISTS ix_pipeline_sessions_expires_at "
+                        "ON pipeline_sessions (expires_at)"
+                    ))
+                    print("✅ Added expires_at index (or already exists)")
+
+        else:
+            print(f"⚠️  Unknown database type: {db_url}")
+            print("Please run migration manually for your database")
+            return False
+
+        print("✅ Migration completed successfully")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    try:
+        success = run_migration()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Migration error: {e}")
+        sys.exit(1)
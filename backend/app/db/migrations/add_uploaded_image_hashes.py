@@ -0,0 +1,105 @@
+"""
+Database migration script to add content hashes to uploaded_images table.
+
+This migration adds:
+- content_hash: String(64) field (nullable, indexed) with the SHA-256 of the
+  original upload; keys the pre-generated derivatives under assets/users/{id}/derived/
+- perceptual_hash: String(16) field (nullable) with a 64-bit difference hash
+
+Run this script to update existing databases:
+    python -m app.db.migrations.add_uploaded_image_hashes
+
+Note: For SQLite, this uses ALTER TABLE ADD COLUMN.
+For PostgreSQL, this uses ALTER TABLE ADD COLUMN IF NOT EXISTS.
+Existing rows keep NULL hashes and fall back to their original files.
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db.base import engine
+
+
+def run_migration():
+    """
+    Run migration to add content_hash and perceptual_hash columns.
+    
+    This migration is idempotent - it can be run multiple times safely.
+    """
+    print("🔄 Starting migration: Add content hashes to uploaded_images table")
+    
+    # Check database type
+    db_url = settings.DATABASE_URL
+    is_sqlite = db_url.startswith("sqlite")
+    is_postgres = "postgresql" in db_url or "postgres" in db_url
+    
+    columns = [
+        ("content_hash", "VARCHAR(64)"),
+        ("perceptual_hash", "VARCHAR(16)"),
+    ]
+    
+    try:
+        if is_sqlite:
+            # SQLite: use connect() and manual commit
+            with engine.connect() as conn:
+                for column_name, column_type in columns:
+                    try:
+                        conn.execute(text(
+                            f"ALTER TABLE uploaded_images ADD COLUMN {column_name} {column_type}"
+                        ))
+                        print(f"✅ Added {column_name} column")
+                    except OperationalError as e:
+                        if "duplicate column name" in str(e).lower():
+                            print(f"ℹ️  {column_name} column already exists, skipping")
+                        else:
+                            raise
+                
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_uploaded_images_content_hash "
+                    "ON uploaded_images (content_hash)"
+                ))
+                print("✅ Created content_hash index (or already exists)")
+                conn.commit()
+        
+        elif is_postgres:
+            # PostgreSQL: use begin() for proper transaction handling (SQLAlchemy 2.0)
+            with engine.begin() as conn:
+                for column_name, column_type in columns:
+                    conn.execute(text(
+                        f"ALTER TABLE uploaded_images ADD COLUMN IF NOT EXISTS {column_name} {column_type}"
+                    ))
+                    print(f"✅ Added {column_name} column (or already exists)")
+                
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_uploaded_images_content_hash "
+                    "ON uploaded_images (content_hash)"
+                ))
+                print("✅ Created content_hash index (or already exists)")
+        
+        else:
+            print(f"⚠️  Unknown database type: {db_url}")
+            print("Please run migration manually for your database")
+            return False
+        
+        print("✅ Migration completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    try:
+        success = run_migration()
+        sys.exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Migration error: {e}")
+        sys.exit(1)
@@ -24,6 +24,11 @@ from app.db.migrations.add_generation_groups import run_migration as migrate_gro
 from app.db.migrations.add_coherence_settings import run_migration as migrate_coherence
 from app.db.migrations.create_editing_sessions_table import run_migration as migrate_editing_sessions
 from app.db.migrations.add_basic_settings_and_generation_time import run_migration as migrate_basic_settings
+from app.db.migrations.add_pipeline_session_version import run_migration as migrate_pipeline_session_version
+from app.db.migrations.add_uploaded_image_hashes import run_migration as migrate_uploaded_image_hashes
+from app.db.migrations.add_editor_media import run_migration as migrate_editor_media
+from app.db.migrations.add_delivery import run_migration as migrate_delivery
+from app.db.migrations.add_pipeline_checkpoint import run_migration as migrate_pipeline_checkpoint
 
 
 def run_all_migrations():
@@ -44,6 +49,11 @@ def run_all_migrations():
         ("Add coherence_settings", migrate_coherence),
         ("Add parent_generation_id to generations", migrate_parent_id),
         ("Add basic_settings and generation_time", migrate_basic_settings),
+        ("Add version and expires_at index to pipeline_sessions", migrate_pipeline_session_version),
+        ("Add content hashes to uploaded_images", migrate_uploaded_image_hashes),
+        ("Add editor_media to generations", migrate_editor_media),
+        ("Add delivery to generations", migrate_delivery),
+        ("Add pipeline_checkpoint to generations", migrate_pipeline_checkpoint),
     ]
     
     print("🔄 Starting database migrations...")
@@ -54,6 +54,9 @@ class Generation(Base):
     scene_plan = Column(JSON, nullable=True)  # Scene breakdown JSON (ScenePlan)
     llm_conversation_history = Column(JSON, nullable=True)  # Complete LLM conversation history for Master Mode
     temp_clip_paths = Column(JSON, nullable=True)  # Array of temp video clip file paths
+    editor_media = Column(JSON, nullable=True)  # Precomputed editor media per clip (proxy, sprite, waveform, probed duration)
+    delivery = Column(JSON, nullable=True)  # Delivery packaging manifest (faststart, poster, HLS renditions)
+    pipeline_checkpoint = Column(JSON, nullable=True)  # Stage-DAG checkpoints (run arguments, stage outputs, timings) for resume
     coherence_settings = Column(JSON, nullable=True)  # Coherence technique settings
     seed_value = Column(Integer, nullable=True)  # Seed value for visual consistency across scenes
     cancellation_requested = Column(Boolean, default=False)  # Cancellation flag
@@ -25,6 +25,8 @@ class UploadedImage(Base):
     filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer, nullable=False)  # Size in bytes
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the original; keys derived/ images
+    perceptual_hash = Column(String(16), nullable=True)  # 64-bit dHash for near-duplicate detection
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Product style extraction (only for product images)
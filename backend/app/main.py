@@ -1,13 +1,15 @@
 """
 FastAPI application entry point.
 """
+import asyncio
 import logging
+import shutil
 from datetime import datetime
 from pathlib import Path
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
@@ -27,10 +29,14 @@ from app.api.routes import (
 )
 from app.core.config import BACKEND_DIR, settings
 from app.core.logging import setup_logging
+from app.core.tracing import instrument_llm_clients, render_metrics
 
 # Setup structured logging
 setup_logging()
 
+# Time every OpenAI chat completion as an "llm" span, whichever pipeline makes it
+instrument_llm_clients()
+
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -188,15 +194,68 @@ logger.info(f"Master mode temp files mounted at /temp ({temp_dir})")
 @app.on_event("startup")
 async def startup_event():
     """Startup event."""
+    from app.services.pipeline.session_storage import init_session_storage
+    from app.api.routes.generations import resume_interrupted_generations
+    from app.services.pipeline.audio_library import get_audio_library
+    from app.services.storage.janitor import get_storage_janitor
+    from app.services.unified_pipeline.config_loader import config_registry
+
+    # Invalid pipeline configs or prompt templates should fail the boot, not a generation
+    config_registry.preload()
+
+    # Index the music/SFX library (decodes new files once; cached across restarts)
+    try:
+        await asyncio.to_thread(get_audio_library().refresh)
+    except Exception as e:
+        logger.warning(f"Audio library indexing failed: {e}")
+
+    try:
+        await init_session_storage()
+    except Exception as e:
+        logger.warning(f"Session storage initialization failed: {e}")
+
+    # Periodic cleanup of temp artifacts (retention per class + disk high-water mark)
+    get_storage_janitor().start()
+
+    # Generations left running by the previous process continue from their last checkpointed stage
+    if settings.PIPELINE_RESUME_ON_STARTUP:
+        try:
+            await resume_interrupted_generations()
+        except Exception as e:
+            logger.warning(f"Resuming interrupted generations failed: {e}")
     logger.info("Ad Mint AI API started")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown event."""
+    from app.api.routes.websocket import manager as websocket_manager
+    from app.db.base import dispose_async_engine
+    from app.services.media.clip_pool import shutdown_media_executor
+    from app.services.pipeline.session_storage import shutdown_session_storage
+    from app.services.storage.janitor import get_storage_janitor
+
+    await get_storage_janitor().close()
+    shutdown_media_executor()
+    await websocket_manager.close()
+    await shutdown_session_storage()
+    await dispose_async_engine()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
     return {"message": "Ad Mint AI API"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: span duration histograms per pipeline, kind, stage/operation, model and status, and storage janitor counters."""
+    from app.services.storage.janitor import get_storage_janitor
+
+    return render_metrics() + get_storage_janitor().render_metrics()
+
+
 @app.get("/api/health")
 async def health():
     """
@@ -262,6 +321,21 @@ async def health():
             "type": "local"
         }
     
+    # Local disk usage and storage janitor counters
+    from app.services.storage.janitor import get_storage_janitor
+    janitor_stats = get_storage_janitor().stats()
+    try:
+        disk = shutil.disk_usage("output")
+        disk_used_percent = round(100 * disk.used / disk.total, 1)
+        health_status["components"]["disk"] = {
+            "status": "healthy" if disk_used_percent < settings.JANITOR_HIGH_WATER_PERCENT else "pressure",
+            "used_percent": disk_used_percent,
+            "free_bytes": disk.free,
+            "janitor": janitor_stats
+        }
+    except OSError as e:
+        health_status["components"]["disk"] = {"status": "unknown", "error": str(e), "janitor": janitor_stats}
+    
     # External API checks (optional - don't fail health check if external APIs are down)
     external_apis = {}
     
@@ -15,6 +15,7 @@ class UploadedImageResponse(BaseModel):
     id: str
     filename: str
     url: str  # URL to access the image (e.g., /api/assets/users/{user_id}/brand_styles/{filename})
+    thumbnail_url: Optional[str] = None  # Pre-generated thumbnail (None for images uploaded before derivatives)
     uploaded_at: datetime
 
 
@@ -25,6 +25,30 @@ class EditingSessionListResponse(BaseModel):
     sessions: List[EditingSessionListItem] = Field(..., description="List of editing sessions")
 
 
+class SpriteSheetInfo(BaseModel):
+    """Schema for a clip's thumbnail sprite sheet (tiles left-to-right, top-to-bottom)."""
+
+    url: str = Field(..., description="URL to the sprite sheet image")
+    interval: float = Field(..., gt=0, description="Seconds between consecutive thumbnails")
+    columns: int = Field(..., ge=1, description="Thumbnails per row")
+    rows: int = Field(..., ge=1, description="Number of rows")
+    count: int = Field(..., ge=1, description="Number of thumbnails in the sheet")
+    tile_width: int = Field(..., ge=1, description="Thumbnail width in pixels")
+    tile_height: int = Field(..., ge=1, description="Thumbnail height in pixels")
+
+
+class ClipMediaInfo(BaseModel):
+    """Schema for precomputed editor timeline media of a clip."""
+
+    duration: float = Field(..., ge=0, description="Probed clip duration in seconds")
+    proxy_url: Optional[str] = Field(None, description="URL to the low-bitrate 360p scrubbing proxy")
+    sprite: Optional[SpriteSheetInfo] = Field(None, description="Thumbnail sprite sheet")
+    waveform_url: Optional[str] = Field(
+        None, description="URL to waveform peaks (one unsigned byte per bucket, 0-255)"
+    )
+    waveform_peaks_per_second: Optional[int] = Field(None, description="Waveform buckets per second")
+
+
 class ClipInfo(BaseModel):
     """Schema for individual clip information in editor data."""
 
@@ -37,6 +61,7 @@ class ClipInfo(BaseModel):
     end_time: float = Field(..., ge=0, description="End time in the original video")
     thumbnail_url: Optional[str] = Field(None, description="URL to clip thumbnail")
     text_overlay: Optional[dict] = Field(None, description="Text overlay metadata for the clip")
+    media: Optional[ClipMediaInfo] = Field(None, description="Precomputed timeline media (proxy, sprite, waveform)")
 
 
 class EditorDataResponse(BaseModel):
@@ -2,7 +2,7 @@
 Pydantic schemas for video generation requests, responses, and LLM output validation.
 """
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -88,6 +88,10 @@ class GenerateRequest(BaseModel):
         le=6,
         description="Maximum number of prompt enhancement iterations in advanced mode. Default: 4"
     )
+    reference_topology: Optional[Literal["chain", "star", "tree", "waves"]] = Field(
+        "chain",
+        description="How reference, start and end images reference each other: 'chain' (each image uses the previous one, one at a time), 'star' (all anchored to scene 1 or the user's image), 'tree' (fan-out of 2) or 'waves' (waves of 2 anchored to the previous wave). Non-chain topologies generate images concurrently and record consistency scores in the storyboard plan. Default: 'chain'"
+    )
     
     refinement_instructions: Optional[dict] = Field(
         default=None,
@@ -139,6 +143,12 @@ class StatusResponse(BaseModel):
     # Advanced image generation metadata
     advanced_image_generation_used: Optional[bool] = None  # Whether advanced image generation was used
     image_quality_scores: Optional[dict] = None  # Quality scores for each scene's selected image
+    
+    # S3 uploads in flight (files/bytes done and total, percent); None when nothing is uploading
+    upload_progress: Optional[dict] = None
+    
+    # Live ETA while pending/processing (eta_seconds, eta_p90_seconds, queue_position, stages_remaining, source)
+    eta: Optional[dict] = None
 
 
 class GenerateResponse(BaseModel):
@@ -157,6 +167,7 @@ class GenerationListItem(BaseModel):
     status: str
     video_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
+    hls_url: Optional[str] = Field(None, description="HLS master playlist, if the video was packaged with an HLS ladder")
     duration: int
     cost: Optional[float] = None
     created_at: datetime
@@ -6,9 +6,9 @@ that allows users to review and refine AI-generated content (story, images,
 storyboard) through conversational feedback before committing API credits.
 """
 from datetime import datetime
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Set
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 # ============================================================================
@@ -30,9 +30,12 @@ class PipelineStartRequest(BaseModel):
         le=60,
         description="Target video duration in seconds (default: 15)"
     )
-    mode: Literal["interactive", "auto"] = Field(
+    mode: Literal["interactive", "auto", "streaming"] = Field(
         "interactive",
-        description="Pipeline mode: 'interactive' pauses at each stage, 'auto' runs without pauses"
+        description=(
+            "Pipeline mode: 'interactive' pauses at each stage, 'auto' runs without pauses, "
+            "'streaming' runs without pauses and takes each scene from storyboard to video independently"
+        )
     )
     title: Optional[str] = Field(
         None,
@@ -411,7 +414,7 @@ class PipelineSessionState(BaseModel):
     # Pipeline configuration
     prompt: str
     target_duration: int
-    mode: Literal["interactive", "auto"]
+    mode: Literal["interactive", "auto", "streaming"]
     title: Optional[str] = None
 
     # Stage outputs
@@ -436,6 +439,18 @@ class PipelineSessionState(BaseModel):
     error: Optional[str] = None
     error_count: int = 0
 
+    # Optimistic concurrency
+    version: int = Field(
+        default=0,
+        description="Storage version, incremented on every save (0 = never saved)"
+    )
+
+    # Parts of the stored session this object holds, set by session storage on
+    # a partial load so that saving it never deletes what was not loaded
+    _loaded_stages: Optional[Set[str]] = PrivateAttr(default=None)  # None = all stages
+    _conversation_loaded: bool = PrivateAttr(default=True)
+    _appended_messages: int = PrivateAttr(default=0)  # Saved while the conversation was not loaded
+
     class Config:
         json_schema_extra = {
             "example": {
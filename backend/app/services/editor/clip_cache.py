@@ -0,0 +1,167 @@
+"""
+Persistent cache of processed editor clips.
+
+Export and preview both turn a clip_state into a processed clip file. The
+result depends only on the source clip's content, the cut range and the
+processing parameters (including the encode settings), so it is cached
+under a key built from exactly those. Re-exporting after changing one clip
+then trims that clip only; stitching with transitions, the audio layer and
+color grading still run over the whole timeline, since each of them
+re-encodes it.
+
+Source content hashes are memoized by (path, size, mtime), so an unchanged
+source is hashed once per process. Entries are evicted least-recently-used
+once the cache exceeds its size limit.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when processing output changes so stale entries are not reused
+PROCESSING_VERSION = 2
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def link_or_copy(source: Path, destination: Path) -> None:
+    """Hardlink source to destination, copying when linking is not possible."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class ProcessedClipCache:
+    """Content-addressed, size-bounded cache of processed clip files."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        """
+        Initialize processed clip cache.
+
+        Args:
+            cache_dir: Directory holding cached clips
+            max_bytes: Total size above which least-recently-used clips are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def source_digest(self, path: str) -> str:
+        """SHA-256 of a source file, memoized by (path, size, mtime)."""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+            self._digests[memo_key] = digest
+        return digest
+
+    def make_key(self, source_path: str, params: Dict[str, Any]) -> str:
+        """Build a cache key from source content and processing parameters."""
+        payload = json.dumps(
+            {
+                "source": self.source_digest(source_path),
+                "params": params,
+                "version": PROCESSING_VERSION,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp4"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Get a cached clip, marking it recently used."""
+        path = self._entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, clip_path: str) -> Optional[Path]:
+        """
+        Store a processed clip.
+
+        Returns:
+            Path of the cached clip, or None if clip_path does not exist
+        """
+        if not os.path.isfile(clip_path):
+            return None
+
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+        try:
+            link_or_copy(Path(clip_path), tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache processed clip {clip_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Remove least-recently-used clips until the cache fits max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in self.cache_dir.glob("*.mp4"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= size
+                logger.debug(f"Evicted processed clip {entry.name}")
+
+
+_clip_cache: Optional[ProcessedClipCache] = None
+_clip_cache_disabled = False
+
+
+def get_clip_cache() -> Optional[ProcessedClipCache]:
+    """
+    Get the process-wide processed clip cache.
+
+    Returns:
+        The cache, or None if its directory cannot be created (caching disabled)
+    """
+    global _clip_cache, _clip_cache_disabled
+    if _clip_cache is None and not _clip_cache_disabled:
+        try:
+            _clip_cache = ProcessedClipCache(
+                Path(settings.EDITOR_CLIP_CACHE_DIR),
+                settings.EDITOR_CLIP_CACHE_MAX_MB * 1024 * 1024,
+            )
+        except OSError as e:
+            logger.warning(f"Could not create editor clip cache: {e}. Caching will be disabled.")
+            _clip_cache_disabled = True
+    return _clip_cache
@@ -1,9 +1,11 @@
 """
 Editor service for extracting scene clips and managing editing sessions.
 """
+import asyncio
 import logging
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
 from sqlalchemy.orm import Session
@@ -11,12 +13,34 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.db.models.generation import Generation
 from app.db.models.editing_session import EditingSession
-from app.schemas.editor import ClipInfo
+from app.schemas.editor import ClipInfo, ClipMediaInfo, SpriteSheetInfo
 from app.schemas.generation import ScenePlan, Scene
+from app.services.media.probe import MediaProbeError, probe_media
 
 logger = logging.getLogger(__name__)
 
 
+def get_static_url(relative_path: Optional[str]) -> Optional[str]:
+    """
+    Convert a local file path to its URL under the /output static mount.
+    
+    Args:
+        relative_path: Relative file path
+        
+    Returns:
+        Static URL or None if path is empty
+    """
+    if not relative_path:
+        return None
+    
+    base_url = settings.STATIC_BASE_URL.rstrip("/") if settings.STATIC_BASE_URL else ""
+    path = relative_path.replace("\\", "/").lstrip("/")
+    # Remove "output/" prefix if present (since base_url already includes /output)
+    if path.startswith("output/"):
+        path = path[7:]  # Remove "output/" prefix
+    return f"{base_url}/{path}" if base_url else relative_path.replace("\\", "/")
+
+
 def get_full_url(relative_path: Optional[str]) -> Optional[str]:
     """
     Convert relative path to full URL for frontend consumption.
@@ -48,25 +72,79 @@ def get_full_url(relative_path: Optional[str]) -> Optional[str]:
         except Exception as e:
             logger.warning(f"Failed to generate presigned URL for {normalized_path}: {e}, falling back to static URL")
             # Fall back to static URL if S3 fails
-            base_url = settings.STATIC_BASE_URL.rstrip("/") if settings.STATIC_BASE_URL else ""
-            path = normalized_path.lstrip("/")
-            # Remove "output/" prefix if present (since base_url already includes /output)
-            if path.startswith("output/"):
-                path = path[7:]  # Remove "output/" prefix
-            return f"{base_url}/{path}" if base_url else normalized_path
+            return get_static_url(normalized_path)
     else:
         # Convert relative path to full URL (local storage)
-        base_url = settings.STATIC_BASE_URL.rstrip("/") if settings.STATIC_BASE_URL else ""
-        path = normalized_path.lstrip("/")
-        # Remove "output/" prefix if present (since base_url already includes /output)
-        if path.startswith("output/"):
-            path = path[7:]  # Remove "output/" prefix
-        return f"{base_url}/{path}" if base_url else normalized_path
+        return get_static_url(normalized_path)
+
+
+def get_clip_media(entry: Optional[Dict[str, Any]]) -> Optional[ClipMediaInfo]:
+    """
+    Convert a Generation.editor_media clip entry to ClipMediaInfo with URLs.
+    
+    Editor media is only written locally (never uploaded), so it is always
+    served from the /output static mount, even in S3 storage mode.
+    
+    Args:
+        entry: Clip entry from generation.editor_media["clips"], if any
+        
+    Returns:
+        ClipMediaInfo or None if the clip has no precomputed media
+    """
+    if not entry:
+        return None
+    
+    sprite = None
+    if entry.get("sprite_path") and entry.get("sprite"):
+        sprite = SpriteSheetInfo(url=get_static_url(entry["sprite_path"]), **entry["sprite"])
+    
+    return ClipMediaInfo(
+        duration=entry["duration"],
+        proxy_url=get_static_url(entry.get("proxy_path")),
+        sprite=sprite,
+        waveform_url=get_static_url(entry.get("waveform_path")),
+        waveform_peaks_per_second=entry.get("waveform_peaks_per_second"),
+    )
+
+
+async def probe_clip_durations(generation: Generation) -> Dict[int, float]:
+    """
+    Probe the durations of clips that have no precomputed editor media.
+    
+    Clips are probed concurrently without blocking the event loop; clips that
+    are missing or cannot be probed are left out.
+    
+    Args:
+        generation: Generation model instance
+        
+    Returns:
+        Probed duration in seconds per scene number (1-based)
+    """
+    media_entries = (generation.editor_media or {}).get("clips", {})
+    scenes = [
+        (i, clip_path)
+        for i, clip_path in enumerate(generation.temp_clip_paths or [], start=1)
+        if str(i) not in media_entries and os.path.exists(clip_path)
+    ]
+    probes = await asyncio.gather(
+        *(probe_media(clip_path) for _, clip_path in scenes), return_exceptions=True
+    )
+    
+    durations = {}
+    for (i, _), probe in zip(scenes, probes):
+        if isinstance(probe, MediaProbeError):
+            logger.warning(f"Could not probe clip {i} for generation {generation.id}: {probe}")
+        elif isinstance(probe, BaseException):
+            raise probe
+        else:
+            durations[i] = probe.duration
+    return durations
 
 
 def extract_clips_from_generation(
     generation: Generation,
-    db: Session
+    db: Session,
+    durations: Optional[Dict[int, float]] = None
 ) -> List[ClipInfo]:
     """
     Extract scene clip information from a generation record.
@@ -74,6 +152,7 @@ def extract_clips_from_generation(
     Args:
         generation: Generation model instance
         db: Database session
+        durations: Probed clip durations by scene number (see probe_clip_durations)
         
     Returns:
         List of ClipInfo objects with clip metadata
@@ -94,6 +173,9 @@ def extract_clips_from_generation(
             except Exception as e:
                 logger.warning(f"Failed to parse scene_plan for generation {generation.id}: {e}")
         
+        # Precomputed media (probed durations, proxies, sprites), if available
+        media_entries = (generation.editor_media or {}).get("clips", {})
+        
         # Calculate cumulative start times for each clip
         cumulative_time = 0.0
         
@@ -115,6 +197,13 @@ def extract_clips_from_generation(
                         "animation": scene.text_overlay.animation,
                     }
             
+            # Probed duration is exact; scene_plan duration is only the requested one
+            media = get_clip_media(media_entries.get(str(i)))
+            if media:
+                scene_duration = media.duration
+            elif durations and i in durations:
+                scene_duration = durations[i]
+            
             start_time = cumulative_time
             end_time = cumulative_time + scene_duration
             
@@ -127,9 +216,10 @@ def extract_clips_from_generation(
             # Generate clip ID
             clip_id = f"clip-{generation.id}-{i}"
             
-            # For thumbnail, we could generate one or use a placeholder
-            # For now, we'll leave it as None (can be enhanced later)
+            # Thumbnail is the precomputed poster frame, if available
             thumbnail_url = None
+            if media:
+                thumbnail_url = get_static_url(media_entries[str(i)].get("poster_path"))
             
             clip_info = ClipInfo(
                 clip_id=clip_id,
@@ -141,6 +231,7 @@ def extract_clips_from_generation(
                 end_time=end_time,
                 thumbnail_url=thumbnail_url,
                 text_overlay=text_overlay,
+                media=media,
             )
             clips.append(clip_info)
             
@@ -167,7 +258,8 @@ def extract_clips_from_generation(
 def get_or_create_editing_session(
     generation: Generation,
     user_id: str,
-    db: Session
+    db: Session,
+    durations: Optional[Dict[int, float]] = None
 ) -> EditingSession:
     """
     Get existing editing session or create a new one for a generation.
@@ -176,6 +268,7 @@ def get_or_create_editing_session(
         generation: Generation model instance
         user_id: User ID who owns the generation
         db: Database session
+        durations: Probed clip durations by scene number (see probe_clip_durations)
         
     Returns:
         EditingSession model instance (existing or newly created)
@@ -194,7 +287,7 @@ def get_or_create_editing_session(
     
     # Create new editing session
     # Initialize editing_state with clips from generation
-    clips = extract_clips_from_generation(generation, db)
+    clips = extract_clips_from_generation(generation, db, durations)
     
     # Build initial editing state
     editing_state = {
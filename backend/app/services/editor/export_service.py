@@ -4,7 +4,6 @@ Handles processing editing state, applying edits, and creating exported video.
 """
 import logging
 import os
-import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple, List, Callable
@@ -14,14 +13,23 @@ from moviepy import VideoFileClip
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.tracing import traced
 from app.db.models.editing_session import EditingSession
 from app.db.models.generation import Generation
+from app.services.editor.clip_cache import ProcessedClipCache, get_clip_cache, link_or_copy
+from app.services.editor.smart_cut import BOUNDARY_ENCODE, SmartCutError, probe_video, smart_cut
+from app.services.media.clip_pool import ClipTaskCancelled, ClipTaskError, get_worker_threads, run_per_clip
 from app.services.pipeline.stitching import stitch_video_clips
 from app.services.pipeline.audio import add_audio_layer
 from app.services.pipeline.export import export_final_video
+from app.services.storage.janitor import create_temp_dir, remove_temp_dir
 
 logger = logging.getLogger(__name__)
 
+# MoviePy re-encode of clips that cannot be smart-cut (clips keep their source
+# resolution); part of the processed clip cache key
+CLIP_ENCODE = {"codec": "libx264", "audio_codec": "aac", "fps": 24, "preset": "medium"}
+
 # Export progress stages
 EXPORT_STAGES = [
     (10, "Export started"),
@@ -89,11 +97,221 @@ def _resolve_clip_path(file_path: str) -> str:
     return str(resolved_path)
 
 
+def _clamp_trim(
+    trim_start: Optional[float],
+    trim_end: Optional[float],
+    duration: float
+) -> Tuple[float, float]:
+    """
+    Resolve trim points (relative to the clip file) to a valid cut range.
+
+    Defaults to the full clip and keeps a minimum duration of 0.5s.
+    """
+    actual_start = trim_start if trim_start is not None else 0.0
+    actual_end = trim_end if trim_end is not None else duration
+
+    # Ensure trim points are within clip bounds
+    actual_start = max(0, min(actual_start, duration))
+    actual_end = max(actual_start + 0.5, min(actual_end, duration))  # Min 0.5s duration
+    return actual_start, actual_end
+
+
+def _final_video_range(clip_state: Dict[str, Any], duration: float) -> Tuple[float, float]:
+    """
+    Get the range of a clip within the final stitched video, with trims applied.
+
+    trim_start and trim_end are relative to the clip's start_time.
+    """
+    clip_start = clip_state.get("start_time", 0.0)
+    start_time = clip_start
+    end_time = clip_state.get("end_time", duration)
+
+    trim_start = clip_state.get("trim_start")
+    trim_end = clip_state.get("trim_end")
+    if trim_start is not None:
+        start_time = clip_start + trim_start
+    if trim_end is not None:
+        end_time = clip_start + trim_end
+
+    # Ensure times are within video bounds
+    start_time = max(0, min(start_time, duration))
+    end_time = max(start_time + 0.5, min(end_time, duration))
+    return start_time, end_time
+
+
+def _smart_cut_clip(
+    source_path: str,
+    output_path: str,
+    clip_state: Dict[str, Any],
+    from_final_video: bool,
+    frame_accurate: bool
+) -> Optional[str]:
+    """
+    Cut a clip with the keyframe-aware smart cut.
+
+    Returns:
+        Output path, or None if the source cannot be smart-cut (caller re-encodes)
+    """
+    try:
+        probe = probe_video(source_path)
+        if from_final_video:
+            start, end = _final_video_range(clip_state, probe.duration)
+        else:
+            start, end = _clamp_trim(clip_state.get("trim_start"), clip_state.get("trim_end"), probe.duration)
+        return smart_cut(
+            source_path, output_path, start, end,
+            frame_accurate=frame_accurate, probe=probe
+        )
+    except SmartCutError as e:
+        logger.info(f"Smart cut unavailable for clip {clip_state.get('id')}, re-encoding: {e}")
+        return None
+
+
+def _trim_with_moviepy(source_path: str, output_path: str, clip_state: Dict[str, Any]) -> str:
+    """Re-encode a clip file with its trim applied (fallback when smart cut is unavailable)."""
+    # Load original clip
+    original_clip = VideoFileClip(source_path)
+    clip = original_clip
+    clips_to_close = [original_clip]
+    
+    try:
+        # Apply trim operations if present
+        # trim_start and trim_end are relative to the clip's duration (0 to clip.duration)
+        trim_start = clip_state.get("trim_start")
+        trim_end = clip_state.get("trim_end")
+        
+        if trim_start is not None or trim_end is not None:
+            # trim_start and trim_end are positions within THIS clip file (not the final video)
+            actual_start, actual_end = _clamp_trim(trim_start, trim_end, clip.duration)
+            
+            # Apply trim using subclipped
+            trimmed_clip = clip.subclipped(actual_start, actual_end)
+            clips_to_close.append(trimmed_clip)
+            clip = trimmed_clip
+        
+        # Save processed clip to temp directory
+        clip.write_videofile(
+            output_path,
+            **CLIP_ENCODE,
+            threads=get_worker_threads(),
+            logger=None  # Suppress MoviePy logs
+        )
+        
+        return output_path
+        
+    finally:
+        for clip_obj in clips_to_close:
+            try:
+                clip_obj.close()
+            except Exception:
+                pass
+
+
+def _extract_with_moviepy(final_video_path: str, output_path: str, clip_state: Dict[str, Any]) -> str:
+    """Re-encode a clip's range of the final video (fallback when smart cut is unavailable)."""
+    # Load final video
+    final_video = VideoFileClip(final_video_path)
+
+    # Get clip timing from state, with trim operations applied
+    start_time, end_time = _final_video_range(clip_state, final_video.duration)
+    trim_start = clip_state.get("trim_start")
+    trim_end = clip_state.get("trim_end")
+
+    logger.info(
+        f"Extracting clip from {start_time:.2f}s to {end_time:.2f}s "
+        f"from final video {final_video_path}"
+        f"{' (with trim applied)' if trim_start is not None or trim_end is not None else ''}"
+    )
+
+    # Extract clip with trim already applied
+    extracted_clip = final_video.subclipped(start_time, end_time)
+
+    # Save extracted clip
+    extracted_clip.write_videofile(
+        output_path,
+        **CLIP_ENCODE,
+        threads=get_worker_threads(),
+        logger=None  # Suppress MoviePy logs
+    )
+
+    # Clean up
+    extracted_clip.close()
+    final_video.close()
+    return output_path
+
+
+def _clip_cache_key(
+    cache: ProcessedClipCache,
+    source_path: str,
+    clip_state: Dict[str, Any],
+    from_final_video: bool,
+    frame_accurate: bool
+) -> Optional[str]:
+    """
+    Build the processed clip cache key, or None if the source cannot be hashed.
+
+    Split and merge only rewrite a clip's source and trim range, so the key
+    covers every edit that affects the processed output. The encode settings
+    of both cut paths are part of it, so changing them never serves stale clips.
+    """
+    params: Dict[str, Any] = {
+        "from_final_video": from_final_video,
+        "trim_start": clip_state.get("trim_start"),
+        "trim_end": clip_state.get("trim_end"),
+        "frame_accurate": frame_accurate,
+        "encode": {"reencode": CLIP_ENCODE, "smart_cut": BOUNDARY_ENCODE},
+    }
+    if from_final_video:
+        params["start_time"] = clip_state.get("start_time", 0.0)
+        params["end_time"] = clip_state.get("end_time")
+    try:
+        return cache.make_key(source_path, params)
+    except OSError as e:
+        logger.warning(f"Could not hash clip source {source_path}: {e}")
+        return None
+
+
+def _cut_clip(
+    source_path: str,
+    output_path: str,
+    clip_state: Dict[str, Any],
+    from_final_video: bool,
+    frame_accurate: bool
+) -> str:
+    """
+    Produce a processed clip, reusing the cached result of an identical edit.
+
+    Cache misses are smart-cut, falling back to a MoviePy re-encode.
+    """
+    cache = get_clip_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = _clip_cache_key(cache, source_path, clip_state, from_final_video, frame_accurate)
+    if cache_key:
+        cached_path = cache.get(cache_key)
+        if cached_path:
+            link_or_copy(cached_path, Path(output_path))
+            logger.info(f"Reusing cached processed clip for clip {clip_state.get('id')}")
+            return output_path
+
+    # Stream-copy whole GOPs; only partial GOPs at the cut points are re-encoded
+    if not _smart_cut_clip(source_path, output_path, clip_state, from_final_video, frame_accurate):
+        if from_final_video:
+            _extract_with_moviepy(source_path, output_path, clip_state)
+        else:
+            _trim_with_moviepy(source_path, output_path, clip_state)
+
+    if cache_key:
+        cache.put(cache_key, output_path)
+    return output_path
+
+
 def _extract_clip_from_final_video(
     clip_state: Dict[str, Any],
     final_video_path: str,
     temp_dir: str,
-    cancellation_check: Optional[Callable] = None
+    cancellation_check: Optional[Callable] = None,
+    frame_accurate: bool = True
 ) -> str:
     """
     Extract a clip from the final stitched video when the original clip file is not found.
@@ -105,6 +323,7 @@ def _extract_clip_from_final_video(
         final_video_path: Path to the final stitched video
         temp_dir: Temporary directory to save extracted clip
         cancellation_check: Optional function to check for cancellation
+        frame_accurate: Re-encode partial GOPs at the cut points instead of snapping to keyframes
         
     Returns:
         Path to extracted clip file
@@ -115,76 +334,33 @@ def _extract_clip_from_final_video(
     if cancellation_check and cancellation_check():
         raise RuntimeError("Export cancelled by user")
     
+    clip_id = clip_state.get("id", str(uuid4()))
+    output_path = os.path.join(temp_dir, f"extracted-{clip_id}.mp4")
+    
     try:
-        # Load final video
-        final_video = VideoFileClip(final_video_path)
-        
-        # Get clip timing from state
-        start_time = clip_state.get("start_time", 0.0)
-        end_time = clip_state.get("end_time", final_video.duration)
-        
-        # Check for trim operations and apply them to extraction times
-        # trim_start and trim_end are relative to the clip's start_time
-        trim_start = clip_state.get("trim_start")
-        trim_end = clip_state.get("trim_end")
-        
-        if trim_start is not None:
-            # Adjust start time to account for trim
-            start_time = start_time + trim_start
-        
-        if trim_end is not None:
-            # Adjust end time to account for trim
-            # trim_end is relative to clip start, so add to clip's start_time
-            clip_start = clip_state.get("start_time", 0.0)
-            end_time = clip_start + trim_end
-        
-        # Ensure times are within video bounds
-        start_time = max(0, min(start_time, final_video.duration))
-        end_time = max(start_time + 0.5, min(end_time, final_video.duration))
-        
-        logger.info(
-            f"Extracting clip from {start_time:.2f}s to {end_time:.2f}s "
-            f"from final video {final_video_path}"
-            f"{' (with trim applied)' if trim_start is not None or trim_end is not None else ''}"
-        )
-        
-        # Extract clip with trim already applied
-        extracted_clip = final_video.subclipped(start_time, end_time)
-        
-        # Save extracted clip
-        clip_id = clip_state.get("id", str(uuid4()))
-        output_path = os.path.join(temp_dir, f"extracted-{clip_id}.mp4")
-        
-        extracted_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            fps=24,
-            preset='medium',
-            logger=None  # Suppress MoviePy logs
-        )
-        
-        # Clean up
-        extracted_clip.close()
-        final_video.close()
-        
-        logger.info(f"Successfully extracted clip to {output_path}")
-        return output_path
-        
+        _cut_clip(final_video_path, output_path, clip_state, True, frame_accurate)
     except Exception as e:
         logger.error(f"Failed to extract clip from final video: {e}")
         raise RuntimeError(f"Clip extraction from final video failed: {e}")
 
+    logger.info(f"Successfully extracted clip to {output_path}")
+    return output_path
+
 
 def process_clip_with_edits(
     clip_state: Dict[str, Any],
     temp_dir: str,
     cancellation_check: Optional[Callable] = None,
-    fallback_video_path: Optional[str] = None
+    fallback_video_path: Optional[str] = None,
+    frame_accurate: Optional[bool] = None
 ) -> str:
     """
     Process a single clip by applying trim operations.
     
+    H.264 clips are cut with the keyframe-aware smart cut: whole GOPs are
+    stream-copied and only partial GOPs at the trim points are re-encoded
+    (an untrimmed clip is a pure remux). Other clips are re-encoded with MoviePy.
+    
     Note: Split clips are already separated in editing_state (split_service creates
     two separate clips). Merged clips are already merged (merge_service creates
     one merged clip). This function processes each clip independently.
@@ -194,6 +370,8 @@ def process_clip_with_edits(
         temp_dir: Temporary directory for processed clips
         cancellation_check: Optional function to check for cancellation
         fallback_video_path: Optional path to final stitched video to extract clip from if original not found
+        frame_accurate: Re-encode partial GOPs at trim points instead of snapping to
+            keyframes (defaults to settings.EDITOR_FRAME_ACCURATE_CUTS)
         
     Returns:
         Path to processed clip file
@@ -205,6 +383,9 @@ def process_clip_with_edits(
     if cancellation_check and cancellation_check():
         raise RuntimeError("Export cancelled by user")
     
+    if frame_accurate is None:
+        frame_accurate = settings.EDITOR_FRAME_ACCURATE_CUTS
+    
     original_path = clip_state.get("original_path")
     if not original_path:
         raise ValueError(f"Clip {clip_state.get('id', 'unknown')} has no original_path")
@@ -213,7 +394,6 @@ def process_clip_with_edits(
     
     # Validate file path is within expected directories (prevent path traversal)
     # For MVP, allow paths in output directory and temp directories
-    from app.core.config import settings
     output_dir_setting = Path(getattr(settings, 'OUTPUT_DIR', 'output'))
     if not output_dir_setting.is_absolute():
         output_dir_setting = Path.cwd() / output_dir_setting
@@ -245,7 +425,8 @@ def process_clip_with_edits(
                     clip_state=clip_state,
                     final_video_path=fallback_video_path,
                     temp_dir=temp_dir,
-                    cancellation_check=cancellation_check
+                    cancellation_check=cancellation_check,
+                    frame_accurate=frame_accurate
                 )
             else:
                 logger.error(
@@ -256,55 +437,55 @@ def process_clip_with_edits(
             logger.error("No fallback video path available")
             raise ValueError(f"Clip original_path not found: {original_path}")
     
-    # Load original clip
-    original_clip = VideoFileClip(resolved_original_path)
-    clip = original_clip
-    clips_to_close = [original_clip]
+    clip_id = clip_state.get("id", str(uuid4()))
+    output_path = os.path.join(temp_dir, f"processed-{clip_id}.mp4")
     
+    return _cut_clip(resolved_original_path, output_path, clip_state, False, frame_accurate)
+
+
+def render_clip_preview(
+    editing_session: EditingSession,
+    clip_id: str,
+    fallback_video_path: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Render one clip of an editing session with its edits applied, for preview.
+
+    Uses the same processed clip cache as export, so previewing a clip makes
+    its next export free (and vice versa).
+
+    Args:
+        editing_session: EditingSession model instance
+        clip_id: ID of the clip to render
+        fallback_video_path: Optional path to final stitched video to extract clip from if original not found
+
+    Returns:
+        Tuple[str, str]: (preview_path, temp_dir); the caller removes temp_dir with remove_temp_dir when done
+
+    Raises:
+        ValueError: If the clip is not found or cannot be processed
+    """
+    clips_state = (editing_session.editing_state or {}).get("clips", [])
+    clip_state = next((c for c in clips_state if c.get("id") == clip_id), None)
+    if clip_state is None:
+        raise ValueError(f"Clip {clip_id} not found in editing session")
+
+    resolved_fallback_path = _resolve_clip_path(fallback_video_path) if fallback_video_path else None
+
+    temp_dir = create_temp_dir("preview-")
     try:
-        # Apply trim operations if present
-        # trim_start and trim_end are relative to the clip's duration (0 to clip.duration)
-        trim_start = clip_state.get("trim_start")
-        trim_end = clip_state.get("trim_end")
-        
-        if trim_start is not None or trim_end is not None:
-            # trim_start and trim_end are positions within THIS clip file (not the final video)
-            # Default to full clip if not specified
-            actual_start = trim_start if trim_start is not None else 0.0
-            actual_end = trim_end if trim_end is not None else clip.duration
-            
-            # Ensure trim points are within clip bounds
-            actual_start = max(0, min(actual_start, clip.duration))
-            actual_end = max(actual_start + 0.5, min(actual_end, clip.duration))  # Min 0.5s duration
-            
-            # Apply trim using subclipped
-            trimmed_clip = clip.subclipped(actual_start, actual_end)
-            clips_to_close.append(trimmed_clip)
-            clip = trimmed_clip
-        
-        # Save processed clip to temp directory
-        clip_id = clip_state.get("id", str(uuid4()))
-        output_path = os.path.join(temp_dir, f"processed-{clip_id}.mp4")
-        
-        clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            fps=24,
-            preset='medium',
-            logger=None  # Suppress MoviePy logs
+        preview_path = process_clip_with_edits(
+            clip_state=clip_state,
+            temp_dir=temp_dir,
+            fallback_video_path=resolved_fallback_path
         )
-        
-        return output_path
-        
-    finally:
-        for clip_obj in clips_to_close:
-            try:
-                clip_obj.close()
-            except Exception:
-                pass
+    except Exception:
+        remove_temp_dir(temp_dir)
+        raise
+    return preview_path, temp_dir
 
 
+@traced("encode")
 def export_edited_video(
     editing_session: EditingSession,
     output_dir: str,
@@ -380,36 +561,38 @@ def export_edited_video(
         logger.warning("No fallback video path provided, cannot recover missing clips")
     
     # Create temporary directory for processed clips
-    temp_dir = tempfile.mkdtemp(prefix="export-")
+    temp_dir = create_temp_dir("export-")
     
     try:
         # Stage 1: Process clips with trim operations
         # Note: Split clips are already separated in clips_state (split_service creates two clips).
         # Merged clips are already merged (merge_service creates one merged clip).
-        # We process each clip independently, applying trim operations.
-        processed_clip_paths = []
-        num_clips = len(clips_state)
+        # We process each clip independently, applying trim operations, in
+        # parallel worker processes; cancellation is checked as clips finish.
+        def clip_progress(completed: int, total: int) -> None:
+            # Update progress: 20-40% for clip processing
+            if progress_callback:
+                progress_callback(20 + int(completed / total * 20), f"Processing clip {completed}/{total}")
         
-        for idx, clip_state in enumerate(clips_state):
-            if cancellation_check and cancellation_check():
-                raise RuntimeError("Export cancelled by user")
-            
-            try:
-                processed_path = process_clip_with_edits(
-                    clip_state=clip_state,
-                    temp_dir=temp_dir,
-                    cancellation_check=cancellation_check,
-                    fallback_video_path=resolved_fallback_path
-                )
-                processed_clip_paths.append(processed_path)
-                
-                # Update progress: 20-40% for clip processing
-                if progress_callback:
-                    clip_progress = 20 + int((idx + 1) / num_clips * 20)  # 20-40%
-                    progress_callback(clip_progress, f"Processing clip {idx + 1}/{num_clips}")
-            except Exception as e:
-                logger.error(f"Failed to process clip {clip_state.get('id')}: {e}")
-                raise RuntimeError(f"Failed to process clip: {e}")
+        try:
+            processed_clip_paths = run_per_clip(
+                process_clip_with_edits,
+                [
+                    {
+                        "clip_state": clip_state,
+                        "temp_dir": temp_dir,
+                        "fallback_video_path": resolved_fallback_path,
+                    }
+                    for clip_state in clips_state
+                ],
+                cancellation_check=cancellation_check,
+                progress_callback=clip_progress
+            )
+        except ClipTaskCancelled:
+            raise RuntimeError("Export cancelled by user")
+        except ClipTaskError as e:
+            logger.error(f"Failed to process clip {clips_state[e.index].get('id')}: {e}")
+            raise RuntimeError(f"Failed to process clip: {e}")
         
         if cancellation_check and cancellation_check():
             raise RuntimeError("Export cancelled by user")
@@ -505,8 +688,7 @@ def export_edited_video(
     finally:
         # Cleanup temporary files
         try:
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            remove_temp_dir(temp_dir)
         except Exception as e:
             logger.warning(f"Failed to cleanup temp directory {temp_dir}: {e}")
 
@@ -0,0 +1,229 @@
+"""
+Editor timeline media precompute.
+
+When a generation completes, each clip is decoded once by a single ffmpeg
+pass with four outputs:
+- proxy.mp4: low-bitrate 360p rendition with short GOPs, for scrubbing
+- sprite.jpg: thumbnail sprite sheet, one tile every SPRITE_INTERVAL seconds
+- poster.jpg: mid-clip thumbnail
+- waveform.bin: audio peaks, one unsigned byte (0-255) per bucket
+
+The probed duration and asset paths are stored in Generation.editor_media so
+the editor no longer guesses durations from scene_plan or streams the
+full-resolution clips.
+
+Layout (under EDITOR_MEDIA_DIR, served from /output by default):
+    {generation_id}/scene-{n}/proxy.mp4
+    {generation_id}/scene-{n}/sprite.jpg
+    {generation_id}/scene-{n}/poster.jpg
+    {generation_id}/scene-{n}/waveform.bin
+"""
+import logging
+import math
+import os
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from moviepy.config import FFMPEG_BINARY
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models.generation import Generation
+from app.services.editor.smart_cut import FFMPEG_TIMEOUT_SECONDS
+from app.services.media.clip_pool import ffmpeg_thread_args, run_per_clip
+from app.services.media.probe import probe_media_sync
+
+logger = logging.getLogger(__name__)
+
+# Bump when the asset layout changes so stale manifests are recomputed
+EDITOR_MEDIA_VERSION = 1
+
+SPRITE_INTERVAL = 1.0  # seconds between sprite tiles
+SPRITE_TILE_WIDTH = 160
+SPRITE_MAX_COLUMNS = 10
+POSTER_WIDTH = 320
+PROXY_SHORT_SIDE = 360
+WAVEFORM_SAMPLE_RATE = 8000
+WAVEFORM_PEAKS_PER_SECOND = 100
+
+
+def get_editor_media_dir(generation_id: str) -> Path:
+    """Get the editor media directory for a generation (does not create it)."""
+    return Path(settings.EDITOR_MEDIA_DIR) / generation_id
+
+
+def compute_waveform_peaks(pcm: bytes, sample_rate: int, peaks_per_second: int) -> bytes:
+    """
+    Reduce mono s16le PCM to one peak per bucket.
+
+    Returns:
+        One unsigned byte per bucket: the bucket's peak amplitude scaled to 0-255
+    """
+    samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % 2], dtype="<i2").astype(np.int32)
+    if samples.size == 0:
+        return b""
+    bucket = max(1, sample_rate // peaks_per_second)
+    padded = np.pad(np.abs(samples), (0, -samples.size % bucket))
+    peaks = padded.reshape(-1, bucket).max(axis=1)
+    return (np.minimum(peaks, 32767) * 255 // 32767).astype(np.uint8).tobytes()
+
+
+def precompute_clip_media(source_path: str, output_dir: str) -> Dict[str, Any]:
+    """
+    Produce proxy, sprite sheet, poster and waveform for one clip in one decode.
+
+    Args:
+        source_path: Clip video path
+        output_dir: Directory for the clip's assets
+
+    Returns:
+        Manifest entry with the probed duration and asset paths
+
+    Raises:
+        RuntimeError: If the clip cannot be probed or ffmpeg fails
+    """
+    from PIL import Image
+
+    probe = probe_media_sync(source_path)
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    count = max(1, math.ceil(probe.duration / SPRITE_INTERVAL))
+    columns = min(count, SPRITE_MAX_COLUMNS)
+    rows = math.ceil(count / columns)
+    short = PROXY_SHORT_SIDE
+
+    filters = (
+        "[0:v]split=3[p][s][t];"
+        f"[p]scale='if(gt(iw,ih),-2,{short})':'if(gt(iw,ih),{short},-2)'[proxy];"
+        f"[s]fps=1/{SPRITE_INTERVAL:g},scale={SPRITE_TILE_WIDTH}:-2,tile={columns}x{rows}[sprite];"
+        f"[t]trim=start={probe.duration / 2:.3f},setpts=PTS-STARTPTS,scale={POSTER_WIDTH}:-2[poster]"
+    )
+    cmd = [
+        FFMPEG_BINARY, "-hide_banner", "-nostdin", "-y", "-loglevel", "error",
+        *ffmpeg_thread_args("-filter_complex_threads"), *ffmpeg_thread_args(),
+        "-i", source_path, "-filter_complex", filters,
+        "-map", "[proxy]", "-map", "0:a?", *ffmpeg_thread_args(),
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+        "-maxrate", "600k", "-bufsize", "1200k", "-g", "12",
+        "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart", str(out / "proxy.mp4"),
+        "-map", "[sprite]", "-frames:v", "1", str(out / "sprite.jpg"),
+        "-map", "[poster]", "-frames:v", "1", str(out / "poster.jpg"),
+    ]
+    if probe.has_audio:
+        cmd += ["-map", "0:a:0", "-ac", "1", "-ar", str(WAVEFORM_SAMPLE_RATE), "-f", "s16le", "pipe:1"]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"ffmpeg failed to run: {e}")
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {result.returncode}: {result.stderr[-500:].decode(errors='replace')}")
+
+    with Image.open(out / "sprite.jpg") as sprite:
+        tile_height = sprite.height // rows
+
+    entry: Dict[str, Any] = {
+        "duration": probe.duration,
+        "proxy_path": str(out / "proxy.mp4"),
+        "poster_path": str(out / "poster.jpg"),
+        "sprite_path": str(out / "sprite.jpg"),
+        "sprite": {
+            "interval": SPRITE_INTERVAL,
+            "columns": columns,
+            "rows": rows,
+            "count": count,
+            "tile_width": SPRITE_TILE_WIDTH,
+            "tile_height": tile_height,
+        },
+        "waveform_path": None,
+        "waveform_peaks_per_second": None,
+    }
+    if probe.has_audio:
+        (out / "waveform.bin").write_bytes(
+            compute_waveform_peaks(result.stdout, WAVEFORM_SAMPLE_RATE, WAVEFORM_PEAKS_PER_SECOND)
+        )
+        entry["waveform_path"] = str(out / "waveform.bin")
+        entry["waveform_peaks_per_second"] = WAVEFORM_PEAKS_PER_SECOND
+    return entry
+
+
+def _try_precompute_clip(source_path: str, output_dir: str) -> Optional[Dict[str, Any]]:
+    """Precompute one clip, logging failures instead of failing the batch."""
+    try:
+        return precompute_clip_media(source_path, output_dir)
+    except Exception as e:
+        logger.warning(f"Editor media precompute failed for {source_path}: {e}")
+        return None
+
+
+def precompute_editor_media(generation: Generation, db: Session) -> Optional[Dict[str, Any]]:
+    """
+    Precompute editor timeline media for a generation's clips and store it.
+
+    Must run while generation.temp_clip_paths still exist. Clips are processed
+    in parallel (see clip_pool); clips that fail are left out and fall back to
+    scene_plan durations in the editor.
+
+    Args:
+        generation: Completed Generation with temp_clip_paths
+        db: Database session
+
+    Returns:
+        The stored editor_media manifest, or None if there are no clips
+    """
+    clip_paths = generation.temp_clip_paths or []
+    media_dir = get_editor_media_dir(generation.id)
+
+    scene_numbers = []
+    tasks = []
+    for scene_number, clip_path in enumerate(clip_paths, start=1):
+        if not os.path.exists(clip_path):
+            logger.warning(f"[{generation.id}] Clip {scene_number} not found for editor media: {clip_path}")
+            continue
+        scene_numbers.append(scene_number)
+        tasks.append({"source_path": clip_path, "output_dir": str(media_dir / f"scene-{scene_number}")})
+
+    if not tasks:
+        return None
+
+    entries = run_per_clip(_try_precompute_clip, tasks)
+    editor_media = {
+        "version": EDITOR_MEDIA_VERSION,
+        "clips": {
+            str(scene_number): entry
+            for scene_number, entry in zip(scene_numbers, entries)
+            if entry is not None
+        },
+    }
+
+    generation.editor_media = editor_media
+    db.commit()
+    logger.info(
+        f"[{generation.id}] Editor media precomputed for "
+        f"{len(editor_media['clips'])}/{len(clip_paths)} clips"
+    )
+    return editor_media
+
+
+def precompute_editor_media_in_session(generation_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Precompute editor media for a generation using a database session of its own.
+
+    For asyncio.to_thread: the pipeline's session must not be shared with a
+    worker thread. Callers holding the Generation should refresh it afterwards.
+
+    Returns:
+        The stored editor_media manifest, or None if the generation has no clips
+    """
+    db = SessionLocal()
+    try:
+        generation = db.query(Generation).filter(Generation.id == generation_id).first()
+        if generation is None:
+            return None
+        return precompute_editor_media(generation, db)
+    finally:
+        db.close()
@@ -0,0 +1,399 @@
+"""
+Keyframe-aware smart cut for editor trims.
+
+A trim is cut as up to three pieces:
+- head: start of the range up to the first keyframe inside it (re-encoded)
+- body: every whole GOP inside the range (stream-copied, no decode)
+- tail: last keyframe inside the range up to the end (re-encoded)
+
+The video pieces are spliced with the concat demuxer and stream-copied into
+the output. Boundary segments are encoded with the source's H.264 profile,
+level, pixel format and timebase, and read back before splicing; if any of
+them, or any other field of the sequence and picture parameter sets (the
+extradata the spliced stream keeps from its first piece), differs from the
+copied GOPs the cut raises SmartCutError so the caller re-encodes the whole
+clip instead of writing a stream that only some players decode. Sources
+encoded by x264 record their encoder options in an SEI message; the options
+that shape the parameter sets (reference frames, entropy coder, B-frames,
+weighted prediction, rate factor, psy tuning...) are reused for the boundary
+segments so that they match.
+
+The copied body is limited by frame count rather than time, so B-frame
+reordering cannot spill frames past its closing keyframe. Audio is cut from
+the source for the same range and re-encoded in one pass. That is cheap, and
+it avoids the priming gaps that spliced AAC pieces leave. Without frame
+accuracy both cut points snap outwards to keyframes (or the end of the file)
+and the video is stream-copied whole.
+
+Uses the ffmpeg binary MoviePy is configured with (ffprobe is not required).
+Sources are probed through the shared, memoized media probe service.
+"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from moviepy.config import FFMPEG_BINARY
+
+from app.services.media.clip_pool import ffmpeg_thread_args
+from app.services.media.probe import MediaProbe, MediaProbeError, parse_probe_output, probe_media_sync
+
+logger = logging.getLogger(__name__)
+
+# Cuts within this distance of a keyframe are treated as on the keyframe
+KEYFRAME_TOLERANCE = 0.01  # seconds
+
+# Only these source codecs can be spliced with libx264-encoded boundary segments
+SMART_CUT_CODECS = {"h264"}
+
+# libx264 profile names by SPS profile_idc
+X264_PROFILES = {66: "baseline", 77: "main", 100: "high", 110: "high10", 122: "high422", 244: "high444"}
+
+# SPS fields printed by the trace_headers bitstream filter ("name  bits = value")
+_SPS_FIELD_RE = re.compile(r"\b(profile_idc|level_idc|chroma_format_idc|bit_depth_luma_minus8)\s+[01]+ = (\d+)")
+_TRACE_FIELD_RE = re.compile(r"^\[trace_headers @ \w+\] \d+\s+(\w+)\s+[01]+ = (-?\d+)$")
+_TRACE_HEADER_RE = re.compile(r"^\[trace_headers @ \w+\] ([A-Za-z][\w ]*)$")
+_PARAMETER_SETS = ("Sequence Parameter Set", "Picture Parameter Set")
+
+# x264 options (as written in its SEI message) that are reflected in the SPS/PPS
+X264_HEADER_OPTIONS = (
+    "cabac", "ref", "subme", "psy", "trellis", "8x8dct", "bframes", "b_pyramid", "direct",
+    "weightb", "weightp", "open_gop", "keyint", "keyint_min", "constrained_intra",
+)
+# The SEI message is in the first video sample, near the start of the file
+X264_SEI_SEARCH_BYTES = 4 * 1024 * 1024
+
+# Encoding of boundary segments (x264 sources override these with their own options)
+# and of the spliced audio; part of the processed clip cache key
+BOUNDARY_ENCODE = {"codec": "libx264", "preset": "veryfast", "crf": 18, "audio_codec": "aac", "audio_bitrate": "192k"}
+
+FFMPEG_TIMEOUT_SECONDS = 300
+
+
+class SmartCutError(RuntimeError):
+    """Raised when a smart cut cannot be performed; callers fall back to a full re-encode."""
+
+
+# Stream properties needed to cut and splice a video
+VideoProbe = MediaProbe
+
+
+@dataclass(frozen=True)
+class SpliceParameters:
+    """Stream parameters that must be identical for encoded and copied pieces to splice."""
+
+    profile_idc: int
+    level_idc: int
+    chroma_format_idc: int
+    bit_depth: int
+    pix_fmt: str
+    timescale: Optional[int]
+    # Digest of every field of the first SPS and PPS
+    parameter_sets: str
+    # libx264 options reproducing the source's parameter sets (None if not encoded by x264)
+    x264_params: Optional[str] = field(default=None, compare=False)
+
+    @property
+    def x264_profile(self) -> Optional[str]:
+        return X264_PROFILES.get(self.profile_idc)
+
+    @property
+    def x264_level(self) -> str:
+        return f"{self.level_idc / 10:g}"
+
+
+def _run_ffmpeg(args: List[str]) -> subprocess.CompletedProcess:
+    """Run ffmpeg; non-zero exit raises SmartCutError with the tail of stderr."""
+    cmd = [FFMPEG_BINARY, "-hide_banner", "-nostdin", "-y", *args]
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT_SECONDS
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise SmartCutError(f"ffmpeg failed to run: {e}")
+    if result.returncode != 0:
+        raise SmartCutError(f"ffmpeg exited with {result.returncode}: {result.stderr[-500:]}")
+    return result
+
+
+def probe_video(path: str) -> VideoProbe:
+    """
+    Probe duration, codec parameters and keyframe timestamps (memoized).
+
+    Raises:
+        SmartCutError: If the file cannot be probed
+    """
+    try:
+        return probe_media_sync(path)
+    except MediaProbeError as e:
+        raise SmartCutError(str(e)) from e
+
+
+def _parameter_sets_digest(trace: str) -> str:
+    """Digest the fields of the first SPS and first PPS in trace_headers output."""
+    fields: List[str] = []
+    seen = set()
+    current = None
+    for line in trace.splitlines():
+        header = _TRACE_HEADER_RE.match(line)
+        if header:
+            name = header.group(1).strip()
+            current = name if name in _PARAMETER_SETS and name not in seen else None
+            seen.add(name)
+            continue
+        match = _TRACE_FIELD_RE.match(line) if current else None
+        if match:
+            fields.append(f"{current}:{match.group(1)}={match.group(2)}")
+    return hashlib.blake2b("\n".join(fields).encode(), digest_size=8).hexdigest()
+
+
+def read_x264_options(path: str) -> Dict[str, str]:
+    """Encoder options from the x264 SEI message of a file ({} if there is none)."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(X264_SEI_SEARCH_BYTES)
+    except OSError:
+        return {}
+    start = data.find(b"x264 - core")
+    options_start = data.find(b"options: ", start) if start >= 0 else -1
+    if options_start < 0:
+        return {}
+    end = data.find(b"\x00", options_start)
+    text = data[options_start + len(b"options: "):end if end >= 0 else None].decode("ascii", "replace")
+    return dict(item.split("=", 1) for item in text.split() if "=" in item)
+
+
+def x264_params_for(options: Dict[str, str]) -> Optional[str]:
+    """
+    Build libx264 -x264-params that reproduce the parameter sets of an x264 encode.
+
+    x264 records the chroma QP offset after its psy adjustment, so the
+    adjustment is undone here and re-applied by the encoder.
+    """
+    if not options:
+        return None
+    params = {key.replace("_", "-"): options[key] for key in X264_HEADER_OPTIONS if key in options}
+    deblock = options.get("deblock", "1:0:0").split(":")
+    if deblock[0] == "1" and len(deblock) == 3:
+        params["deblock"] = f"{deblock[1]},{deblock[2]}"
+    else:
+        params["no-deblock"] = "1"
+    try:
+        psy_rd, psy_trellis = (float(value) for value in options.get("psy_rd", "0:0").split(":"))
+        chroma_qp_offset = int(options.get("chroma_qp_offset", "0"))
+    except ValueError:
+        return None
+    params["psy-rd"] = f"{psy_rd:.2f},{psy_trellis:.2f}"
+    if options.get("psy") == "1":
+        if psy_rd and int(options.get("subme", "0")) >= 6:
+            chroma_qp_offset += 1 if psy_rd < 0.25 else 2
+        if psy_trellis and int(options.get("trellis", "0")):
+            chroma_qp_offset += 1 if psy_trellis < 0.25 else 2
+    params["chroma-qp-offset"] = str(chroma_qp_offset)
+    # The initial QP in the PPS follows the rate factor
+    if options.get("rc") == "crf" and "crf" in options:
+        params["crf"] = options["crf"]
+    elif options.get("rc") == "cqp" and "qp" in options:
+        params["qp"] = options["qp"]
+    return ":".join(f"{key}={value}" for key, value in params.items())
+
+
+def read_splice_parameters(path: str) -> SpliceParameters:
+    """
+    Read the H.264 sequence parameters and stream timebase of a file's first frame.
+
+    Raises:
+        SmartCutError: If the file cannot be read or has no H.264 sequence parameter set
+    """
+    result = _run_ffmpeg([
+        "-i", path, "-map", "0:v:0", "-c", "copy", "-bsf:v", "trace_headers",
+        "-frames:v", "1", "-f", "null", "-",
+    ])
+    try:
+        probe = parse_probe_output(result.stderr, path)
+    except MediaProbeError as e:
+        raise SmartCutError(str(e)) from e
+    # First SPS only; fields absent for profiles below High take their defaults
+    fields = {}
+    for name, value in _SPS_FIELD_RE.findall(result.stderr):
+        fields.setdefault(name, int(value))
+    if "profile_idc" not in fields or "level_idc" not in fields:
+        raise SmartCutError(f"No H.264 sequence parameters found in {path}")
+    return SpliceParameters(
+        profile_idc=fields["profile_idc"],
+        level_idc=fields["level_idc"],
+        chroma_format_idc=fields.get("chroma_format_idc", 1),
+        bit_depth=fields.get("bit_depth_luma_minus8", 0) + 8,
+        pix_fmt=probe.pix_fmt,
+        timescale=probe.timescale,
+        parameter_sets=_parameter_sets_digest(result.stderr),
+        x264_params=x264_params_for(read_x264_options(path)),
+    )
+
+
+def _copy_segment(source: str, output: str, start: float, end: float, probe: VideoProbe) -> None:
+    """Stream-copy video [start, end); start must be a keyframe and end a keyframe or EOF."""
+    # Input seeking with -c copy lands on the keyframe at or before the seek point
+    args = ["-ss", f"{start + KEYFRAME_TOLERANCE / 2:.6f}", "-i", source, "-map", "0:v:0", "-c", "copy"]
+    if end < probe.duration - KEYFRAME_TOLERANCE:
+        args += ["-t", f"{end - start:.6f}"]
+        if probe.fps:
+            # Closed GOPs: the first N packets in decode order are exactly the GOPs in range
+            args += ["-frames:v", str(round((end - start) * probe.fps))]
+    args += ["-avoid_negative_ts", "make_zero", output]
+    _run_ffmpeg(args)
+
+
+def _encode_segment(
+    source: str,
+    output: str,
+    start: float,
+    end: float,
+    probe: VideoProbe,
+    parameters: SpliceParameters,
+) -> None:
+    """Re-encode video [start, end) with the profile, level, pixel format, timebase and x264 options of the source."""
+    args = [
+        "-ss", f"{start:.6f}", *ffmpeg_thread_args(), "-i", source, "-t", f"{end - start:.6f}",
+        "-map", "0:v:0", "-c:v", BOUNDARY_ENCODE["codec"],
+        "-preset", BOUNDARY_ENCODE["preset"], "-crf", str(BOUNDARY_ENCODE["crf"]),
+        "-pix_fmt", parameters.pix_fmt,
+        "-profile:v", parameters.x264_profile, "-level:v", parameters.x264_level,
+    ]
+    if parameters.x264_params:
+        args += ["-x264-params", parameters.x264_params]
+    if probe.fps:
+        args += ["-r", f"{probe.fps:g}"]
+    if parameters.timescale:
+        args += ["-video_track_timescale", str(parameters.timescale)]
+    args += [*ffmpeg_thread_args(), output]
+    _run_ffmpeg(args)
+
+
+def _splice(source: str, pieces: List[str], output: str, start: float, end: float, probe: VideoProbe) -> None:
+    """Concatenate video pieces and mux audio for [start, end) from the source."""
+    list_path = os.path.join(os.path.dirname(pieces[0]), "pieces.txt")
+    with open(list_path, "w") as f:
+        for piece in pieces:
+            f.write(f"file '{piece}'\n")
+
+    args = ["-f", "concat", "-safe", "0", "-i", list_path]
+    if probe.has_audio:
+        args += [
+            "-ss", f"{start:.6f}", "-i", source, "-t", f"{end - start:.6f}",
+            "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy",
+            "-c:a", BOUNDARY_ENCODE["audio_codec"], "-b:a", BOUNDARY_ENCODE["audio_bitrate"],
+        ]
+    else:
+        args += ["-map", "0:v:0", "-c", "copy"]
+    args += ["-movflags", "+faststart", output]
+    _run_ffmpeg(args)
+
+
+def smart_cut(
+    source: str,
+    output: str,
+    start: float,
+    end: float,
+    frame_accurate: bool = True,
+    probe: Optional[VideoProbe] = None,
+) -> str:
+    """
+    Cut [start, end) from source into output (MP4), re-encoding as little as possible.
+
+    Args:
+        source: Source video path
+        output: Output MP4 path
+        start: Cut start in seconds
+        end: Cut end in seconds
+        frame_accurate: Re-encode partial GOPs at the edges; when False the cut
+            points snap outwards to keyframes and no video is re-encoded
+        probe: Optional pre-computed probe of source
+
+    Returns:
+        Output path
+
+    Raises:
+        SmartCutError: If the source cannot be smart-cut (caller should re-encode)
+    """
+    probe = probe or probe_video(source)
+    if probe.video_codec not in SMART_CUT_CODECS:
+        raise SmartCutError(f"Unsupported codec for smart cut: {probe.video_codec}")
+    if not probe.keyframes:
+        raise SmartCutError(f"No keyframes found in {source}")
+    if not probe.fps:
+        raise SmartCutError(f"Unknown frame rate for {source}")
+
+    start = max(0.0, start)
+    end = min(end, probe.duration)
+    if end <= start:
+        raise SmartCutError(f"Empty cut range {start:.3f}-{end:.3f}")
+
+    # (copy?, start, end) for each video piece
+    plan: List[Tuple[bool, float, float]] = []
+    if not frame_accurate:
+        start = max((k for k in probe.keyframes if k <= start + KEYFRAME_TOLERANCE), default=0.0)
+        snapped_end = min((k for k in probe.keyframes if k >= end - KEYFRAME_TOLERANCE), default=probe.duration)
+        end = snapped_end if snapped_end > start else probe.duration
+        plan.append((True, start, end))
+    else:
+        # Whole GOPs lie between the first and last keyframes inside the range;
+        # if the range runs to the end of the file the last GOP is whole too
+        inside = [k for k in probe.keyframes if start - KEYFRAME_TOLERANCE <= k <= end + KEYFRAME_TOLERANCE]
+        ends_at_eof = end >= probe.duration - KEYFRAME_TOLERANCE
+        body_start = inside[0] if inside else None
+        body_end = end if ends_at_eof else (inside[-1] if inside else None)
+
+        if body_start is None or body_end - body_start < KEYFRAME_TOLERANCE:
+            # No whole GOP inside the range - the range is short, just re-encode it
+            plan.append((False, start, end))
+        else:
+            if body_start - start > KEYFRAME_TOLERANCE:
+                plan.append((False, start, body_start))
+            else:
+                start = body_start
+            plan.append((True, body_start, body_end))
+            if end - body_end > KEYFRAME_TOLERANCE:
+                plan.append((False, body_end, end))
+            else:
+                end = body_end
+
+    parameters = None
+    if not all(copy for copy, _, _ in plan):
+        parameters = read_splice_parameters(source)
+        if parameters.x264_profile is None:
+            raise SmartCutError(f"Cannot encode H.264 profile_idc {parameters.profile_idc} of {source}")
+
+    work_dir = tempfile.mkdtemp(prefix="smartcut-", dir=os.path.dirname(os.path.abspath(output)))
+    try:
+        pieces = []
+        for index, (copy, piece_start, piece_end) in enumerate(plan):
+            piece = os.path.join(work_dir, f"piece-{index}.mp4")
+            if copy:
+                _copy_segment(source, piece, piece_start, piece_end, probe)
+            else:
+                _encode_segment(source, piece, piece_start, piece_end, probe, parameters)
+                # A lone re-encoded piece is spliced with nothing, so it need not match
+                if len(plan) > 1:
+                    encoded = read_splice_parameters(piece)
+                    if encoded != parameters:
+                        raise SmartCutError(
+                            f"Boundary segment of {os.path.basename(source)} does not match the source "
+                            f"({encoded} != {parameters})"
+                        )
+            pieces.append(piece)
+        _splice(source, pieces, output, start, end, probe)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    copied = sum(b - a for copy, a, b in plan if copy)
+    logger.info(
+        f"Smart cut {os.path.basename(source)} {start:.2f}-{end:.2f}s: "
+        f"stream-copied {copied:.2f}s, re-encoded {end - start - copied:.2f}s"
+    )
+    return output
@@ -11,6 +11,7 @@ import replicate
 import httpx
 
 from app.core.config import settings
+from app.core.tracing import record_prediction, traced
 
 logger = logging.getLogger(__name__)
 
@@ -433,6 +434,8 @@ async def _generate_with_retry(
                 await asyncio.sleep(2)  # Poll every 2 seconds
                 prediction = client.predictions.get(prediction.id)
             
+            record_prediction(prediction, model_name, "image")
+
             # Handle result
             if prediction.status == "succeeded":
                 if not prediction.output:
@@ -528,6 +531,7 @@ def prepare_image_for_replicate(image_path: str) -> str:
     return str(image_path_obj.absolute())
 
 
+@traced("prediction", name="image.download")
 async def _download_image(
     image_url: str,
     output_dir: Path,
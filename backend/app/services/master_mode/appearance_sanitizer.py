@@ -9,6 +9,8 @@ import logging
 import re
 from typing import Dict, Any, List
 
+from app.services.pipeline.text_analysis import compile_alternation
+
 logger = logging.getLogger(__name__)
 
 
@@ -95,6 +97,33 @@ REFERENCE_REPLACEMENTS = {
 }
 
 
+# Compiled once: reference simplifications and complex patterns run in order
+# (later patterns see earlier replacements); all terms are a single alternation
+# that removes the longest listed phrase at each position ("long hair", not just "hair")
+_REFERENCE_REPLACEMENTS = [
+    (re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in REFERENCE_REPLACEMENTS.items()
+]
+_APPEARANCE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in APPEARANCE_PATTERNS]
+_APPEARANCE_TERMS = compile_alternation(APPEARANCE_TERMS, whole_words=True)
+
+_CLEANUP_RULES = [
+    # Remove empty parentheses or brackets
+    (re.compile(r'\(\s*\)'), ''),
+    (re.compile(r'\[\s*\]'), ''),
+    # Clean up punctuation issues (double spaces, double commas, etc.)
+    (re.compile(r'\s+'), ' '),  # Multiple spaces -> single space
+    (re.compile(r'\s*,\s*,\s*'), ', '),  # Double commas
+    (re.compile(r'\s*\.\s*\.\s*'), '. '),  # Double periods
+    (re.compile(r',\s*\.'), '.'),  # Comma before period
+    (re.compile(r',\s*,'), ','),  # Double commas (again)
+    # Fix spacing around punctuation
+    (re.compile(r'\s+([.,;:!?])'), r'\1'),  # Remove space before punctuation
+    (re.compile(r'([.,;:!?])([A-Za-z])'), r'\1 \2'),  # Add space after punctuation
+]
+
+REMOVED_MARKER = '[APPEARANCE REMOVED]'
+
+
 def sanitize_appearance_from_prompt(prompt: str) -> str:
     """
     Remove ALL physical appearance descriptions from a video generation prompt.
@@ -109,42 +138,25 @@ def sanitize_appearance_from_prompt(prompt: str) -> str:
     sanitized = prompt
     
     # Step 1: Apply reference phrase simplifications first (to preserve structure)
-    for pattern, replacement in REFERENCE_REPLACEMENTS.items():
-        sanitized = re.sub(pattern, replacement, sanitized, flags=re.IGNORECASE)
+    for pattern, replacement in _REFERENCE_REPLACEMENTS:
+        sanitized = pattern.sub(replacement, sanitized)
     
     # Step 2: Remove complex appearance patterns
-    for pattern in APPEARANCE_PATTERNS:
-        matches = re.findall(pattern, sanitized, flags=re.IGNORECASE)
-        if matches:
-            logger.debug(f"[Appearance Sanitizer] Removing pattern: {pattern[:50]}... (found {len(matches)} matches)")
-        sanitized = re.sub(pattern, '[APPEARANCE REMOVED]', sanitized, flags=re.IGNORECASE)
-    
-    # Step 3: Remove individual appearance terms (whole words only)
-    for term in APPEARANCE_TERMS:
-        # Use word boundaries to avoid removing parts of other words
-        pattern = r'\b' + re.escape(term) + r'\b'
-        if re.search(pattern, sanitized, flags=re.IGNORECASE):
-            logger.debug(f"[Appearance Sanitizer] Removing term: {term}")
-        sanitized = re.sub(pattern, '[APPEARANCE REMOVED]', sanitized, flags=re.IGNORECASE)
+    for pattern in _APPEARANCE_PATTERNS:
+        sanitized, count = pattern.subn(REMOVED_MARKER, sanitized)
+        if count:
+            logger.debug(f"[Appearance Sanitizer] Removing pattern: {pattern.pattern[:50]}... (found {count} matches)")
+    
+    # Step 3: Remove individual appearance terms (whole words only), in one pass
+    sanitized, count = _APPEARANCE_TERMS.subn(REMOVED_MARKER, sanitized)
+    if count:
+        logger.debug(f"[Appearance Sanitizer] Removed {count} appearance terms")
     
     # Step 4: Clean up the text
     # Remove placeholder markers and extra whitespace
-    sanitized = re.sub(r'\[APPEARANCE REMOVED\]', '', sanitized)
-    
-    # Remove empty parentheses or brackets
-    sanitized = re.sub(r'\(\s*\)', '', sanitized)
-    sanitized = re.sub(r'\[\s*\]', '', sanitized)
-    
-    # Clean up punctuation issues (double spaces, double commas, etc.)
-    sanitized = re.sub(r'\s+', ' ', sanitized)  # Multiple spaces -> single space
-    sanitized = re.sub(r'\s*,\s*,\s*', ', ', sanitized)  # Double commas
-    sanitized = re.sub(r'\s*\.\s*\.\s*', '. ', sanitized)  # Double periods
-    sanitized = re.sub(r',\s*\.', '.', sanitized)  # Comma before period
-    sanitized = re.sub(r',\s*,', ',', sanitized)  # Double commas (again)
-    
-    # Fix spacing around punctuation
-    sanitized = re.sub(r'\s+([.,;:!?])', r'\1', sanitized)  # Remove space before punctuation
-    sanitized = re.sub(r'([.,;:!?])([A-Za-z])', r'\1 \2', sanitized)  # Add space after punctuation
+    sanitized = sanitized.replace(REMOVED_MARKER, '')
+    for pattern, replacement in _CLEANUP_RULES:
+        sanitized = pattern.sub(replacement, sanitized)
     
     # Remove leading/trailing whitespace
     sanitized = sanitized.strip()
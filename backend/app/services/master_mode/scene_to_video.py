@@ -12,6 +12,7 @@ from pathlib import Path
 
 from app.services.master_mode.scene_enhancer import enhance_all_scenes_for_video, align_enhanced_scenes
 from app.services.master_mode.appearance_sanitizer import sanitize_all_video_params
+from app.services.pipeline.text_analysis import analyze_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -33,13 +34,11 @@ def extract_scene_metadata(scene_content: str) -> Dict[str, Any]:
         "subject_present": True
     }
     
-    content_lower = scene_content.lower()
+    features = analyze_prompt(scene_content)
     
     # Extract duration from scene header (e.g., "Scene 1: Attention (6 seconds)")
-    import re
-    duration_match = re.search(r'\((\d+)\s*seconds?\)', content_lower)
-    if duration_match:
-        duration = int(duration_match.group(1))
+    if features.scene_duration is not None:
+        duration = features.scene_duration
         # Veo 3.1 only supports 4, 6, or 8 seconds
         if duration <= 4:
             metadata["duration"] = 4
@@ -48,22 +47,12 @@ def extract_scene_metadata(scene_content: str) -> Dict[str, Any]:
         else:
             metadata["duration"] = 8
     
-    # Detect camera movement
-    if any(word in content_lower for word in ["push-in", "push in", "dolly in"]):
-        metadata["camera_movement"] = "push-in"
-    elif any(word in content_lower for word in ["pull-out", "pull out", "dolly out"]):
-        metadata["camera_movement"] = "pull-out"
-    elif any(word in content_lower for word in ["pan left", "panning left"]):
-        metadata["camera_movement"] = "pan-left"
-    elif any(word in content_lower for word in ["pan right", "panning right"]):
-        metadata["camera_movement"] = "pan-right"
-    elif any(word in content_lower for word in ["tilt up"]):
-        metadata["camera_movement"] = "tilt-up"
-    elif any(word in content_lower for word in ["tilt down"]):
-        metadata["camera_movement"] = "tilt-down"
+    # Detect camera movement (push-in, pull-out, pan-left/right, tilt-up/down)
+    if features.camera_movement:
+        metadata["camera_movement"] = features.camera_movement
     
-    # Detect if subject is present
-    if "subject does not appear" in content_lower or "no subject" in content_lower:
+    # Detect if subject is present ("subject does not appear", "no subject")
+    if features.has("subject_absent"):
         metadata["subject_present"] = False
     
     return metadata
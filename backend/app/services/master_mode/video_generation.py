@@ -9,7 +9,7 @@ import logging
 import os
 import shutil
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
 
 from app.services.pipeline.video_generation import generate_video_clip_with_model
@@ -108,7 +108,8 @@ async def generate_all_scene_videos(
     video_params_list: List[Dict[str, Any]],
     output_dir: Path,
     generation_id: str,
-    max_parallel: int = 4
+    max_parallel: int = 4,
+    on_video_ready: Optional[Callable[[str], None]] = None
 ) -> List[Optional[str]]:
     """
     Generate videos for all scenes in parallel.
@@ -118,6 +119,8 @@ async def generate_all_scene_videos(
         output_dir: Directory to save generated videos
         generation_id: Unique generation ID
         max_parallel: Maximum number of parallel video generations (default: 4)
+        on_video_ready: Optional callback invoked with each scene video path as soon
+            as that scene finishes (e.g. to start its upload)
         
     Returns:
         List of video paths (or None for failed scenes)
@@ -132,7 +135,10 @@ async def generate_all_scene_videos(
     
     async def generate_with_semaphore(scene_params: Dict[str, Any], scene_num: int):
         async with semaphore:
-            return await generate_scene_video(scene_params, output_dir, scene_num, generation_id)
+            video_path = await generate_scene_video(scene_params, output_dir, scene_num, generation_id)
+        if video_path and on_video_ready:
+            on_video_ready(video_path)
+        return video_path
     
     # Create tasks for all scenes
     tasks = [
@@ -200,7 +206,8 @@ async def generate_and_stitch_videos(
     output_dir: Path,
     final_output_path: Path,
     generation_id: str,
-    max_parallel: int = 4
+    max_parallel: int = 4,
+    on_video_ready: Optional[Callable[[str], None]] = None
 ) -> Optional[str]:
     """
     Generate all scene videos and stitch them together into final video.
@@ -212,6 +219,8 @@ async def generate_and_stitch_videos(
         final_output_path: Path for the final stitched video
         generation_id: Unique generation ID
         max_parallel: Maximum number of parallel video generations
+        on_video_ready: Optional callback invoked with each scene video path as soon
+            as that scene finishes
         
     Returns:
         Path to final stitched video or None if failed
@@ -226,7 +235,8 @@ async def generate_and_stitch_videos(
             video_params_list=video_params_list,
             output_dir=output_dir,
             generation_id=generation_id,
-            max_parallel=max_parallel
+            max_parallel=max_parallel,
+            on_video_ready=on_video_ready
         )
         
         # Check if all videos were generated
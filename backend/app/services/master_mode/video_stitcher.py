@@ -12,6 +12,9 @@ from moviepy import VideoFileClip, concatenate_videoclips
 from moviepy.video.fx.FadeIn import FadeIn
 from moviepy.video.fx.FadeOut import FadeOut
 
+from app.core.tracing import traced
+from app.services.media.probe import probe_media_sync
+
 logger = logging.getLogger(__name__)
 
 
@@ -75,6 +78,13 @@ class VideoStitcher:
         logger.info(f"[Stitcher] Loading clip {clip_number}/{total_clips}: {clip_path_obj.name}")
         
         try:
+            # Memoized probe (shared with generation-time validation) rejects unreadable files
+            # before MoviePy opens them
+            probe = probe_media_sync(str(clip_path))
+            logger.debug(
+                f"[Stitcher] Clip {clip_number}: {probe.width}x{probe.height}, "
+                f"{probe.duration:.2f}s, {probe.fps} fps, audio: {probe.audio_channel_layout or 'none'}"
+            )
             clip = VideoFileClip(str(clip_path))
             
             # Normalize frame rate if needed
@@ -299,6 +309,7 @@ class VideoStitcher:
 
 
 # Convenience function for backward compatibility
+@traced("encode")
 def stitch_master_mode_videos(
     video_paths: List[str],
     output_path: str,
@@ -0,0 +1,302 @@
+"""
+Process pool for per-clip media work.
+
+Text overlays and editor export do CPU-bound MoviePy/ffmpeg work that is
+independent per clip. run_per_clip fans the clips out to worker processes and
+returns the results in input order.
+
+The workers belong to one spawn pool per process, created on first use and
+shared with video quality scoring (video_scoring_pool), so the interpreter
+start-up and imports of a worker are paid once rather than per batch. The app
+stops it on shutdown (shutdown_media_executor).
+
+The CPU is split explicitly between workers: every task gets
+cpu_count // pool workers encoder threads (get_worker_threads, passed to
+ffmpeg/MoviePy as -threads), so the pool never runs more encoder threads than
+there are cores, however the running batches are sized. Work runs inline (no
+pool) when only one worker would be used, e.g. for a single clip or with
+MEDIA_POOL_WORKERS=1.
+
+When a batch is cancelled or one of its clips fails, clips that have not
+started are dropped and the ones already running are stopped: a watcher
+thread in each worker kills the ffmpeg processes of its task once the batch's
+cancel flag file exists, so the task fails fast without breaking the shared
+pool.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How often the parent checks cancellation while clips are processing
+CANCELLATION_POLL_SECONDS = 1.0
+
+# How long a cancelled batch waits for its running clips to stop
+CANCEL_GRACE_SECONDS = 10.0
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+# Encoder threads for this process; set in pool workers only
+_worker_threads: Optional[int] = None
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class ClipTaskCancelled(RuntimeError):
+    """Raised when cancellation_check requests a stop before all clips finished."""
+
+
+class ClipTaskError(RuntimeError):
+    """Raised when processing one clip fails; the original exception is the __cause__."""
+
+    def __init__(self, index: int, error: BaseException):
+        super().__init__(str(error))
+        self.index = index
+
+
+def get_worker_threads() -> Optional[int]:
+    """
+    Get the encoder thread count for this process.
+
+    Returns:
+        Threads to pass to ffmpeg/MoviePy in pool workers, None elsewhere (encoder default)
+    """
+    return _worker_threads
+
+
+def ffmpeg_thread_args(option: str = "-threads") -> List[str]:
+    """
+    Get an ffmpeg thread option capped to this worker's CPU share.
+
+    ffmpeg applies -threads to the next input (decoder) or output (encoder),
+    so commands add it before each -i and before each output they encode;
+    -filter_complex_threads caps filter graphs.
+
+    Returns:
+        [option, threads] in pool workers, [] elsewhere (ffmpeg default)
+    """
+    return [option, str(_worker_threads)] if _worker_threads else []
+
+
+def init_worker(threads: int) -> None:
+    """Pin native thread pools (BLAS, OpenCV) in a new worker process to its CPU share."""
+    global _worker_threads
+    _worker_threads = threads
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        import cv2
+    except ImportError:
+        return
+    cv2.setNumThreads(threads)
+
+
+def _child_pids() -> List[int]:
+    """PIDs of this process's child processes (read from /proc; empty where it does not exist)."""
+    parent = os.getpid()
+    pids = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return pids
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # "pid (comm) state ppid ..." - comm may contain spaces
+        fields = stat.rsplit(")", 1)[-1].split()
+        if len(fields) > 1 and fields[1] == str(parent):
+            pids.append(int(entry))
+    return pids
+
+
+def _kill_children_on_cancel(cancel_path: str, finished: threading.Event) -> None:
+    """Kill the task's subprocesses (ffmpeg) for as long as the batch is cancelled."""
+    while not finished.wait(CANCELLATION_POLL_SECONDS):
+        if not os.path.exists(cancel_path):
+            continue
+        for pid in _child_pids():
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def _call_in_worker(func: Callable[..., Any], kwargs: Dict[str, Any], cancel_path: str) -> Any:
+    """Run one task of a batch in a worker, stopping its subprocesses if the batch is cancelled."""
+    finished = threading.Event()
+    watcher = threading.Thread(target=_kill_children_on_cancel, args=(cancel_path, finished), daemon=True)
+    watcher.start()
+    try:
+        return func(**kwargs)
+    finally:
+        finished.set()
+        watcher.join()
+
+
+def resolve_pool_size(num_items: int) -> Tuple[int, int]:
+    """
+    Get (workers, threads_per_worker) for a batch of clips.
+
+    MEDIA_POOL_WORKERS caps the workers (0 = one per CPU). Each worker gets
+    its share of the CPUs for the whole pool, since other batches and video
+    scoring may be running on the remaining workers.
+    """
+    cpus = os.cpu_count() or 1
+    pool_workers = _max_workers(cpus)
+    workers = max(1, min(pool_workers, num_items))
+    return workers, max(1, cpus // pool_workers)
+
+
+def _max_workers(cpus: int) -> int:
+    return settings.MEDIA_POOL_WORKERS if settings.MEDIA_POOL_WORKERS > 0 else cpus
+
+
+def get_media_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the process-wide media pool, creating it on first use.
+
+    Returns:
+        The shared executor, or None when MEDIA_POOL_WORKERS (or the CPU count) allows one worker
+    """
+    global _executor
+    cpus = os.cpu_count() or 1
+    workers = _max_workers(cpus)
+    if workers == 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            logger.info(f"Starting media pool with {workers} workers")
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(max(1, cpus // workers),),
+            )
+        return _executor
+
+
+def discard_broken_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died (e.g. OOM-killed) so the next call starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_media_executor() -> None:
+    """Stop the media pool (app shutdown); queued work is cancelled."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_per_clip(
+    func: Callable[..., Any],
+    tasks: Sequence[Dict[str, Any]],
+    cancellation_check: Optional[Callable[[], bool]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> List[Any]:
+    """
+    Run func(**kwargs) for each task, in parallel worker processes.
+
+    func and the task arguments must be picklable (module-level function,
+    plain data). Cancellation is checked in the calling process, so
+    cancellation_check may use the caller's DB session. On cancellation or
+    failure the clips that have not started are dropped and the subprocesses
+    of clips already running are killed (waiting up to CANCEL_GRACE_SECONDS
+    for them to stop); their results are discarded.
+
+    Args:
+        func: Module-level function processing one clip
+        tasks: Keyword arguments for each call
+        cancellation_check: Optional function returning True to stop processing
+        progress_callback: Optional function(completed, total) called as clips finish
+
+    Returns:
+        Results in the same order as tasks
+
+    Raises:
+        ClipTaskCancelled: If cancellation was requested
+        ClipTaskError: If processing a clip failed (remaining clips are abandoned)
+    """
+    total = len(tasks)
+    results: List[Any] = [None] * total
+    workers, threads = resolve_pool_size(total)
+    executor = get_media_executor() if workers > 1 else None
+
+    if executor is None:
+        for index, kwargs in enumerate(tasks):
+            if cancellation_check and cancellation_check():
+                raise ClipTaskCancelled("Cancelled by user")
+            try:
+                results[index] = func(**kwargs)
+            except Exception as e:
+                raise ClipTaskError(index, e) from e
+            if progress_callback:
+                progress_callback(index + 1, total)
+        return results
+
+    logger.info(f"Processing {total} clips with {workers} workers x {threads} threads")
+    cancel_path = os.path.join(tempfile.gettempdir(), f"clip-pool-cancel-{uuid.uuid4().hex}")
+    pending: Dict[Future, int] = {}
+    try:
+        for index, kwargs in enumerate(tasks):
+            pending[executor.submit(_call_in_worker, func, kwargs, cancel_path)] = index
+        completed = 0
+        while pending:
+            if cancellation_check and cancellation_check():
+                raise ClipTaskCancelled("Cancelled by user")
+
+            done, _ = wait(pending, timeout=CANCELLATION_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except BrokenProcessPool as e:
+                    discard_broken_executor(executor)
+                    raise ClipTaskError(index, e) from e
+                except Exception as e:
+                    raise ClipTaskError(index, e) from e
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, total)
+        return results
+    finally:
+        running = [future for future in pending if not future.cancel()]
+        if running:
+            _stop_running(running, cancel_path)
+
+
+def _stop_running(running: List[Future], cancel_path: str) -> None:
+    """Signal the running tasks of an abandoned batch to stop and wait for them."""
+    try:
+        open(cancel_path, "w").close()
+    except OSError as e:
+        logger.warning(f"Could not signal running clips to stop: {e}")
+        return
+    _, not_done = wait(running, timeout=CANCEL_GRACE_SECONDS)
+    if not_done:
+        # The flag stays so their watchers keep stopping them
+        logger.warning(f"{len(not_done)} cancelled clips are still running")
+        return
+    os.remove(cancel_path)
@@ -0,0 +1,349 @@
+"""
+Image Ingest Service
+
+Streams uploaded brand style and product images to disk, deduplicates them by
+content hash across a user's folders and pre-generates the derivatives that
+downstream stages need, so vision calls never re-open the full-size originals.
+
+Layout (under assets/users/{user_id}/):
+    brand_styles/{filename}            original upload (or hardlink to a duplicate)
+    products/{filename}                original upload (or hardlink to a duplicate)
+    derived/{sha256}/model.jpg         model-input sized JPEG
+    derived/{sha256}/thumb.jpg         thumbnail for the UI
+    derived/{sha256}/meta.json         dimensions, perceptual hash and source paths
+
+Derivatives are content-addressed, so replacing a folder with the same images
+(or uploading a product shot that is already a brand style image) costs one
+hash pass and no re-encoding.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Set, Union
+
+from fastapi import UploadFile
+
+from app.core.config import BACKEND_DIR
+from app.utils import storage
+
+logger = logging.getLogger(__name__)
+
+# Read/write chunk size for streaming uploads to disk
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# Longest edge of the image sent to vision models
+MODEL_INPUT_MAX_SIZE = 1024
+
+# Longest edge of the UI thumbnail
+THUMBNAIL_MAX_SIZE = 256
+
+MODEL_INPUT_FILENAME = "model.jpg"
+THUMBNAIL_FILENAME = "thumb.jpg"
+META_FILENAME = "meta.json"
+
+_CONTENT_TYPE_EXTENSIONS = {
+    "image/webp": ".webp",
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+}
+
+
+@dataclass
+class IngestedImage:
+    """Result of ingesting one uploaded image."""
+
+    path: Path
+    content_hash: str
+    file_size: int
+    perceptual_hash: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    deduplicated: bool = False
+
+    @property
+    def relative_path(self) -> str:
+        """Path relative to BACKEND_DIR (absolute if outside it)."""
+        return _relative_to_backend(self.path)
+
+
+def _relative_to_backend(path: Path) -> str:
+    try:
+        return str(path.relative_to(BACKEND_DIR))
+    except ValueError:
+        return str(path.absolute())
+
+
+def _source_path(source: str) -> Path:
+    path = Path(source)
+    return path if path.is_absolute() else BACKEND_DIR / path
+
+
+def get_derived_dir(user_id: str, content_hash: str) -> Path:
+    """Get the derivative directory for an image hash (does not create it)."""
+    return storage.STORAGE_BASE_DIR / user_id / "derived" / content_hash
+
+
+def resolve_model_input(user_id: str, file_path: Union[str, Path], content_hash: Optional[str]) -> Path:
+    """
+    Get the image to send to a vision model.
+
+    Returns the pre-generated model-input derivative when it exists, otherwise
+    the original upload (images ingested before derivatives existed).
+    """
+    if content_hash:
+        derived = get_derived_dir(user_id, content_hash) / MODEL_INPUT_FILENAME
+        if derived.exists():
+            return derived
+    return Path(file_path)
+
+
+def get_thumbnail_url(user_id: str, content_hash: Optional[str]) -> Optional[str]:
+    """Get the /api/assets URL of an image's thumbnail, if one was generated."""
+    if not content_hash:
+        return None
+    if not (get_derived_dir(user_id, content_hash) / THUMBNAIL_FILENAME).exists():
+        return None
+    return f"/api/assets/users/{user_id}/derived/{content_hash}/{THUMBNAIL_FILENAME}"
+
+
+def _safe_filename(file: UploadFile) -> str:
+    """Sanitize the upload filename, keeping a valid image extension."""
+    # webkitdirectory uploads may include path components - keep only the name
+    filename = Path(file.filename or "image").name
+    safe_filename = "".join(c for c in filename if c.isalnum() or c in (".", "-", "_")).strip()
+    if not Path(safe_filename).suffix:
+        safe_filename += _CONTENT_TYPE_EXTENSIONS.get(file.content_type, "")
+    return safe_filename or "image"
+
+
+def _unique_path(directory: Path, filename: str, taken: Set[str]) -> Path:
+    """Pick a free filename in directory, appending _N on collisions."""
+    stem, suffix = Path(filename).stem, Path(filename).suffix
+    candidate = filename
+    counter = 1
+    while candidate in taken or (directory / candidate).exists():
+        candidate = f"{stem}_{counter}{suffix}"
+        counter += 1
+    taken.add(candidate)
+    return directory / candidate
+
+
+def _stream_to_file(source: BinaryIO, destination: Path) -> tuple:
+    """Copy source to destination in chunks, hashing as we go."""
+    digest = hashlib.sha256()
+    size = 0
+    source.seek(0)
+    with open(destination, "wb") as out:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _write_bytes(content: bytes, destination: Path) -> tuple:
+    destination.write_bytes(content)
+    return hashlib.sha256(content).hexdigest(), len(content)
+
+
+def _dhash(image, hash_size: int = 8) -> str:
+    """Difference hash: 64-bit perceptual hash as 16 hex characters."""
+    from PIL import Image
+
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def _read_meta(derived_dir: Path) -> Optional[Dict]:
+    meta_path = derived_dir / META_FILENAME
+    if not meta_path.exists():
+        return None
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable image metadata {meta_path}: {e}")
+        return None
+
+
+def _write_meta(derived_dir: Path, meta: Dict) -> None:
+    tmp_path = derived_dir / f"{META_FILENAME}.part"
+    tmp_path.write_text(json.dumps(meta))
+    os.replace(tmp_path, derived_dir / META_FILENAME)
+
+
+def _build_derivatives(source: Path, derived_dir: Path) -> Optional[Dict]:
+    """Decode the original once and write model input, thumbnail and metadata."""
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(source) as opened:
+            image = ImageOps.exif_transpose(opened).convert("RGB")
+    except Exception as e:
+        logger.warning(f"Could not decode {source} for derivatives: {e}")
+        return None
+
+    derived_dir.mkdir(parents=True, exist_ok=True)
+    model_input = image.copy()
+    model_input.thumbnail((MODEL_INPUT_MAX_SIZE, MODEL_INPUT_MAX_SIZE), Image.LANCZOS)
+    model_input.save(derived_dir / MODEL_INPUT_FILENAME, "JPEG", quality=90)
+    model_input.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE), Image.LANCZOS)
+    model_input.save(derived_dir / THUMBNAIL_FILENAME, "JPEG", quality=85)
+
+    return {
+        "width": image.width,
+        "height": image.height,
+        "perceptual_hash": _dhash(image),
+        "sources": [],
+    }
+
+
+def _finalize(user_id: str, part_path: Path, target: Path, content_hash: str, file_size: int) -> IngestedImage:
+    """
+    Move a streamed upload into place, reusing an existing copy and its
+    derivatives when the same content is already stored for this user.
+    """
+    derived_dir = get_derived_dir(user_id, content_hash)
+    meta = _read_meta(derived_dir)
+
+    existing = None
+    if meta:
+        for source in meta.get("sources", []):
+            source_path = _source_path(source)
+            if source_path.exists() and source_path.resolve() != target.resolve():
+                existing = source_path
+                break
+
+    deduplicated = False
+    if existing is not None:
+        try:
+            os.link(existing, target)
+            part_path.unlink()
+        except OSError:
+            os.replace(part_path, target)
+        deduplicated = True
+        logger.info(f"Deduplicated upload {target.name} against {existing}")
+    else:
+        os.replace(part_path, target)
+
+    if meta is None:
+        meta = _build_derivatives(target, derived_dir)
+
+    if meta is not None:
+        relative = _relative_to_backend(target)
+        sources = [s for s in meta.get("sources", []) if _source_path(s).exists()]
+        if relative not in sources:
+            sources.append(relative)
+        meta["sources"] = sources
+        _write_meta(derived_dir, meta)
+
+    return IngestedImage(
+        path=target,
+        content_hash=content_hash,
+        file_size=file_size,
+        perceptual_hash=meta.get("perceptual_hash") if meta else None,
+        width=meta.get("width") if meta else None,
+        height=meta.get("height") if meta else None,
+        deduplicated=deduplicated,
+    )
+
+
+async def ingest_uploaded_images(
+    user_id: str,
+    files: List[UploadFile],
+    folder_type: str,
+) -> List[IngestedImage]:
+    """
+    Stream uploaded images to the user's folder and pre-generate derivatives.
+
+    File I/O, hashing and image decoding run in worker threads. Identical
+    images within one upload are stored once; images already stored in the
+    user's other folder are hardlinked and reuse their derivatives.
+
+    Args:
+        user_id: User ID
+        files: List of uploaded files
+        folder_type: Type of folder ('brand_styles' or 'products')
+
+    Returns:
+        List of ingested images, in upload order, excluding invalid files and
+        in-batch duplicates
+
+    Raises:
+        OSError: If file saving fails
+        ValueError: If folder_type is invalid
+    """
+    user_dir = storage.ensure_user_directory(user_id, folder_type)
+
+    ingested: List[IngestedImage] = []
+    taken: Set[str] = set()
+    seen_hashes: Set[str] = set()
+
+    for file in files:
+        if not storage.validate_image_file(file):
+            logger.warning(f"Skipping invalid file: {file.filename}")
+            continue
+
+        target = _unique_path(user_dir, _safe_filename(file), taken)
+        part_path = target.with_name(f".{target.name}.part")
+
+        try:
+            source = getattr(file, "file", None)
+            if source is not None:
+                content_hash, file_size = await asyncio.to_thread(_stream_to_file, source, part_path)
+            else:
+                content_hash, file_size = await asyncio.to_thread(_write_bytes, await file.read(), part_path)
+        except Exception:
+            part_path.unlink(missing_ok=True)
+            raise
+
+        if content_hash in seen_hashes:
+            part_path.unlink(missing_ok=True)
+            taken.discard(target.name)
+            logger.info(f"Skipping duplicate image in upload: {file.filename}")
+            continue
+        seen_hashes.add(content_hash)
+
+        image = await asyncio.to_thread(_finalize, user_id, part_path, target, content_hash, file_size)
+        ingested.append(image)
+        logger.info(f"Saved image: {image.relative_path} (sha256: {content_hash[:12]})")
+
+    return ingested
+
+
+def remove_orphaned_derivatives(user_id: str) -> int:
+    """
+    Delete derivative directories whose originals no longer exist.
+
+    Returns:
+        Number of derivative directories removed
+    """
+    derived_root = storage.STORAGE_BASE_DIR / user_id / "derived"
+    if not derived_root.exists():
+        return 0
+
+    removed = 0
+    for derived_dir in derived_root.iterdir():
+        meta = _read_meta(derived_dir) or {}
+        if any(_source_path(s).exists() for s in meta.get("sources", [])):
+            continue
+        shutil.rmtree(derived_dir, ignore_errors=True)
+        removed += 1
+    if removed:
+        logger.info(f"Removed {removed} orphaned image derivative(s) for user {user_id}")
+    return removed
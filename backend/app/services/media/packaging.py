@@ -0,0 +1,366 @@
+"""
+Delivery packaging for finished ads.
+
+Runs after the final MP4 is written (export_final_video, Master Mode
+stitching) and prepares it for playback in the gallery:
+
+- Fast start: the MP4 is remuxed (stream copy, no re-encode) so the moov
+  atom precedes the media data and players can start before the download
+  finishes. Files that are already fast-start are left untouched.
+- Poster: a full-resolution JPEG frame for the player before playback.
+- HLS ladder (DELIVERY_HLS_ENABLED): 360p/720p/1080p H.264 renditions with
+  aligned keyframes and a master playlist, so players pick a rung for the
+  viewer's bandwidth. Rungs above the source resolution are skipped.
+
+The result is a JSON-serializable manifest that is stored on the
+Generation row (Generation.delivery). Paths in the manifest use the same
+form as Generation.video_url: relative to the static mount locally, or S3
+keys when STORAGE_MODE is "s3".
+"""
+import logging
+import os
+import shutil
+import struct
+import subprocess
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from moviepy.config import FFMPEG_BINARY
+
+from app.core.config import settings
+from app.core.tracing import traced
+from app.services.media.clip_pool import ffmpeg_thread_args
+from app.services.media.probe import MediaProbe, MediaProbeError, probe_media_sync
+from app.services.storage.upload_manager import get_upload_manager
+
+logger = logging.getLogger(__name__)
+
+PACKAGING_TIMEOUT_SECONDS = 600
+HLS_AUDIO_BITRATE = "128k"
+
+_CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".jpg": "image/jpeg",
+    ".mp4": "video/mp4",
+}
+
+
+class PackagingError(RuntimeError):
+    """Raised when ffmpeg fails to package a video for delivery."""
+
+
+@dataclass(frozen=True)
+class Rung:
+    """One rendition of the HLS ladder."""
+
+    name: str
+    short_side: int  # px of the shorter dimension (360p = 360 for 16:9 and 9:16 alike)
+    video_bitrate_k: int
+
+
+HLS_LADDER = (
+    Rung("360p", 360, 800),
+    Rung("720p", 720, 2800),
+    Rung("1080p", 1080, 5000),
+)
+
+
+def _run_ffmpeg(args: List[str], description: str) -> None:
+    command = [
+        FFMPEG_BINARY, "-hide_banner", "-nostdin", "-y", "-loglevel", "error",
+        *ffmpeg_thread_args("-filter_complex_threads"), *args,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=PACKAGING_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise PackagingError(f"{description} failed to run: {e}") from e
+    if result.returncode != 0:
+        raise PackagingError(f"{description} failed: {result.stderr.strip()[-500:]}")
+
+
+def is_faststart(path: str) -> bool:
+    """
+    Return True if the MP4's moov atom comes before its mdat atom.
+
+    Only the top-level box headers are read, so this is cheap for any file size.
+    """
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            size, box_type = struct.unpack(">I4s", f.read(8))
+            if box_type == b"moov":
+                return True
+            if box_type == b"mdat":
+                return False
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0]
+            elif size == 0:
+                break
+            if size < 8:
+                break
+            offset += size
+    return False
+
+
+def faststart_remux(path: str) -> bool:
+    """
+    Move the moov atom to the front of an MP4 in place (stream copy).
+
+    Args:
+        path: MP4 file to remux
+
+    Returns:
+        bool: True if the file was remuxed, False if it was already fast-start
+
+    Raises:
+        PackagingError: If ffmpeg fails (the original file is left as it was)
+    """
+    if is_faststart(path):
+        return False
+
+    tmp_path = f"{path}.faststart.mp4"
+    try:
+        _run_ffmpeg(
+            ["-i", path, "-map", "0", "-c", "copy", "-movflags", "+faststart", tmp_path],
+            f"Fast-start remux of {path}",
+        )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.debug(f"Remuxed {path} with moov atom first")
+    return True
+
+
+def extract_poster(path: str, output_path: str, probe: MediaProbe) -> None:
+    """
+    Write a full-resolution JPEG poster frame.
+
+    The frame is taken at the second keyframe if there is one (the first
+    frame of generated clips is often a fade-in), otherwise at 0.1s.
+    """
+    timestamp = probe.keyframes[1] if len(probe.keyframes) > 1 else min(0.1, probe.duration / 2)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    _run_ffmpeg(
+        ["-ss", f"{timestamp:.3f}", "-i", path, "-frames:v", "1", "-q:v", "2", output_path],
+        f"Poster extraction from {path}",
+    )
+
+
+def _even(value: float) -> int:
+    return max(2, int(round(value / 2)) * 2)
+
+
+def select_rungs(width: int, height: int) -> List[Dict[str, Any]]:
+    """
+    Pick the ladder rungs for a source size, preserving its aspect ratio.
+
+    Rungs above the source's short side are skipped (no upscaling); the
+    lowest rung is always kept.
+
+    Returns:
+        List of dicts with name, width, height and video_bitrate_k
+    """
+    short_side = min(width, height)
+    rungs = [rung for rung in HLS_LADDER if rung.short_side <= short_side] or [HLS_LADDER[0]]
+    selected = []
+    for rung in rungs:
+        scale = rung.short_side / short_side
+        selected.append({
+            "name": rung.name,
+            "width": _even(width * scale),
+            "height": _even(height * scale),
+            "video_bitrate_k": rung.video_bitrate_k,
+        })
+    return selected
+
+
+def build_hls_ladder(path: str, output_dir: str, probe: MediaProbe) -> List[Dict[str, Any]]:
+    """
+    Encode the HLS renditions and master playlist in one ffmpeg pass.
+
+    Keyframes are forced every DELIVERY_HLS_SEGMENT_SECONDS in every rung so
+    segment boundaries line up and players can switch rungs at any segment.
+
+    Args:
+        path: Source MP4
+        output_dir: Directory for master.m3u8 and one sub-directory per rung
+        probe: Probe of the source (size, audio)
+
+    Returns:
+        List of rendition dicts (name, width, height, bandwidth, playlist
+        relative to output_dir)
+
+    Raises:
+        PackagingError: If ffmpeg fails
+    """
+    rungs = select_rungs(probe.width, probe.height)
+    segment_seconds = settings.DELIVERY_HLS_SEGMENT_SECONDS
+    shutil.rmtree(output_dir, ignore_errors=True)
+    Path(output_dir).mkdir(parents=True)
+
+    splits = "".join(f"[v{i}]" for i in range(len(rungs)))
+    filters = [f"[0:v]split={len(rungs)}{splits}"]
+    filters += [f"[v{i}]scale={rung['width']}:{rung['height']}[v{i}out]" for i, rung in enumerate(rungs)]
+
+    args = [*ffmpeg_thread_args(), "-i", path, "-filter_complex", ";".join(filters)]
+    stream_map = []
+    for i, rung in enumerate(rungs):
+        args += ["-map", f"[v{i}out]"]
+        if probe.has_audio:
+            args += ["-map", "0:a:0"]
+        args += [
+            f"-b:v:{i}", f"{rung['video_bitrate_k']}k",
+            f"-maxrate:v:{i}", f"{int(rung['video_bitrate_k'] * 1.07)}k",
+            f"-bufsize:v:{i}", f"{rung['video_bitrate_k'] * 2}k",
+        ]
+        stream_map.append(f"v:{i},a:{i},name:{rung['name']}" if probe.has_audio else f"v:{i},name:{rung['name']}")
+
+    args += [
+        *ffmpeg_thread_args(), "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})", "-sc_threshold", "0",
+    ]
+    if probe.has_audio:
+        args += ["-c:a", "aac", "-b:a", HLS_AUDIO_BITRATE, "-ac", "2"]
+    args += [
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", str(Path(output_dir) / "%v" / "segment_%03d.ts"),
+        "-master_pl_name", "master.m3u8",
+        "-var_stream_map", " ".join(stream_map),
+        str(Path(output_dir) / "%v" / "index.m3u8"),
+    ]
+    _run_ffmpeg(args, f"HLS packaging of {path}")
+
+    audio_bits = int(HLS_AUDIO_BITRATE.rstrip("k")) * 1000 if probe.has_audio else 0
+    return [
+        {
+            "name": rung["name"],
+            "width": rung["width"],
+            "height": rung["height"],
+            "bandwidth": rung["video_bitrate_k"] * 1000 + audio_bits,
+            "playlist": f"{rung['name']}/index.m3u8",
+        }
+        for rung in rungs
+    ]
+
+
+def _publish(
+    local_path: Path,
+    output_dir: Path,
+    storage_prefix: str,
+    s3_prefix: Optional[str],
+    uploads: List[Future],
+    generation_id: Optional[str],
+) -> str:
+    """Return the stored path for a packaged file, starting its S3 upload when configured."""
+    relative = local_path.relative_to(output_dir).as_posix()
+    if s3_prefix is None:
+        return f"{storage_prefix}/{relative}"
+
+    s3_key = f"{s3_prefix}/{relative}"
+    uploads.append(get_upload_manager().submit(
+        str(local_path), s3_key, content_type=_CONTENT_TYPES.get(local_path.suffix), generation_id=generation_id
+    ))
+    return s3_key
+
+
+@traced("encode")
+def package_for_delivery(
+    video_path: str,
+    output_dir: str,
+    storage_prefix: str,
+    s3_prefix: Optional[str] = None,
+    poster: bool = True,
+    hls: Optional[bool] = None,
+    generation_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Package a finished MP4 for delivery.
+
+    The MP4 is remuxed in place for fast start. The poster and HLS ladder
+    are written under output_dir and, if s3_prefix is given and
+    STORAGE_MODE is "s3", uploaded under that prefix as soon as each is
+    written (the poster uploads while the ladder encodes). HLS playlists
+    reference their segments by relative path, so S3 delivery of the ladder
+    needs public (or CDN) read access to the prefix.
+
+    Args:
+        video_path: Final MP4 (remuxed in place)
+        output_dir: Directory for the poster and the HLS ladder
+        storage_prefix: Path of output_dir as stored locally (e.g. "delivery/<id>")
+        s3_prefix: S3 key prefix for uploads (None = keep local)
+        poster: Extract a poster frame (False when a thumbnail already exists)
+        hls: Build the HLS ladder (None = settings.DELIVERY_HLS_ENABLED)
+        generation_id: Generation to report upload progress on
+
+    Returns:
+        Dict: Delivery manifest with "faststart", "poster" and "hls" entries
+        ("poster"/"hls" are None when not produced)
+
+    Raises:
+        PackagingError: If the video cannot be probed, packaged or uploaded
+    """
+    if hls is None:
+        hls = settings.DELIVERY_HLS_ENABLED
+    if settings.STORAGE_MODE != "s3":
+        s3_prefix = None
+
+    remuxed = faststart_remux(video_path)
+    try:
+        probe = probe_media_sync(video_path)
+    except MediaProbeError as e:
+        raise PackagingError(str(e)) from e
+
+    package_dir = Path(output_dir)
+    uploads: List[Future] = []
+    manifest: Dict[str, Any] = {
+        "faststart": True,
+        "width": probe.width,
+        "height": probe.height,
+        "duration": round(probe.duration, 3),
+        "poster": None,
+        "hls": None,
+    }
+
+    if poster:
+        poster_path = package_dir / "poster.jpg"
+        extract_poster(video_path, str(poster_path), probe)
+        manifest["poster"] = _publish(
+            poster_path, package_dir, storage_prefix, s3_prefix, uploads, generation_id
+        )
+
+    if hls:
+        hls_dir = package_dir / "hls"
+        renditions = build_hls_ladder(video_path, str(hls_dir), probe)
+        files = sorted(p for p in hls_dir.rglob("*") if p.is_file())
+        stored = {
+            p: _publish(p, package_dir, storage_prefix, s3_prefix, uploads, generation_id)
+            for p in files
+        }
+        manifest["hls"] = {
+            "master": stored[hls_dir / "master.m3u8"],
+            "segment_seconds": settings.DELIVERY_HLS_SEGMENT_SECONDS,
+            "renditions": [
+                {**rendition, "playlist": stored[hls_dir / rendition["playlist"]]}
+                for rendition in renditions
+            ],
+        }
+
+    for upload in uploads:
+        try:
+            upload.result()
+        except Exception as e:
+            raise PackagingError(f"Upload of packaged files failed: {e}") from e
+
+    logger.info(
+        f"Packaged {video_path} for delivery (remuxed: {remuxed}, poster: {manifest['poster'] is not None}, "
+        f"hls rungs: {len(manifest['hls']['renditions']) if manifest['hls'] else 0})"
+    )
+    return manifest
@@ -0,0 +1,336 @@
+"""
+Media probe service.
+
+One place to read a video's stream metadata: container duration, streams,
+video codec/size/fps/pixel format, keyframe timestamps and audio layout.
+Generation validation, stitching, the editor and the smart cut all read it
+here instead of each opening the file (MoviePy, ffprobe) on its own.
+
+Results are memoized by (path, size, mtime): in memory, and as JSON under
+MEDIA_PROBE_CACHE_DIR so they survive restarts. A file that changes on disk
+is probed again. Probes run the ffmpeg binary MoviePy is configured with
+(ffprobe is not required); only keyframes are decoded.
+
+probe_media() is for async code: it runs ffmpeg with
+asyncio.create_subprocess_exec, and at most MEDIA_PROBE_CONCURRENCY probes
+run at once. probe_media_sync() is the blocking equivalent for worker code.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from moviepy.config import FFMPEG_BINARY
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when MediaProbe fields change so cached probes are re-read
+PROBE_CACHE_VERSION = 2
+
+PROBE_TIMEOUT_SECONDS = 120
+MEMORY_CACHE_ENTRIES = 1024
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_START_RE = re.compile(r"Duration: [^,]+, start: (-?\d+(?:\.\d+)?)")
+_STREAM_RE = re.compile(r"Stream #0:(\d+)[^:]*: (Video|Audio|Subtitle|Data|Attachment): (\w+)(.*)")
+_PIX_FMT_RE = re.compile(r"\b(yuv\w+|nv12|rgb24)\b")
+_SIZE_RE = re.compile(r", (\d{2,5})x(\d{2,5})\b")
+_FPS_RE = re.compile(r"(\d+(?:\.\d+)?) fps")
+_TBN_RE = re.compile(r"(\d+)(k?) tbn")  # ffmpeg prints 90000 as "90k"
+_SAMPLE_RATE_RE = re.compile(r"(\d+) Hz, ([^,]+)")
+_CHANNELS_RE = re.compile(r"(\d+) channels")
+_PTS_TIME_RE = re.compile(r"pts_time:(-?\d+(?:\.\d+)?)")
+
+_LAYOUT_CHANNELS = {"mono": 1, "stereo": 2, "2.1": 3, "3.0": 3, "quad": 4, "4.0": 4, "5.0": 5, "5.1": 6, "7.1": 8}
+
+
+class MediaProbeError(RuntimeError):
+    """Raised when a file is missing or cannot be probed."""
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    """One stream of the container."""
+
+    index: int
+    kind: str  # "video", "audio", "subtitle", "data" or "attachment"
+    codec: str
+
+
+@dataclass
+class MediaProbe:
+    """Stream properties of a video file."""
+
+    duration: float
+    video_codec: str
+    pix_fmt: str
+    fps: Optional[float]
+    timescale: Optional[int]
+    audio_codec: Optional[str]
+    keyframes: List[float] = field(default_factory=list)
+    width: int = 0
+    height: int = 0
+    audio_sample_rate: Optional[int] = None
+    audio_channels: Optional[int] = None
+    audio_channel_layout: Optional[str] = None
+    streams: List[StreamInfo] = field(default_factory=list)
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    @property
+    def aspect_ratio(self) -> Optional[float]:
+        return self.width / self.height if self.width and self.height else None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MediaProbe":
+        return cls(**{**data, "streams": [StreamInfo(**stream) for stream in data.get("streams", [])]})
+
+
+def _probe_command(path: str) -> List[str]:
+    # showinfo on keyframes only (-skip_frame nokey) lists keyframe timestamps cheaply
+    return [
+        FFMPEG_BINARY, "-hide_banner", "-nostdin",
+        "-skip_frame", "nokey", "-i", path,
+        "-map", "0:v:0", "-vf", "showinfo", "-an", "-f", "null", "-",
+    ]
+
+
+def parse_probe_output(stderr: str, path: str) -> MediaProbe:
+    """
+    Build a MediaProbe from ffmpeg's stderr for a probe run.
+
+    Raises:
+        MediaProbeError: If the duration or video stream cannot be found
+    """
+    # Only the input section describes the file; output streams follow "Output #0"
+    header = stderr.split("\nOutput #0", 1)[0]
+    streams = [
+        (StreamInfo(int(index), kind.lower(), codec), details)
+        for index, kind, codec, details in _STREAM_RE.findall(header)
+    ]
+    video = next(((stream, details) for stream, details in streams if stream.kind == "video"), None)
+    audio = next(((stream, details) for stream, details in streams if stream.kind == "audio"), None)
+
+    duration_match = _DURATION_RE.search(header)
+    if not duration_match or video is None:
+        raise MediaProbeError(f"Could not parse stream info for {path}")
+
+    hours, minutes, seconds = duration_match.groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    start_match = _START_RE.search(header)
+    start_offset = float(start_match.group(1)) if start_match else 0.0
+
+    video_stream, video_details = video
+    pix_fmt_match = _PIX_FMT_RE.search(video_details)
+    size_match = _SIZE_RE.search(video_details)
+    fps_match = _FPS_RE.search(video_details)
+    tbn_match = _TBN_RE.search(video_details)
+
+    audio_sample_rate = audio_channels = audio_layout = None
+    if audio is not None:
+        rate_match = _SAMPLE_RATE_RE.search(audio[1])
+        if rate_match:
+            audio_sample_rate = int(rate_match.group(1))
+            audio_layout = rate_match.group(2).strip()
+            channels_match = _CHANNELS_RE.search(audio_layout)
+            audio_channels = (
+                int(channels_match.group(1)) if channels_match
+                else _LAYOUT_CHANNELS.get(audio_layout.split("(", 1)[0])
+            )
+
+    keyframes = sorted(
+        max(0.0, float(t) - start_offset) for t in _PTS_TIME_RE.findall(stderr)
+    )
+
+    return MediaProbe(
+        duration=duration,
+        video_codec=video_stream.codec,
+        pix_fmt=pix_fmt_match.group(1) if pix_fmt_match else "yuv420p",
+        fps=float(fps_match.group(1)) if fps_match else None,
+        timescale=int(tbn_match.group(1)) * (1000 if tbn_match.group(2) else 1) if tbn_match else None,
+        audio_codec=audio[0].codec if audio else None,
+        keyframes=keyframes,
+        width=int(size_match.group(1)) if size_match else 0,
+        height=int(size_match.group(2)) if size_match else 0,
+        audio_sample_rate=audio_sample_rate,
+        audio_channels=audio_channels,
+        audio_channel_layout=audio_layout,
+        streams=[stream for stream, _ in streams],
+    )
+
+
+class _ProbeCache:
+    """In-memory LRU of probes backed by one JSON file per probe."""
+
+    def __init__(self, max_entries: int = MEMORY_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int, int], MediaProbe]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(path: str) -> Tuple[str, int, int]:
+        """(absolute path, size, mtime_ns) of a file; raises MediaProbeError if it is missing."""
+        absolute = os.path.abspath(path)
+        try:
+            stat = os.stat(absolute)
+        except OSError as e:
+            raise MediaProbeError(f"Media file not found: {path}") from e
+        return absolute, stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _disk_path(key: Tuple[str, int, int]) -> Path:
+        digest = hashlib.sha256(f"{PROBE_CACHE_VERSION}:{key[0]}:{key[1]}:{key[2]}".encode()).hexdigest()
+        return Path(settings.MEDIA_PROBE_CACHE_DIR) / f"{digest[:32]}.json"
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[MediaProbe]:
+        with self._lock:
+            probe = self._entries.get(key)
+            if probe is not None:
+                self._entries.move_to_end(key)
+                return probe
+
+        try:
+            probe = MediaProbe.from_dict(json.loads(self._disk_path(key).read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+        self._remember(key, probe)
+        return probe
+
+    def put(self, key: Tuple[str, int, int], probe: MediaProbe) -> None:
+        self._remember(key, probe)
+        disk_path = self._disk_path(key)
+        try:
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = disk_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+            temp_path.write_text(json.dumps(asdict(probe)))
+            os.replace(temp_path, disk_path)
+        except OSError as e:
+            logger.debug(f"Could not persist probe for {key[0]}: {e}")
+
+    def _remember(self, key: Tuple[str, int, int], probe: MediaProbe) -> None:
+        with self._lock:
+            self._entries[key] = probe
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget in-memory probes (the disk cache is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _ProbeCache()
+
+_sync_semaphore: Optional[threading.BoundedSemaphore] = None
+_sync_semaphore_lock = threading.Lock()
+_async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_sync_semaphore() -> threading.BoundedSemaphore:
+    global _sync_semaphore
+    with _sync_semaphore_lock:
+        if _sync_semaphore is None:
+            _sync_semaphore = threading.BoundedSemaphore(max(1, settings.MEDIA_PROBE_CONCURRENCY))
+        return _sync_semaphore
+
+
+def _get_async_semaphore() -> asyncio.Semaphore:
+    # asyncio primitives are bound to one event loop
+    loop = asyncio.get_running_loop()
+    semaphore = _async_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, settings.MEDIA_PROBE_CONCURRENCY))
+        _async_semaphores[loop] = semaphore
+    return semaphore
+
+
+def _check_result(returncode: int, stderr: str, path: str) -> None:
+    if returncode != 0:
+        raise MediaProbeError(f"ffmpeg exited with {returncode} probing {path}: {stderr[-500:]}")
+
+
+def probe_media_sync(path: str) -> MediaProbe:
+    """
+    Probe a media file (memoized by path, size and mtime).
+
+    Args:
+        path: Video file path
+
+    Returns:
+        MediaProbe (shared between callers; do not modify)
+
+    Raises:
+        MediaProbeError: If the file is missing or cannot be probed
+    """
+    key = _cache.key_for(path)
+    probe = _cache.get(key)
+    if probe is not None:
+        return probe
+
+    with _get_sync_semaphore():
+        try:
+            result = subprocess.run(
+                _probe_command(key[0]), capture_output=True, text=True, errors="replace",
+                timeout=PROBE_TIMEOUT_SECONDS,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise MediaProbeError(f"ffmpeg failed to run: {e}") from e
+    _check_result(result.returncode, result.stderr, path)
+
+    probe = parse_probe_output(result.stderr, path)
+    _cache.put(key, probe)
+    return probe
+
+
+async def probe_media(path: str) -> MediaProbe:
+    """
+    Probe a media file without blocking the event loop (memoized like probe_media_sync).
+
+    Raises:
+        MediaProbeError: If the file is missing or cannot be probed
+    """
+    key = _cache.key_for(path)
+    probe = _cache.get(key)
+    if probe is not None:
+        return probe
+
+    async with _get_async_semaphore():
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *_probe_command(key[0]),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            raise MediaProbeError(f"ffmpeg failed to run: {e}") from e
+        try:
+            _, stderr_bytes = await asyncio.wait_for(process.communicate(), timeout=PROBE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError as e:
+            process.kill()
+            await process.wait()
+            raise MediaProbeError(f"ffmpeg timed out probing {path}") from e
+    stderr = stderr_bytes.decode(errors="replace")
+    _check_result(process.returncode, stderr, path)
+
+    probe = parse_probe_output(stderr, path)
+    _cache.put(key, probe)
+    return probe
+
+
+def clear_probe_cache() -> None:
+    """Forget in-memory probes (e.g. in tests); persisted probes are kept."""
+    _cache.clear()
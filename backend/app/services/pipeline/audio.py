@@ -1,5 +1,9 @@
 """
 Audio layer service for adding background music and sound effects to videos.
+
+Music and sound effects come from the indexed audio library (audio_library):
+their PCM is decoded once and cached, so they are mixed as NumPy arrays,
+each normalized to a common loudness before its volume is applied.
 """
 import logging
 import os
@@ -10,17 +14,31 @@ from typing import Optional, TYPE_CHECKING
 if TYPE_CHECKING:
     from app.schemas.generation import ScenePlan
 
-from moviepy import VideoFileClip, AudioFileClip, CompositeAudioClip, afx
+import numpy as np
+from moviepy import VideoFileClip, CompositeAudioClip
+from moviepy.audio.AudioClip import AudioArrayClip
 from moviepy.audio.fx.MultiplyVolume import MultiplyVolume
 
+from app.core.tracing import traced
+from app.services.pipeline.audio_library import (
+    CHANNELS,
+    MUSIC_LIBRARY_DIR,
+    SAMPLE_RATE,
+    SFX_LIBRARY_DIR,
+    AudioLibrary,
+    base_name,
+    get_audio_library,
+    mix_into,
+)
+
 logger = logging.getLogger(__name__)
 
-# Music library directory structure
-# Resolve path relative to this file's location (backend/app/services/pipeline/)
-# Go up 4 levels: pipeline -> services -> app -> backend, then into assets/music
-_BASE_DIR = Path(__file__).parent.parent.parent.parent
-MUSIC_LIBRARY_DIR = _BASE_DIR / "assets" / "music"
-SFX_LIBRARY_DIR = _BASE_DIR / "assets" / "sfx"
+# Track volumes, applied after loudness normalization
+ORIGINAL_AUDIO_VOLUME = 0.6  # Sora-2 audio, so it doesn't overpower background music
+MUSIC_VOLUME = 0.3
+AMBIENT_SFX_VOLUME = 0.2  # subtle background
+TRANSITION_SFX_VOLUME = 1.0
+TRANSITION_SFX_DURATION = 0.5  # matches the crossfade transition
 
 # Music style mapping (maps style keywords to music file names)
 # For MVP, we'll use simple keyword matching
@@ -36,6 +54,7 @@ MUSIC_STYLE_MAP = {
 }
 
 
+@traced("encode")
 def add_audio_layer(
     video_path: str,
     music_style: str,
@@ -138,45 +157,33 @@ def add_audio_layer(
         else:
             logger.warning(f"No music file found for style '{music_style}' - video will be exported without background music")
         
-        # Check cancellation before loading music
+        # Check cancellation before mixing music
         if cancellation_check and cancellation_check():
             video.close()
             raise RuntimeError("Audio layer processing cancelled by user")
         
-        # Load and process background music (if available)
-        music_clip = None
-        if music_file and music_file.exists():
-            logger.debug(f"Selected music file: {music_file}")
-            music_clip = AudioFileClip(str(music_file))
+        # Music and SFX are mixed from the library's cached PCM into one buffer
+        library = get_audio_library()
+        mix = np.zeros((int(round(video_duration * SAMPLE_RATE)), CHANNELS), dtype=np.float32)
         
-        # Process music if available
-        if music_clip:
-            # Trim music to video duration
-            if music_clip.duration > video_duration:
-                logger.debug(f"Trimming music from {music_clip.duration}s to {video_duration}s")
-                music_clip = music_clip.subclipped(0, video_duration)
-            elif music_clip.duration < video_duration and music_clip.duration > 0:
-                # Loop music if shorter than video (for MVP, just repeat once)
-                logger.debug(f"Music ({music_clip.duration}s) shorter than video ({video_duration}s), looping")
-                loops_needed = int(video_duration / music_clip.duration) + 1
-                music_clips = [music_clip] * loops_needed
-                music_clip = CompositeAudioClip(music_clips).subclipped(0, video_duration)
-            
-            # Adjust music volume to 30%
-            logger.debug("Adjusting music volume to 30%")
-            music_clip = music_clip.with_effects([MultiplyVolume(0.3)])
+        has_music = False
+        if music_file:
+            # Looped if shorter than the video, trimmed to the video duration otherwise
+            has_music = _mix_library_track(mix, library, music_file, 0.0, video_duration, MUSIC_VOLUME, loop=True)
+            if has_music:
+                logger.debug(f"Mixed music at {MUSIC_VOLUME:.0%} volume (loudness-normalized)")
+            else:
+                logger.warning(f"Could not load music file {music_file} - video will be exported without background music")
         else:
             logger.info("No music file available - video will be exported without background music")
         
         # Check cancellation before adding sound effects
         if cancellation_check and cancellation_check():
             video.close()
-            if music_clip:
-                music_clip.close()
             raise RuntimeError("Audio layer processing cancelled by user")
         
         # Add sound effects: ambient SFX from LLM sound_design + transition SFX
-        sfx_clips = []
+        sfx_count = 0
         
         # First, add ambient sound effects based on LLM sound_design for each scene
         if llm_specification and scene_plan and scene_plan.scenes:
@@ -202,28 +209,18 @@ def add_audio_layer(
                 if sound_design:
                     # Map sound_design description to appropriate ambient SFX
                     ambient_sfx_file = _select_ambient_sfx(sound_design)
-                    if ambient_sfx_file and ambient_sfx_file.exists():
+                    if ambient_sfx_file:
                         try:
-                            ambient_clip = AudioFileClip(str(ambient_sfx_file))
-                            # Trim to scene duration
-                            scene_duration = scene.duration
-                            if ambient_clip.duration > scene_duration:
-                                ambient_clip = ambient_clip.subclipped(0, scene_duration)
-                            elif ambient_clip.duration < scene_duration:
-                                # Loop ambient SFX to match scene duration
-                                loops_needed = int(scene_duration / ambient_clip.duration) + 1
-                                ambient_clips = [ambient_clip] * loops_needed
-                                ambient_clip = CompositeAudioClip(ambient_clips).subclipped(0, scene_duration)
-                            
-                            # Position at scene start time
-                            ambient_clip = ambient_clip.with_start(current_time)
-                            # Lower volume for ambient (20% - subtle background)
-                            ambient_clip = ambient_clip.with_effects([MultiplyVolume(0.2)])
-                            sfx_clips.append(ambient_clip)
-                            logger.info(
-                                f"Added ambient SFX for scene {scene.scene_number} "
-                                f"({sound_design[:50]}...) at {current_time:.2f}s"
-                            )
+                            # Looped to fill the scene, positioned at the scene start
+                            if _mix_library_track(
+                                mix, library, ambient_sfx_file, current_time, scene.duration,
+                                AMBIENT_SFX_VOLUME, loop=True,
+                            ):
+                                sfx_count += 1
+                                logger.info(
+                                    f"Added ambient SFX for scene {scene.scene_number} "
+                                    f"({sound_design[:50]}...) at {current_time:.2f}s"
+                                )
                         except Exception as e:
                             logger.warning(f"Could not add ambient SFX for scene {scene.scene_number}: {e}")
                     else:
@@ -247,18 +244,13 @@ def add_audio_layer(
             # Add SFX at each transition point
             try:
                 sfx_file = _select_sfx_file("transition")
-                if sfx_file and sfx_file.exists():
+                if sfx_file:
                     logger.info(f"Adding sound effects at {len(transition_times)} scene transitions")
-                    base_sfx = AudioFileClip(str(sfx_file))
-                    # Trim SFX to 0.5s (transition duration)
-                    if base_sfx.duration > 0.5:
-                        base_sfx = base_sfx.subclipped(0, 0.5)
-                    
-                    # Create SFX clips at each transition point
                     for transition_time in transition_times:
-                        if transition_time < video_duration:  # Only if within video duration
-                            sfx_at_transition = base_sfx.with_start(transition_time)
-                            sfx_clips.append(sfx_at_transition)
+                        if transition_time < video_duration and _mix_library_track(
+                            mix, library, sfx_file, transition_time, TRANSITION_SFX_DURATION, TRANSITION_SFX_VOLUME,
+                        ):
+                            sfx_count += 1
                             logger.debug(f"Added SFX at transition: {transition_time:.2f}s")
                 else:
                     logger.warning(
@@ -274,49 +266,43 @@ def add_audio_layer(
             # Fallback: Add SFX at start if no scene plan available
             try:
                 sfx_file = _select_sfx_file("transition")
-                if sfx_file and sfx_file.exists():
+                if sfx_file:
                     logger.debug("Adding sound effect at start (no scene plan available)")
-                    sfx_clip = AudioFileClip(str(sfx_file))
-                    if sfx_clip.duration > 0.5:
-                        sfx_clip = sfx_clip.subclipped(0, 0.5)
-                    sfx_clip = sfx_clip.with_start(0)
-                    sfx_clips.append(sfx_clip)
+                    if _mix_library_track(
+                        mix, library, sfx_file, 0.0, TRANSITION_SFX_DURATION, TRANSITION_SFX_VOLUME,
+                    ):
+                        sfx_count += 1
             except Exception as e:
                 logger.debug(f"Could not add sound effect at start: {e}")
         
-        # Composite audio tracks: original Sora-2 audio + music + SFX clips
+        # Composite audio tracks: original Sora-2 audio + library mix (music and SFX)
         audio_tracks = []
         
         # Preserve original audio from Sora-2 (ambient sounds, sound effects generated by AI)
         if original_audio:
-            # Lower volume of original audio to 60% so it doesn't overpower background music
+            # Lower volume of original audio so it doesn't overpower background music
             # This allows Sora-2's ambient sounds to be heard but not dominate
-            original_audio_adjusted = original_audio.with_effects([MultiplyVolume(0.6)])
+            original_audio_adjusted = original_audio.with_effects([MultiplyVolume(ORIGINAL_AUDIO_VOLUME)])
             audio_tracks.append(original_audio_adjusted)
-            logger.info("Preserving Sora-2 generated audio (ambient sounds, SFX) at 60% volume")
-        
-        # Add background music
-        if music_clip:
-            audio_tracks.append(music_clip)
+            logger.info(f"Preserving Sora-2 generated audio (ambient sounds, SFX) at {ORIGINAL_AUDIO_VOLUME:.0%} volume")
         
-        # Add manual SFX clips (if files exist - optional)
-        if sfx_clips:
-            audio_tracks.extend(sfx_clips)
+        # Add background music and SFX
+        if has_music or sfx_count:
+            audio_tracks.append(AudioArrayClip(np.clip(mix, -1.0, 1.0), fps=SAMPLE_RATE))
         
         # Composite all audio tracks
+        track_names = []
+        if original_audio:
+            track_names.append("Sora-2 audio")
+        if has_music:
+            track_names.append("background music")
+        if sfx_count:
+            track_names.append(f"{sfx_count} SFX clip(s)")
         if len(audio_tracks) > 1:
-            track_names = []
-            if original_audio:
-                track_names.append("Sora-2 audio")
-            if music_clip:
-                track_names.append("background music")
-            if sfx_clips:
-                track_names.append(f"{len(sfx_clips)} SFX clip(s)")
             logger.info(f"Compositing {len(audio_tracks)} audio track(s): {', '.join(track_names)}")
             final_audio = CompositeAudioClip(audio_tracks)
         elif len(audio_tracks) == 1:
-            track_name = "Sora-2 audio" if original_audio else ("background music" if music_clip else "SFX")
-            logger.info(f"Using single audio track: {track_name}")
+            logger.info(f"Using single audio track: {', '.join(track_names)}")
             final_audio = audio_tracks[0]
         else:
             # No audio - video will be silent
@@ -326,10 +312,6 @@ def add_audio_layer(
         # Check cancellation before attaching audio
         if cancellation_check and cancellation_check():
             video.close()
-            if music_clip:
-                music_clip.close()
-            for sfx in sfx_clips:
-                sfx.close()
             if final_audio:
                 final_audio.close()
             raise RuntimeError("Audio layer processing cancelled by user")
@@ -360,10 +342,6 @@ def add_audio_layer(
         video.close()
         if original_audio:
             original_audio.close()
-        if music_clip:
-            music_clip.close()
-        for sfx in sfx_clips:
-            sfx.close()
         if final_audio:
             final_audio.close()
         final_video.close()
@@ -387,10 +365,45 @@ def add_audio_layer(
             pass  # Ignore errors when restoring directory
 
 
+def _mix_library_track(
+    mix: np.ndarray,
+    library: AudioLibrary,
+    path: Path,
+    start: float,
+    duration: float,
+    volume: float,
+    loop: bool = False,
+) -> bool:
+    """
+    Mix a library file into the buffer at a consistent loudness.
+
+    Args:
+        mix: (samples, CHANNELS) buffer at SAMPLE_RATE
+        library: Audio library holding the file's cached PCM
+        path: Library file (from one of the _select_* functions)
+        start: Position in the mix, in seconds
+        duration: Maximum length to mix, in seconds
+        volume: Volume relative to the normalized loudness
+        loop: Repeat the file to fill the duration
+
+    Returns:
+        bool: True if any audio was mixed
+    """
+    track = library.get(path)
+    if track is None:
+        return False
+    gain = volume * track.normalization_gain()
+    return mix_into(mix, library.load_pcm(track), start, duration, gain, loop=loop) > 0
+
+
 def _select_music_file(style: str) -> Optional[Path]:
     """
     Select music file based on style keyword.
     
+    An exact file name from MUSIC_STYLE_MAP is used if present; otherwise the
+    audio library index is searched for the mapped name (any case/extension),
+    a track tagged with the style, the default track, and finally any track.
+    
     Args:
         style: Music style keyword (e.g., "energetic", "calm", "professional")
     
@@ -410,70 +423,43 @@ def _select_music_file(style: str) -> Optional[Path]:
     
     # Try exact match first
     music_file = MUSIC_LIBRARY_DIR / filename
-    
-    # If not found, try case-insensitive match and different extensions
-    if not music_file.exists():
-        logger.debug(f"Music file not found: {music_file}, trying case-insensitive and alternative extensions")
-        
-        # Extract base name (without extension) - handle double extensions like .mp3.mp3
-        expected_base = filename.replace(".mp3", "").lower()
-        
-        # Try case-insensitive match - check if filename starts with expected base
-        for file in MUSIC_LIBRARY_DIR.iterdir():
-            if file.is_file():
-                # Get base name by removing all extensions (handle .mp3.mp3 case)
-                file_base = file.name
-                while '.' in file_base:
-                    file_base = file_base.rsplit('.', 1)[0]
-                
-                if file_base.lower() == expected_base:
-                    # Found a match (might have different extension or case)
-                    logger.info(f"Found music file with different case/extension: {file.name} (looking for {filename})")
-                    music_file = file
-                    break
-        else:
-            # If still not found, try default
-            logger.warning(f"Music file not found: {music_file}, trying default")
-            default_filename = MUSIC_STYLE_MAP["default"]
-            music_file = MUSIC_LIBRARY_DIR / default_filename
-            expected_base_default = default_filename.replace(".mp3", "").lower()
-            
-            # Try case-insensitive for default too
-            if not music_file.exists():
-                for file in MUSIC_LIBRARY_DIR.iterdir():
-                    if file.is_file():
-                        # Get base name by removing all extensions
-                        file_base = file.name
-                        while '.' in file_base:
-                            file_base = file_base.rsplit('.', 1)[0]
-                        
-                        if file_base.lower() == expected_base_default:
-                            logger.info(f"Found default music file with different case/extension: {file.name}")
-                            music_file = file
-                            break
-                
-                # If default not found either, try to use ANY available MP3 file as fallback
-                if not music_file.exists():
-                    logger.warning(f"Default music file also not found, trying to use any available MP3 file")
-                    for file in MUSIC_LIBRARY_DIR.iterdir():
-                        if file.is_file() and file.suffix.lower() in ['.mp3', '.wav', '.m4a']:
-                            logger.info(f"Using any available music file as fallback: {file.name}")
-                            music_file = file
-                            break
-    
-    if not music_file.exists():
-        # List available files for debugging
-        available_files = [f.name for f in MUSIC_LIBRARY_DIR.iterdir() if f.is_file()]
+    if music_file.exists():
+        logger.info(f"Selected music file: {music_file} (absolute: {music_file.absolute()})")
+        return music_file
+    
+    library = get_audio_library()
+    track = (
+        library.find("music", base_name(Path(filename)))
+        or library.find("music", style_lower)
+        or library.find("music", base_name(Path(MUSIC_STYLE_MAP["default"])))
+    )
+    if track is None:
+        tracks = library.tracks("music")
+        if tracks:
+            track = tracks[0]
+            logger.warning(f"No music matches style '{style_lower}', using any available music file: {track.path.name}")
+    
+    if track is None:
         logger.warning(
             f"Music library is empty or file not found. "
-            f"Looking for: {filename} in {MUSIC_LIBRARY_DIR} (resolved: {music_file.absolute()}). "
-            f"Available files: {available_files}. "
+            f"Looking for: {filename} in {MUSIC_LIBRARY_DIR}. "
             f"Video will be exported without background music."
         )
         return None
     
-    logger.info(f"Selected music file: {music_file} (absolute: {music_file.absolute()})")
-    return music_file
+    logger.info(f"Selected music file: {track.path} (looking for {filename})")
+    return track.path
+
+
+def _find_sfx_file(name: str) -> Optional[Path]:
+    """Find a sound effect by name: exact .mp3/.wav file, then the library index."""
+    for extension in (".mp3", ".wav"):
+        sfx_file = SFX_LIBRARY_DIR / f"{name}{extension}"
+        if sfx_file.exists():
+            return sfx_file
+    
+    track = get_audio_library().find("sfx", name)
+    return track.path if track else None
 
 
 def _select_sfx_file(sfx_type: str) -> Optional[Path]:
@@ -486,18 +472,9 @@ def _select_sfx_file(sfx_type: str) -> Optional[Path]:
     Returns:
         Optional[Path]: Path to sound effect file, or None if not found
     """
-    # For MVP, use a simple mapping
-    sfx_filename = f"{sfx_type}.mp3"
-    sfx_file = SFX_LIBRARY_DIR / sfx_filename
-    
-    if not sfx_file.exists():
-        # Try WAV format
-        sfx_file = SFX_LIBRARY_DIR / f"{sfx_type}.wav"
-    
-    if not sfx_file.exists():
-        logger.debug(f"Sound effect not found: {sfx_file}")
-        return None
-    
+    sfx_file = _find_sfx_file(sfx_type)
+    if sfx_file is None:
+        logger.debug(f"Sound effect not found: {sfx_type}")
     return sfx_file
 
 
@@ -540,20 +517,16 @@ def _select_ambient_sfx(sound_design: str) -> Optional[Path]:
     # Find first matching keyword
     for keyword, sfx_name in ambient_mappings:
         if keyword in sound_design_lower:
-            sfx_file = SFX_LIBRARY_DIR / f"{sfx_name}.mp3"
-            if not sfx_file.exists():
-                sfx_file = SFX_LIBRARY_DIR / f"{sfx_name}.wav"
-            if sfx_file.exists():
+            sfx_file = _find_sfx_file(sfx_name)
+            if sfx_file:
                 logger.debug(f"Mapped sound_design '{sound_design[:50]}...' to {sfx_name}")
                 return sfx_file
     
     # Fallback: try generic "ambient" or "room_tone"
     fallback_files = ["room_tone", "ambient", "background"]
     for fallback_name in fallback_files:
-        fallback_file = SFX_LIBRARY_DIR / f"{fallback_name}.mp3"
-        if not fallback_file.exists():
-            fallback_file = SFX_LIBRARY_DIR / f"{fallback_name}.wav"
-        if fallback_file.exists():
+        fallback_file = _find_sfx_file(fallback_name)
+        if fallback_file:
             logger.debug(f"Using fallback ambient SFX: {fallback_name} for '{sound_design[:50]}...'")
             return fallback_file
     
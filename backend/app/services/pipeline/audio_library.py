@@ -0,0 +1,451 @@
+"""
+Indexed audio asset library.
+
+Music and sound-effect files are indexed once (at startup, then whenever a
+library directory's mtime changes) instead of being found by directory scans
+and decoded on every export. For each track the index holds:
+- name and tags (lowercase filename tokens, e.g. "calm_piano.mp3" -> {"calm", "piano"})
+- duration, BPM (music only) and integrated loudness (ITU-R BS.1770 / EBU R128)
+- the decoded PCM: float32 stereo at SAMPLE_RATE, cached as .npy under
+  AUDIO_CACHE_DIR and opened memory-mapped
+
+Mixing library tracks is then plain NumPy on the cached PCM (see mix_into),
+with a per-track gain bringing each track to TARGET_LOUDNESS_LUFS.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+from moviepy.config import FFMPEG_BINARY
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached metadata or PCM layout changes
+INDEX_VERSION = 1
+
+SAMPLE_RATE = 44100  # MoviePy's default audio fps for write_videofile
+CHANNELS = 2
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg"}
+
+TARGET_LOUDNESS_LUFS = -16.0
+MAX_NORMALIZATION_GAIN_DB = 12.0
+
+# BS.1770 gating
+LOUDNESS_BLOCK_SECONDS = 0.4
+LOUDNESS_STEP_SECONDS = 0.1
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+# Tempo estimation
+BPM_RANGE = (60.0, 180.0)
+BPM_HOP = 512  # samples per onset-envelope frame
+BPM_MIN_SECONDS = 5.0
+
+DECODE_TIMEOUT_SECONDS = 120
+
+# Library locations: backend/assets/{music,sfx}
+_BASE_DIR = Path(__file__).parent.parent.parent.parent
+MUSIC_LIBRARY_DIR = _BASE_DIR / "assets" / "music"
+SFX_LIBRARY_DIR = _BASE_DIR / "assets" / "sfx"
+
+
+@dataclass(frozen=True)
+class AudioTrack:
+    """Indexed library track."""
+
+    path: Path
+    kind: str  # "music" or "sfx"
+    name: str  # lowercase file name without extensions
+    tags: FrozenSet[str]
+    duration: float
+    loudness_lufs: Optional[float]  # None for silence
+    bpm: Optional[float]  # None for sound effects and short or arrhythmic tracks
+    pcm_path: Path
+    size: int
+    mtime_ns: int
+
+    def normalization_gain(self, target_lufs: float = TARGET_LOUDNESS_LUFS) -> float:
+        """Linear gain bringing the track to target_lufs (bounded to +/-MAX_NORMALIZATION_GAIN_DB)."""
+        if self.loudness_lufs is None:
+            return 1.0
+        gain_db = min(max(target_lufs - self.loudness_lufs, -MAX_NORMALIZATION_GAIN_DB), MAX_NORMALIZATION_GAIN_DB)
+        return 10 ** (gain_db / 20)
+
+
+def base_name(path: Path) -> str:
+    """Lowercase file name with all extensions removed (handles e.g. "calm.mp3.mp3")."""
+    return path.name.split(".", 1)[0].lower()
+
+
+def _tags_for(name: str) -> FrozenSet[str]:
+    return frozenset(token for token in re.split(r"[^a-z0-9]+", name) if token)
+
+
+def decode_pcm(path: Path, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio file to float32 stereo PCM with ffmpeg.
+
+    Returns:
+        Array of shape (samples, CHANNELS)
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    cmd = [
+        FFMPEG_BINARY, "-hide_banner", "-nostdin", "-loglevel", "error",
+        "-i", str(path), "-vn", "-f", "f32le", "-ac", str(CHANNELS), "-ar", str(sample_rate), "pipe:1",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=DECODE_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"ffmpeg failed to run: {e}")
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {result.returncode}: {result.stderr[-500:].decode(errors='replace')}")
+    usable = len(result.stdout) - len(result.stdout) % (4 * CHANNELS)
+    return np.frombuffer(result.stdout[:usable], dtype="<f4").reshape(-1, CHANNELS)
+
+
+def _biquad_response(b: Tuple[float, float, float], a: Tuple[float, float, float], z: np.ndarray) -> np.ndarray:
+    return (b[0] + b[1] * z + b[2] * z ** 2) / (a[0] + a[1] * z + a[2] * z ** 2)
+
+
+def _k_weighting_response(n_fft: int, sample_rate: int) -> np.ndarray:
+    """
+    Frequency response of the BS.1770 K-weighting filter (shelf + high-pass) on an rfft grid.
+
+    Coefficients are derived for sample_rate from the filters' analog parameters
+    (as in libebur128), matching the standard's coefficients at 48 kHz.
+    """
+    z = np.exp(-2j * np.pi * np.fft.rfftfreq(n_fft))  # z^-1 on the unit circle
+
+    # Stage 1: high shelf (+4 dB above ~1.7 kHz), models the head's acoustic effect
+    gain_db, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = np.tan(np.pi * fc / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = _biquad_response(
+        ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0),
+        (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0),
+        z,
+    )
+
+    # Stage 2: high-pass at ~38 Hz (RLB weighting)
+    q, fc = 0.5003270373238773, 38.13547087602444
+    k = np.tan(np.pi * fc / sample_rate)
+    a0 = 1 + k / q + k * k
+    high_pass = _biquad_response(
+        (1.0, -2.0, 1.0),  # unnormalized numerator, as in the standard
+        (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0),
+        z,
+    )
+    return shelf * high_pass
+
+
+def integrated_loudness(samples: np.ndarray, sample_rate: int) -> Optional[float]:
+    """
+    Integrated loudness in LUFS per ITU-R BS.1770-4 (gated, equal channel weights).
+
+    Clips shorter than one 400 ms block are measured as a single block.
+
+    Args:
+        samples: PCM of shape (samples,) or (samples, channels), full scale = 1.0
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        Loudness in LUFS, or None if the audio is silent (below the absolute gate)
+    """
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    n = samples.shape[0]
+    if n == 0:
+        return None
+
+    # Filter in the frequency domain; the padding keeps the filter's tail from wrapping around
+    n_fft = 1 << int(np.ceil(np.log2(n + sample_rate // 2)))
+    spectrum = np.fft.rfft(samples, n=n_fft, axis=0) * _k_weighting_response(n_fft, sample_rate)[:, None]
+    weighted = np.fft.irfft(spectrum, n=n_fft, axis=0)[:n]
+
+    energy = np.concatenate([np.zeros((1, samples.shape[1])), np.cumsum(weighted ** 2, axis=0)])
+    block = int(LOUDNESS_BLOCK_SECONDS * sample_rate)
+    if n < block:
+        starts, block = np.array([0]), n
+    else:
+        starts = np.arange(0, n - block + 1, int(LOUDNESS_STEP_SECONDS * sample_rate))
+    mean_square = (energy[starts + block] - energy[starts]) / block  # (blocks, channels)
+
+    block_loudness = -0.691 + 10 * np.log10(np.maximum(mean_square.sum(axis=1), 1e-20))
+    above_absolute = block_loudness > ABSOLUTE_GATE_LUFS
+    if not above_absolute.any():
+        return None
+    relative_gate = -0.691 + 10 * np.log10(mean_square[above_absolute].mean(axis=0).sum()) + RELATIVE_GATE_LU
+    gated = mean_square[above_absolute & (block_loudness > relative_gate)]
+    return float(-0.691 + 10 * np.log10(gated.mean(axis=0).sum()))
+
+
+def estimate_bpm(samples: np.ndarray, sample_rate: int) -> Optional[float]:
+    """
+    Estimate tempo from the autocorrelation of the onset (energy-rise) envelope.
+
+    Returns:
+        Tempo in BPM within BPM_RANGE, or None if the audio is too short or has no pulse
+    """
+    mono = samples.mean(axis=1) if samples.ndim == 2 else samples
+    frames = len(mono) // BPM_HOP
+    if frames * BPM_HOP < BPM_MIN_SECONDS * sample_rate:
+        return None
+
+    energy = (mono[:frames * BPM_HOP].astype(np.float64).reshape(frames, BPM_HOP) ** 2).sum(axis=1)
+    onset = np.maximum(np.diff(np.log1p(energy * 1000)), 0.0)
+    onset -= onset.mean()
+    autocorrelation = np.fft.irfft(np.abs(np.fft.rfft(onset, n=2 * len(onset))) ** 2)[:len(onset)]
+
+    frame_rate = sample_rate / BPM_HOP
+    min_lag = int(frame_rate * 60 / BPM_RANGE[1])
+    max_lag = int(np.ceil(frame_rate * 60 / BPM_RANGE[0]))
+    if max_lag + 1 >= len(autocorrelation):
+        return None
+    lag = min_lag + int(np.argmax(autocorrelation[min_lag:max_lag + 1]))
+    if autocorrelation[lag] <= 0:
+        return None
+
+    # Parabolic interpolation around the peak for sub-frame precision
+    before, peak, after = autocorrelation[lag - 1:lag + 2]
+    curvature = before - 2 * peak + after
+    offset = 0.5 * (before - after) / curvature if curvature < 0 else 0.0
+    return round(60 * frame_rate / (lag + offset), 1)
+
+
+def mix_into(
+    buffer: np.ndarray,
+    pcm: np.ndarray,
+    start: float,
+    duration: float,
+    gain: float,
+    loop: bool = False,
+) -> int:
+    """
+    Add gain * pcm into buffer, starting at `start` seconds, for up to `duration` seconds.
+
+    Both arrays are (samples, CHANNELS) at SAMPLE_RATE. With loop=True the track
+    repeats to fill the duration; writes past the end of buffer are dropped.
+
+    Returns:
+        Number of samples written
+    """
+    offset = int(round(start * SAMPLE_RATE))
+    length = min(int(round(duration * SAMPLE_RATE)), buffer.shape[0] - offset)
+    if offset < 0 or length <= 0 or len(pcm) == 0:
+        return 0
+
+    written = 0
+    while written < length:
+        count = min(length - written, len(pcm))
+        target = buffer[offset + written:offset + written + count]
+        target += pcm[:count] * np.float32(gain)
+        written += count
+        if not loop:
+            break
+    return written
+
+
+class AudioLibrary:
+    """
+    Index of the music and sound-effect libraries.
+
+    The directories are re-scanned when their mtime changes; files whose size
+    and mtime are unchanged keep their index entry, and decoded PCM plus
+    metadata persist in cache_dir across restarts.
+    """
+
+    def __init__(self, music_dir: Path, sfx_dir: Path, cache_dir: Path):
+        self.dirs: Dict[str, Path] = {"music": Path(music_dir), "sfx": Path(sfx_dir)}
+        self.cache_dir = Path(cache_dir)
+        self._tracks: Dict[str, Dict[str, AudioTrack]] = {"music": {}, "sfx": {}}
+        self._by_path: Dict[Path, AudioTrack] = {}
+        self._dir_mtimes: Optional[Tuple[Optional[int], ...]] = None
+        self._lock = threading.Lock()
+
+    def _current_dir_mtimes(self) -> Tuple[Optional[int], ...]:
+        mtimes = []
+        for directory in self.dirs.values():
+            try:
+                mtimes.append(directory.stat().st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-index the libraries if a directory changed since the last scan."""
+        mtimes = self._current_dir_mtimes()
+        if not force and mtimes == self._dir_mtimes:
+            return
+
+        with self._lock:
+            if not force and mtimes == self._dir_mtimes:
+                return
+            tracks: Dict[str, Dict[str, AudioTrack]] = {}
+            for kind, directory in self.dirs.items():
+                tracks[kind] = {}
+                if not directory.is_dir():
+                    continue
+                for path in sorted(directory.iterdir()):
+                    if path.suffix.lower() not in AUDIO_EXTENSIONS or not path.is_file():
+                        continue
+                    track = self._index_file(path, kind)
+                    if track is not None:
+                        # First file wins when only the extension differs (sorted order)
+                        tracks[kind].setdefault(track.name, track)
+            self._tracks = tracks
+            self._by_path = {track.path: track for kind_tracks in tracks.values() for track in kind_tracks.values()}
+            self._dir_mtimes = mtimes
+        logger.info(
+            f"Audio library indexed: {len(self._tracks['music'])} music track(s), "
+            f"{len(self._tracks['sfx'])} sound effect(s)"
+        )
+
+    def _index_file(self, path: Path, kind: str) -> Optional[AudioTrack]:
+        """Get the index entry for a file, decoding it unless it is cached."""
+        path = path.resolve()
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        existing = self._by_path.get(path)
+        if existing is not None and (existing.size, existing.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return existing
+
+        key = hashlib.sha256(
+            f"{INDEX_VERSION}:{path}:{stat.st_size}:{stat.st_mtime_ns}:{SAMPLE_RATE}".encode()
+        ).hexdigest()[:32]
+        pcm_path = self.cache_dir / f"{key}.npy"
+        meta_path = self.cache_dir / f"{key}.json"
+
+        metadata = None
+        if pcm_path.exists() and meta_path.exists():
+            try:
+                metadata = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                metadata = None
+
+        if metadata is None:
+            try:
+                pcm = decode_pcm(path)
+            except RuntimeError as e:
+                logger.warning(f"Could not decode audio file {path}: {e}")
+                return None
+            metadata = {
+                "duration": len(pcm) / SAMPLE_RATE,
+                "loudness_lufs": integrated_loudness(pcm, SAMPLE_RATE),
+                "bpm": estimate_bpm(pcm, SAMPLE_RATE) if kind == "music" else None,
+            }
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = pcm_path.with_suffix(".npy.part")
+            with open(temp_path, "wb") as f:
+                np.save(f, pcm)
+            os.replace(temp_path, pcm_path)
+            meta_path.write_text(json.dumps(metadata))
+            logger.info(
+                f"Indexed {kind} '{path.name}': {metadata['duration']:.1f}s, "
+                f"loudness={metadata['loudness_lufs']}, bpm={metadata['bpm']}"
+            )
+
+        name = base_name(path)
+        return AudioTrack(
+            path=path,
+            kind=kind,
+            name=name,
+            tags=_tags_for(name),
+            duration=metadata["duration"],
+            loudness_lufs=metadata["loudness_lufs"],
+            bpm=metadata["bpm"],
+            pcm_path=pcm_path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+        )
+
+    def tracks(self, kind: str) -> List[AudioTrack]:
+        """Get all indexed tracks of a kind ("music" or "sfx")."""
+        self.refresh()
+        return list(self._tracks[kind].values())
+
+    def find(self, kind: str, name: str) -> Optional[AudioTrack]:
+        """
+        Find a track by name (case- and extension-insensitive), then by tag.
+
+        Args:
+            kind: "music" or "sfx"
+            name: Track name or tag, e.g. "calm" matches calm.mp3 or calm_piano.wav
+        """
+        self.refresh()
+        name = name.lower()
+        tracks = self._tracks[kind]
+        if name in tracks:
+            return tracks[name]
+        for track in tracks.values():
+            if name in track.tags:
+                return track
+        return None
+
+    def get(self, path: Path) -> Optional[AudioTrack]:
+        """
+        Get the track for a library file path, re-indexing it if it changed on disk.
+
+        Returns:
+            The track, or None if the file is outside the libraries or cannot be decoded
+        """
+        self.refresh()
+        path = Path(path).resolve()
+        kind = next((kind for kind, directory in self.dirs.items() if path.parent == directory.resolve()), None)
+        if kind is None:
+            return None
+        track = self._index_file(path, kind)
+        if track is not None and self._by_path.get(path) is not track:
+            with self._lock:
+                # Copy-on-write so concurrent lookups never see a dict change size
+                self._by_path = {**self._by_path, path: track}
+                self._tracks = {**self._tracks, kind: {**self._tracks[kind], track.name: track}}
+        return track
+
+    def cache_files(self) -> Set[str]:
+        """Names of the cache files (PCM and metadata) of the indexed tracks."""
+        names = set()
+        for track in list(self._by_path.values()):
+            names.add(track.pcm_path.name)
+            names.add(track.pcm_path.with_suffix(".json").name)
+        return names
+
+    @staticmethod
+    def load_pcm(track: AudioTrack) -> np.ndarray:
+        """Open a track's decoded PCM (memory-mapped, read-only)."""
+        return np.load(track.pcm_path, mmap_mode="r")
+
+
+_audio_library: Optional[AudioLibrary] = None
+_audio_library_lock = threading.Lock()
+
+
+def indexed_cache_files() -> Set[str]:
+    """Names of AUDIO_CACHE_DIR files in use by this process (none if the library was never loaded)."""
+    library = _audio_library
+    return library.cache_files() if library is not None else set()
+
+
+def get_audio_library() -> AudioLibrary:
+    """Get the process-wide audio library (indexed lazily on first use)."""
+    global _audio_library
+    if _audio_library is None:
+        with _audio_library_lock:
+            if _audio_library is None:
+                _audio_library = AudioLibrary(MUSIC_LIBRARY_DIR, SFX_LIBRARY_DIR, Path(settings.AUDIO_CACHE_DIR))
+    return _audio_library
@@ -12,6 +12,8 @@ import numpy as np
 from moviepy import VideoFileClip
 
 from app.core.config import settings
+from app.core.tracing import traced
+from app.services.storage.upload_manager import get_upload_manager
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,7 @@ def _is_mock_object(value) -> bool:
     return module_name.startswith("unittest.mock")
 
 
+@traced("encode")
 def export_final_video(
     video_path: str,
     brand_style: str,
@@ -171,6 +174,7 @@ def export_final_video(
                 fps=24,  # Consistent frame rate
                 preset='medium',
                 bitrate=bitrate,  # Dynamic bitrate based on resolution
+                ffmpeg_params=['-movflags', '+faststart'],  # moov atom first so playback starts before download completes
                 logger=None  # Suppress MoviePy progress logs
             )
         finally:
@@ -180,6 +184,16 @@ def export_final_video(
             except OSError:
                 pass  # Ignore errors when restoring directory
         
+        # Start the S3 upload of the video while the thumbnail is generated
+        video_upload = None
+        if settings.STORAGE_MODE == "s3":
+            video_upload = get_upload_manager().submit(
+                str(video_output_path),
+                f"videos/{video_filename}",
+                content_type="video/mp4",
+                generation_id=generation_id
+            )
+        
         # Check cancellation before thumbnail generation
         if cancellation_check and cancellation_check():
             video.close()
@@ -199,24 +213,15 @@ def export_final_video(
         # Upload to S3 if storage mode is S3
         if settings.STORAGE_MODE == "s3":
             try:
-                from app.services.storage.s3_storage import get_s3_storage
-                s3_storage = get_s3_storage()
-                
-                # Upload video to S3
-                video_s3_key = f"videos/{video_filename}"
-                s3_storage.upload_file(
-                    str(video_output_path),
-                    video_s3_key,
-                    content_type="video/mp4"
-                )
-                
-                # Upload thumbnail to S3
-                thumbnail_s3_key = f"thumbnails/{thumbnail_filename}"
-                s3_storage.upload_file(
+                # Upload thumbnail to S3 and wait for both uploads
+                thumbnail_upload = get_upload_manager().submit(
                     str(thumbnail_output_path),
-                    thumbnail_s3_key,
-                    content_type="image/jpeg"
+                    f"thumbnails/{thumbnail_filename}",
+                    content_type="image/jpeg",
+                    generation_id=generation_id
                 )
+                video_s3_key = video_upload.result()
+                thumbnail_s3_key = thumbnail_upload.result()
                 
                 logger.info(f"Files uploaded to S3: {video_s3_key}, {thumbnail_s3_key}")
                 
@@ -13,6 +13,7 @@ import replicate
 import httpx
 
 from app.core.config import settings
+from app.core.tracing import record_prediction, traced
 from app.services.pipeline.video_generation import MAX_RETRIES, POLL_INTERVAL
 
 logger = logging.getLogger(__name__)
@@ -264,6 +265,8 @@ async def _generate_image_with_retry(
                 # Refresh prediction status
                 prediction = client.predictions.get(prediction.id)
             
+            record_prediction(prediction, NANO_BANANA_MODEL, "image")
+
             # Check final status
             if prediction.status == "succeeded":
                 # Nano Banana returns a list of image URLs
@@ -309,6 +312,7 @@ async def _generate_image_with_retry(
     )
 
 
+@traced("prediction", name="image.download")
 async def _download_image(image_url: str, output_path: Path) -> None:
     """Download image from URL to local path."""
     async with httpx.AsyncClient(timeout=60.0) as client:
@@ -1,18 +1,22 @@
 """
 Batch image generation with sequential reference image consistency.
-Generates multiple images where each subsequent image uses the previous one as reference.
+Generates multiple images where each subsequent image uses a previous one as reference:
+the previous image (chain) by default, or a star, tree or chain-of-waves topology
+whose independent images are generated concurrently.
 """
+import asyncio
 import json
 import logging
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
+from typing import Awaitable, Callable, List, Optional, Dict, Tuple
 
 from app.services.pipeline.image_generation import generate_image
 from app.services.pipeline.image_prompt_enhancement import enhance_prompt_iterative, ImagePromptEnhancementResult
 from app.services.image_generation import generate_images, ImageGenerationResult
 from app.services.pipeline.image_quality_scoring import score_image, rank_images_by_quality
+from app.services.pipeline.scene_stream import provider_slot
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +104,106 @@ def _build_enhanced_image_prompt(
     return enhanced
 
 
+# Consistency topologies for multi-image generation. Each image takes one reference image:
+# - chain: image k references image k-1 (N serial round-trips, closest neighbour continuity)
+# - star: every image references the initial reference image, or image 1 if there is none
+# - tree: image k references image (k-1) // fan_out, so depth grows with log(N)
+# - waves: images are generated in waves of wave_size, all referencing the last image of the previous wave
+REFERENCE_TOPOLOGIES = ("chain", "star", "tree", "waves")
+
+
+def plan_reference_topology(
+    num_images: int,
+    topology: str = "chain",
+    has_initial_reference: bool = False,
+    fan_out: int = 2,
+    wave_size: int = 2,
+) -> List[Optional[int]]:
+    """
+    Reference parent of each image in a consistency topology.
+    
+    Args:
+        num_images: Number of images to generate
+        topology: One of REFERENCE_TOPOLOGIES
+        has_initial_reference: Whether an initial reference image anchors the set
+        fan_out: Children per image in the "tree" topology
+        wave_size: Images per wave in the "waves" topology
+    
+    Returns:
+        List[Optional[int]]: For each image, the index of the image it uses as reference,
+        or None if it uses the initial reference image (or no reference)
+    
+    Raises:
+        ValueError: If topology is unknown
+    """
+    if topology not in REFERENCE_TOPOLOGIES:
+        raise ValueError(f"Unknown reference topology '{topology}', expected one of {REFERENCE_TOPOLOGIES}")
+    fan_out = max(1, fan_out)
+    wave_size = max(1, wave_size)
+    
+    parents: List[Optional[int]] = []
+    for k in range(num_images):
+        if k == 0:
+            parents.append(None)
+        elif topology == "chain":
+            parents.append(k - 1)
+        elif topology == "star":
+            parents.append(None if has_initial_reference else 0)
+        elif topology == "tree":
+            parents.append((k - 1) // fan_out)
+        else:
+            # Wave w (w >= 1) holds images 1 + (w-1)*wave_size ... and references the last image of wave w-1
+            wave = (k - 1) // wave_size + 1
+            parents.append(0 if wave == 1 else (wave - 1) * wave_size)
+    return parents
+
+
+def reference_waves(parents: List[Optional[int]]) -> List[List[int]]:
+    """Group image indices by depth in the topology; images of one wave are generated concurrently."""
+    depths: List[int] = []
+    for parent in parents:
+        depths.append(0 if parent is None else depths[parent] + 1)
+    waves: List[List[int]] = [[] for _ in range(max(depths, default=-1) + 1)]
+    for index, depth in enumerate(depths):
+        waves[depth].append(index)
+    return waves
+
+
+async def _run_reference_topology(
+    parents: List[Optional[int]],
+    initial_reference_image: Optional[str],
+    generate_one: Callable[[int, Optional[str]], Awaitable[Optional[str]]],
+) -> List[Optional[str]]:
+    """
+    Generate images along a topology; each starts as soon as its reference image exists.
+    
+    generate_one(index, reference_path) returns the image path, or None if the image
+    was skipped; images referencing a skipped image use that image's own reference.
+    If any image raises, the others are cancelled and the error is re-raised.
+    """
+    tasks: List[asyncio.Task] = []
+    
+    async def run_image(index: int) -> Optional[str]:
+        reference = initial_reference_image
+        parent = parents[index]
+        while parent is not None:
+            parent_path = await tasks[parent]
+            if parent_path:
+                reference = parent_path
+                break
+            parent = parents[parent]
+        return await generate_one(index, reference)
+    
+    tasks.extend(asyncio.create_task(run_image(index)) for index in range(len(parents)))
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
 async def generate_images_with_sequential_references(
     prompts: List[str],
     output_dir: str,
@@ -111,9 +215,12 @@ async def generate_images_with_sequential_references(
     initial_reference_image: Optional[str] = None,  # Base reference image to start the chain (e.g., scene's reference image for start/end frames)
     cancellation_check: Optional[callable] = None,
     scene_offset: int = 0,  # Offset for scene numbering in filenames (e.g., if generating single images per scene in a loop)
+    topology: str = "chain",
+    fan_out: int = 2,
+    wave_size: int = 2,
 ) -> List[str]:
     """
-    Generate multiple images sequentially, using each previous image as reference for the next.
+    Generate multiple images, each using a previously generated image as reference.
     
     This ensures visual consistency across all generated images by:
     1. Generating the first image with enhanced prompts (consistency markers + continuity notes + guidelines)
@@ -123,6 +230,11 @@ async def generate_images_with_sequential_references(
     3. Using the second image as reference for the third image
     4. And so on...
     
+    That is the default "chain" topology. The other topologies (see plan_reference_topology)
+    let images that do not depend on each other be generated concurrently: "star" anchors
+    every image to the initial reference (or image 1), "tree" to a parent with fan_out
+    children, and "waves" to the last image of the previous wave.
+    
     Args:
         prompts: List of base prompts, one per image (should be detailed image_generation_prompt from LLM)
         output_dir: Directory to save generated images
@@ -134,6 +246,9 @@ async def generate_images_with_sequential_references(
         initial_reference_image: Optional base reference image to start the chain (e.g., scene's reference image for start/end frames)
         cancellation_check: Optional function to check if generation should be cancelled
         scene_offset: Offset for scene numbering in filenames (CRITICAL for start/end images generated one at a time in a loop)
+        topology: Consistency topology, one of REFERENCE_TOPOLOGIES (default: "chain")
+        fan_out: Children per image in the "tree" topology (2-3)
+        wave_size: Images per wave in the "waves" topology
     
     Returns:
         List[str]: List of paths to generated images (in order)
@@ -159,30 +274,38 @@ async def generate_images_with_sequential_references(
     if not prompts:
         return []
     
-    image_paths = []
-    previous_image_path = initial_reference_image  # Start with initial reference if provided
+    parents = plan_reference_topology(
+        len(prompts), topology, has_initial_reference=bool(initial_reference_image),
+        fan_out=fan_out, wave_size=wave_size,
+    )
+    logger.info(
+        f"[{generation_id}] Generating {len(prompts)} images with '{topology}' references "
+        f"in {len(reference_waves(parents))} waves"
+    )
     
-    for idx, prompt in enumerate(prompts, start=1):
+    async def generate_one(index: int, reference_path: Optional[str]) -> str:
+        idx = index + 1
         # Check cancellation
         if cancellation_check and cancellation_check():
             raise RuntimeError("Image generation cancelled by user")
         
+        prompt = prompts[index]
         logger.info(f"[{generation_id}] Generating image {idx}/{len(prompts)}")
         logger.debug(f"Base prompt: {prompt[:80]}...")
         
         # Determine which reference image to use
         reference_to_use = None
-        if previous_image_path:
+        if reference_path:
             # Check if the file exists before using it
-            ref_path = Path(previous_image_path)
+            ref_path = Path(reference_path)
             if ref_path.exists():
-                reference_to_use = previous_image_path
-                if idx == 1 and previous_image_path == initial_reference_image:
-                    logger.info(f"[{generation_id}] Using initial reference image as base for visual consistency: {previous_image_path}")
+                reference_to_use = reference_path
+                if reference_path == initial_reference_image:
+                    logger.info(f"[{generation_id}] Using initial reference image as base for visual consistency: {reference_path}")
                 else:
-                    logger.info(f"[{generation_id}] Using previous generated image as reference for visual consistency: {previous_image_path}")
+                    logger.info(f"[{generation_id}] Using generated image as reference for visual consistency: {reference_path}")
             else:
-                logger.warning(f"[{generation_id}] Reference image not found: {previous_image_path}, generating without reference")
+                logger.warning(f"[{generation_id}] Reference image not found: {reference_path}, generating without reference")
                 reference_to_use = None
         
         # Build enhanced prompt with all consistency information
@@ -199,32 +322,31 @@ async def generate_images_with_sequential_references(
         
         # Generate image with:
         # - Enhanced prompt (base + markers + continuity notes + guidelines + explicit coherence instructions)
-        # - Previous image as reference (visual consistency chain)
+        # - Parent image in the topology as reference (visual consistency)
         # 
-        # Coherence Chain:
+        # Coherence Chain (default topology):
         # - Scene 1: Uses user's initial reference image (if provided) OR no reference
         # - Scene 2: Uses Scene 1's reference image as reference
         # - Scene 3: Uses Scene 2's reference image as reference
         # - Scene 4: Uses Scene 3's reference image as reference
         # This creates a visual chain where each scene maintains consistency with the previous one
-        image_path = await generate_image(
-            prompt=enhanced_prompt,
-            output_dir=output_dir,
-            generation_id=generation_id,
-            scene_number=scene_offset + idx,  # Use scene_offset to ensure correct filename numbering
-            consistency_markers=None,  # Already included in enhanced_prompt
-            reference_image_path=reference_to_use,  # Use previous image as reference (creates visual chain)
-            cancellation_check=cancellation_check,
-        )
-        
-        image_paths.append(image_path)
-        # Update previous_image_path to the newly generated image for next iteration
-        # This creates the sequential chain: Image 1 -> Image 2 -> Image 3 -> Image 4
-        previous_image_path = image_path  # Use this image as reference for next
+        async with provider_slot("image"):
+            image_path = await generate_image(
+                prompt=enhanced_prompt,
+                output_dir=output_dir,
+                generation_id=generation_id,
+                scene_number=scene_offset + idx,  # Use scene_offset to ensure correct filename numbering
+                consistency_markers=None,  # Already included in enhanced_prompt
+                reference_image_path=reference_to_use,  # Parent image as reference (creates visual chain)
+                cancellation_check=cancellation_check,
+            )
         
         logger.info(f"[{generation_id}] Image {idx} generated: {image_path}")
+        return image_path
+    
+    image_paths = await _run_reference_topology(parents, initial_reference_image, generate_one)
     
-    logger.info(f"[{generation_id}] ✅ All {len(image_paths)} images generated with sequential references")
+    logger.info(f"[{generation_id}] ✅ All {len(image_paths)} images generated with '{topology}' references")
     return image_paths
 
 
@@ -241,6 +363,10 @@ async def generate_enhanced_reference_images_with_sequential_references(
     quality_threshold: float = 30.0,
     num_variations: int = 4,
     max_enhancement_iterations: int = 4,
+    scene_offset: int = 0,
+    topology: str = "chain",
+    fan_out: int = 2,
+    wave_size: int = 2,
 ) -> List[str]:
     """
     Generate enhanced reference images with prompt enhancement and quality scoring.
@@ -255,6 +381,10 @@ async def generate_enhanced_reference_images_with_sequential_references(
     7. Uses selected reference image as input for next scene's generation (sequential chaining via nano-banana image-to-image)
     8. Saves trace files and cleans them up immediately after completion
     
+    Step 7 follows the consistency topology (see plan_reference_topology): with the default
+    "chain" each scene waits for the previous one; with "star", "tree" or "waves" the scenes
+    of a wave are processed concurrently.
+    
     Note: Always uses google/nano-banana model for image generation to support image-to-image
     sequential chaining, which ensures visual consistency across scenes.
     
@@ -271,6 +401,10 @@ async def generate_enhanced_reference_images_with_sequential_references(
         quality_threshold: Minimum quality score to proceed (default: 30.0, logs warning if below)
         num_variations: Number of image variations to generate per scene (default: 4)
         max_enhancement_iterations: Maximum number of prompt enhancement iterations (default: 4)
+        scene_offset: Offset for scene numbering in trace directories (when continuing a set of scenes)
+        topology: Consistency topology, one of REFERENCE_TOPOLOGIES (default: "chain")
+        fan_out: Children per image in the "tree" topology (2-3)
+        wave_size: Images per wave in the "waves" topology
     
     Returns:
         List[str]: List of paths to selected reference images (one per scene, in order)
@@ -297,99 +431,101 @@ async def generate_enhanced_reference_images_with_sequential_references(
     trace_root = Path(output_dir).parent / "reference_image_traces" / generation_id
     trace_root.mkdir(parents=True, exist_ok=True)
     
-    reference_image_paths = []
-    previous_reference_image = initial_reference_image  # Start with initial reference if provided
+    parents = plan_reference_topology(
+        len(prompts), topology, has_initial_reference=bool(initial_reference_image),
+        fan_out=fan_out, wave_size=wave_size,
+    )
+    logger.info(
+        f"[{generation_id}] Processing {len(prompts)} scenes with '{topology}' references "
+        f"in {len(reference_waves(parents))} waves"
+    )
     
-    try:
-        for scene_idx, base_prompt in enumerate(prompts, start=1):
-            # Check cancellation
-            if cancellation_check and cancellation_check():
-                raise RuntimeError("Reference image generation cancelled by user")
+    async def process_scene(index: int, reference_image: Optional[str]) -> Optional[str]:
+        scene_idx = index + 1
+        base_prompt = prompts[index]
+        
+        # Check cancellation
+        if cancellation_check and cancellation_check():
+            raise RuntimeError("Reference image generation cancelled by user")
+        
+        logger.info(f"[{generation_id}] Processing scene {scene_idx}/{len(prompts)}")
+        
+        # Create scene-specific trace directory
+        scene_trace_dir = trace_root / f"scene_{scene_offset + scene_idx}"
+        scene_trace_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Step 1: Enhance prompt using iterative two-agent enhancement
+        enhanced_prompt = base_prompt
+        enhancement_result = None
+        try:
+            logger.info(f"[{generation_id}] Enhancing prompt for scene {scene_idx}...")
+            enhancement_result = await enhance_prompt_iterative(
+                user_prompt=base_prompt,
+                max_iterations=max_enhancement_iterations,
+                score_threshold=85.0,
+                trace_dir=scene_trace_dir,
+                generate_negative=True
+            )
+            enhanced_prompt = enhancement_result.final_prompt
             
-            logger.info(f"[{generation_id}] Processing scene {scene_idx}/{len(prompts)}")
+            # Save final enhanced prompt
+            (scene_trace_dir / "final_enhanced_prompt.txt").write_text(
+                enhanced_prompt, encoding="utf-8"
+            )
             
-            # Create scene-specific trace directory
-            scene_trace_dir = trace_root / f"scene_{scene_idx}"
-            scene_trace_dir.mkdir(parents=True, exist_ok=True)
+            # Save prompt trace summary
+            prompt_trace_summary = {
+                "original_prompt": base_prompt,
+                "final_prompt": enhanced_prompt,
+                "iterations": enhancement_result.total_iterations,
+                "final_score": enhancement_result.final_score,
+                "iteration_history": enhancement_result.iterations,
+                "timestamp": datetime.now().isoformat()
+            }
+            (scene_trace_dir / "prompt_trace_summary.json").write_text(
+                json.dumps(prompt_trace_summary, indent=2), encoding="utf-8"
+            )
             
-            # Step 1: Enhance prompt using iterative two-agent enhancement
+            logger.info(
+                f"[{generation_id}] Prompt enhanced for scene {scene_idx} "
+                f"(iterations: {enhancement_result.total_iterations}, "
+                f"score: {enhancement_result.final_score.get('overall', 0):.1f})"
+            )
+        except Exception as e:
+            logger.error(
+                f"[{generation_id}] Prompt enhancement failed for scene {scene_idx}: {e}. "
+                "Falling back to original prompt."
+            )
+            # Fallback: use original prompt, generate single image
             enhanced_prompt = base_prompt
-            enhancement_result = None
-            try:
-                logger.info(f"[{generation_id}] Enhancing prompt for scene {scene_idx}...")
-                enhancement_result = await enhance_prompt_iterative(
-                    user_prompt=base_prompt,
-                    max_iterations=max_enhancement_iterations,
-                    score_threshold=85.0,
-                    trace_dir=scene_trace_dir,
-                    generate_negative=True
-                )
-                enhanced_prompt = enhancement_result.final_prompt
-                
-                # Save final enhanced prompt
-                (scene_trace_dir / "final_enhanced_prompt.txt").write_text(
-                    enhanced_prompt, encoding="utf-8"
-                )
-                
-                # Save prompt trace summary
-                prompt_trace_summary = {
-                    "original_prompt": base_prompt,
-                    "final_prompt": enhanced_prompt,
-                    "iterations": enhancement_result.total_iterations,
-                    "final_score": enhancement_result.final_score,
-                    "iteration_history": enhancement_result.iterations,
-                    "timestamp": datetime.now().isoformat()
-                }
-                (scene_trace_dir / "prompt_trace_summary.json").write_text(
-                    json.dumps(prompt_trace_summary, indent=2), encoding="utf-8"
-                )
-                
+        
+        # Step 2: Generate 4 image variations using enhanced prompt
+        generated_images = []
+        try:
+            logger.info(f"[{generation_id}] Generating {num_variations} variations for scene {scene_idx}...")
+            
+            # Build enhanced prompt with consistency markers (for image generation)
+            enhanced_prompt_with_markers = _build_enhanced_image_prompt(
+                base_prompt=enhanced_prompt,
+                consistency_markers=consistency_markers,
+                continuity_note=continuity_notes[scene_idx - 1] if continuity_notes and scene_idx - 1 < len(continuity_notes) else None,
+                consistency_guideline=consistency_guidelines[scene_idx - 1] if consistency_guidelines and scene_idx - 1 < len(consistency_guidelines) else None,
+                transition_note=transition_notes[scene_idx - 1] if transition_notes and scene_idx - 1 < len(transition_notes) else None,
+                scene_number=scene_idx,
+            )
+            
+            # Prepare image_input for sequential chaining
+            image_input_list = None
+            if reference_image and Path(reference_image).exists():
+                # Use the parent scene's best reference image (or the user's initial reference) as input
+                image_input_list = [reference_image]
                 logger.info(
-                    f"[{generation_id}] Prompt enhanced for scene {scene_idx} "
-                    f"(iterations: {enhancement_result.total_iterations}, "
-                    f"score: {enhancement_result.final_score.get('overall', 0):.1f})"
+                    f"[{generation_id}] Using reference image ({reference_image}) "
+                    f"for scene {scene_idx} ('{topology}' topology)"
                 )
-            except Exception as e:
-                logger.error(
-                    f"[{generation_id}] Prompt enhancement failed for scene {scene_idx}: {e}. "
-                    "Falling back to original prompt."
-                )
-                # Fallback: use original prompt, generate single image
-                enhanced_prompt = base_prompt
             
-            # Step 2: Generate 4 image variations using enhanced prompt
-            generated_images = []
-            try:
-                logger.info(f"[{generation_id}] Generating {num_variations} variations for scene {scene_idx}...")
-                
-                # Build enhanced prompt with consistency markers (for image generation)
-                enhanced_prompt_with_markers = _build_enhanced_image_prompt(
-                    base_prompt=enhanced_prompt,
-                    consistency_markers=consistency_markers,
-                    continuity_note=continuity_notes[scene_idx - 1] if continuity_notes and scene_idx - 1 < len(continuity_notes) else None,
-                    consistency_guideline=consistency_guidelines[scene_idx - 1] if consistency_guidelines and scene_idx - 1 < len(consistency_guidelines) else None,
-                    transition_note=transition_notes[scene_idx - 1] if transition_notes and scene_idx - 1 < len(transition_notes) else None,
-                    scene_number=scene_idx,
-                )
-                
-                # Prepare image_input for sequential chaining
-                image_input_list = None
-                if previous_reference_image and Path(previous_reference_image).exists():
-                    # Use previous scene's best reference image as input for this scene
-                    image_input_list = [previous_reference_image]
-                    logger.info(
-                        f"[{generation_id}] Using previous scene's reference image "
-                        f"({previous_reference_image}) for sequential chaining"
-                    )
-                elif scene_idx == 1 and initial_reference_image and Path(initial_reference_image).exists():
-                    # First scene: use user's initial reference image if provided
-                    image_input_list = [initial_reference_image]
-                    logger.info(
-                        f"[{generation_id}] Using initial reference image "
-                        f"({initial_reference_image}) for first scene"
-                    )
-                
-                # Generate variations using nano-banana (supports image-to-image for sequential chaining)
+            # Generate variations using nano-banana (supports image-to-image for sequential chaining)
+            async with provider_slot("image"):
                 generation_results = await generate_images(
                     prompt=enhanced_prompt_with_markers,
                     num_variations=num_variations,
@@ -399,143 +535,147 @@ async def generate_enhanced_reference_images_with_sequential_references(
                     image_input=image_input_list,
                     negative_prompt=enhancement_result.negative_prompt if enhancement_result else None
                 )
-                
-                generated_images = generation_results
-                logger.info(
-                    f"[{generation_id}] Generated {len(generated_images)} variations for scene {scene_idx}"
-                )
-                
-            except Exception as e:
-                logger.error(
-                    f"[{generation_id}] Image generation failed for scene {scene_idx}: {e}. "
-                    "Retrying once..."
-                )
-                try:
-                    # Retry once with original prompt using nano-banana
+            
+            generated_images = generation_results
+            logger.info(
+                f"[{generation_id}] Generated {len(generated_images)} variations for scene {scene_idx}"
+            )
+            
+        except Exception as e:
+            logger.error(
+                f"[{generation_id}] Image generation failed for scene {scene_idx}: {e}. "
+                "Retrying once..."
+            )
+            try:
+                # Retry once with original prompt using nano-banana
+                async with provider_slot("image"):
                     generation_results = await generate_images(
                         prompt=base_prompt,
                         num_variations=1,  # Fallback: single image
                         aspect_ratio="16:9",
                         output_dir=Path(output_dir),
                         model_name="google/nano-banana",  # Always use nano-banana
-                        image_input=[previous_reference_image] if previous_reference_image and Path(previous_reference_image).exists() else None
-                    )
-                    generated_images = generation_results
-                    logger.info(f"[{generation_id}] Fallback generation succeeded for scene {scene_idx}")
-                except Exception as retry_error:
-                    logger.error(
-                        f"[{generation_id}] Fallback generation also failed for scene {scene_idx}: {retry_error}"
-                    )
-                    # Last resort: use first generated image if available, otherwise skip
-                    if not generated_images:
-                        logger.warning(
-                            f"[{generation_id}] No images generated for scene {scene_idx}, skipping..."
-                        )
-                        continue
-            
-            # Step 3: Score all variations
-            scored_images = []
-            try:
-                logger.info(f"[{generation_id}] Scoring {len(generated_images)} variations for scene {scene_idx}...")
-                for img_result in generated_images:
-                    scores = await score_image(
-                        image_path=img_result.image_path,
-                        prompt_text=enhanced_prompt
+                        image_input=[reference_image] if reference_image and Path(reference_image).exists() else None
                     )
-                    scored_images.append((img_result.image_path, scores))
-                
-                logger.info(
-                    f"[{generation_id}] Scored {len(scored_images)} variations for scene {scene_idx}"
-                )
-            except Exception as e:
-                logger.warning(
-                    f"[{generation_id}] Quality scoring failed for scene {scene_idx}: {e}. "
-                    "Using first generated image without ranking."
-                )
-                # Fallback: use first image without ranking
-                if generated_images:
-                    scored_images = [(generated_images[0].image_path, {"overall": 0.0})]
-                else:
-                    logger.error(f"[{generation_id}] No images available for scene {scene_idx}, skipping...")
-                    continue
-            
-            # Step 4: Rank variations by quality
-            ranked_images = []
-            try:
-                ranked_images = rank_images_by_quality(scored_images)
-                logger.info(
-                    f"[{generation_id}] Ranked {len(ranked_images)} variations for scene {scene_idx}. "
-                    f"Best score: {ranked_images[0][1].get('overall', 0):.1f}"
-                )
-            except Exception as e:
-                logger.warning(
-                    f"[{generation_id}] Ranking failed for scene {scene_idx}: {e}. "
-                    "Using first image."
+                generated_images = generation_results
+                logger.info(f"[{generation_id}] Fallback generation succeeded for scene {scene_idx}")
+            except Exception as retry_error:
+                logger.error(
+                    f"[{generation_id}] Fallback generation also failed for scene {scene_idx}: {retry_error}"
                 )
-                # Fallback: use first image
-                if scored_images:
-                    ranked_images = [(scored_images[0][0], scored_images[0][1], 1)]
-                else:
-                    logger.error(f"[{generation_id}] No scored images available for scene {scene_idx}, skipping...")
-                    continue
-            
-            # Step 5: Select best-ranked image (rank 1)
-            best_image_path, best_scores, best_rank = ranked_images[0]
+                # Last resort: use first generated image if available, otherwise skip
+                if not generated_images:
+                    logger.warning(
+                        f"[{generation_id}] No images generated for scene {scene_idx}, skipping..."
+                    )
+                    return None
+        
+        # Step 3: Score all variations
+        scored_images = []
+        try:
+            logger.info(f"[{generation_id}] Scoring {len(generated_images)} variations for scene {scene_idx}...")
+            # Score concurrently so the scorer can batch the variations
+            all_scores = await asyncio.gather(*(
+                score_image(image_path=img_result.image_path, prompt_text=enhanced_prompt)
+                for img_result in generated_images
+            ))
+            scored_images = [
+                (img_result.image_path, scores) for img_result, scores in zip(generated_images, all_scores)
+            ]
             
-            # Step 6: Check quality threshold
-            overall_score = best_scores.get("overall", 0.0)
-            if overall_score < quality_threshold:
-                logger.warning(
-                    f"[{generation_id}] Scene {scene_idx} selected reference image quality score "
-                    f"({overall_score:.1f}) is below threshold ({quality_threshold}). "
-                    "Proceeding with selected image."
-                )
+            logger.info(
+                f"[{generation_id}] Scored {len(scored_images)} variations for scene {scene_idx}"
+            )
+        except Exception as e:
+            logger.warning(
+                f"[{generation_id}] Quality scoring failed for scene {scene_idx}: {e}. "
+                "Using first generated image without ranking."
+            )
+            # Fallback: use first image without ranking
+            if generated_images:
+                scored_images = [(generated_images[0].image_path, {"overall": 0.0})]
             else:
-                logger.info(
-                    f"[{generation_id}] Scene {scene_idx} selected reference image quality score: "
-                    f"{overall_score:.1f} (threshold: {quality_threshold})"
-                )
-            
-            # Save generation trace metadata
-            generation_trace = {
-                "scene_number": scene_idx,
-                "variations": [
-                    {
-                        "image_path": img_result.image_path,
-                        "scores": scores,
-                        "rank": rank
-                    }
-                    for img_result, (_, scores, rank) in zip(generated_images, ranked_images)
-                ],
-                "selected_image": {
-                    "image_path": best_image_path,
-                    "scores": best_scores,
-                    "rank": best_rank
-                },
-                "timestamp": datetime.now().isoformat()
-            }
-            (scene_trace_dir / "generation_trace.json").write_text(
-                json.dumps(generation_trace, indent=2), encoding="utf-8"
+                logger.error(f"[{generation_id}] No images available for scene {scene_idx}, skipping...")
+                return None
+        
+        # Step 4: Rank variations by quality
+        ranked_images = []
+        try:
+            ranked_images = rank_images_by_quality(scored_images)
+            logger.info(
+                f"[{generation_id}] Ranked {len(ranked_images)} variations for scene {scene_idx}. "
+                f"Best score: {ranked_images[0][1].get('overall', 0):.1f}"
             )
-            
-            # Add selected image to results
-            reference_image_paths.append(best_image_path)
-            
-            # Update previous_reference_image for next scene
-            previous_reference_image = best_image_path
-            
+        except Exception as e:
+            logger.warning(
+                f"[{generation_id}] Ranking failed for scene {scene_idx}: {e}. "
+                "Using first image."
+            )
+            # Fallback: use first image
+            if scored_images:
+                ranked_images = [(scored_images[0][0], scored_images[0][1], 1)]
+            else:
+                logger.error(f"[{generation_id}] No scored images available for scene {scene_idx}, skipping...")
+                return None
+        
+        # Step 5: Select best-ranked image (rank 1)
+        best_image_path, best_scores, best_rank = ranked_images[0]
+        
+        # Step 6: Check quality threshold
+        overall_score = best_scores.get("overall", 0.0)
+        if overall_score < quality_threshold:
+            logger.warning(
+                f"[{generation_id}] Scene {scene_idx} selected reference image quality score "
+                f"({overall_score:.1f}) is below threshold ({quality_threshold}). "
+                "Proceeding with selected image."
+            )
+        else:
             logger.info(
-                f"[{generation_id}] ✅ Scene {scene_idx} completed: selected reference image "
-                f"(score: {overall_score:.1f}, rank: {best_rank})"
+                f"[{generation_id}] Scene {scene_idx} selected reference image quality score: "
+                f"{overall_score:.1f} (threshold: {quality_threshold})"
             )
         
+        # Save generation trace metadata
+        generation_trace = {
+            "scene_number": scene_idx,
+            "variations": [
+                {
+                    "image_path": img_result.image_path,
+                    "scores": scores,
+                    "rank": rank
+                }
+                for img_result, (_, scores, rank) in zip(generated_images, ranked_images)
+            ],
+            "selected_image": {
+                "image_path": best_image_path,
+                "scores": best_scores,
+                "rank": best_rank
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+        (scene_trace_dir / "generation_trace.json").write_text(
+            json.dumps(generation_trace, indent=2), encoding="utf-8"
+        )
+        
+        logger.info(
+            f"[{generation_id}] ✅ Scene {scene_idx} completed: selected reference image "
+            f"(score: {overall_score:.1f}, rank: {best_rank})"
+        )
+        # The selected image is the reference for this scene's children in the topology
+        return best_image_path
+    
+
+    try:
+        selected_paths = await _run_reference_topology(parents, initial_reference_image, process_scene)
+        reference_image_paths = [path for path in selected_paths if path]
+        
         logger.info(
             f"[{generation_id}] ✅ All {len(reference_image_paths)} enhanced reference images "
-            "generated with sequential chaining"
+            f"generated with '{topology}' references"
         )
         
     finally:
-        # Step 7: Clean up trace files immediately after completion
+        # Step 8: Clean up trace files immediately after completion
         try:
             if trace_root.exists():
                 shutil.rmtree(trace_root)
@@ -546,4 +686,3 @@ async def generate_enhanced_reference_images_with_sequential_references(
             )
     
     return reference_image_paths
-
@@ -17,7 +17,7 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import openai
 
 from app.core.config import settings
@@ -28,6 +28,7 @@ from app.services.pipeline.model_specific_prompts import (
     supports_negative_prompts,
     get_default_negative_prompt
 )
+from app.services.pipeline.text_analysis import analyze_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -430,13 +431,13 @@ def _quick_score_prompt(prompt: str) -> Dict[str, float]:
     Fast rule-based prompt scoring (no LLM call).
     Used for initial assessment to decide if enhancement is needed.
     """
-    prompt_lower = prompt.lower()
+    features = analyze_prompt(prompt)
     
     # Rule-based checks for image prompts (general-purpose, not product-specific)
-    has_subject = any(word in prompt_lower for word in ["product", "service", "item", "person", "object", "subject", "character", "model", "portrait", "thing", "item"])
-    has_visual = any(word in prompt_lower for word in ["image", "photo", "picture", "visual", "scene", "shot", "camera", "cinematic", "view"])
-    has_style = any(word in prompt_lower for word in ["style", "mood", "tone", "aesthetic", "look", "feel", "atmosphere", "grading", "color"])
-    has_details = len(prompt.split()) > 10  # Has some detail
+    has_subject = features.has("subject")
+    has_visual = features.has("visual")
+    has_style = features.has("style")
+    has_details = features.word_count > 10  # Has some detail
     
     # Calculate completeness
     completeness = (
@@ -447,14 +448,13 @@ def _quick_score_prompt(prompt: str) -> Dict[str, float]:
     ) * 100
     
     # Specificity: more words = more specific, but cap at reasonable level
-    word_count = len(prompt.split())
-    specificity = min(word_count / 25.0, 1.0) * 100  # Adjusted threshold
+    specificity = min(features.word_count / 25.0, 1.0) * 100  # Adjusted threshold
     
     # Professionalism: check for professional language patterns
     # Look for awkward phrasing patterns that indicate unprofessional language
-    awkward_patterns = ["framed by a", "using a", "all in a", "to evoke"]  # These suggest less natural flow
-    has_awkward = any(pattern in prompt_lower for pattern in awkward_patterns)
-    has_professional_terms = any(word in prompt_lower for word in ["cinematic", "professional", "elegant", "sophisticated", "polished", "refined"])
+    # ("framed by a", "using a", ... suggest less natural flow)
+    has_awkward = features.has("awkward")
+    has_professional_terms = features.has("professional")
     
     # Professionalism score: base on completeness, but penalize awkward phrasing
     professionalism_base = completeness * 0.9
@@ -466,9 +466,9 @@ def _quick_score_prompt(prompt: str) -> Dict[str, float]:
         professionalism = professionalism_base
     
     # Cinematography: check for camera/lighting details
-    has_camera = any(word in prompt_lower for word in ["camera", "lens", "canon", "sony", "eos", "f/", "mm"])
-    has_shot_type = any(word in prompt_lower for word in ["angle", "shot", "framing", "aerial", "close-up", "closeup", "telephoto", "macro", "portrait", "wide"])
-    has_lighting = any(word in prompt_lower for word in ["lighting", "light", "glow", "illumination", "diffused", "dramatic", "soft", "harsh", "golden", "neon"])
+    has_camera = features.has("camera")
+    has_shot_type = features.has("shot_type")
+    has_lighting = features.has("lighting")
     
     cinematography = (
         (1.0 if has_camera else 0.0) * 0.4 +
@@ -478,8 +478,8 @@ def _quick_score_prompt(prompt: str) -> Dict[str, float]:
     
     # Brand alignment: check for brand/style coherence (general, not product-specific)
     # If brand terms mentioned, they should be coherent; if not, score based on style consistency
-    has_brand_terms = any(word in prompt_lower for word in ["brand", "logo", "identity", "guidelines"])
-    has_style_coherence = any(word in prompt_lower for word in ["color", "palette", "aesthetic", "style", "mood", "tone"])
+    has_brand_terms = features.has("brand_terms")
+    has_style_coherence = features.has("style_coherence")
     brand_alignment = (1.0 if (has_brand_terms or has_style_coherence) else 0.5) * 100
     
     overall = (
@@ -814,9 +814,8 @@ async def enhance_prompt_with_parallel_exploration(
         
         # Step 3: Generate one image per variation (in parallel)
         logger.info(f"Generating 1 image per variation ({len(prompt_variations)} images total)...")
-        variation_results = []
         
-        for var_idx, variation_prompt in enumerate(prompt_variations):
+        async def generate_and_score(var_idx: int, variation_prompt: str) -> Dict[str, Any]:
             var_output_dir = trace_dir / f"iteration_{iteration}_variation_{var_idx+1}" if trace_dir else None
             if var_output_dir:
                 var_output_dir.mkdir(parents=True, exist_ok=True)
@@ -835,8 +834,9 @@ async def enhance_prompt_with_parallel_exploration(
                 if gen_results and gen_results[0].image_path:
                     # Score the image
                     scores = await score_image(gen_results[0].image_path, variation_prompt)
+                    logger.info(f"  Variation {var_idx+1}: Score {scores['overall']:.1f}/100")
                     
-                    variation_results.append({
+                    return {
                         "variation_index": var_idx + 1,
                         "prompt": variation_prompt,
                         "image_path": gen_results[0].image_path,
@@ -845,25 +845,27 @@ async def enhance_prompt_with_parallel_exploration(
                         "pickscore": scores.get("pickscore", 0),
                         "clip_score": scores.get("clip_score", 0),
                         "aesthetic": scores.get("aesthetic", 0)
-                    })
-                    
-                    logger.info(f"  Variation {var_idx+1}: Score {scores['overall']:.1f}/100")
-                else:
-                    logger.warning(f"  Variation {var_idx+1}: Failed to generate image")
-                    variation_results.append({
-                        "variation_index": var_idx + 1,
-                        "prompt": variation_prompt,
-                        "error": "Image generation failed",
-                        "overall_score": 0.0
-                    })
+                    }
+                logger.warning(f"  Variation {var_idx+1}: Failed to generate image")
+                return {
+                    "variation_index": var_idx + 1,
+                    "prompt": variation_prompt,
+                    "error": "Image generation failed",
+                    "overall_score": 0.0
+                }
             except Exception as e:
                 logger.error(f"  Variation {var_idx+1}: Error - {e}")
-                variation_results.append({
+                return {
                     "variation_index": var_idx + 1,
                     "prompt": variation_prompt,
                     "error": str(e),
                     "overall_score": 0.0
-                })
+                }
+        
+        # Scoring requests of all variations arrive together, so the scorer can batch them
+        variation_results = list(await asyncio.gather(
+            *(generate_and_score(var_idx, variation_prompt) for var_idx, variation_prompt in enumerate(prompt_variations))
+        ))
         
         # Step 4: Analyze results and select best
         best_var = None
@@ -7,13 +7,18 @@ This service implements multiple quality metrics:
 - VQAScore: Compositional semantic alignment (0-100, if available)
 - Aesthetic Predictor: Aesthetic quality (1-10 scale, normalized to 0-100)
 - Overall Quality Score: Weighted combination of all metrics
+- Reference consistency: CLIP image-image similarity across a set of images (0-100)
 
 Models are loaded once and cached in memory for reuse across multiple images.
+When SCORING_SERVICE_SOCKET is set, scoring is delegated to the shared scoring
+service (scoring_service.py), which keeps the models warm in one process and
+batches concurrent requests; the models are then never loaded in API workers.
 """
 import logging
 import time
+from functools import partial
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 from PIL import Image
 
@@ -25,6 +30,9 @@ CLIP_SCORE_WEIGHT = 0.25
 VQA_SCORE_WEIGHT = 0.15  # Only used if VQAScore is available
 AESTHETIC_WEIGHT = 0.10
 
+# CLIP text encoders take at most 77 tokens; ~4 chars per token, so ~300 chars is safe
+MAX_PROMPT_CHARS = 300
+
 # Model caching
 _clip_model = None
 _clip_processor = None
@@ -97,55 +105,18 @@ def _compute_clip_score(image_path: str, prompt_text: str) -> float:
             logger.warning("CLIP model not available, returning default score")
             return 50.0  # Default neutral score
         
-        import torch
-        
         # Load and preprocess image
         image = Image.open(image_path).convert("RGB")
         
         # Truncate prompt if too long (CLIP has max 77 tokens)
         # The processor will handle truncation, but we can pre-truncate to avoid warnings
-        # Most CLIP models use ~4 chars per token on average, so ~300 chars is safe
-        max_chars = 300  # Conservative estimate for 77 tokens
-        if len(prompt_text) > max_chars:
-            truncated_prompt = prompt_text[:max_chars].rsplit(' ', 1)[0]  # Cut at word boundary
-            logger.debug(f"Truncating prompt from {len(prompt_text)} to {len(truncated_prompt)} chars for CLIP")
-            prompt_text = truncated_prompt
-        
-        # Process text and image
-        # CLIP models have a 77 token limit, so we need to ensure truncation
-        # Tokenize text separately first to ensure proper truncation
-        text_inputs = processor.tokenizer(
-            prompt_text,
-            return_tensors="pt",
-            padding="max_length",
-            truncation=True,
-            max_length=77  # CLIP base model max length
-        )
-        
-        # Process image
-        image_inputs = processor.image_processor(image, return_tensors="pt")
+        prompt_text = _truncate_prompt(prompt_text)
         
-        # Combine inputs
-        inputs = {**text_inputs, **image_inputs}
+        # Compute embeddings and their cosine similarity
+        image_features, text_features = _embed_batch("clip", model, processor, [image], [prompt_text])
+        clip_score = float(_cosine_similarity(image_features, text_features)[0])
         
-        # Move to GPU if available
-        if torch.cuda.is_available():
-            inputs = {k: v.to("cuda") for k, v in inputs.items()}
-            model = model.to("cuda")
-        
-        # Compute embeddings
-        with torch.no_grad():
-            outputs = model(**inputs)
-            image_embeds = outputs.image_embeds
-            text_embeds = outputs.text_embeds
-        
-        # Compute cosine similarity
-        similarity = torch.nn.functional.cosine_similarity(image_embeds, text_embeds)
-        clip_score = similarity.item()
-        
-        # Normalize to 0-100 scale (CLIP similarity is typically -1 to 1, but usually 0.2-0.8)
-        # Map to 0-100: (score - 0.2) / (0.8 - 0.2) * 100, clamped to 0-100
-        normalized_score = max(0, min(100, (clip_score - 0.2) / 0.6 * 100))
+        normalized_score = _normalize_clip_similarity(clip_score)
         
         logger.debug(f"CLIP-Score computed: {normalized_score:.2f} (raw: {clip_score:.4f})")
         return float(normalized_score)
@@ -155,6 +126,20 @@ def _compute_clip_score(image_path: str, prompt_text: str) -> float:
         return 50.0  # Default neutral score on error
 
 
+def _truncate_prompt(prompt_text: str) -> str:
+    """Cut a prompt at a word boundary to fit the CLIP text encoder."""
+    if len(prompt_text) <= MAX_PROMPT_CHARS:
+        return prompt_text
+    truncated_prompt = prompt_text[:MAX_PROMPT_CHARS].rsplit(' ', 1)[0]
+    logger.debug(f"Truncating prompt from {len(prompt_text)} to {len(truncated_prompt)} chars for CLIP")
+    return truncated_prompt
+
+
+def _normalize_clip_similarity(similarity: float) -> float:
+    # CLIP similarity is -1 to 1 but usually 0.2-0.8; map that to 0-100, clamped
+    return float(max(0, min(100, (similarity - 0.2) / 0.6 * 100)))
+
+
 def _load_pickscore_model():
     """Load PickScore model and processor (cached)."""
     global _pickscore_model, _pickscore_processor
@@ -224,53 +209,17 @@ def _compute_pickscore(image_path: str, prompt_text: str) -> float:
             logger.warning("PickScore model not available, returning default score")
             return 50.0  # Default neutral score
         
-        import torch
-        
         # Load and preprocess image
         image = Image.open(image_path).convert("RGB")
         
         # Truncate prompt if too long (CLIP has max 77 tokens)
-        max_chars = 300  # Conservative estimate for 77 tokens
-        if len(prompt_text) > max_chars:
-            truncated_prompt = prompt_text[:max_chars].rsplit(' ', 1)[0]
-            logger.debug(f"Truncating prompt from {len(prompt_text)} to {len(truncated_prompt)} chars for PickScore")
-            prompt_text = truncated_prompt
-        
-        # Process text and image
-        text_inputs = processor.tokenizer(
-            prompt_text,
-            return_tensors="pt",
-            padding="max_length",
-            truncation=True,
-            max_length=77
-        )
-        
-        image_inputs = processor.image_processor(image, return_tensors="pt")
-        
-        inputs = {**text_inputs, **image_inputs}
-        
-        # Move to GPU if available
-        if torch.cuda.is_available():
-            inputs = {k: v.to("cuda") for k, v in inputs.items()}
-            model = model.to("cuda")
-        
-        # Compute embeddings
-        with torch.no_grad():
-            outputs = model(**inputs)
-            image_embeds = outputs.image_embeds
-            text_embeds = outputs.text_embeds
+        prompt_text = _truncate_prompt(prompt_text)
         
-        # Normalize embeddings
-        image_embeds = image_embeds / image_embeds.norm(dim=-1, keepdim=True)
-        text_embeds = text_embeds / text_embeds.norm(dim=-1, keepdim=True)
+        # Compute cosine similarity of the embeddings (PickScore uses this as base)
+        image_features, text_features = _embed_batch("pickscore", model, processor, [image], [prompt_text])
+        similarity = float(_cosine_similarity(image_features, text_features)[0])
         
-        # Compute cosine similarity (PickScore uses this as base)
-        similarity = (image_embeds * text_embeds).sum(dim=-1).item()
-        
-        # PickScore normalization: typically ranges from 0.2 to 0.9
-        # Map to 0-100 scale with preference-focused scaling
-        # PickScore tends to have higher values for good matches
-        normalized_score = max(0, min(100, (similarity - 0.2) / 0.7 * 100))
+        normalized_score = _normalize_pickscore_similarity(similarity)
         
         logger.debug(f"PickScore computed: {normalized_score:.2f} (raw: {similarity:.4f})")
         return float(normalized_score)
@@ -280,6 +229,11 @@ def _compute_pickscore(image_path: str, prompt_text: str) -> float:
         return 50.0  # Default neutral score on error
 
 
+def _normalize_pickscore_similarity(similarity: float) -> float:
+    # PickScore similarity typically ranges from 0.2 to 0.9 (higher for good matches); map to 0-100
+    return float(max(0, min(100, (similarity - 0.2) / 0.7 * 100)))
+
+
 def _compute_vqa_score(image_path: str, prompt_text: str) -> Optional[float]:
     """
     Compute VQAScore (compositional semantic alignment) on 0-100 scale.
@@ -386,63 +340,14 @@ def _compute_aesthetic_score(image_path: str) -> float:
             logger.warning("Aesthetic model not available, returning default score")
             return 50.0  # Default neutral score
         
-        import torch
-        
         # Load and preprocess image
         image = Image.open(image_path).convert("RGB")
         
-        # Process image
-        image_inputs = processor.image_processor(image, return_tensors="pt")
+        # Compute normalized image embeddings
+        image_features, _ = _embed_batch("aesthetic", model, processor, [image])
+        image_features = _normalize_rows(image_features)[0]
         
-        # Move to GPU if available
-        if torch.cuda.is_available():
-            image_inputs = {k: v.to("cuda") for k, v in image_inputs.items()}
-            model = model.to("cuda")
-        
-        # Compute image embeddings
-        with torch.no_grad():
-            # Use the same pattern as CLIP score for consistency
-            image_outputs = model.get_image_features(**image_inputs)
-            # Normalize embeddings
-            if image_outputs.dim() > 1:
-                image_features = image_outputs / image_outputs.norm(dim=-1, keepdim=True)
-            else:
-                image_features = image_outputs / image_outputs.norm()
-        
-        # Aesthetic score is typically computed from image features
-        # We use the magnitude and quality of features as a proxy
-        # LAION aesthetic predictor uses a learned MLP, but we'll approximate
-        # using feature statistics
-        
-        # Compute feature statistics that correlate with aesthetic quality
-        # LAION aesthetic predictor uses learned MLP, but we approximate using feature quality
-        feature_mean = image_features.mean().item()
-        feature_std = image_features.std().item()
-        
-        # Aesthetic quality correlates with:
-        # - Feature richness (higher mean indicates more information)
-        # - Feature diversity (higher std indicates more variation)
-        # Normalize these to a reasonable 1-10 scale
-        # Typical CLIP features have mean ~0 and std ~0.1-0.3
-        
-        # Map feature statistics to aesthetic score (1-10 scale)
-        # Base score of 5.0 (middle of scale)
-        base_score = 5.0
-        
-        # Mean contribution: positive mean indicates richer features
-        mean_contribution = max(-2.0, min(2.0, feature_mean * 4.0))
-        
-        # Std contribution: higher std indicates more diversity
-        std_contribution = max(-1.5, min(1.5, (feature_std - 0.15) * 5.0))
-        
-        # Combine to get aesthetic score
-        aesthetic_score = base_score + mean_contribution + std_contribution
-        
-        # Clamp to 1-10 scale
-        aesthetic_score = max(1.0, min(10.0, aesthetic_score))
-        
-        # Normalize to 0-100: (score - 1) / (10 - 1) * 100
-        normalized_score = (aesthetic_score - 1.0) / 9.0 * 100.0
+        aesthetic_score, normalized_score = _aesthetic_from_features(image_features)
         
         logger.debug(f"Aesthetic score computed: {normalized_score:.2f} (raw: {aesthetic_score:.2f}/10)")
         return float(normalized_score)
@@ -452,38 +357,40 @@ def _compute_aesthetic_score(image_path: str) -> float:
         return 50.0  # Default neutral score on error
 
 
-async def score_image(image_path: str, prompt_text: str) -> Dict[str, float]:
+def _aesthetic_from_features(image_features) -> Tuple[float, float]:
     """
-    Compute all quality scores for a generated image.
+    Get (1-10 aesthetic score, 0-100 normalized score) from normalized CLIP image features.
     
-    Args:
-        image_path: Path to the image file
-        prompt_text: Text prompt used for generation
+    LAION aesthetic predictor uses a learned MLP; this approximates it with
+    feature statistics that correlate with aesthetic quality.
+    """
+    feature_mean = float(np.mean(image_features))
+    feature_std = float(np.std(image_features, ddof=1))
     
-    Returns:
-        Dict[str, float]: Quality scores dictionary with keys:
-            - pickscore: Human preference prediction (0-100)
-            - clip_score: Image-text alignment (0-100)
-            - vqa_score: Compositional semantic alignment (0-100, or None if unavailable)
-            - aesthetic: Aesthetic quality (0-100, normalized from 1-10 scale)
-            - overall: Weighted combination of all metrics (0-100)
+    # Aesthetic quality correlates with:
+    # - Feature richness (higher mean indicates more information)
+    # - Feature diversity (higher std indicates more variation)
+    # Typical CLIP features have mean ~0 and std ~0.1-0.3
+    # Base score of 5.0 (middle of the 1-10 scale)
+    base_score = 5.0
     
-    Raises:
-        FileNotFoundError: If image file doesn't exist
-    """
-    if not Path(image_path).exists():
-        raise FileNotFoundError(f"Image file not found: {image_path}")
+    # Mean contribution: positive mean indicates richer features
+    mean_contribution = max(-2.0, min(2.0, feature_mean * 4.0))
     
-    logger.info(f"Computing quality scores for image: {image_path}")
-    start_time = time.time()
+    # Std contribution: higher std indicates more diversity
+    std_contribution = max(-1.5, min(1.5, (feature_std - 0.15) * 5.0))
     
-    # Compute all scores
-    pickscore = _compute_pickscore(image_path, prompt_text)
-    clip_score = _compute_clip_score(image_path, prompt_text)
-    vqa_score = _compute_vqa_score(image_path, prompt_text)
-    aesthetic = _compute_aesthetic_score(image_path)
+    # Combine and clamp to the 1-10 scale
+    aesthetic_score = max(1.0, min(10.0, base_score + mean_contribution + std_contribution))
     
-    # Calculate overall score with weighted combination
+    # Normalize to 0-100: (score - 1) / (10 - 1) * 100
+    return aesthetic_score, (aesthetic_score - 1.0) / 9.0 * 100.0
+
+
+def _combine_scores(
+    pickscore: float, clip_score: float, vqa_score: Optional[float], aesthetic: float
+) -> Dict[str, float]:
+    """Quality scores dict with the weighted overall score."""
     # Adjust weights if VQAScore is unavailable
     if vqa_score is None:
         # Redistribute VQAScore weight proportionally to other metrics
@@ -504,14 +411,6 @@ async def score_image(image_path: str, prompt_text: str) -> Dict[str, float]:
             aesthetic * AESTHETIC_WEIGHT
         )
     
-    elapsed_time = time.time() - start_time
-    logger.info(
-        f"Quality scores computed in {elapsed_time:.2f}s: "
-        f"PickScore={pickscore:.1f}, CLIP={clip_score:.1f}, "
-        f"VQA={vqa_score if vqa_score is not None else 'N/A'}, "
-        f"Aesthetic={aesthetic:.1f}, Overall={overall:.1f}"
-    )
-    
     return {
         "pickscore": pickscore,
         "clip_score": clip_score,
@@ -521,6 +420,284 @@ async def score_image(image_path: str, prompt_text: str) -> Dict[str, float]:
     }
 
 
+def warm_up_models() -> None:
+    """
+    Load all scoring models, and prepare their quantized encoders, now instead of on the first scored image.
+    
+    Preparing the encoders can take minutes on the first run (see
+    scoring_runtime.py), so call this from a thread, not the event loop.
+    """
+    from app.services.pipeline.scoring_runtime import prepare_quantized_encoder
+    
+    for kind, loader in (("clip", _load_clip_model), ("pickscore", _load_pickscore_model), ("aesthetic", _load_aesthetic_model)):
+        model, processor = loader()
+        if model is not None and processor is not None:
+            prepare_quantized_encoder(kind, model, processor, _embed_batch_torch, partial(_scores_from_features, kind))
+
+
+def _embed_batch(
+    kind: str, model, processor, images: List[Image.Image], prompts: Optional[List[str]] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Projected CLIP features of a batch of images (and prompts) as float32 arrays.
+    
+    Runs on the quantized ONNX Runtime encoders when they are enabled for this
+    scorer (see scoring_runtime.py), and on the PyTorch model otherwise.
+    
+    Args:
+        kind: Scorer the model belongs to ("clip", "pickscore" or "aesthetic")
+    
+    Returns:
+        (image_features, text_features); text_features is None without prompts
+    """
+    from app.services.pipeline.scoring_runtime import get_quantized_encoder
+    
+    encoder = get_quantized_encoder(kind, model, processor, _embed_batch_torch, partial(_scores_from_features, kind))
+    if encoder is not None:
+        return encoder.encode(images, prompts)
+    return _embed_batch_torch(model, processor, images, prompts)
+
+
+def _embed_batch_torch(
+    model, processor, images: List[Image.Image], prompts: Optional[List[str]] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Projected CLIP features from the PyTorch model, on the device it was loaded to."""
+    import torch
+    
+    device = next(model.parameters()).device
+    image_inputs = processor.image_processor(images, return_tensors="pt")
+    text_features = None
+    with torch.no_grad():
+        image_features = model.get_image_features(pixel_values=image_inputs["pixel_values"].to(device))
+        if prompts is not None:
+            text_inputs = processor.tokenizer(
+                prompts,
+                return_tensors="pt",
+                padding="max_length",
+                truncation=True,
+                max_length=77  # CLIP base model max length
+            )
+            text_features = model.get_text_features(
+                input_ids=text_inputs["input_ids"].to(device),
+                attention_mask=text_inputs["attention_mask"].to(device),
+            ).float().cpu().numpy()
+    return image_features.float().cpu().numpy(), text_features
+
+
+def _normalize_rows(features: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(features, axis=-1, keepdims=True)
+    return features / np.where(norms == 0, 1.0, norms)
+
+
+def _cosine_similarity(image_features: np.ndarray, text_features: np.ndarray) -> np.ndarray:
+    return np.sum(_normalize_rows(image_features) * _normalize_rows(text_features), axis=-1)
+
+
+def _scores_from_features(kind: str, image_features: np.ndarray, text_features: Optional[np.ndarray]) -> List[float]:
+    """0-100 scores of one scorer from a batch of projected features."""
+    if kind == "aesthetic":
+        return [_aesthetic_from_features(row)[1] for row in _normalize_rows(image_features)]
+    normalize = _normalize_clip_similarity if kind == "clip" else _normalize_pickscore_similarity
+    return [normalize(float(value)) for value in _cosine_similarity(image_features, text_features)]
+
+
+def compute_scores_batch(items: Sequence[Tuple[str, str]]) -> List[Dict[str, float]]:
+    """
+    Compute quality scores for several images with one forward pass per model.
+    
+    Produces the same scores as score_image for each (image_path, prompt_text)
+    pair; used by the scoring service to batch concurrent requests. Falls back
+    to scoring images one by one if the batch cannot be processed.
+    
+    Returns:
+        Quality score dicts (see score_image), in input order
+    """
+    if not items:
+        return []
+    try:
+        images = [Image.open(image_path).convert("RGB") for image_path, _ in items]
+        prompts = [_truncate_prompt(prompt_text) for _, prompt_text in items]
+        
+        scores = {}
+        for kind, loader in (("clip", _load_clip_model), ("pickscore", _load_pickscore_model), ("aesthetic", _load_aesthetic_model)):
+            model, processor = loader()
+            if model is None or processor is None:
+                scores[kind] = [50.0] * len(items)  # Default neutral score
+                continue
+            features = _embed_batch(kind, model, processor, images, None if kind == "aesthetic" else prompts)
+            scores[kind] = _scores_from_features(kind, *features)
+        
+        pickscores, clip_scores, aesthetics = scores["pickscore"], scores["clip"], scores["aesthetic"]
+        return [
+            _combine_scores(pickscore, clip_score, _compute_vqa_score(image_path, prompt_text), aesthetic)
+            for (image_path, prompt_text), pickscore, clip_score, aesthetic in zip(items, pickscores, clip_scores, aesthetics)
+        ]
+        
+    except Exception as e:
+        logger.warning(f"Batch scoring of {len(items)} images failed ({e}); scoring one by one")
+        return [_score_image_sync(image_path, prompt_text) for image_path, prompt_text in items]
+
+
+def _score_image_sync(image_path: str, prompt_text: str) -> Dict[str, float]:
+    return _combine_scores(
+        _compute_pickscore(image_path, prompt_text),
+        _compute_clip_score(image_path, prompt_text),
+        _compute_vqa_score(image_path, prompt_text),
+        _compute_aesthetic_score(image_path),
+    )
+
+
+async def score_image(image_path: str, prompt_text: str) -> Dict[str, float]:
+    """
+    Compute all quality scores for a generated image.
+    
+    Args:
+        image_path: Path to the image file
+        prompt_text: Text prompt used for generation
+    
+    Returns:
+        Dict[str, float]: Quality scores dictionary with keys:
+            - pickscore: Human preference prediction (0-100)
+            - clip_score: Image-text alignment (0-100)
+            - vqa_score: Compositional semantic alignment (0-100, or None if unavailable)
+            - aesthetic: Aesthetic quality (0-100, normalized from 1-10 scale)
+            - overall: Weighted combination of all metrics (0-100)
+    
+    Raises:
+        FileNotFoundError: If image file doesn't exist
+    """
+    if not Path(image_path).exists():
+        raise FileNotFoundError(f"Image file not found: {image_path}")
+    
+    logger.info(f"Computing quality scores for image: {image_path}")
+    start_time = time.time()
+    
+    from app.services.pipeline.scoring_service import ScoringServiceError, get_scoring_client
+    
+    client = get_scoring_client()
+    if client is not None:
+        try:
+            scores = await client.score_image(image_path, prompt_text)
+            logger.info(f"Quality scores from scoring service in {time.time() - start_time:.2f}s: Overall={scores['overall']:.1f}")
+            return scores
+        except ScoringServiceError as e:
+            logger.warning(f"Scoring service unavailable ({e}); scoring in-process")
+    
+    # Compute all scores
+    scores = _score_image_sync(image_path, prompt_text)
+    
+    elapsed_time = time.time() - start_time
+    vqa_score = scores["vqa_score"]
+    logger.info(
+        f"Quality scores computed in {elapsed_time:.2f}s: "
+        f"PickScore={scores['pickscore']:.1f}, CLIP={scores['clip_score']:.1f}, "
+        f"VQA={vqa_score if vqa_score is not None else 'N/A'}, "
+        f"Aesthetic={scores['aesthetic']:.1f}, Overall={scores['overall']:.1f}"
+    )
+    
+    return scores
+
+
+def _compute_clip_image_embedding(image_path: str) -> Optional[np.ndarray]:
+    """Normalized CLIP image embedding, or None if CLIP is unavailable."""
+    try:
+        model, processor = _load_clip_model()
+        if model is None or processor is None:
+            return None
+        
+        image = Image.open(image_path).convert("RGB")
+        image_features, _ = _embed_batch("clip", model, processor, [image])
+        return _normalize_rows(image_features)[0]
+        
+    except Exception as e:
+        logger.error(f"Error computing CLIP image embedding: {e}", exc_info=True)
+        return None
+
+
+def compute_image_embeddings_batch(image_paths: Sequence[str]) -> List[Optional[np.ndarray]]:
+    """Normalized CLIP image embeddings of several images with one forward pass (None where unavailable)."""
+    if not image_paths:
+        return []
+    try:
+        model, processor = _load_clip_model()
+        if model is None or processor is None:
+            return [None] * len(image_paths)
+        images = [Image.open(image_path).convert("RGB") for image_path in image_paths]
+        features, _ = _embed_batch("clip", model, processor, images)
+        return list(_normalize_rows(features))
+    except Exception as e:
+        logger.warning(f"Batch embedding of {len(image_paths)} images failed ({e}); embedding one by one")
+        return [_compute_clip_image_embedding(image_path) for image_path in image_paths]
+
+
+async def _clip_image_embeddings(image_paths: List[str]) -> List[Optional[np.ndarray]]:
+    """CLIP image embeddings from the scoring service, or computed in-process."""
+    from app.services.pipeline.scoring_service import ScoringServiceError, get_scoring_client
+    
+    client = get_scoring_client()
+    if client is not None:
+        try:
+            return await client.image_embeddings(image_paths)
+        except ScoringServiceError as e:
+            logger.warning(f"Scoring service unavailable ({e}); embedding in-process")
+    return [_compute_clip_image_embedding(path) for path in image_paths]
+
+
+def _similarity_to_score(similarity: float) -> float:
+    # CLIP image-image similarity of related images is typically 0.5-1.0; map that to 0-100
+    return float(max(0.0, min(100.0, (similarity - 0.5) / 0.5 * 100)))
+
+
+async def score_image_consistency(image_paths: List[str], anchor_path: Optional[str] = None) -> Dict[str, float]:
+    """
+    Compute visual consistency of a set of images (e.g., the reference images of a storyboard).
+    
+    Used to compare reference topologies: a chain keeps neighbours close, a star keeps
+    every image close to the anchor.
+    
+    Args:
+        image_paths: Paths to the images, in scene order
+        anchor_path: Optional anchor image (e.g., user's reference image); defaults to the first image
+    
+    Returns:
+        Dict[str, float]: Consistency scores (0-100, 50.0 if CLIP is unavailable) with keys:
+            - mean_pairwise: Mean similarity over all pairs of images
+            - min_pairwise: Similarity of the least consistent pair
+            - adjacent: Mean similarity of consecutive images
+            - anchor: Mean similarity of each image to the anchor
+    """
+    paths = [path for path in image_paths if path and Path(path).exists()]
+    anchor_path = anchor_path if anchor_path and Path(anchor_path).exists() else (paths[0] if paths else None)
+    neutral = {"mean_pairwise": 50.0, "min_pairwise": 50.0, "adjacent": 50.0, "anchor": 50.0}
+    if len(paths) < 2:
+        return neutral
+    
+    start_time = time.time()
+    embeddings = await _clip_image_embeddings(paths if anchor_path in paths else paths + [anchor_path])
+    anchor_embedding = embeddings[paths.index(anchor_path)] if anchor_path in paths else embeddings.pop()
+    if any(embedding is None for embedding in embeddings) or anchor_embedding is None:
+        logger.warning("CLIP model not available, returning default consistency scores")
+        return neutral
+    
+    matrix = np.stack(embeddings)
+    similarities = matrix @ matrix.T
+    pairs = [similarities[i, j] for i in range(len(paths)) for j in range(i + 1, len(paths))]
+    adjacent = [similarities[i, i + 1] for i in range(len(paths) - 1)]
+    to_anchor = [float(embedding @ anchor_embedding) for embedding, path in zip(embeddings, paths) if path != anchor_path]
+    
+    scores = {
+        "mean_pairwise": _similarity_to_score(float(np.mean(pairs))),
+        "min_pairwise": _similarity_to_score(float(np.min(pairs))),
+        "adjacent": _similarity_to_score(float(np.mean(adjacent))),
+        "anchor": _similarity_to_score(float(np.mean(to_anchor))) if to_anchor else 100.0,
+    }
+    logger.info(
+        f"Consistency scores for {len(paths)} images computed in {time.time() - start_time:.2f}s: "
+        + ", ".join(f"{name}={value:.1f}" for name, value in scores.items())
+    )
+    return scores
+
+
 def rank_images_by_quality(
     image_results: list[tuple[str, Dict[str, float]]]
 ) -> list[tuple[str, Dict[str, float], int]]:
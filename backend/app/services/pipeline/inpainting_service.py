@@ -15,6 +15,7 @@ import httpx
 from PIL import Image
 
 from app.core.config import settings
+from app.core.tracing import record_prediction, traced
 from app.services.pipeline.video_generation import MAX_RETRIES, POLL_INTERVAL
 
 logger = logging.getLogger(__name__)
@@ -269,6 +270,8 @@ async def _inpaint_with_retry(
                 # Refresh prediction status
                 prediction = client.predictions.get(prediction.id)
 
+            record_prediction(prediction, SDXL_INPAINT_MODEL, "inpaint")
+
             # Check final status
             if prediction.status == "succeeded":
                 # SDXL-inpaint returns a list of image URLs
@@ -314,6 +317,7 @@ async def _inpaint_with_retry(
     )
 
 
+@traced("prediction", name="inpaint.download")
 async def _download_image(image_url: str, output_path: Path) -> None:
     """Download image from URL to local path."""
     async with httpx.AsyncClient(timeout=60.0) as client:
@@ -13,6 +13,7 @@ Key features:
 """
 
 import asyncio
+import functools
 import json
 import logging
 import uuid
@@ -21,6 +22,7 @@ from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
 
 from app.core.config import settings
+from app.core.tracing import span, trace
 from app.schemas.interactive import (
     ChatMessage,
     PipelineSessionState,
@@ -28,6 +30,7 @@ from app.schemas.interactive import (
 from app.schemas.generation import Scene
 from app.services.pipeline.story_generator import generate_story
 from app.services.pipeline.template_selector import select_template_with_override
+from app.services.pipeline.scene_stream import SceneChains, provider_slot
 from app.services.pipeline.session_storage import get_session_storage
 from app.services.pipeline.video_generation import generate_video_clip
 from app.services.pipeline.stitching import stitch_video_clips
@@ -35,6 +38,17 @@ from app.services.pipeline.stitching import stitch_video_clips
 logger = logging.getLogger(__name__)
 
 
+def _traced_stage(stage: str):
+    """Run an orchestrator stage method as a span of its own trace ("{session_id}-{stage}")."""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, session_id: str, *args, **kwargs):
+            with trace(f"{session_id}-{stage}", "interactive"), span(stage, "stage"):
+                return await method(self, session_id, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 class InteractivePipelineOrchestrator:
     """
     Orchestrates interactive multi-stage pipeline with pause points.
@@ -45,6 +59,10 @@ class InteractivePipelineOrchestrator:
     3. Storyboard generation → pause → approve → continue
     4. Video generation → complete
 
+    In streaming mode, stages 3 and 4 run as one pass without a pause: each
+    scene's frames start as soon as it is parsed from the streamed storyboard,
+    and its video as soon as its frames exist.
+
     Each pause point allows user to:
     - Review the output
     - Provide conversational feedback
@@ -79,7 +97,7 @@ class InteractivePipelineOrchestrator:
             user_id: User identifier
             prompt: User's video generation prompt
             target_duration: Target video duration in seconds
-            mode: Pipeline mode ('interactive' or 'auto')
+            mode: Pipeline mode ('interactive', 'auto' or 'streaming')
             title: Optional video title
 
         Returns:
@@ -118,8 +136,9 @@ class InteractivePipelineOrchestrator:
 
         # Start first stage (story generation) in background
         # In production, this would be a background task
-        if mode == "auto":
-            # Auto mode: run all stages without pausing
+        if mode in ("auto", "streaming"):
+            # Auto mode: run all stages without pausing; streaming mode also
+            # lets each scene go from storyboard to video on its own
             logger.info("Auto mode: running all stages...")
             await self._run_auto_pipeline(session_id)
         else:
@@ -128,17 +147,26 @@ class InteractivePipelineOrchestrator:
 
         return session
 
-    async def get_session(self, session_id: str) -> Optional[PipelineSessionState]:
+    async def get_session(
+        self,
+        session_id: str,
+        stages: Optional[List[str]] = None,
+        include_conversation: bool = True,
+    ) -> Optional[PipelineSessionState]:
         """
         Retrieve a session by ID.
 
         Args:
             session_id: Session identifier
+            stages: Stage outputs to load (None loads all, [] loads none)
+            include_conversation: Whether to load the conversation history
 
         Returns:
             PipelineSessionState if found, None otherwise
         """
-        session = await self._load_session(session_id)
+        session = await self._load_session(
+            session_id, stages=stages, include_conversation=include_conversation
+        )
 
         if session and session.expires_at < datetime.utcnow():
             logger.warning(f"Session {session_id} has expired")
@@ -201,7 +229,7 @@ class InteractivePipelineOrchestrator:
             # Final stage approved - mark as complete
             session.status = "complete"
             session.current_stage = "Complete"
-            await self._save_session(session)
+            await self._save_session(session, check_version=True)
 
             return {
                 "session_id": session_id,
@@ -213,7 +241,7 @@ class InteractivePipelineOrchestrator:
         if manual_images:
             logger.info("Manual reference images supplied; skipping automatic reference generation.")
             await self._complete_manual_reference_stage(session, manual_images)
-            await self._generate_storyboard_stage(session_id)
+            await self._generate_storyboard_stage(session_id, chain_video=session.mode == "streaming")
 
             return {
                 "session_id": session_id,
@@ -238,13 +266,14 @@ class InteractivePipelineOrchestrator:
         session.updated_at = datetime.utcnow()
         session.conversation_history = []  # Reset conversation for new stage
 
-        await self._save_session(session)
+        # Version-checked so a concurrent approve/regenerate of the same stage fails
+        await self._save_session(session, check_version=True)
 
         # Start next stage generation
         if next_stage == "reference_image":
             await self._generate_reference_image_stage(session_id)
         elif next_stage == "storyboard":
-            await self._generate_storyboard_stage(session_id)
+            await self._generate_storyboard_stage(session_id, chain_video=session.mode == "streaming")
         elif next_stage == "video":
             await self._generate_video_stage(session_id)
 
@@ -299,6 +328,12 @@ class InteractivePipelineOrchestrator:
             )
             session.conversation_history.append(feedback_msg)
 
+        # Claim the stage before regenerating so a concurrent approve/regenerate
+        # fails instead of clobbering this one. The stage generator reloads and
+        # saves the session itself, so this copy is not saved again afterwards.
+        session.updated_at = datetime.utcnow()
+        await self._save_session(session, check_version=True)
+
         # Regenerate based on stage
         if stage == "story":
             await self._generate_story_stage(session_id, modifications)
@@ -307,9 +342,6 @@ class InteractivePipelineOrchestrator:
         elif stage == "storyboard":
             await self._generate_storyboard_stage(session_id, modifications)
 
-        session.updated_at = datetime.utcnow()
-        await self._save_session(session)
-
         return {
             "session_id": session_id,
             "stage": stage,
@@ -411,9 +443,10 @@ class InteractivePipelineOrchestrator:
         session.conversation_history = []
         session.updated_at = datetime.utcnow()
 
-        await self._save_session(session)
+        await self._save_session(session, check_version=True)
         await self._notify_stage_complete(session.session_id, "reference_image", session.outputs["reference_image"])
 
+    @_traced_stage("story")
     async def _generate_story_stage(
         self,
         session_id: str,
@@ -475,6 +508,7 @@ class InteractivePipelineOrchestrator:
             await self._save_session(session)
             raise
 
+    @_traced_stage("reference_image")
     async def _generate_reference_image_stage(
         self,
         session_id: str,
@@ -586,17 +620,27 @@ class InteractivePipelineOrchestrator:
             await self._save_session(session)
             raise
 
+    @_traced_stage("storyboard")
     async def _generate_storyboard_stage(
         self,
         session_id: str,
-        modifications: Optional[Dict[str, Any]] = None
+        modifications: Optional[Dict[str, Any]] = None,
+        chain_video: bool = False,
     ):
-        """Generate storyboard for the session."""
+        """
+        Generate storyboard for the session.
+
+        The storyboard is streamed from the LLM, and each scene's start/end frames
+        start generating as soon as that scene has been parsed. With chain_video
+        (streaming mode), each scene's video starts as soon as its frames exist
+        and the session completes with the video stage.
+        """
         session = await self.get_session(session_id)
         if not session:
             raise ValueError(f"Session not found: {session_id}")
 
         stage_start = datetime.utcnow()
+        chains = SceneChains(label=session_id)
         try:
             logger.info(f"🎬 Generating storyboard for session {session_id}...")
 
@@ -626,8 +670,6 @@ class InteractivePipelineOrchestrator:
                 affected_indices = modifications["affected_indices"]
                 logger.info(f"Regenerating specific clips: {affected_indices}")
 
-            # Generate storyboard
-            logger.info("Generating storyboard from story and reference images...")
             storyboard_prompt = user_prompt
             narrative_context = story.get("narrative")
             if narrative_context:
@@ -636,37 +678,16 @@ class InteractivePipelineOrchestrator:
             if modifications:
                 storyboard_prompt = f"{storyboard_prompt}\n\nApply these adjustments:\n{json.dumps(modifications, ensure_ascii=False)}"
 
-            storyboard_result = await generate_storyboard(
-                user_prompt=storyboard_prompt,
-                reference_image_paths=reference_image_paths,
-            )
-
-            if hasattr(storyboard_result, "model_dump"):
-                storyboard_payload = storyboard_result.model_dump()
-            elif isinstance(storyboard_result, dict):
-                storyboard_payload = storyboard_result
-            else:
-                storyboard_payload = json.loads(storyboard_result)
-
-            # Generate images for each storyboard scene (clips)
+            # Images for each storyboard scene (clips) are generated while the storyboard streams
             output_dir = f"{settings.OUTPUT_BASE_DIR}/interactive/{session_id}/storyboard"
-            storyboard_clips: List[Dict[str, Any]] = []
             existing_clips = session.outputs.get("storyboard", {}).get("clips", [])
             existing_clip_map = {clip["clip_number"]: clip for clip in existing_clips}
 
-            scenes = storyboard_payload.get("scenes", [])
-            clip_results: Dict[int, Dict[str, Any]] = {}
-            concurrency_limit = max(
-                1, getattr(settings, "STORYBOARD_CLIP_CONCURRENCY", 3)
-            )
-            semaphore = asyncio.Semaphore(concurrency_limit)
-            clip_tasks: List[asyncio.Task] = []
-
-            async def process_clip(clip_index: int, scene: Dict[str, Any]):
+            async def process_clip(clip_index: int, scene: Dict[str, Any]) -> Dict[str, Any]:
                 scene_prompt = scene.get("visual_prompt", "")
                 logger.info(f"Generating images for clip {clip_index}...")
 
-                async with semaphore:
+                async with provider_slot("image"):
                     start_task = asyncio.create_task(
                         generate_image(
                             prompt=f"{scene_prompt} (start frame)",
@@ -699,47 +720,76 @@ class InteractivePipelineOrchestrator:
                     except Exception as e:
                         logger.warning(f"Quality scoring failed for clip {clip_index}: {e}")
 
-                    logger.info(f"✅ Clip {clip_index}/{len(scenes)} generated")
-                    return (
-                        clip_index,
-                        {
-                            "clip_number": clip_index,
-                            "scene": scene,
-                            "start_frame": {
-                                "path": start_frame_path,
-                                "url": f"/api/v1/outputs/interactive/{session_id}/storyboard/{Path(start_frame_path).name}",
-                            },
-                            "end_frame": {
-                                "path": end_frame_path,
-                                "url": f"/api/v1/outputs/interactive/{session_id}/storyboard/{Path(end_frame_path).name}",
-                            },
-                            "duration": scene.get("duration", 4),
-                            "voiceover": scene.get("scene_type", ""),
-                            "quality_score": quality_score,
-                            "quality_metrics": quality_metrics,
+                    logger.info(f"✅ Clip {clip_index} frames generated")
+                    return {
+                        "clip_number": clip_index,
+                        "scene": scene,
+                        "start_frame": {
+                            "path": start_frame_path,
+                            "url": f"/api/v1/outputs/interactive/{session_id}/storyboard/{Path(start_frame_path).name}",
                         },
-                    )
-
-            for i, scene in enumerate(scenes):
-                clip_index = i + 1
+                        "end_frame": {
+                            "path": end_frame_path,
+                            "url": f"/api/v1/outputs/interactive/{session_id}/storyboard/{Path(end_frame_path).name}",
+                        },
+                        "duration": scene.get("duration", 4),
+                        "voiceover": scene.get("scene_type", ""),
+                        "quality_score": quality_score,
+                        "quality_metrics": quality_metrics,
+                    }
 
+            async def scene_chain(clip_index: int, scene: Dict[str, Any]):
                 # Skip clips not in affected_indices if regenerating specific ones
+                clip = None
                 if affected_indices and clip_index not in affected_indices:
-                    existing_clip = existing_clip_map.get(clip_index)
-                    if existing_clip:
-                        clip_results[clip_index] = existing_clip
+                    clip = existing_clip_map.get(clip_index)
+                    if clip:
                         logger.info(f"Reusing existing clip {clip_index}")
-                        continue
+                if clip is None:
+                    clip = await process_clip(clip_index, scene)
+                if not chain_video:
+                    return clip, None
+                try:
+                    video_clip = await self._generate_clip_video(session_id, clip, clip_index)
+                except Exception as e:
+                    logger.error(f"Video clip generation failed for clip {clip_index}: {e}")
+                    video_clip = None
+                return clip, video_clip
 
-                clip_tasks.append(asyncio.create_task(process_clip(clip_index, scene)))
+            def on_scene(clip_index: int, scene: Scene) -> None:
+                scene_data = scene.model_dump()
+                chains.start(clip_index, lambda: scene_chain(clip_index, scene_data))
 
-            for result in await asyncio.gather(*clip_tasks, return_exceptions=True):
-                if isinstance(result, Exception):
+            logger.info("Generating storyboard from story and reference images...")
+            storyboard_result = await generate_storyboard(
+                user_prompt=storyboard_prompt,
+                reference_image_paths=reference_image_paths,
+                on_scene=on_scene,
+            )
+
+            if hasattr(storyboard_result, "model_dump"):
+                storyboard_payload = storyboard_result.model_dump()
+            elif isinstance(storyboard_result, dict):
+                storyboard_payload = storyboard_result
+            else:
+                storyboard_payload = json.loads(storyboard_result)
+
+            # Scenes the stream did not hand out (not parsed incrementally) start now
+            scenes = storyboard_payload.get("scenes", [])
+            for i, scene in enumerate(scenes):
+                if i + 1 not in chains:
+                    chains.start(i + 1, lambda i=i, scene=scene: scene_chain(i + 1, scene))
+
+            clip_results: Dict[int, Dict[str, Any]] = {}
+            video_results: List[Dict[str, Any]] = []
+            for clip_index, result in (await chains.results()).items():
+                if isinstance(result, BaseException):
                     logger.error(f"Storyboard clip generation task failed: {result}")
                     continue
-                if result:
-                    clip_index, clip_payload = result
-                    clip_results[clip_index] = clip_payload
+                clip_payload, video_clip = result
+                clip_results[clip_index] = clip_payload
+                if video_clip:
+                    video_results.append(video_clip)
 
             storyboard_clips = [clip_results[idx] for idx in sorted(clip_results.keys()) if clip_results.get(idx)]
 
@@ -766,13 +816,126 @@ class InteractivePipelineOrchestrator:
             # Send WebSocket notification
             await self._notify_stage_complete(session_id, "storyboard", session.outputs["storyboard"])
 
+            if chain_video:
+                await self._complete_video_stage(session, video_results, stage_start)
+
         except Exception as e:
+            await chains.cancel()
             logger.error(f"❌ Storyboard generation failed: {e}")
             session.error = str(e)
             session.error_count += 1
             await self._save_session(session)
             raise
 
+    async def _generate_clip_video(
+        self,
+        session_id: str,
+        clip: Dict[str, Any],
+        default_index: int,
+        fallback_prompt: str = "",
+    ) -> Dict[str, Any]:
+        """Generate the Veo 3 video for one storyboard clip from its start frame."""
+        video_output_dir = f"{settings.OUTPUT_BASE_DIR}/interactive/{session_id}/video"
+        Path(video_output_dir).mkdir(parents=True, exist_ok=True)
+
+        clip_number = clip.get("clip_number") or default_index
+        scene_data = clip.get("scene", {}) or {}
+        visual_prompt = (
+            scene_data.get("visual_prompt")
+            or scene_data.get("visual")
+            or fallback_prompt
+        )
+
+        scene_payload = Scene(
+            scene_number=clip_number or 0,
+            scene_type=scene_data.get("scene_type", "Scene"),
+            visual_prompt=visual_prompt,
+            model_prompts=scene_data.get("model_prompts", {}),
+            reference_image_path=scene_data.get("reference_image_path"),
+            text_overlay=None,
+            duration=int(clip.get("duration", 4)),
+            sound_design=scene_data.get("sound_design"),
+            transition_to_next=scene_data.get("transition_to_next", "crossfade"),
+        )
+
+        start_reference = clip.get("start_frame", {}).get("path")
+        reference_images = []
+        if start_reference:
+            reference_images.append(start_reference)
+
+        async with provider_slot("video"):
+            clip_path, model_used = await generate_video_clip(
+                scene=scene_payload,
+                output_dir=video_output_dir,
+                generation_id=f"{session_id}_video",
+                scene_number=scene_payload.scene_number,
+                preferred_model="google/veo-3",
+                reference_image_path=start_reference,
+                reference_images=reference_images if reference_images else None,
+                resolution="1080p",
+                generate_audio=True,
+            )
+
+        logger.info(f"✅ Video clip {scene_payload.scene_number} generated")
+        return {
+            "clip_number": scene_payload.scene_number,
+            "path": clip_path,
+            "url": f"/api/v1/outputs/interactive/{session_id}/video/{Path(clip_path).name}",
+            "model": model_used,
+        }
+
+    async def _complete_video_stage(
+        self,
+        session: PipelineSessionState,
+        clip_results: List[Dict[str, Any]],
+        stage_start: datetime,
+    ):
+        """Stitch the generated video clips, save the video output and complete the session."""
+        session_id = session.session_id
+        if not clip_results:
+            raise RuntimeError("Video generation produced no clips")
+
+        clip_results.sort(key=lambda c: c.get("clip_number") or 0)
+
+        video_output_dir = f"{settings.OUTPUT_BASE_DIR}/interactive/{session_id}/video"
+        final_video_path = None
+        final_video_url = None
+        try:
+            stitched_filename = f"{session_id}_final.mp4"
+            stitched_path = Path(video_output_dir) / stitched_filename
+            stitched_result = stitch_video_clips(
+                clip_paths=[clip["path"] for clip in clip_results],
+                output_path=str(stitched_path),
+            )
+            final_video_path = stitched_result
+            final_video_url = f"/api/v1/outputs/interactive/{session_id}/video/{Path(stitched_result).name}"
+        except Exception as stitch_err:
+            logger.error(f"Video stitching failed for session {session_id}: {stitch_err}")
+
+        duration_seconds = (datetime.utcnow() - stage_start).total_seconds()
+
+        session.outputs["video"] = {
+            "clips": clip_results,
+            "model": "google/veo-3",
+            "status": "completed",
+            "duration_seconds": duration_seconds,
+        }
+        if final_video_path:
+            session.outputs["video"]["final_video"] = {
+                "path": final_video_path,
+                "url": final_video_url,
+            }
+
+        session.status = "complete"
+        session.current_stage = "Complete"
+        session.stage_data["video_last_duration_seconds"] = duration_seconds
+        session.updated_at = datetime.utcnow()
+        await self._save_session(session)
+
+        await self._notify_stage_complete(session_id, "video", session.outputs["video"])
+        logger.info(f"✅ Video generation completed for session {session_id}")
+
+    @_traced_stage("video")
     async def _generate_video_stage(
         self,
         session_id: str,
@@ -791,63 +954,14 @@ class InteractivePipelineOrchestrator:
         stage_start = datetime.utcnow()
         try:
             logger.info(f"🎥 Generating final video for session {session_id} with Veo 3")
-            video_output_dir = f"{settings.OUTPUT_BASE_DIR}/interactive/{session_id}/video"
-            Path(video_output_dir).mkdir(parents=True, exist_ok=True)
+            fallback_prompt = storyboard.get("storyboard_spec", {}).get("visual_prompt") or ""
 
-            concurrency_limit = max(1, getattr(settings, "VIDEO_CLIP_CONCURRENCY", 2))
-            semaphore = asyncio.Semaphore(concurrency_limit)
             clip_tasks: List[asyncio.Task] = []
-
-            async def process_video_clip(clip: Dict[str, Any], default_index: int) -> Optional[Dict[str, Any]]:
-                clip_number = clip.get("clip_number") or default_index
-                scene_data = clip.get("scene", {}) or {}
-                visual_prompt = (
-                    scene_data.get("visual_prompt")
-                    or scene_data.get("visual")
-                    or storyboard.get("storyboard_spec", {}).get("visual_prompt")
-                    or ""
-                )
-
-                scene_payload = Scene(
-                    scene_number=clip_number or 0,
-                    scene_type=scene_data.get("scene_type", "Scene"),
-                    visual_prompt=visual_prompt,
-                    model_prompts=scene_data.get("model_prompts", {}),
-                    reference_image_path=scene_data.get("reference_image_path"),
-                    text_overlay=None,
-                    duration=int(clip.get("duration", 4)),
-                    sound_design=scene_data.get("sound_design"),
-                    transition_to_next=scene_data.get("transition_to_next", "crossfade"),
-                )
-
-                start_reference = clip.get("start_frame", {}).get("path")
-                reference_images = []
-                if start_reference:
-                    reference_images.append(start_reference)
-
-                async with semaphore:
-                    clip_path, model_used = await generate_video_clip(
-                        scene=scene_payload,
-                        output_dir=video_output_dir,
-                        generation_id=f"{session_id}_video",
-                        scene_number=scene_payload.scene_number,
-                        preferred_model="google/veo-3",
-                        reference_image_path=start_reference,
-                        reference_images=reference_images if reference_images else None,
-                        resolution="1080p",
-                        generate_audio=True,
-                    )
-
-                return {
-                    "clip_number": scene_payload.scene_number,
-                    "path": clip_path,
-                    "url": f"/api/v1/outputs/interactive/{session_id}/video/{Path(clip_path).name}",
-                    "model": model_used,
-                }
-
             for clip in clips:
                 default_index = clip.get("clip_number") or (len(clip_tasks) + 1)
-                clip_tasks.append(asyncio.create_task(process_video_clip(clip, default_index)))
+                clip_tasks.append(
+                    asyncio.create_task(self._generate_clip_video(session_id, clip, default_index, fallback_prompt))
+                )
 
             clip_results: List[Dict[str, Any]] = []
             for result in await asyncio.gather(*clip_tasks, return_exceptions=True):
@@ -857,47 +971,7 @@ class InteractivePipelineOrchestrator:
                 if result:
                     clip_results.append(result)
 
-            if not clip_results:
-                raise RuntimeError("Video generation produced no clips")
-
-            clip_results.sort(key=lambda c: c.get("clip_number") or 0)
-
-            final_video_path = None
-            final_video_url = None
-            try:
-                stitched_filename = f"{session_id}_final.mp4"
-                stitched_path = Path(video_output_dir) / stitched_filename
-                stitched_result = stitch_video_clips(
-                    clip_paths=[clip["path"] for clip in clip_results],
-                    output_path=str(stitched_path),
-                )
-                final_video_path = stitched_result
-                final_video_url = f"/api/v1/outputs/interactive/{session_id}/video/{Path(stitched_result).name}"
-            except Exception as stitch_err:
-                logger.error(f"Video stitching failed for session {session_id}: {stitch_err}")
-
-            duration_seconds = (datetime.utcnow() - stage_start).total_seconds()
-
-            session.outputs["video"] = {
-                "clips": clip_results,
-                "model": "google/veo-3",
-                "status": "completed",
-                "duration_seconds": duration_seconds,
-            }
-            if final_video_path:
-                session.outputs["video"]["final_video"] = {
-                    "path": final_video_path,
-                    "url": final_video_url,
-                }
-
-            session.status = "complete"
-            session.current_stage = "Complete"
-            session.stage_data["video_last_duration_seconds"] = duration_seconds
-            session.updated_at = datetime.utcnow()
-            await self._save_session(session)
-
-            await self._notify_stage_complete(session_id, "video", session.outputs["video"])
-            logger.info(f"✅ Video generation completed for session {session_id}")
+            await self._complete_video_stage(session, clip_results, stage_start)
 
         except Exception as e:
             logger.error(f"❌ Video generation failed: {e}")
@@ -907,24 +981,40 @@ class InteractivePipelineOrchestrator:
             raise
 
     async def _run_auto_pipeline(self, session_id: str):
-        """Run all stages automatically without pausing (auto mode)."""
+        """Run all stages automatically without pausing (auto and streaming modes)."""
         await self._generate_story_stage(session_id)
         # Auto-approve and continue
         await self.approve_stage(session_id, "story")
         # Subsequent stages will be triggered by approve_stage
+        session = await self.get_session(session_id, stages=[], include_conversation=False)
+        if session and session.mode == "streaming" and session.status == "reference_image":
+            # Storyboard and video run as one pass, each scene flowing through both
+            await self.approve_stage(session_id, "reference_image")
 
     # ========================================================================
     # Session Storage (Redis/PostgreSQL/In-Memory)
     # ========================================================================
 
-    async def _save_session(self, session: PipelineSessionState):
-        """Save session to storage (Redis/PostgreSQL/in-memory)."""
-        await self.storage.save(session)
+    async def _save_session(self, session: PipelineSessionState, check_version: bool = False):
+        """
+        Save session to storage (only changed parts are written).
+
+        With check_version=True, raises SessionConflictError if the session
+        was saved by someone else since it was loaded.
+        """
+        await self.storage.save(session, check_version=check_version)
         logger.debug(f"Session saved: {session.session_id}")
 
-    async def _load_session(self, session_id: str) -> Optional[PipelineSessionState]:
+    async def _load_session(
+        self,
+        session_id: str,
+        stages: Optional[List[str]] = None,
+        include_conversation: bool = True,
+    ) -> Optional[PipelineSessionState]:
         """Load session from storage (Redis/PostgreSQL/in-memory)."""
-        return await self.storage.load(session_id)
+        return await self.storage.load(
+            session_id, stages=stages, include_conversation=include_conversation
+        )
 
     async def _delete_session(self, session_id: str):
         """Delete session from storage (Redis/PostgreSQL/in-memory)."""
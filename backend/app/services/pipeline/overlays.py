@@ -4,19 +4,27 @@ Text overlay service for adding styled text overlays to video clips.
 import logging
 import os
 import platform
-import re
 import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
-from moviepy import VideoFileClip, TextClip, CompositeVideoClip, ColorClip
-from moviepy.video.fx.FadeIn import FadeIn
-from moviepy.video.fx.FadeOut import FadeOut
+from moviepy import VideoFileClip
 
+from app.core.tracing import traced
 from app.schemas.generation import TextOverlay
+from app.services.media.clip_pool import ClipTaskCancelled, ClipTaskError, get_worker_threads, run_per_clip
+from app.services.pipeline.text_analysis import analyze_prompt
+from app.services.pipeline.text_raster import TextRaster, blend, render_text
 
 logger = logging.getLogger(__name__)
 
+# Caption width as a fraction of the video width
+TEXT_WIDTH_RATIO = 0.9
+
+# Fade-in duration for animated overlays (seconds)
+FADE_IN_DURATION = 0.5
+
 
 def add_text_overlay(
     video_path: str,
@@ -46,29 +54,19 @@ def add_text_overlay(
     try:
         # Load video clip
         video = VideoFileClip(video_path)
-        video_duration = video.duration
-        
-        # Create text clip
-        text_clip = _create_text_clip(
-            text_overlay=text_overlay,
-            video_size=video.size,
-            duration=video_duration
-        )
+        width, height = video.size
         
-        # Apply animation
-        text_clip = _apply_animation(text_clip, text_overlay.animation)
+        # Rendered once per distinct caption; repeats are cache hits
+        raster = _render_overlay_raster(text_overlay, video.size)
+        x_pos = (width - raster.width) // 2
+        y_pos = _text_y_position(text_overlay.position, height, raster.height, text_overlay.font_size)
+        animation = text_overlay.animation
         
-        # Position text clip (pass font_size for accurate descender margin calculation)
-        positioned_text = _position_text_clip(
-            text_clip=text_clip,
-            position=text_overlay.position,
-            video_size=video.size,
-            font_size=text_overlay.font_size
+        # Blend the raster onto each frame (only the region the text covers)
+        final_video = video.transform(
+            lambda get_frame, t: blend(get_frame(t), raster, x_pos, y_pos, _animation_opacity(animation, t))
         )
         
-        # Composite text onto video
-        final_video = CompositeVideoClip([video, positioned_text])
-        
         # Set temp directory for MoviePy to use (ensures temp files are created in writable location)
         # Get original working directory BEFORE changing directories
         original_cwd = os.getcwd()
@@ -108,6 +106,7 @@ def add_text_overlay(
                 audio_codec='aac',
                 fps=video.fps,
                 preset='medium',
+                threads=get_worker_threads(),
                 logger=None  # Suppress MoviePy progress logs
             )
         finally:
@@ -119,8 +118,6 @@ def add_text_overlay(
         
         # Clean up
         video.close()
-        text_clip.close()
-        positioned_text.close()
         final_video.close()
         
         logger.info(f"Text overlay added successfully: {output_path_abs}")
@@ -131,88 +128,33 @@ def add_text_overlay(
         raise RuntimeError(f"Text overlay addition failed: {e}")
 
 
-def _create_text_clip(
-    text_overlay: TextOverlay,
-    video_size: tuple,
-    duration: float
-) -> TextClip:
-    """
-    Create a TextClip with brand styling.
-    
-    Args:
-        text_overlay: TextOverlay specification
-        video_size: Video dimensions (width, height)
-        duration: Duration of text clip in seconds
-    
-    Returns:
-        TextClip: Styled text clip
-    """
-    font_path = _get_font_path()
-    
-    # Calculate text width (90% of video width, must be integer)
-    text_width = int(video_size[0] * 0.9)
-    
-    # First, create a temporary clip to get the actual rendered height
-    # This helps us calculate proper padding
-    temp_clip = TextClip(
+def _render_overlay_raster(text_overlay: TextOverlay, video_size: tuple) -> TextRaster:
+    """Render a caption with drop shadow, wrapped to TEXT_WIDTH_RATIO of the video width (cached)."""
+    return render_text(
         text=text_overlay.text,
-        font=font_path,
+        font_path=_get_font_path(),
         font_size=text_overlay.font_size,
         color=text_overlay.color,
-        size=(text_width, None),
-        method='caption',
-        text_align='center'
+        max_width=int(video_size[0] * TEXT_WIDTH_RATIO),
+        shadow=True,
+        shadow_color=_get_shadow_color(text_overlay.color),
     )
-    actual_text_height = temp_clip.h
-    temp_clip.close()
-    
-    # Add padding to account for:
-    # 1. Descenders (p, y, g, q, j) - can extend ~30% of font size below baseline
-    # 2. Line spacing in multi-line text - extra space between lines
-    # 3. Shadow offset - shadow extends 2px in each direction
-    # 4. Safety margin - extra padding to prevent any clipping
-    descender_padding = int(text_overlay.font_size * 0.3)  # 30% for descenders
-    line_spacing_padding = int(text_overlay.font_size * 0.2)  # 20% for line spacing
-    shadow_padding = 4  # 2px shadow offset on each side
-    safety_margin = 10  # Extra safety margin
-    
-    # Calculate total padding (add to both top and bottom for safety)
-    total_padding = descender_padding + line_spacing_padding + shadow_padding + safety_margin
-    padded_height = actual_text_height + (total_padding * 2)  # Padding on top and bottom
-    
-    # Create text clip with explicit height that includes padding
-    # Note: When using explicit height with method='caption', the text may not fill
-    # the entire height, but the clip will be the specified size, preventing clipping
-    text_clip = TextClip(
-        text=text_overlay.text,
-        font=font_path,
-        font_size=text_overlay.font_size,
-        color=text_overlay.color,
-        size=(text_width, padded_height),  # Explicit height with padding
-        method='caption',
-        text_align='center'
-    ).with_duration(duration).with_position((0, 0))  # Position at origin within composite
-    
-    # Add text shadow for readability
-    shadow_color = _get_shadow_color(text_overlay.color)
-    shadow_clip = TextClip(
-        text=text_overlay.text,
-        font=font_path,
-        font_size=text_overlay.font_size,
-        color=shadow_color,
-        size=(text_width, padded_height),
-        method='caption',
-        text_align='center'
-    ).with_duration(duration).with_position((2, 2))  # Shadow offset
-    
-    # Composite shadow and text
-    # The composite will be sized to fit both clips including shadow offset
-    # The padded height ensures descenders and multi-line text have room
-    text_with_shadow = CompositeVideoClip([shadow_clip, text_clip])
-    
-    return text_with_shadow
 
 
+def _animation_opacity(animation: str, t: float) -> float:
+    """
+    Get overlay opacity at time t (seconds since the overlay appeared).
+    
+    **MVP Limitation:** `slide_up` and `scale` are simplified to `fade_in`.
+    """
+    if t < 0:
+        return 0.0
+    if animation in ("fade_in", "slide_up", "scale"):
+        return min(1.0, t / FADE_IN_DURATION)
+    return 1.0
+
+
+@lru_cache(maxsize=1)
 def _get_font_path() -> Optional[str]:
     """
     Locate a system font to ensure consistent rendering across platforms.
@@ -269,138 +211,79 @@ def _get_shadow_color(text_color: str) -> str:
     return "black"
 
 
-def _apply_animation(text_clip: TextClip, animation: str) -> TextClip:
-    """
-    Apply animation to text clip.
-    
-    **MVP Limitation:** For MVP, `slide_up` and `scale` animations are simplified
-    to `fade_in` for faster implementation. Full slide and scale animations can be
-    added in future iterations using MoviePy's position and resize functions with
-    time-based lambda functions.
-    
-    Args:
-        text_clip: Text clip to animate
-        animation: Animation type (fade_in, slide_up, scale, none)
-    
-    Returns:
-        TextClip: Animated text clip
-    """
-    if animation == "fade_in":
-        # Fade in over first 0.5 seconds
-        return FadeIn(duration=0.5).apply(text_clip)
-    
-    elif animation == "slide_up":
-        # MVP LIMITATION: slide_up is simplified to fade_in
-        # Full implementation would use: text_clip.set_position(lambda t: ('center', y_start - t * speed))
-        # where y_start is off-screen bottom and speed calculates movement over duration
-        # For MVP, we use fade_in as a simplified version
-        return FadeIn(duration=0.5).apply(text_clip)
-    
-    elif animation == "scale":
-        # MVP LIMITATION: scale is simplified to fade_in
-        # Full implementation would use: text_clip.resize(lambda t: start_scale + (1 - start_scale) * (t / duration))
-        # where start_scale is 0.5 and duration is 0.5 seconds
-        # For MVP, we use fade_in as a simplified version
-        return FadeIn(duration=0.5).apply(text_clip)
-    
-    else:
-        # No animation
-        return text_clip
-
-
-def _position_text_clip(
-    text_clip: TextClip,
-    position: str,
-    video_size: tuple,
-    font_size: int = 48
-) -> TextClip:
+def _text_y_position(position: str, video_height: int, text_height: int, font_size: int = 48) -> int:
     """
-    Position text clip based on specification (top, center, or bottom).
+    Get the top y coordinate of a text block for a position (top, center, or bottom).
     
     Args:
-        text_clip: Text clip to position
         position: Position specification (top, center, bottom)
-        video_size: Video dimensions (width, height)
+        video_height: Video height in pixels
+        text_height: Height of the text block in pixels
+        font_size: Font size (bottom margin leaves room for descenders)
     
     Returns:
-        TextClip: Positioned text clip
+        int: y coordinate of the top of the text block
     """
-    width, height = video_size
-    text_height = getattr(text_clip, "h", None)
-    
-    # Ensure text_height is usable (handle CompositeVideoClip/mocks)
-    invalid_height = False
-    if text_height is None:
-        invalid_height = True
-    else:
-        try:
-            invalid_height = text_height <= 0
-        except TypeError:
-            invalid_height = True
-    
-    if invalid_height:
-        logger.debug(
-            f"Text height not available ({text_height}), falling back to 10% of video height"
-        )
-        text_height = max(int(height * 0.1), 10)
-    
     if position == "top":
         # Position at top with margin
-        y_pos = int(height * 0.1)  # 10% from top
-        return text_clip.with_position(('center', y_pos))
+        return int(video_height * 0.1)  # 10% from top
     
     elif position == "center":
         # Center vertically
-        y_pos = int((height - text_height) / 2)
-        return text_clip.with_position(('center', y_pos))
+        return int((video_height - text_height) / 2)
     
     elif position == "bottom":
         # Position at bottom with generous margin for descenders and multi-line text
         # Descenders (p, y, g, q, j) can extend ~30-40% of font size below baseline
-        # TextClip's calculated height doesn't always account for descenders properly
         # Multi-line text needs extra vertical space
         # Use a large, safe margin to ensure nothing gets clipped
         descender_margin = int(font_size * 0.4)  # 40% of font size for descenders
-        base_margin = max(int(height * 0.08), 25)  # Base margin from bottom
+        base_margin = max(int(video_height * 0.08), 25)  # Base margin from bottom
         multi_line_margin = 20  # Extra margin for multi-line text
         total_margin = base_margin + descender_margin + multi_line_margin
         
-        # Position so the text clip (including descenders) stays well within bounds
-        y_pos = int(height - text_height - total_margin)
+        # Position so the text block (including descenders) stays well within bounds
+        y_pos = int(video_height - text_height - total_margin)
         
         # Safety check: ensure text doesn't go off-screen
         if y_pos < 0:
             logger.warning(f"Text height ({text_height}) + margins exceed video height, using minimum safe margin")
-            y_pos = max(0, int(height - text_height - 30))  # Minimum 30px margin
+            y_pos = max(0, int(video_height - text_height - 30))  # Minimum 30px margin
         
         logger.debug(f"Bottom positioning: text_height={text_height}, font_size={font_size}, margin={total_margin}, y_pos={y_pos}")
-        return text_clip.with_position(('center', y_pos))
+        return y_pos
     
     else:
         # Default to center
         logger.warning(f"Unknown position '{position}', defaulting to center")
-        y_pos = int((height - text_height) / 2)
-        return text_clip.with_position(('center', y_pos))
+        return int((video_height - text_height) / 2)
 
 
+@traced("encode")
 def add_overlays_to_clips(
     clip_paths: list[str],
     scene_plan: "ScenePlan",
-    output_dir: str
+    output_dir: str,
+    cancellation_check: Optional[Callable[[], bool]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
 ) -> list[str]:
     """
     Add text overlays to multiple video clips.
     
+    Clips are rendered in parallel worker processes (see clip_pool).
+    
     Args:
         clip_paths: List of input video clip paths
         scene_plan: ScenePlan with text overlay specifications
         output_dir: Directory to save output clips
+        cancellation_check: Optional function returning True to stop rendering
+        progress_callback: Optional function(completed, total) called as overlays finish
     
     Returns:
         list[str]: List of output video clip paths with overlays
     
     Raises:
-        RuntimeError: If overlay addition fails
+        RuntimeError: If overlay addition fails or is cancelled
     """
     if len(clip_paths) != len(scene_plan.scenes):
         raise ValueError(
@@ -409,35 +292,40 @@ def add_overlays_to_clips(
     
     logger.info(f"Adding text overlays to {len(clip_paths)} video clips")
     
-    output_paths = []
+    output_paths = list(clip_paths)
     output_dir_path = Path(output_dir)
     output_dir_path.mkdir(parents=True, exist_ok=True)
     
+    # Clips without a text overlay keep the original clip
+    clip_numbers = []
+    tasks = []
     for i, (clip_path, scene) in enumerate(zip(clip_paths, scene_plan.scenes), start=1):
-        try:
-            # Skip overlay if text_overlay is None
-            if scene.text_overlay is None:
-                logger.info(f"No text overlay for clip {i}, skipping overlay addition")
-                output_paths.append(clip_path)  # Use original clip without overlay
-                continue
-            
-            # Generate output path
-            output_filename = f"overlay_{i}.mp4"
-            output_path = output_dir_path / output_filename
-            
-            # Add overlay
-            result_path = add_text_overlay(
-                video_path=clip_path,
-                text_overlay=scene.text_overlay,
-                output_path=str(output_path)
-            )
-            
-            output_paths.append(result_path)
-            logger.info(f"Overlay added to clip {i}/{len(clip_paths)}")
-            
-        except Exception as e:
-            logger.error(f"Failed to add overlay to clip {i}: {e}")
-            raise RuntimeError(f"Text overlay addition failed for clip {i}: {e}")
+        if scene.text_overlay is None:
+            logger.info(f"No text overlay for clip {i}, skipping overlay addition")
+            continue
+        clip_numbers.append(i)
+        tasks.append({
+            "video_path": clip_path,
+            "text_overlay": scene.text_overlay,
+            "output_path": str(output_dir_path / f"overlay_{i}.mp4"),
+        })
+    
+    try:
+        results = run_per_clip(
+            add_text_overlay,
+            tasks,
+            cancellation_check=cancellation_check,
+            progress_callback=progress_callback
+        )
+    except ClipTaskCancelled:
+        raise RuntimeError("Text overlay addition cancelled by user")
+    except ClipTaskError as e:
+        i = clip_numbers[e.index]
+        logger.error(f"Failed to add overlay to clip {i}: {e}")
+        raise RuntimeError(f"Text overlay addition failed for clip {i}: {e}")
+    
+    for i, result_path in zip(clip_numbers, results):
+        output_paths[i - 1] = result_path
     
     logger.info(f"All {len(output_paths)} text overlays added successfully")
     return output_paths
@@ -456,85 +344,21 @@ def extract_brand_name(prompt: str) -> Optional[str]:
     if not prompt:
         return None
     
-    # Common brand patterns (case-insensitive)
-    # Look for capitalized words that might be brands
-    # Common brand names
-    common_brands = [
-        "nike", "adidas", "puma", "reebok", "converse", "vans",
-        "apple", "samsung", "google", "microsoft", "amazon",
-        "coca-cola", "pepsi", "starbucks", "mcdonald's",
-        "tesla", "ford", "toyota", "bmw", "mercedes",
-        "gucci", "prada", "versace", "louis vuitton",
-        "sony", "lg", "dell", "hp", "lenovo"
-    ]
-    
-    prompt_lower = prompt.lower()
-    
-    # Check for common brands first
-    for brand in common_brands:
-        if brand in prompt_lower:
-            # Return capitalized version
-            return brand.capitalize()
-    
-    # Look for capitalized words that might be brand names
-    # Pattern: word(s) that are capitalized and might be a brand
-    words = re.findall(r'\b[A-Z][a-z]+\b', prompt)
-    
-    # Filter out common words that aren't brands (expanded list)
-    # This includes action verbs, adjectives, common nouns, and video-related terms
-    common_words = {
-        # Articles and pronouns
-        "The", "This", "That", "These", "Those", "A", "An", "And", "Or", "But", "For", "With", "From", "About",
-        # Adjectives
-        "Slow", "Fast", "Quick", "Easy", "Hard", "New", "Old", "Big", "Small", "High", "Low", "Hot", "Cold",
-        "Good", "Bad", "Best", "Worst", "First", "Last", "Next", "Previous", "Same", "Different", "Similar",
-        "More", "Less", "Most", "Least", "Many", "Few", "Some", "Any", "All", "Each", "Every", "Other",
-        # Action verbs
-        "Create", "Make", "Show", "Display", "Present", "Feature", "Highlight", "Showcase", "Demonstrate",
-        "Start", "Begin", "End", "Stop", "Finish", "Complete", "Continue", "Pause", "Play", "Run", "Walk",
-        # Video/media terms
-        "Video", "Image", "Picture", "Photo", "Scene", "Shot", "Frame", "Clip", "Movie", "Film",
-        # Product terms
-        "Product", "Item", "Object", "Thing", "Piece", "Part", "Element", "Component",
-        # Marketing terms
-        "Ad", "Advertisement", "Commercial", "Promo", "Promotion", "Marketing", "Campaign",
-        # Style descriptors
-        "Cinematic", "Professional", "Modern", "Classic", "Vintage", "Retro", "Contemporary",
-        # Quality descriptors
-        "Beautiful", "Stunning", "Amazing", "Incredible", "Wonderful", "Fantastic", "Perfect",
-        # Common verbs
-        "Get", "Take", "Give", "Put", "Set", "Let", "Try", "Use", "See", "Look", "Watch", "Find",
-        # Time/sequence words
-        "Now", "Then", "When", "While", "During", "After", "Before", "During",
-        # Common nouns
-        "Day", "Night", "Time", "Place", "Way", "Thing", "Person", "People", "Man", "Woman", "Child"
-    }
-    
-    potential_brands = [w for w in words if w not in common_words]
-    
-    # Additional validation: brand names are typically 3-20 characters
-    # Filter out very short words (likely not brands) and common descriptive words
-    # Also filter out words that are too generic
-    filtered_brands = [
-        w for w in potential_brands 
-        if len(w) >= 3 and len(w) <= 20  # Brand names are usually at least 3 characters
-        and w.lower() not in ["slow", "fast", "new", "old", "big", "small", "start", "end", "stop"]
-        and not w.lower().endswith("ing")  # Filter out gerunds like "running", "walking"
-        and not w.lower().endswith("ed")   # Filter out past tense like "started", "ended"
-    ]
-    
-    # If we found potential brands, return the first one
-    # But be conservative - only return if we're reasonably confident
-    if filtered_brands:
-        # Prefer longer words (more likely to be brand names)
-        filtered_brands.sort(key=len, reverse=True)
-        return filtered_brands[0]
-    
-    # If no confident brand name found, return None
-    # User should provide brand name explicitly if they want it displayed
+    features = analyze_prompt(prompt)
+    
+    # Check for common brands first (Nike, Apple, ...), returned capitalized
+    if features.known_brand:
+        return features.known_brand.capitalize()
+    
+    # Fall back to capitalized words that are not common words, preferring longer ones,
+    # but be conservative: user should provide brand name explicitly if they want it displayed
+    if features.brand_candidates:
+        return features.brand_candidates[0]
+    
     return None
 
 
+@traced("encode")
 def add_brand_overlay_to_final_video(
     video_path: str,
     brand_name: Optional[str],
@@ -576,71 +400,34 @@ def add_brand_overlay_to_final_video(
         # Create brand overlay text
         brand_text = brand_name.upper()  # Display brand in uppercase
         
-        # Create text overlay for brand (appears at the end, centered)
-        brand_overlay = TextOverlay(
-            text=brand_text,
-            position="center",  # Center position
-            font_size=72,  # Larger font for brand
-            color="#FFFFFF",  # White text
-            animation="fade_in"  # Fade in animation
-        )
-        
         # Calculate when to show brand overlay (last N seconds)
         overlay_start_time = max(0, video_duration - duration)
-        overlay_end_time = video_duration
-        
-        # Create text clip for brand
-        text_clip = _create_text_clip(
-            text_overlay=brand_overlay,
-            video_size=video.size,
-            duration=duration
-        )
-        
-        # Apply fade in animation
-        text_clip = _apply_animation(text_clip, brand_overlay.animation)
-        
-        # Get text dimensions for background sizing
-        text_width = text_clip.w
-        text_height = text_clip.h
-        
-        # Create background with padding (semi-transparent black)
-        padding_x = int(text_width * 0.3)  # 30% padding on each side
-        padding_y = int(text_height * 0.4)  # 40% padding on top/bottom
-        background_width = int(text_width + (padding_x * 2))
-        background_height = int(text_height + (padding_y * 2))
         
-        # Create semi-transparent black background (RGBA: black with 80% opacity)
-        # MoviePy ColorClip uses RGB, so we'll use a dark gray/black
-        # For semi-transparency, we'll use a darker background that provides contrast
-        background_color = (0, 0, 0)  # Black
-        background_clip = ColorClip(
-            size=(background_width, background_height),
-            color=background_color,
-            duration=duration
-        ).with_opacity(0.7)  # 70% opacity for semi-transparency
-        
-        # Position text on background (centered)
-        text_on_bg = text_clip.with_position(('center', 'center'))
-        
-        # Composite text on background
-        brand_composite = CompositeVideoClip(
-            [background_clip, text_on_bg],
-            size=(background_width, background_height)
+        # Brand text on a semi-transparent black box (70% opacity), padded
+        # 30% of the text width on each side and 40% of its height top/bottom
+        raster = render_text(
+            text=brand_text,
+            font_path=_get_font_path(),
+            font_size=72,  # Larger font for brand
+            color="#FFFFFF",  # White text
+            max_width=int(video.size[0] * TEXT_WIDTH_RATIO),
+            shadow=True,
+            shadow_color=_get_shadow_color("#FFFFFF"),
+            box_opacity=0.7,
+            box_padding=(0.3, 0.4),
         )
         
-        # Center the brand composite on the video
+        # Center the brand box on the video, fading in at the end of the video
         video_width, video_height = video.size
-        x_pos = (video_width - background_width) // 2
-        y_pos = (video_height - background_height) // 2
+        x_pos = (video_width - raster.width) // 2
+        y_pos = (video_height - raster.height) // 2
         
-        # Position the brand composite in the center of the video
-        positioned_brand = brand_composite.with_position((x_pos, y_pos))
-        
-        # Set the brand composite to appear at the end of the video
-        positioned_brand = positioned_brand.with_start(overlay_start_time)
-        
-        # Composite brand overlay onto video
-        final_video = CompositeVideoClip([video, positioned_brand])
+        final_video = video.transform(
+            lambda get_frame, t: blend(
+                get_frame(t), raster, x_pos, y_pos,
+                _animation_opacity("fade_in", t - overlay_start_time)
+            )
+        )
         
         # Set temp directory for MoviePy to use
         original_cwd = os.getcwd()
@@ -689,10 +476,6 @@ def add_brand_overlay_to_final_video(
         
         # Clean up
         video.close()
-        text_clip.close()
-        background_clip.close()
-        brand_composite.close()
-        positioned_brand.close()
         final_video.close()
         
         logger.info(f"Brand overlay added successfully: {output_path_abs}")
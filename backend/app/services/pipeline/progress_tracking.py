@@ -6,11 +6,13 @@ from typing import Optional
 
 from sqlalchemy.orm import Session
 
+from app.core.tracing import traced
 from app.db.models.generation import Generation
 
 logger = logging.getLogger(__name__)
 
 
+@traced("db")
 def update_generation_progress(
     db: Session,
     generation_id: str,
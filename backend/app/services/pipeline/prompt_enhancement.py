@@ -16,6 +16,7 @@ from typing import Dict, List, Optional
 import openai
 
 from app.core.config import settings
+from app.services.pipeline.text_analysis import analyze_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -316,13 +317,13 @@ def _quick_score_prompt(prompt: str) -> Dict[str, float]:
     Fast rule-based prompt scoring (no LLM call).
     Used for initial assessment to decide if enhancement is needed.
     """
-    prompt_lower = prompt.lower()
+    features = analyze_prompt(prompt)
     
     # Rule-based checks
-    has_product = any(word in prompt_lower for word in ["product", "service", "item", "brand", "ad", "advertisement"])
-    has_visual = any(word in prompt_lower for word in ["video", "visual", "scene", "shot", "camera", "cinematic"])
-    has_style = any(word in prompt_lower for word in ["style", "mood", "tone", "aesthetic", "look", "feel"])
-    has_details = len(prompt.split()) > 10  # Has some detail
+    has_product = features.has("ad_product")
+    has_visual = features.has("ad_visual")
+    has_style = features.has("ad_style")
+    has_details = features.word_count > 10  # Has some detail
     
     # Calculate scores
     completeness = (
@@ -332,12 +333,12 @@ def _quick_score_prompt(prompt: str) -> Dict[str, float]:
         (1.0 if has_details else 0.0) * 0.1
     ) * 100
     
-    specificity = min(len(prompt.split()) / 30.0, 1.0) * 100  # More words = more specific
+    specificity = min(features.word_count / 30.0, 1.0) * 100  # More words = more specific
     
     # Rough estimates for other dimensions
     professionalism = completeness * 0.8  # Rough estimate
-    cinematography = (1.0 if any(word in prompt_lower for word in ["camera", "lens", "angle", "shot", "framing"]) else 0.3) * 100
-    brand_alignment = (1.0 if any(word in prompt_lower for word in ["brand", "logo", "color", "identity"]) else 0.5) * 100
+    cinematography = (1.0 if features.has("ad_camera") else 0.3) * 100
+    brand_alignment = (1.0 if features.has("ad_brand") else 0.5) * 100
     
     overall = (
         completeness * 0.25 +
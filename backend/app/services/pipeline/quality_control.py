@@ -21,11 +21,15 @@ Performance Monitoring:
 import logging
 import os
 import time
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, Optional, Tuple, Any, List
 import cv2
 import numpy as np
 
+from app.core.tracing import traced
+from app.services.pipeline.video_scoring_pool import run_video_scoring
+
 logger = logging.getLogger(__name__)
 
 # Performance monitoring
@@ -42,6 +46,7 @@ except ImportError:
     logger.warning("VBench library not available. Using fallback quality metrics.")
 
 
+@traced("quality")
 def evaluate_vbench(
     video_clip_path: str,
     prompt_text: str,
@@ -124,6 +129,20 @@ def evaluate_vbench(
         raise
 
 
+@traced("quality")
+async def evaluate_vbench_async(video_clip_path: str, prompt_text: str) -> Dict[str, float]:
+    """
+    Run evaluate_vbench in the video scoring pool (see video_scoring_pool.py).
+    
+    Awaiting it does not block the event loop, so parallel generations keep
+    their progress updates flowing during quality control.
+    
+    Raises:
+        FileNotFoundError: If video clip path doesn't exist
+    """
+    return await run_video_scoring(evaluate_vbench, video_clip_path, prompt_text)
+
+
 def _convert_numpy_to_python(scores: Dict[str, float]) -> Dict[str, float]:
     """
     Convert NumPy float types to native Python floats for JSON serialization.
@@ -145,6 +164,88 @@ def _convert_numpy_to_python(scores: Dict[str, float]) -> Dict[str, float]:
     return converted
 
 
+class FrameSample:
+    """
+    Grayscale frames sampled from a clip, decoded once and shared by all fallback metrics.
+    
+    Per-frame histograms and consecutive-frame differences are computed on
+    first use, so metrics built on the same statistic do not recompute it.
+    """
+    
+    def __init__(self, frames: List[np.ndarray], source_size: Tuple[int, int]):
+        self.frames = frames
+        self.source_size = source_size  # (width, height) of the clip before downscaling
+    
+    @cached_property
+    def histograms(self) -> List[np.ndarray]:
+        return [cv2.calcHist([frame], [0], None, [256], [0, 256]) for frame in self.frames]
+    
+    @cached_property
+    def differences(self) -> List[float]:
+        """Mean absolute difference between consecutive frames."""
+        return [
+            float(np.mean(cv2.absdiff(self.frames[i], self.frames[i + 1])))
+            for i in range(len(self.frames) - 1)
+        ]
+    
+    def __len__(self) -> int:
+        return len(self.frames)
+
+
+def _decode_frames(video_path: str, max_samples: int = 20, max_side: int = 0) -> FrameSample:
+    """
+    Decode up to max_samples evenly spaced frames in one sequential pass.
+    
+    Frames are converted to grayscale and, with max_side > 0, downscaled so
+    their long side is at most max_side pixels.
+    
+    Raises:
+        ValueError: If the video cannot be opened or has no decodable frames
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    
+    try:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        
+        # Sample frames evenly distributed across the video for faster evaluation
+        if total_frames > 1:
+            step = max(1, total_frames // min(max_samples, total_frames))
+            sample_indices = set(range(0, total_frames, step)[:max_samples])
+        else:
+            sample_indices = {0}
+        last_index = max(sample_indices)
+        
+        # Grab (decode without converting) every frame up to the last sample instead of seeking:
+        # each seek restarts decoding from the previous keyframe
+        frames = []
+        for frame_idx in range(last_index + 1):
+            if not cap.grab():
+                break
+            if frame_idx not in sample_indices:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            height, width = frame.shape[:2]
+            scale = max_side / max(width, height) if max_side > 0 else 1.0
+            if scale < 1.0:
+                gray = cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+            frames.append(gray)
+    finally:
+        cap.release()
+    
+    if not frames:
+        raise ValueError(f"No frames extracted from video: {video_path}")
+    
+    logger.debug(f"Sampled {len(frames)} frames from {total_frames} total frames for quality evaluation")
+    return FrameSample(frames, (width, height))
+
+
 def _evaluate_fallback_metrics(video_path: str, prompt: str) -> Dict[str, float]:
     """
     Fallback quality evaluation using OpenCV and basic image processing.
@@ -152,6 +253,9 @@ def _evaluate_fallback_metrics(video_path: str, prompt: str) -> Dict[str, float]
     This provides basic quality metrics when VBench is unavailable.
     For production, VBench library integration should be prioritized.
     
+    The clip is decoded once (downscaled to VIDEO_SCORING_MAX_SIDE) and the
+    sampled frames are shared by all metrics.
+    
     Args:
         video_path: Path to video file
         prompt: Generation prompt
@@ -159,42 +263,10 @@ def _evaluate_fallback_metrics(video_path: str, prompt: str) -> Dict[str, float]
     Returns:
         Dict[str, float]: Quality scores (0-100 scale)
     """
+    from app.core.config import settings
+    
     try:
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
-        
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Optimize: Sample frames instead of processing all
-        # Sample up to 20 frames evenly distributed across the video for faster evaluation
-        max_samples = min(20, total_frames)
-        sample_indices = []
-        if total_frames > 1:
-            step = max(1, total_frames // max_samples)
-            sample_indices = list(range(0, total_frames, step))[:max_samples]
-        else:
-            sample_indices = [0]
-        
-        frames = []
-        frame_count = 0
-        
-        # Extract sampled frames only
-        for frame_idx in sample_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            if ret:
-                frames.append(frame)
-                frame_count += 1
-        
-        cap.release()
-        
-        if frame_count == 0:
-            raise ValueError(f"No frames extracted from video: {video_path}")
-        
-        logger.debug(f"Sampled {frame_count} frames from {total_frames} total frames for quality evaluation")
+        frames = _decode_frames(video_path, max_side=settings.VIDEO_SCORING_MAX_SIDE)
         
         # Basic quality metrics
         scores = {
@@ -221,59 +293,41 @@ def _evaluate_fallback_metrics(video_path: str, prompt: str) -> Dict[str, float]
         return _get_default_scores()
 
 
-def _compute_temporal_consistency(frames: list) -> float:
+def _compute_temporal_consistency(frames: FrameSample) -> float:
     """Compute temporal consistency score (0-100)."""
     if len(frames) < 2:
         return 50.0
     
     # Compute frame-to-frame similarity
-    similarities = []
-    for i in range(len(frames) - 1):
-        # Convert to grayscale for comparison
-        gray1 = cv2.cvtColor(frames[i], cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frames[i + 1], cv2.COLOR_BGR2GRAY)
-        
-        # Compute structural similarity
-        # Using histogram correlation as simple metric
-        hist1 = cv2.calcHist([gray1], [0], None, [256], [0, 256])
-        hist2 = cv2.calcHist([gray2], [0], None, [256], [0, 256])
-        correlation = cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
-        similarities.append(correlation * 100)
+    # Using histogram correlation as simple metric
+    histograms = frames.histograms
+    similarities = [
+        cv2.compareHist(histograms[i], histograms[i + 1], cv2.HISTCMP_CORREL) * 100
+        for i in range(len(histograms) - 1)
+    ]
     
     result = np.mean(similarities) if similarities else 50.0
     return float(result)  # Convert to native Python float
 
 
-def _compute_subject_consistency(frames: list) -> float:
+def _compute_subject_consistency(frames: FrameSample) -> float:
     """Compute subject consistency score (0-100)."""
     # Placeholder: Would require object detection/tracking
     # For now, use temporal consistency as proxy
     return _compute_temporal_consistency(frames)
 
 
-def _compute_background_consistency(frames: list) -> float:
+def _compute_background_consistency(frames: FrameSample) -> float:
     """Compute background consistency score (0-100)."""
     # Placeholder: Would require background segmentation
     # For now, use temporal consistency as proxy
     return _compute_temporal_consistency(frames)
 
 
-def _compute_motion_smoothness(frames: list) -> float:
+def _compute_motion_smoothness(frames: FrameSample) -> float:
     """Compute motion smoothness score (0-100)."""
-    if len(frames) < 2:
-        return 50.0
-    
-    # Optimize: Use frame difference instead of expensive optical flow for speed
-    # This is much faster while still providing reasonable motion smoothness estimate
-    gray_frames = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
-    frame_diffs = []
-    
-    for i in range(len(gray_frames) - 1):
-        # Simple frame difference (much faster than optical flow)
-        diff = cv2.absdiff(gray_frames[i], gray_frames[i + 1])
-        mean_diff = float(np.mean(diff))
-        frame_diffs.append(mean_diff)
-    
+    # Use frame difference instead of expensive optical flow for speed
+    frame_diffs = frames.differences
     if not frame_diffs:
         return 50.0
     
@@ -287,21 +341,10 @@ def _compute_motion_smoothness(frames: list) -> float:
     return float(min(100, smoothness))  # Convert to native Python float
 
 
-def _compute_dynamic_degree(frames: list) -> float:
+def _compute_dynamic_degree(frames: FrameSample) -> float:
     """Compute dynamic degree score (0-100)."""
-    if len(frames) < 2:
-        return 50.0
-    
-    # Optimize: Use frame difference instead of expensive optical flow
-    gray_frames = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
-    motion_scores = []
-    
-    for i in range(len(gray_frames) - 1):
-        # Simple frame difference (much faster than optical flow)
-        diff = cv2.absdiff(gray_frames[i], gray_frames[i + 1])
-        mean_diff = float(np.mean(diff))
-        motion_scores.append(mean_diff)
-    
+    # Use frame difference instead of expensive optical flow
+    motion_scores = frames.differences
     if not motion_scores:
         return 50.0
     
@@ -312,16 +355,14 @@ def _compute_dynamic_degree(frames: list) -> float:
     return float(dynamic)  # Convert to native Python float
 
 
-def _compute_aesthetic_quality(frames: list) -> float:
+def _compute_aesthetic_quality(frames: FrameSample) -> float:
     """Compute aesthetic quality score (0-100)."""
-    if not frames:
+    if not len(frames):
         return 50.0
     
     # Basic aesthetic metrics: sharpness, contrast, brightness balance
     scores = []
-    for frame in frames:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
+    for gray in frames.frames:
         # Sharpness (Laplacian variance)
         laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
         sharpness = min(100, (laplacian_var / 500) * 100)  # Normalize
@@ -341,20 +382,19 @@ def _compute_aesthetic_quality(frames: list) -> float:
     return float(result)  # Convert to native Python float
 
 
-def _compute_imaging_quality(frames: list) -> float:
+def _compute_imaging_quality(frames: FrameSample) -> float:
     """Compute imaging quality score (0-100)."""
-    if not frames:
+    if not len(frames):
         return 50.0
     
+    # Resolution quality of the source clip (assume HD+ is good)
+    width, height = frames.source_size
+    resolution_score = min(100, (height * width / (1920 * 1080)) * 100)
+    
     # Imaging quality: resolution, noise, artifacts
     scores = []
-    for frame in frames:
-        # Resolution quality (assume HD+ is good)
-        height, width = frame.shape[:2]
-        resolution_score = min(100, (height * width / (1920 * 1080)) * 100)
-        
+    for gray in frames.frames:
         # Noise estimation (variance in smooth regions)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         # Use median filter to estimate noise
         filtered = cv2.medianBlur(gray, 5)
         noise = np.std(gray - filtered)
@@ -592,8 +632,8 @@ async def evaluate_and_store_quality(
             return True, {"skipped": True, "reason": "vbench_quality_control disabled"}
     
     try:
-        # Evaluate quality (async where possible - currently synchronous but structured for future async)
-        vbench_scores = evaluate_vbench(clip_path, prompt_text)
+        # Evaluate quality in the video scoring pool (does not block the event loop)
+        vbench_scores = await evaluate_vbench_async(clip_path, prompt_text)
         
         # Check thresholds
         passed, details = check_quality_thresholds(vbench_scores)
@@ -789,7 +829,7 @@ async def regenerate_clip(
         
         if vbench_enabled:
             try:
-                vbench_scores = evaluate_vbench(new_clip_path, prompt_text)
+                vbench_scores = await evaluate_vbench_async(new_clip_path, prompt_text)
                 quality_passed, threshold_details = check_quality_thresholds(vbench_scores)
                 quality_details = {
                     "scores": vbench_scores,
@@ -0,0 +1,167 @@
+"""
+Per-scene streaming for the storyboard -> frames -> video pipeline.
+
+Instead of waiting for every scene of a stage before starting the next
+stage, each scene runs as its own chain: its frames start as soon as its
+storyboard entry has been parsed from the streamed LLM JSON, and its video
+starts as soon as its frames exist. End-to-end latency then approaches the
+slowest single scene chain rather than the sum of the slowest scene of each
+stage.
+
+StreamedScenesParser pulls complete scene objects out of a partial JSON
+document. provider_slot() returns the semaphore shared by every pipeline
+calling the same provider, so chains from different sessions together stay
+within STORYBOARD_CLIP_CONCURRENCY image and VIDEO_CLIP_CONCURRENCY video
+calls. SceneChains tracks the per-scene tasks.
+"""
+import asyncio
+import json
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StreamedScenesParser:
+    """
+    Incremental parser for the scenes array of a streamed JSON object.
+
+    feed() takes the next chunk of text and returns the elements of the
+    top-level "scenes" array that were completed by it, parsed as dicts.
+    Elements that are not objects are ignored.
+    """
+
+    def __init__(self, key: str = "scenes"):
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._expect_array = False
+        self._array_depth: Optional[int] = None
+        self._element_start: Optional[int] = None
+        self.count = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._text += chunk
+        completed: List[Dict[str, Any]] = []
+        text = self._text
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_start is not None:
+                        self._last_key = json.loads(text[self._string_start:pos + 1])
+                        self._string_start = None
+                continue
+
+            if char == '"':
+                self._in_string = True
+                # Only strings directly inside the top-level object can be the key
+                if self._depth == 1:
+                    self._string_start = pos
+            elif char == ":":
+                self._expect_array = self._depth == 1 and self._last_key == self.key
+            elif char in "{[":
+                if self._expect_array and char == "[":
+                    self._array_depth = self._depth + 1
+                elif self._array_depth is not None and self._depth == self._array_depth and char == "{":
+                    self._element_start = pos
+                self._expect_array = False
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._element_start is not None and self._depth == self._array_depth:
+                    element = json.loads(text[self._element_start:pos + 1])
+                    self._element_start = None
+                    self.count += 1
+                    completed.append(element)
+                elif self._array_depth is not None and self._depth < self._array_depth:
+                    self._array_depth = None
+            elif not char.isspace():
+                self._expect_array = False
+        self._pos = len(text)
+        return completed
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+
+_PROVIDER_LIMITS: Dict[str, Callable[[], int]] = {
+    "image": lambda: settings.STORYBOARD_CLIP_CONCURRENCY,
+    "video": lambda: settings.VIDEO_CLIP_CONCURRENCY,
+}
+
+_provider_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def provider_slot(provider: str) -> asyncio.Semaphore:
+    """
+    Semaphore limiting concurrent calls to a provider ("image" or "video").
+
+    The same semaphore is returned to every caller on the event loop, so the
+    limit holds across stages and sessions.
+    """
+    # asyncio primitives are bound to one event loop
+    loop = asyncio.get_running_loop()
+    semaphores = _provider_semaphores.get(loop)
+    if semaphores is None:
+        semaphores = {}
+        _provider_semaphores[loop] = semaphores
+    semaphore = semaphores.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, _PROVIDER_LIMITS[provider]()))
+        semaphores[provider] = semaphore
+    return semaphore
+
+
+class SceneChains:
+    """
+    Per-scene tasks started while the scene source is still streaming.
+
+    start() launches one scene's chain right away; results() waits for all
+    of them. A failed chain does not affect the others: its exception is
+    returned in place of its result.
+    """
+
+    def __init__(self, label: str = "pipeline"):
+        self.label = label
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def start(self, index: int, chain: Callable[[], Awaitable[Any]]) -> None:
+        if index in self._tasks:
+            logger.warning(f"[{self.label}] Scene {index} already started; ignoring duplicate")
+            return
+        logger.info(f"[{self.label}] Scene {index} chain started")
+        self._tasks[index] = asyncio.create_task(chain())
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._tasks
+
+    async def results(self) -> Dict[int, Any]:
+        """Result (or exception) of every started chain, keyed by scene index."""
+        indices = list(self._tasks)
+        outcomes = await asyncio.gather(*(self._tasks[i] for i in indices), return_exceptions=True)
+        return dict(zip(indices, outcomes))
+
+    async def cancel(self) -> None:
+        """Cancel chains still running (the scene source failed)."""
+        for task in self._tasks.values():
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
@@ -0,0 +1,430 @@
+"""
+Quantized CPU inference for the image-quality scorers.
+
+The CLIP, PickScore and aesthetic scorers run FP32 PyTorch ViT models. On
+CPU-only hosts their image and text encoders are exported once to ONNX,
+quantized to int8 (dynamic quantization of the weights), and served with
+ONNX Runtime, using the OpenVINO execution provider when onnxruntime-openvino
+is installed.
+
+A quantized encoder is only used after a calibration check: the scores it
+produces on a calibration set must stay within SCORING_ONNX_TOLERANCE points
+(0-100 scale) of the PyTorch scores, otherwise that scorer stays on PyTorch.
+Exported models and calibration results are cached in SCORING_ONNX_DIR, so
+the export and the check run once per model, not per process.
+
+The export and the check take minutes, so they never run on a scoring
+request: warm_up_models prepares the encoders (the scoring service runs it in
+a thread at startup), and a scorer whose encoder is not prepared yet starts
+the preparation in a background thread and runs on PyTorch until it is done.
+
+SCORING_RUNTIME selects the runtime:
+- auto: quantized ONNX Runtime when onnxruntime is installed, no GPU is
+  available and SCORING_CALIBRATION_DIR holds at least MIN_CALIBRATION_IMAGES
+  real images
+- onnx: quantized ONNX Runtime whenever onnxruntime is installed (calibrated
+  on synthetic images without SCORING_CALIBRATION_DIR)
+- torch: always PyTorch
+"""
+import importlib.util
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+
+# CLIP text encoder input length
+TEXT_LENGTH = 77
+
+# Real calibration images "auto" needs before it enables the quantized scorers
+MIN_CALIBRATION_IMAGES = 8
+
+# Calibration images used at most
+MAX_CALIBRATION_IMAGES = 16
+
+CALIBRATION_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+
+# Calibration prompts, paired with the calibration images in turn
+CALIBRATION_PROMPTS = [
+    "A product shot of a white bottle on a marble counter in soft morning light",
+    "A runner tying her shoes on a city street at sunrise, cinematic",
+    "Close-up of a steaming cup of coffee on a wooden table",
+    "A red sports car driving along a coastal road at sunset",
+    "A smiling family cooking together in a bright modern kitchen",
+    "Abstract colorful shapes on a plain background",
+]
+
+# (image_features, text_features) of a batch; text_features is None without prompts
+FeatureFn = Callable[..., Tuple[np.ndarray, Optional[np.ndarray]]]
+ScoreFn = Callable[[np.ndarray, Optional[np.ndarray]], List[float]]
+
+_encoders: Dict[str, Optional["QuantizedEncoder"]] = {}
+_sessions: Dict[str, Any] = {}
+_preparing: Dict[str, threading.Thread] = {}
+_prepare_locks: Dict[str, threading.Lock] = {}
+_lock = threading.RLock()
+
+
+def _calibration_paths() -> List[Path]:
+    """Calibration images in SCORING_CALIBRATION_DIR (empty when it is not set)."""
+    if not settings.SCORING_CALIBRATION_DIR:
+        return []
+    paths = sorted(
+        path for path in Path(settings.SCORING_CALIBRATION_DIR).glob("*")
+        if path.suffix.lower() in CALIBRATION_SUFFIXES
+    )
+    return paths[:MAX_CALIBRATION_IMAGES]
+
+
+def runtime_enabled() -> bool:
+    """Whether the scorers should run on quantized ONNX Runtime encoders."""
+    mode = settings.SCORING_RUNTIME.lower()
+    if mode == "torch":
+        return False
+    if importlib.util.find_spec("onnxruntime") is None:
+        if mode == "onnx":
+            logger.warning("SCORING_RUNTIME=onnx but onnxruntime is not installed; scoring with PyTorch")
+        return False
+    if mode == "auto":
+        # Synthetic images do not show whether quantization shifts scores on real generations
+        if len(_calibration_paths()) < MIN_CALIBRATION_IMAGES:
+            logger.info(
+                f"SCORING_RUNTIME=auto needs {MIN_CALIBRATION_IMAGES} calibration images in "
+                "SCORING_CALIBRATION_DIR; scoring with PyTorch"
+            )
+            return False
+        try:
+            import torch
+
+            return not torch.cuda.is_available()
+        except ImportError:
+            return False
+    return True
+
+
+def _providers() -> List[str]:
+    import onnxruntime as ort
+
+    available = ort.get_available_providers()
+    if "OpenVINOExecutionProvider" in available:
+        return ["OpenVINOExecutionProvider", "CPUExecutionProvider"]
+    return ["CPUExecutionProvider"]
+
+
+def _session(path: Path):
+    """ONNX Runtime session of a model file, shared by the scorers using the same encoder."""
+    import onnxruntime as ort
+
+    key = str(path)
+    with _lock:
+        if key not in _sessions:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            _sessions[key] = ort.InferenceSession(key, options, providers=_providers())
+        return _sessions[key]
+
+
+class QuantizedEncoder:
+    """Int8 ONNX image (and text) encoders of one CLIP model."""
+
+    def __init__(self, processor, image_model: Path, text_model: Optional[Path] = None):
+        self.processor = processor
+        self.image_session = _session(image_model)
+        self.text_session = _session(text_model) if text_model else None
+
+    def encode(self, images: List[Image.Image], prompts: Optional[List[str]] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Projected image (and text) features, matching CLIPModel.get_image_features/get_text_features."""
+        pixel_values = self.processor.image_processor(images, return_tensors="np")["pixel_values"].astype(np.float32)
+        image_features = self.image_session.run(None, {"pixel_values": pixel_values})[0]
+        if prompts is None:
+            return image_features.astype(np.float32), None
+        if self.text_session is None:
+            raise RuntimeError("Quantized encoder was exported without its text encoder")
+        tokens = self.processor.tokenizer(
+            prompts, return_tensors="np", padding="max_length", truncation=True, max_length=TEXT_LENGTH
+        )
+        text_features = self.text_session.run(None, {
+            "input_ids": tokens["input_ids"].astype(np.int64),
+            "attention_mask": tokens["attention_mask"].astype(np.int64),
+        })[0]
+        return image_features.astype(np.float32), text_features.astype(np.float32)
+
+
+def _model_dir(model) -> Path:
+    name = getattr(model, "name_or_path", None) or type(model).__name__
+    return Path(settings.SCORING_ONNX_DIR) / re.sub(r"[^A-Za-z0-9._-]+", "--", str(name))
+
+
+@contextmanager
+def _export_lock(directory: Path):
+    """Serialize exports of one model across processes (API workers, scoring service)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".export.lock", "w") as lock_file:
+        try:
+            import fcntl
+
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        yield
+
+
+def _export_quantized(module, dummy_inputs: Tuple, input_names: List[str], output_path: Path) -> None:
+    """Export a module to ONNX and quantize its weights to int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as temp_dir:
+        float_path = Path(temp_dir) / "model.onnx"
+        dynamic_axes = {name: {0: "batch"} for name in input_names + ["features"]}
+        with torch.no_grad():
+            torch.onnx.export(
+                module,
+                dummy_inputs,
+                str(float_path),
+                input_names=input_names,
+                output_names=["features"],
+                dynamic_axes=dynamic_axes,
+                opset_version=ONNX_OPSET,
+            )
+        # Models over 2GB (CLIP ViT-H) must keep their weights outside the protobuf
+        float_bytes = sum(path.stat().st_size for path in Path(temp_dir).iterdir())
+        quantized_path = Path(temp_dir) / output_path.name
+        quantize_dynamic(
+            str(float_path),
+            str(quantized_path),
+            weight_type=QuantType.QInt8,
+            use_external_data_format=float_bytes > 2**31 - 1,
+        )
+        for path in Path(temp_dir).iterdir():
+            if path.name.startswith(output_path.name):
+                shutil.move(str(path), str(output_path.parent / path.name))
+
+
+def export_encoders(model, directory: Path, with_text: bool) -> Tuple[Path, Optional[Path]]:
+    """
+    Export the image (and text) encoder of a CLIP model as int8 ONNX, unless already exported.
+
+    Returns:
+        (image_model_path, text_model_path or None)
+    """
+    import torch
+
+    image_path, text_path = directory / "image.int8.onnx", directory / "text.int8.onnx"
+    with _export_lock(directory):
+        device = next(model.parameters()).device
+        if not image_path.exists():
+            class ImageEncoder(torch.nn.Module):
+                def __init__(self, clip):
+                    super().__init__()
+                    self.clip = clip
+
+                def forward(self, pixel_values):
+                    return self.clip.get_image_features(pixel_values=pixel_values)
+
+            size = model.config.vision_config.image_size
+            logger.info(f"Exporting quantized image encoder of {model.name_or_path} to {image_path}")
+            _export_quantized(
+                ImageEncoder(model).eval(),
+                (torch.zeros(1, 3, size, size, device=device),),
+                ["pixel_values"],
+                image_path,
+            )
+        if with_text and not text_path.exists():
+            class TextEncoder(torch.nn.Module):
+                def __init__(self, clip):
+                    super().__init__()
+                    self.clip = clip
+
+                def forward(self, input_ids, attention_mask):
+                    return self.clip.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+            logger.info(f"Exporting quantized text encoder of {model.name_or_path} to {text_path}")
+            _export_quantized(
+                TextEncoder(model).eval(),
+                (
+                    torch.ones(1, TEXT_LENGTH, dtype=torch.long, device=device),
+                    torch.ones(1, TEXT_LENGTH, dtype=torch.long, device=device),
+                ),
+                ["input_ids", "attention_mask"],
+                text_path,
+            )
+    return image_path, text_path if with_text else None
+
+
+def calibration_set() -> Tuple[List[Image.Image], List[str]]:
+    """
+    Images and prompts the quantized scores are checked on.
+
+    Uses the images in SCORING_CALIBRATION_DIR (e.g. a sample of past
+    generations) when set; otherwise synthetic images with varied colour,
+    texture and structure (SCORING_RUNTIME=onnx only, see runtime_enabled).
+    """
+    images = [Image.open(path).convert("RGB") for path in _calibration_paths()]
+    if not images:
+        rng = np.random.default_rng(0)
+        gradient = np.linspace(0, 255, 224, dtype=np.uint8)
+        checker = ((np.indices((224, 224)).sum(axis=0) // 28) % 2 * 255).astype(np.uint8)
+        arrays = [
+            np.stack([np.tile(gradient, (224, 1)), np.tile(gradient[:, None], (1, 224)), np.full((224, 224), 128, np.uint8)], axis=-1),
+            rng.integers(0, 256, (224, 224, 3), dtype=np.uint8),
+            np.stack([checker, 255 - checker, checker], axis=-1),
+            np.full((224, 224, 3), (200, 40, 40), np.uint8),
+            np.clip(rng.normal(128, 40, (224, 224, 3)), 0, 255).astype(np.uint8),
+            np.stack([np.tile(gradient[::-1], (224, 1))] * 3, axis=-1),
+        ]
+        images = [Image.fromarray(array) for array in arrays]
+    prompts = [CALIBRATION_PROMPTS[i % len(CALIBRATION_PROMPTS)] for i in range(len(images))]
+    return images, prompts
+
+
+def calibrate(
+    encoder: QuantizedEncoder,
+    model,
+    processor,
+    reference_fn: FeatureFn,
+    score_fn: ScoreFn,
+    with_text: bool,
+) -> Dict[str, Any]:
+    """
+    Compare the quantized scores against PyTorch on the calibration set.
+
+    Returns:
+        Calibration result with max_deviation (score points), tolerance and passed
+    """
+    images, prompts = calibration_set()
+    prompts = prompts if with_text else None
+    reference = score_fn(*reference_fn(model, processor, images, prompts))
+    quantized = score_fn(*encoder.encode(images, prompts))
+    deviations = [abs(a - b) for a, b in zip(reference, quantized)]
+    return {
+        "samples": len(images),
+        "max_deviation": round(max(deviations), 3),
+        "mean_deviation": round(sum(deviations) / len(deviations), 3),
+        "tolerance": settings.SCORING_ONNX_TOLERANCE,
+        "passed": max(deviations) <= settings.SCORING_ONNX_TOLERANCE,
+        "providers": encoder.image_session.get_providers(),
+    }
+
+
+def _prepare(kind: str, model, processor, reference_fn: FeatureFn, score_fn: ScoreFn) -> Optional[QuantizedEncoder]:
+    import onnxruntime
+
+    directory = _model_dir(model)
+    with_text = kind != "aesthetic"
+    image_path, text_path = export_encoders(model, directory, with_text)
+    encoder = QuantizedEncoder(processor, image_path, text_path)
+
+    calibration_path = directory / f"calibration-{kind}.json"
+    calibration = None
+    if calibration_path.exists():
+        calibration = json.loads(calibration_path.read_text())
+        stale = (
+            calibration.get("tolerance") != settings.SCORING_ONNX_TOLERANCE
+            or calibration.get("onnxruntime") != onnxruntime.__version__
+            or calibration.get("calibration_dir") != settings.SCORING_CALIBRATION_DIR
+        )
+        calibration = None if stale else calibration
+    if calibration is None:
+        calibration = calibrate(encoder, model, processor, reference_fn, score_fn, with_text)
+        calibration.update(onnxruntime=onnxruntime.__version__, calibration_dir=settings.SCORING_CALIBRATION_DIR)
+        temp_path = calibration_path.with_suffix(f".{os.getpid()}.part")
+        temp_path.write_text(json.dumps(calibration, indent=2))
+        os.replace(temp_path, calibration_path)
+
+    if not calibration["passed"]:
+        logger.warning(
+            f"Quantized {kind} scorer deviates by up to {calibration['max_deviation']} points "
+            f"(tolerance {calibration['tolerance']}); keeping PyTorch"
+        )
+        return None
+    logger.info(
+        f"{kind} scorer on quantized ONNX Runtime ({', '.join(calibration['providers'])}), "
+        f"max deviation {calibration['max_deviation']} points"
+    )
+    return encoder
+
+
+def _encoder_key(kind: str, model) -> str:
+    return f"{kind}:{getattr(model, 'name_or_path', '')}"
+
+
+def prepare_quantized_encoder(
+    kind: str,
+    model,
+    processor,
+    reference_fn: FeatureFn,
+    score_fn: ScoreFn,
+) -> Optional[QuantizedEncoder]:
+    """
+    Export and calibrate the quantized encoder of a scorer, blocking until done.
+
+    The outcome is remembered for the lifetime of the process. Called by
+    warm_up_models, or in a background thread by get_quantized_encoder.
+
+    Args:
+        kind: Scorer ("clip", "pickscore" or "aesthetic")
+        model: Loaded CLIPModel of the scorer
+        processor: Its CLIPProcessor
+        reference_fn: PyTorch feature function, the calibration reference
+        score_fn: Maps a batch of features to the scorer's 0-100 scores
+
+    Returns:
+        The quantized encoder, or None to run the scorer on PyTorch
+    """
+    key = _encoder_key(kind, model)
+    with _lock:
+        prepare_lock = _prepare_locks.setdefault(key, threading.Lock())
+    with prepare_lock:
+        if key not in _encoders:
+            encoder = None
+            if runtime_enabled():
+                try:
+                    encoder = _prepare(kind, model, processor, reference_fn, score_fn)
+                except Exception as e:
+                    logger.warning(f"Quantized {kind} scorer unavailable ({e}); keeping PyTorch", exc_info=True)
+            _encoders[key] = encoder
+    return _encoders[key]
+
+
+def get_quantized_encoder(
+    kind: str,
+    model,
+    processor,
+    reference_fn: FeatureFn,
+    score_fn: ScoreFn,
+) -> Optional[QuantizedEncoder]:
+    """
+    Quantized encoder for a scorer, or None to run it on PyTorch.
+
+    Never waits for the export: an encoder that is not prepared yet is
+    prepared in a background thread (see prepare_quantized_encoder), and the
+    scorer runs on PyTorch until it is ready.
+    """
+    key = _encoder_key(kind, model)
+    if key in _encoders:
+        return _encoders[key]
+    with _lock:
+        if key not in _preparing:
+            _preparing[key] = threading.Thread(
+                target=prepare_quantized_encoder,
+                args=(kind, model, processor, reference_fn, score_fn),
+                name=f"prepare-{kind}-scorer",
+                daemon=True,
+            )
+            _preparing[key].start()
+    return _encoders.get(key)
@@ -0,0 +1,333 @@
+"""
+Shared image-scoring service.
+
+The CLIP, PickScore and aesthetic models take seconds to load and hundreds of
+MB to GBs of memory. Instead of loading them in every API worker, one local
+process keeps them warm and serves all workers over a Unix socket:
+
+    python -m app.services.pipeline.scoring_service --socket /run/admint-scoring/scoring.sock
+
+Requests are queued and micro-batched: a batch closes when SCORING_BATCH_SIZE
+requests are waiting or SCORING_BATCH_WAIT_MS after its first request, and
+runs as one forward pass per model. Requests that arrive while a batch is
+running form the next batch, so batches grow with load.
+
+API workers use ScoringClient (get_scoring_client()) when SCORING_SERVICE_SOCKET
+is set. When it is not set, or the service cannot be reached, image_quality_scoring
+scores in-process as before.
+
+Protocol: each message is a 4-byte big-endian length followed by a JSON
+object. Requests are {"id", "op", "payload"}; responses are {"id", "result"}
+or {"id", "error"}. A connection may carry several requests at once.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the socket connection before falling back to in-process scoring
+CONNECT_TIMEOUT_SECONDS = 2.0
+
+# After a failed connection, clients skip the service for this long
+RETRY_AFTER_SECONDS = 30.0
+
+# Largest accepted message (embeddings of a big image set are the largest responses)
+MAX_MESSAGE_BYTES = 64 * 2**20
+
+_HEADER = struct.Struct(">I")
+
+# op -> function scoring a batch of request payloads, returning one result per payload
+BatchHandler = Callable[[List[Dict[str, Any]]], List[Any]]
+
+
+class ScoringServiceError(RuntimeError):
+    """Raised when the scoring service fails a request."""
+
+
+class ScoringServiceUnavailable(ScoringServiceError):
+    """Raised when the scoring service cannot be reached."""
+
+
+def _write_message(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+    data = json.dumps(message).encode()
+    writer.write(_HEADER.pack(len(data)) + data)
+
+
+async def _read_message(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    """Read one message; None when the peer closed the connection."""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_MESSAGE_BYTES:
+        raise ScoringServiceError(f"Message of {length} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit")
+    return json.loads(await reader.readexactly(length))
+
+
+def _score_images(payloads: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+    from app.services.pipeline.image_quality_scoring import compute_scores_batch
+
+    return compute_scores_batch([(payload["image_path"], payload["prompt"]) for payload in payloads])
+
+
+def _image_embeddings(payloads: List[Dict[str, Any]]) -> List[List[Optional[List[float]]]]:
+    from app.services.pipeline.image_quality_scoring import compute_image_embeddings_batch
+
+    # One forward pass over the images of all requests, split back per request
+    paths = [path for payload in payloads for path in payload["image_paths"]]
+    embeddings = [None if embedding is None else embedding.tolist() for embedding in compute_image_embeddings_batch(paths)]
+    results, start = [], 0
+    for payload in payloads:
+        results.append(embeddings[start:start + len(payload["image_paths"])])
+        start += len(payload["image_paths"])
+    return results
+
+
+DEFAULT_HANDLERS: Dict[str, BatchHandler] = {
+    "score_image": _score_images,
+    "image_embeddings": _image_embeddings,
+}
+
+
+class ScoringServer:
+    """Unix socket server batching scoring requests onto warm models."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        handlers: Optional[Dict[str, BatchHandler]] = None,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        warm_up: bool = True,
+    ):
+        self.socket_path = socket_path
+        self.handlers = handlers or DEFAULT_HANDLERS
+        self.max_batch = max(1, max_batch or settings.SCORING_BATCH_SIZE)
+        self.max_wait = (settings.SCORING_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.warm_up = warm_up
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self) -> None:
+        if self.warm_up:
+            from app.services.pipeline.image_quality_scoring import warm_up_models
+
+            start_time = time.time()
+            await asyncio.to_thread(warm_up_models)
+            logger.info(f"Scoring models loaded in {time.time() - start_time:.1f}s")
+
+        self._queue = asyncio.Queue()
+        path = Path(self.socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()  # stale socket of a previous run
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=str(path))
+        os.chmod(path, 0o660)
+        self._batcher = asyncio.create_task(self._run_batches())
+        logger.info(f"Scoring service listening on {path} (batch size {self.max_batch}, wait {self.max_wait * 1000:.0f}ms)")
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        if self._batcher:
+            self._batcher.cancel()
+            self._batcher = None
+        if self._server:
+            self._server.close()
+            # Closing the transports ends the connection handlers at their next read
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        try:
+            Path(self.socket_path).unlink()
+        except FileNotFoundError:
+            pass
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        pending = set()
+        connection = asyncio.current_task()
+        self._connections[connection] = writer
+        try:
+            while True:
+                message = await _read_message(reader)
+                if message is None:
+                    break
+                task = asyncio.create_task(self._answer(message, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except (ScoringServiceError, ValueError, ConnectionError) as e:
+            logger.warning(f"Dropping scoring connection: {e}")
+        finally:
+            self._connections.pop(connection, None)
+            writer.close()
+
+    async def _answer(self, message: Dict[str, Any], writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        op = message.get("op")
+        response: Dict[str, Any] = {"id": message.get("id")}
+        if op not in self.handlers:
+            response["error"] = f"Unknown operation: {op}"
+        else:
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((op, message.get("payload") or {}, future))
+            try:
+                response["result"] = await future
+            except Exception as e:
+                response["error"] = str(e)
+        async with write_lock:
+            _write_message(writer, response)
+            await writer.drain()
+
+    async def _next_batch(self) -> List[Any]:
+        """Wait for a request, then collect more until the batch is full or the wait is over."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run_batches(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+            by_op = defaultdict(list)
+            for op, payload, future in batch:
+                by_op[op].append((payload, future))
+            for op, entries in by_op.items():
+                start_time = time.time()
+                try:
+                    # Models run in a worker thread so the socket keeps accepting the next batch
+                    results = await asyncio.to_thread(self.handlers[op], [payload for payload, _ in entries])
+                    if len(results) != len(entries):
+                        raise ScoringServiceError(f"{op} returned {len(results)} results for {len(entries)} requests")
+                    for (_, future), result in zip(entries, results):
+                        if not future.done():
+                            future.set_result(result)
+                except Exception as e:
+                    logger.error(f"Scoring batch of {len(entries)} {op} requests failed: {e}", exc_info=True)
+                    for _, future in entries:
+                        if not future.done():
+                            future.set_exception(ScoringServiceError(str(e)))
+                logger.debug(f"Scored batch of {len(entries)} {op} requests in {time.time() - start_time:.2f}s")
+
+
+class ScoringClient:
+    """Async client of the scoring service; one short-lived connection per request."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout or settings.SCORING_SERVICE_TIMEOUT_SECONDS
+        self._down_until = 0.0
+        self._next_id = 0
+
+    async def _request(self, op: str, payload: Dict[str, Any]) -> Any:
+        if time.monotonic() < self._down_until:
+            raise ScoringServiceUnavailable(f"{self.socket_path} was unreachable, retrying later")
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(self.socket_path), CONNECT_TIMEOUT_SECONDS)
+        except (OSError, asyncio.TimeoutError) as e:
+            self._down_until = time.monotonic() + RETRY_AFTER_SECONDS
+            raise ScoringServiceUnavailable(f"Cannot connect to {self.socket_path}: {e or type(e).__name__}") from e
+
+        self._next_id += 1
+        try:
+            _write_message(writer, {"id": self._next_id, "op": op, "payload": payload})
+            await writer.drain()
+            response = await asyncio.wait_for(_read_message(reader), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise ScoringServiceError(f"No response to {op} within {self.timeout}s") from e
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise ScoringServiceUnavailable(f"Connection to {self.socket_path} lost: {e}") from e
+        finally:
+            writer.close()
+
+        if response is None:
+            raise ScoringServiceUnavailable(f"{self.socket_path} closed the connection")
+        if "error" in response:
+            raise ScoringServiceError(response["error"])
+        return response["result"]
+
+    async def score_image(self, image_path: str, prompt_text: str) -> Dict[str, float]:
+        """Quality scores of an image (see image_quality_scoring.score_image)."""
+        # The service runs in another process and working directory
+        return await self._request("score_image", {"image_path": str(Path(image_path).resolve()), "prompt": prompt_text})
+
+    async def image_embeddings(self, image_paths: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Normalized CLIP image embeddings (None where unavailable), in input order."""
+        embeddings = await self._request(
+            "image_embeddings", {"image_paths": [str(Path(path).resolve()) for path in image_paths]}
+        )
+        return [None if embedding is None else np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+
+
+_client: Optional[ScoringClient] = None
+
+
+def get_scoring_client() -> Optional[ScoringClient]:
+    """Client of the configured scoring service, or None to score in-process."""
+    global _client
+    socket_path = settings.SCORING_SERVICE_SOCKET
+    if not socket_path:
+        return None
+    if _client is None or _client.socket_path != socket_path:
+        _client = ScoringClient(socket_path)
+    return _client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve image quality scoring to API workers over a Unix socket")
+    parser.add_argument("--socket", default=settings.SCORING_SERVICE_SOCKET, help="Socket path (default: SCORING_SERVICE_SOCKET)")
+    parser.add_argument("--batch-size", type=int, default=settings.SCORING_BATCH_SIZE, help="Largest batch")
+    parser.add_argument("--batch-wait-ms", type=float, default=settings.SCORING_BATCH_WAIT_MS, help="Wait for more requests after the first")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("--socket or SCORING_SERVICE_SOCKET is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    server = ScoringServer(args.socket, max_batch=args.batch_size, max_wait_ms=args.batch_wait_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
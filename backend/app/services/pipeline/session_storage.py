@@ -6,24 +6,114 @@ Provides flexible session persistence with multiple backend options:
 - PostgreSQL (fallback - database-backed persistence)
 - In-Memory (development only - not production-safe)
 
+Persistent backends store a session as separate parts - a small header,
+one entry per stage output and an append-only conversation log - so a save
+only writes the parts that changed since the session was last loaded or
+saved by this process.
+
+Every save increments the session's ``version``. Saves made with
+``check_version=True`` only succeed if the stored version still matches the
+one that was loaded, otherwise SessionConflictError is raised.
+
 Usage:
+    await init_session_storage()  # once at startup
     storage = get_session_storage()
     await storage.save(session)
+    await storage.save(session, check_version=True)
     session = await storage.load(session_id)
+    header_only = await storage.load(session_id, stages=[], include_conversation=False)
     await storage.delete(session_id)
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic_core import to_json
 
 from app.core.config import settings
 from app.schemas.interactive import PipelineSessionState
 
 logger = logging.getLogger(__name__)
 
+# Fields stored outside the session header
+_PART_FIELDS = {"outputs", "conversation_history"}
+_HEADER_EXCLUDE = _PART_FIELDS | {"version"}
+
+# Maximum number of sessions whose last persisted state is tracked per process
+_MAX_TRACKED_SESSIONS = 1024
+
+
+# ============================================================================
+# Delta Tracking
+# ============================================================================
+
+def _digest(data: str) -> bytes:
+    """Short content digest used to detect changed session parts."""
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+
+def _serialize_header(session: PipelineSessionState) -> str:
+    """Serialize everything except stage outputs, conversation history and version."""
+    return session.model_dump_json(exclude=_HEADER_EXCLUDE)
+
+
+def _serialize_value(value: Any) -> str:
+    """Serialize a stage output (arbitrary JSON-compatible data)."""
+    return to_json(value).decode("utf-8")
+
+
+@dataclass
+class _SessionSnapshot:
+    """Digests of the session parts as last persisted by this process."""
+
+    header: Optional[bytes] = None
+    outputs: Dict[str, bytes] = field(default_factory=dict)
+    # None when the length of the stored conversation log is unknown
+    message_count: Optional[int] = 0
+    last_message: Optional[bytes] = None
+
+
+@dataclass
+class SessionDelta:
+    """Parts of a session that must be written to bring storage up to date."""
+
+    header: Optional[str] = None
+    outputs: Dict[str, str] = field(default_factory=dict)
+    removed_outputs: List[str] = field(default_factory=list)
+    reset_conversation: bool = False
+    new_messages: List[str] = field(default_factory=list)
+    # True when nothing is known about the stored session (write everything)
+    full: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.header
+            or self.outputs
+            or self.removed_outputs
+            or self.reset_conversation
+            or self.new_messages
+        )
+
+
+class SessionConflictError(Exception):
+    """Raised when a version-checked save finds the session was modified concurrently."""
+
+    def __init__(self, session_id: str, expected_version: int):
+        self.session_id = session_id
+        self.expected_version = expected_version
+        super().__init__(
+            f"Session {session_id} was modified concurrently "
+            f"(expected version {expected_version})"
+        )
+
 
 # ============================================================================
 # Abstract Base Class
@@ -32,14 +122,45 @@ logger = logging.getLogger(__name__)
 class SessionStorage(ABC):
     """Abstract base class for session storage backends."""
 
+    async def initialize(self) -> None:
+        """One-time backend setup (schema, background tasks). Called at startup."""
+        pass
+
+    async def close(self) -> None:
+        """Stop background tasks and release resources. Called at shutdown."""
+        pass
+
     @abstractmethod
-    async def save(self, session: PipelineSessionState) -> None:
-        """Save session to storage."""
+    async def save(self, session: PipelineSessionState, check_version: bool = False) -> None:
+        """
+        Save session to storage and increment ``session.version``.
+
+        Args:
+            session: Session to save
+            check_version: Raise SessionConflictError if the stored version
+                differs from ``session.version`` (optimistic concurrency)
+        """
         pass
 
     @abstractmethod
-    async def load(self, session_id: str) -> Optional[PipelineSessionState]:
-        """Load session from storage. Returns None if not found."""
+    async def load(
+        self,
+        session_id: str,
+        stages: Optional[Sequence[str]] = None,
+        include_conversation: bool = True,
+    ) -> Optional[PipelineSessionState]:
+        """
+        Load session from storage. Returns None if not found.
+
+        Args:
+            session_id: Session identifier
+            stages: Stage outputs to load (None loads all, [] loads none)
+            include_conversation: Whether to load the conversation history
+
+        A partially loaded session can be saved back: stage outputs that
+        were not loaded are left untouched, and messages added to a session
+        loaded without its conversation are appended to the stored log.
+        """
         pass
 
     @abstractmethod
@@ -57,13 +178,188 @@ class SessionStorage(ABC):
         """Clean up expired sessions. Returns number of sessions deleted."""
         pass
 
+    # ------------------------------------------------------------------------
+    # Delta helpers (used by backends that store sessions as separate parts)
+    # ------------------------------------------------------------------------
+
+    @property
+    def _snapshots(self) -> "OrderedDict[str, _SessionSnapshot]":
+        snapshots = self.__dict__.get("_snapshot_cache")
+        if snapshots is None:
+            snapshots = self.__dict__["_snapshot_cache"] = OrderedDict()
+        return snapshots
+
+    def _remember(self, session_id: str, snapshot: _SessionSnapshot) -> None:
+        """Record the persisted state of a session (bounded LRU)."""
+        snapshots = self._snapshots
+        snapshots[session_id] = snapshot
+        snapshots.move_to_end(session_id)
+        while len(snapshots) > _MAX_TRACKED_SESSIONS:
+            snapshots.popitem(last=False)
+
+    def _remember_loaded(
+        self,
+        session_id: str,
+        header: str,
+        outputs: Dict[str, str],
+        messages: Optional[List[str]],
+        all_outputs: bool,
+    ) -> None:
+        """
+        Record the parts read by a load.
+
+        A partial load only updates what it read: outputs of stages that were
+        not requested and the conversation log position keep the state
+        recorded by an earlier full load or save.
+        """
+        snapshot = self._snapshot_from_parts(header, outputs, messages)
+        previous = self._snapshots.get(session_id)
+        if previous is not None:
+            if not all_outputs:
+                snapshot.outputs = {**previous.outputs, **snapshot.outputs}
+            if messages is None:
+                snapshot.message_count = previous.message_count
+                snapshot.last_message = previous.last_message
+        self._remember(session_id, snapshot)
+
+    def _forget(self, session_id: str) -> None:
+        self._snapshots.pop(session_id, None)
+
+    def _snapshot_from_parts(
+        self,
+        header: str,
+        outputs: Dict[str, str],
+        messages: Optional[List[str]],
+    ) -> _SessionSnapshot:
+        """Build a snapshot from the raw parts read from storage."""
+        return _SessionSnapshot(
+            header=_digest(header),
+            outputs={stage: _digest(data) for stage, data in outputs.items()},
+            message_count=len(messages) if messages is not None else None,
+            last_message=_digest(messages[-1]) if messages else None,
+        )
+
+    def _compute_delta(self, session: PipelineSessionState) -> SessionDelta:
+        """
+        Diff a session against its last persisted snapshot.
+
+        Updates the snapshot to the new state, so callers must write the
+        returned delta (or call _forget on failure).
+        """
+        previous = self._snapshots.get(session.session_id)
+        # Only the parts the session object holds are diffed; nothing is
+        # removed or reset for stages and messages it did not load
+        held_stages = session._loaded_stages
+        conversation_held = session._conversation_loaded
+        delta = SessionDelta(full=previous is None and held_stages is None and conversation_held)
+        snapshot = _SessionSnapshot()
+
+        header = _serialize_header(session)
+        snapshot.header = _digest(header)
+        if previous is None or previous.header != snapshot.header:
+            delta.header = header
+
+        for stage, value in session.outputs.items():
+            data = _serialize_value(value)
+            snapshot.outputs[stage] = _digest(data)
+            if previous is None or previous.outputs.get(stage) != snapshot.outputs[stage]:
+                delta.outputs[stage] = data
+        if previous is not None:
+            delta.removed_outputs = [
+                stage for stage in previous.outputs
+                if stage not in session.outputs and (held_stages is None or stage in held_stages)
+            ]
+            if held_stages is not None:
+                # Stages that were not loaded keep their last known state
+                snapshot.outputs = {
+                    **{stage: data for stage, data in previous.outputs.items() if stage not in held_stages},
+                    **snapshot.outputs,
+                }
+        if held_stages is not None:
+            session._loaded_stages = held_stages | set(session.outputs)
+
+        messages = session.conversation_history
+        if not conversation_held:
+            # Conversation was not loaded - everything present is new, except
+            # the messages already appended by earlier saves of this object
+            start = min(session._appended_messages, len(messages))
+            delta.new_messages = [msg.model_dump_json() for msg in messages[start:]]
+            session._appended_messages = len(messages)
+            if previous is None or previous.message_count is None:
+                snapshot.message_count = None
+            else:
+                snapshot.message_count = previous.message_count + len(delta.new_messages)
+                snapshot.last_message = (
+                    _digest(delta.new_messages[-1]) if delta.new_messages else previous.last_message
+                )
+            self._remember(session.session_id, snapshot)
+            return delta
+
+        start = 0
+        if previous is None or previous.message_count is None:
+            # Stored log position unknown - rewrite the whole history
+            delta.reset_conversation = True
+        elif len(messages) < previous.message_count or (
+            previous.message_count
+            and _digest(messages[previous.message_count - 1].model_dump_json())
+            != previous.last_message
+        ):
+            # History was reset or rewritten (e.g. stage transition)
+            delta.reset_conversation = True
+        else:
+            start = previous.message_count
+
+        delta.new_messages = [msg.model_dump_json() for msg in messages[start:]]
+        snapshot.message_count = len(messages)
+        if messages:
+            snapshot.last_message = (
+                _digest(delta.new_messages[-1])
+                if delta.new_messages
+                else previous.last_message
+            )
+
+        self._remember(session.session_id, snapshot)
+        return delta
+
+
+def _assemble_session(
+    header: str,
+    outputs: Dict[str, str],
+    messages: Optional[List[str]],
+    version: int = 0,
+    stages: Optional[Sequence[str]] = None,
+) -> PipelineSessionState:
+    """Rebuild a session from its stored parts (stages: the requested stages, None = all)."""
+    data = json.loads(header)
+    data["version"] = version
+    # Rows written before the split layout hold the whole session in the header
+    data.setdefault("outputs", {})
+    data["outputs"].update({stage: json.loads(value) for stage, value in outputs.items()})
+    if messages is not None:
+        data["conversation_history"] = [json.loads(msg) for msg in messages]
+    session = PipelineSessionState.model_validate(data)
+    if stages is not None:
+        session._loaded_stages = set(stages) | set(session.outputs)
+    session._conversation_loaded = messages is not None
+    return session
+
 
 # ============================================================================
 # Redis Storage Adapter
 # ============================================================================
 
 class RedisSessionStorage(SessionStorage):
-    """Redis-based session storage (preferred)."""
+    """
+    Redis-based session storage (preferred).
+
+    Layout per session:
+        {prefix}{session_id}               hash: "header" + "output:{stage}" fields
+        {prefix}{session_id}:conversation  list of chat message JSON (append-only)
+    """
+
+    HEADER_FIELD = "header"
+    VERSION_FIELD = "version"
+    OUTPUT_FIELD_PREFIX = "output:"
 
     def __init__(self, redis_url: str = None, key_prefix: str = "pipeline:session:"):
         """
@@ -103,13 +399,18 @@ class RedisSessionStorage(SessionStorage):
         """Generate Redis key for session."""
         return f"{self.key_prefix}{session_id}"
 
-    async def save(self, session: PipelineSessionState) -> None:
-        """Save session to Redis with TTL."""
+    def _make_conversation_key(self, session_id: str) -> str:
+        """Generate Redis key for the session's conversation log."""
+        return f"{self.key_prefix}{session_id}:conversation"
+
+    async def save(self, session: PipelineSessionState, check_version: bool = False) -> None:
+        """Save changed session parts to Redis with TTL."""
+        from redis.exceptions import WatchError
+
         client = await self._get_client()
 
-        # Serialize session to JSON
-        session_data = session.model_dump_json()
         key = self._make_key(session.session_id)
+        conversation_key = self._make_conversation_key(session.session_id)
 
         # Calculate TTL from expires_at
         if session.expires_at:
@@ -118,22 +419,101 @@ class RedisSessionStorage(SessionStorage):
         else:
             ttl_seconds = 3600  # Default 1 hour
 
-        # Store with TTL
-        await client.setex(key, ttl_seconds, session_data)
-        logger.debug(f"Session saved to Redis: {session.session_id} (TTL: {ttl_seconds}s)")
+        delta = self._compute_delta(session)
+
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                if check_version:
+                    await pipe.watch(key)
+                    stored_version = await pipe.hget(key, self.VERSION_FIELD)
+                    if int(stored_version or 0) != session.version:
+                        raise SessionConflictError(session.session_id, session.version)
+                    pipe.multi()
+                if delta.full:
+                    pipe.delete(key)
+                fields = {
+                    f"{self.OUTPUT_FIELD_PREFIX}{stage}": data
+                    for stage, data in delta.outputs.items()
+                }
+                if delta.header:
+                    fields[self.HEADER_FIELD] = delta.header
+                if delta.full:
+                    fields[self.VERSION_FIELD] = session.version
+                if fields:
+                    pipe.hset(key, mapping=fields)
+                if delta.removed_outputs:
+                    pipe.hdel(key, *[
+                        f"{self.OUTPUT_FIELD_PREFIX}{stage}" for stage in delta.removed_outputs
+                    ])
+                if delta.reset_conversation:
+                    pipe.delete(conversation_key)
+                if delta.new_messages:
+                    pipe.rpush(conversation_key, *delta.new_messages)
+                version_index = len(pipe)
+                pipe.hincrby(key, self.VERSION_FIELD, 1)
+                pipe.expire(key, ttl_seconds)
+                pipe.expire(conversation_key, ttl_seconds)
+                results = await pipe.execute()
+        except WatchError:
+            self._forget(session.session_id)
+            raise SessionConflictError(session.session_id, session.version)
+        except Exception:
+            self._forget(session.session_id)
+            raise
+
+        session.version = int(results[version_index])
+
+        logger.debug(
+            f"Session saved to Redis: {session.session_id} (TTL: {ttl_seconds}s, "
+            f"header={'yes' if delta.header else 'no'}, outputs={list(delta.outputs)}, "
+            f"messages=+{len(delta.new_messages)})"
+        )
 
-    async def load(self, session_id: str) -> Optional[PipelineSessionState]:
-        """Load session from Redis."""
+    async def load(
+        self,
+        session_id: str,
+        stages: Optional[Sequence[str]] = None,
+        include_conversation: bool = True,
+    ) -> Optional[PipelineSessionState]:
+        """Load session (or selected parts of it) from Redis."""
         client = await self._get_client()
         key = self._make_key(session_id)
 
-        data = await client.get(key)
-        if data is None:
+        async with client.pipeline(transaction=False) as pipe:
+            if stages is None:
+                pipe.hgetall(key)
+            else:
+                pipe.hmget(key, [self.HEADER_FIELD, self.VERSION_FIELD] + [
+                    f"{self.OUTPUT_FIELD_PREFIX}{stage}" for stage in stages
+                ])
+            if include_conversation:
+                pipe.lrange(self._make_conversation_key(session_id), 0, -1)
+            results = await pipe.execute()
+
+        if stages is None:
+            fields = results[0]
+        else:
+            names = [self.HEADER_FIELD, self.VERSION_FIELD] + [
+                f"{self.OUTPUT_FIELD_PREFIX}{stage}" for stage in stages
+            ]
+            fields = {name: value for name, value in zip(names, results[0]) if value is not None}
+
+        header = fields.pop(self.HEADER_FIELD, None)
+        version = int(fields.pop(self.VERSION_FIELD, None) or 0)
+        if header is None:
             logger.debug(f"Session not found in Redis: {session_id}")
             return None
 
-        # Deserialize from JSON
-        session = PipelineSessionState.model_validate_json(data)
+        prefix_len = len(self.OUTPUT_FIELD_PREFIX)
+        outputs = {
+            name[prefix_len:]: value
+            for name, value in fields.items()
+            if name.startswith(self.OUTPUT_FIELD_PREFIX)
+        }
+        messages = results[1] if include_conversation else None
+
+        session = _assemble_session(header, outputs, messages, version, stages)
+        self._remember_loaded(session_id, header, outputs, messages, all_outputs=stages is None)
         logger.debug(f"Session loaded from Redis: {session_id}")
         return session
 
@@ -142,7 +522,8 @@ class RedisSessionStorage(SessionStorage):
         client = await self._get_client()
         key = self._make_key(session_id)
 
-        deleted = await client.delete(key)
+        self._forget(session_id)
+        deleted = await client.delete(key, self._make_conversation_key(session_id))
         if deleted:
             logger.debug(f"Session deleted from Redis: {session_id}")
 
@@ -163,7 +544,18 @@ class RedisSessionStorage(SessionStorage):
 # ============================================================================
 
 class PostgreSQLSessionStorage(SessionStorage):
-    """PostgreSQL-based session storage (fallback)."""
+    """
+    PostgreSQL-based session storage (fallback).
+
+    Layout:
+        {table_name}           one row per session holding the header and version
+        {table_name}_outputs   one row per (session, stage) output
+        {table_name}_messages  append-only conversation log
+
+    Uses the shared pooled async engine. Tables are created once by
+    initialize(), which also starts a background task that deletes expired
+    sessions in batches (indexed on expires_at).
+    """
 
     def __init__(self, table_name: str = "pipeline_sessions"):
         """
@@ -172,22 +564,26 @@ class PostgreSQLSessionStorage(SessionStorage):
         Args:
             table_name: Table name for sessions
         """
-        from sqlalchemy import create_engine, Table, Column, String, Text, DateTime, MetaData
-        from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+        from sqlalchemy import (
+            Column, DateTime, ForeignKey, Integer, MetaData, String, Text,
+        )
+        from sqlalchemy import Table
+        from sqlalchemy.ext.asyncio import AsyncSession
         from sqlalchemy.orm import sessionmaker
 
-        self.table_name = table_name
+        from app.db.base import get_async_engine
 
-        # Convert sync DATABASE_URL to async if needed
-        db_url = settings.DATABASE_URL
-        if db_url.startswith("postgresql://"):
-            db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        self.table_name = table_name
 
-        self.engine = create_async_engine(db_url, echo=settings.DEBUG)
+        self.engine = get_async_engine()
         self.async_session = sessionmaker(
             self.engine, class_=AsyncSession, expire_on_commit=False
         )
 
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._expiry_task: Optional[asyncio.Task] = None
+
         # Define table schema
         self.metadata = MetaData()
         self.sessions_table = Table(
@@ -195,117 +591,271 @@ class PostgreSQLSessionStorage(SessionStorage):
             self.metadata,
             Column("session_id", String(50), primary_key=True),
             Column("data", Text, nullable=False),
-            Column("expires_at", DateTime, nullable=False),
+            Column("version", Integer, nullable=False, default=1),
+            Column("expires_at", DateTime, nullable=False, index=True),
             Column("created_at", DateTime, default=datetime.utcnow),
             Column("updated_at", DateTime, default=datetime.utcnow, onupdate=datetime.utcnow),
         )
+        self.outputs_table = Table(
+            f"{table_name}_outputs",
+            self.metadata,
+            Column(
+                "session_id",
+                String(50),
+                ForeignKey(f"{table_name}.session_id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            Column("stage", String(50), primary_key=True),
+            Column("data", Text, nullable=False),
+            Column("updated_at", DateTime, default=datetime.utcnow, onupdate=datetime.utcnow),
+        )
+        self.messages_table = Table(
+            f"{table_name}_messages",
+            self.metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column(
+                "session_id",
+                String(50),
+                ForeignKey(f"{table_name}.session_id", ondelete="CASCADE"),
+                nullable=False,
+                index=True,
+            ),
+            Column("data", Text, nullable=False),
+        )
 
-    async def _ensure_table(self):
-        """Create table if it doesn't exist."""
-        async with self.engine.begin() as conn:
-            await conn.run_sync(self.metadata.create_all)
-
-    async def save(self, session: PipelineSessionState) -> None:
-        """Save session to PostgreSQL."""
-        from sqlalchemy import insert, update
+    async def initialize(self) -> None:
+        """Create tables (once) and start the background expiry task."""
+        await self._ensure_initialized()
+
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.create_task(self._expiry_loop())
+
+    async def close(self) -> None:
+        """Stop the background expiry task."""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+            self._expiry_task = None
+
+    async def _ensure_initialized(self) -> None:
+        """Create tables on first use if startup initialization was skipped."""
+        if not self._initialized:
+            async with self._init_lock:
+                if not self._initialized:
+                    async with self.engine.begin() as conn:
+                        await conn.run_sync(self.metadata.create_all)
+                    self._initialized = True
+                    logger.info(f"PostgreSQL session tables ready ({self.table_name})")
+
+    async def _expiry_loop(self) -> None:
+        """Periodically delete expired sessions."""
+        interval = settings.SESSION_CLEANUP_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.cleanup_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Session expiry sweep failed: {e}")
+
+    async def save(self, session: PipelineSessionState, check_version: bool = False) -> None:
+        """Save changed session parts to PostgreSQL (one transaction)."""
+        from sqlalchemy import delete, insert
         from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-        await self._ensure_table()
+        await self._ensure_initialized()
 
-        session_data = session.model_dump_json()
         expires_at = session.expires_at or datetime.utcnow() + timedelta(hours=1)
+        now = datetime.utcnow()
+        delta = self._compute_delta(session)
+        session_id = session.session_id
+        table = self.sessions_table
+        header = delta.header or _serialize_header(session)
 
-        async with self.async_session() as db:
-            # Use upsert (INSERT ... ON CONFLICT UPDATE)
-            stmt = pg_insert(self.sessions_table).values(
-                session_id=session.session_id,
-                data=session_data,
-                expires_at=expires_at,
-                updated_at=datetime.utcnow()
-            )
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["session_id"],
-                set_={"data": session_data, "expires_at": expires_at, "updated_at": datetime.utcnow()}
-            )
-
-            await db.execute(stmt)
-            await db.commit()
-
-        logger.debug(f"Session saved to PostgreSQL: {session.session_id}")
+        try:
+            async with self.async_session() as db:
+                # Upsert header and bump version (INSERT ... ON CONFLICT UPDATE)
+                stmt = pg_insert(table).values(
+                    session_id=session_id,
+                    data=header,
+                    version=1,
+                    expires_at=expires_at,
+                    created_at=session.created_at,
+                    updated_at=now,
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["session_id"],
+                    set_={
+                        "data": header,
+                        "version": table.c.version + 1,
+                        "expires_at": expires_at,
+                        "updated_at": now,
+                    },
+                    where=(table.c.version == session.version) if check_version else None,
+                ).returning(table.c.version)
+                new_version = (await db.execute(stmt)).scalar()
+                if new_version is None:
+                    await db.rollback()
+                    raise SessionConflictError(session_id, session.version)
+
+                if delta.full:
+                    await db.execute(
+                        delete(self.outputs_table).where(
+                            self.outputs_table.c.session_id == session_id
+                        )
+                    )
+                elif delta.removed_outputs:
+                    await db.execute(
+                        delete(self.outputs_table).where(
+                            self.outputs_table.c.session_id == session_id,
+                            self.outputs_table.c.stage.in_(delta.removed_outputs),
+                        )
+                    )
+
+                if delta.outputs:
+                    stmt = pg_insert(self.outputs_table).values([
+                        {"session_id": session_id, "stage": stage, "data": data, "updated_at": now}
+                        for stage, data in delta.outputs.items()
+                    ])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["session_id", "stage"],
+                        set_={"data": stmt.excluded.data, "updated_at": now},
+                    )
+                    await db.execute(stmt)
+
+                if delta.reset_conversation:
+                    await db.execute(
+                        delete(self.messages_table).where(
+                            self.messages_table.c.session_id == session_id
+                        )
+                    )
+                if delta.new_messages:
+                    await db.execute(
+                        insert(self.messages_table),
+                        [{"session_id": session_id, "data": msg} for msg in delta.new_messages],
+                    )
+
+                await db.commit()
+        except Exception:
+            self._forget(session_id)
+            raise
+
+        session.version = new_version
+        logger.debug(
+            f"Session saved to PostgreSQL: {session_id} (version={new_version}, "
+            f"outputs={list(delta.outputs)}, messages=+{len(delta.new_messages)})"
+        )
 
-    async def load(self, session_id: str) -> Optional[PipelineSessionState]:
-        """Load session from PostgreSQL."""
+    async def load(
+        self,
+        session_id: str,
+        stages: Optional[Sequence[str]] = None,
+        include_conversation: bool = True,
+    ) -> Optional[PipelineSessionState]:
+        """Load session (or selected parts of it) from PostgreSQL."""
         from sqlalchemy import select
 
-        await self._ensure_table()
+        await self._ensure_initialized()
 
         async with self.async_session() as db:
             stmt = select(self.sessions_table).where(
-                self.sessions_table.c.session_id == session_id
+                self.sessions_table.c.session_id == session_id,
+                self.sessions_table.c.expires_at > datetime.utcnow(),
             )
             result = await db.execute(stmt)
             row = result.first()
 
             if row is None:
+                # Missing or expired (expired rows are removed by the expiry task)
                 logger.debug(f"Session not found in PostgreSQL: {session_id}")
                 return None
 
-            # Check if expired
-            if row.expires_at < datetime.utcnow():
-                logger.debug(f"Session expired: {session_id}")
-                await self.delete(session_id)
-                return None
-
-            # Deserialize from JSON
-            session = PipelineSessionState.model_validate_json(row.data)
-            logger.debug(f"Session loaded from PostgreSQL: {session_id}")
-            return session
+            outputs: Dict[str, str] = {}
+            if stages is None or stages:
+                stmt = select(self.outputs_table.c.stage, self.outputs_table.c.data).where(
+                    self.outputs_table.c.session_id == session_id
+                )
+                if stages is not None:
+                    stmt = stmt.where(self.outputs_table.c.stage.in_(list(stages)))
+                outputs = {r.stage: r.data for r in (await db.execute(stmt)).all()}
+
+            messages: Optional[List[str]] = None
+            if include_conversation:
+                stmt = (
+                    select(self.messages_table.c.data)
+                    .where(self.messages_table.c.session_id == session_id)
+                    .order_by(self.messages_table.c.id)
+                )
+                messages = list((await db.execute(stmt)).scalars())
+
+        session = _assemble_session(row.data, outputs, messages, row.version, stages)
+        self._remember_loaded(session_id, row.data, outputs, messages, all_outputs=stages is None)
+        logger.debug(f"Session loaded from PostgreSQL: {session_id}")
+        return session
 
     async def delete(self, session_id: str) -> None:
         """Delete session from PostgreSQL."""
         from sqlalchemy import delete
 
-        await self._ensure_table()
+        await self._ensure_initialized()
 
+        self._forget(session_id)
         async with self.async_session() as db:
-            stmt = delete(self.sessions_table).where(
-                self.sessions_table.c.session_id == session_id
-            )
-            await db.execute(stmt)
+            for table in (self.messages_table, self.outputs_table, self.sessions_table):
+                await db.execute(delete(table).where(table.c.session_id == session_id))
             await db.commit()
 
         logger.debug(f"Session deleted from PostgreSQL: {session_id}")
 
     async def exists(self, session_id: str) -> bool:
         """Check if session exists in PostgreSQL."""
-        from sqlalchemy import select, func
+        from sqlalchemy import select
 
-        await self._ensure_table()
+        await self._ensure_initialized()
 
         async with self.async_session() as db:
-            stmt = select(func.count()).select_from(self.sessions_table).where(
+            stmt = select(self.sessions_table.c.session_id).where(
                 self.sessions_table.c.session_id == session_id,
                 self.sessions_table.c.expires_at > datetime.utcnow()
-            )
+            ).limit(1)
             result = await db.execute(stmt)
-            count = result.scalar()
-            return count > 0
-
-    async def cleanup_expired(self) -> int:
-        """Delete all expired sessions from PostgreSQL."""
-        from sqlalchemy import delete
-
-        await self._ensure_table()
-
-        async with self.async_session() as db:
-            stmt = delete(self.sessions_table).where(
-                self.sessions_table.c.expires_at < datetime.utcnow()
-            )
-            result = await db.execute(stmt)
-            await db.commit()
-            deleted_count = result.rowcount
-
-        logger.info(f"Cleaned up {deleted_count} expired sessions from PostgreSQL")
+            return result.first() is not None
+
+    async def cleanup_expired(self, batch_size: Optional[int] = None) -> int:
+        """Delete expired sessions from PostgreSQL in batches."""
+        from sqlalchemy import delete, select
+
+        await self._ensure_initialized()
+
+        batch_size = batch_size or settings.SESSION_CLEANUP_BATCH_SIZE
+        deleted_count = 0
+
+        while True:
+            async with self.async_session() as db:
+                expired_ids = list((await db.execute(
+                    select(self.sessions_table.c.session_id)
+                    .where(self.sessions_table.c.expires_at < datetime.utcnow())
+                    .limit(batch_size)
+                )).scalars())
+                if not expired_ids:
+                    break
+
+                for table in (self.messages_table, self.outputs_table, self.sessions_table):
+                    await db.execute(delete(table).where(table.c.session_id.in_(expired_ids)))
+                await db.commit()
+
+            for session_id in expired_ids:
+                self._forget(session_id)
+            deleted_count += len(expired_ids)
+            if len(expired_ids) < batch_size:
+                break
+
+        if deleted_count:
+            logger.info(f"Cleaned up {deleted_count} expired sessions from PostgreSQL")
         return deleted_count
 
 
@@ -318,16 +868,26 @@ class InMemorySessionStorage(SessionStorage):
 
     def __init__(self):
         """Initialize in-memory storage."""
+        # Holds copies, so sessions loaded by different callers are independent (as with Redis/PostgreSQL)
         self._store = {}
         logger.warning("Using in-memory session storage - NOT PRODUCTION SAFE")
 
-    async def save(self, session: PipelineSessionState) -> None:
-        """Save session to memory."""
-        self._store[session.session_id] = session
+    async def save(self, session: PipelineSessionState, check_version: bool = False) -> None:
+        """Save a copy of the session to memory."""
+        stored = self._store.get(session.session_id)
+        if check_version and stored is not None and stored.version != session.version:
+            raise SessionConflictError(session.session_id, session.version)
+        session.version += 1
+        self._store[session.session_id] = session.model_copy(deep=True)
         logger.debug(f"Session saved to memory: {session.session_id}")
 
-    async def load(self, session_id: str) -> Optional[PipelineSessionState]:
-        """Load session from memory."""
+    async def load(
+        self,
+        session_id: str,
+        stages: Optional[Sequence[str]] = None,
+        include_conversation: bool = True,
+    ) -> Optional[PipelineSessionState]:
+        """Load a copy of the session from memory (always the full session)."""
         session = self._store.get(session_id)
 
         if session is None:
@@ -341,7 +901,7 @@ class InMemorySessionStorage(SessionStorage):
             return None
 
         logger.debug(f"Session loaded from memory: {session_id}")
-        return session
+        return session.model_copy(deep=True)
 
     async def delete(self, session_id: str) -> None:
         """Delete session from memory."""
@@ -423,3 +983,16 @@ def get_session_storage() -> SessionStorage:
     logger.warning("Using in-memory session storage - NOT PRODUCTION SAFE")
     _storage_instance = InMemorySessionStorage()
     return _storage_instance
+
+
+async def init_session_storage() -> SessionStorage:
+    """Initialize the session storage backend once at application startup."""
+    storage = get_session_storage()
+    await storage.initialize()
+    return storage
+
+
+async def shutdown_session_storage() -> None:
+    """Stop session storage background work at application shutdown."""
+    if _storage_instance is not None:
+        await _storage_instance.close()
@@ -0,0 +1,283 @@
+"""
+Checkpointed stage-DAG executor.
+
+A pipeline is a set of stages, each declaring the named values it reads
+(inputs) and produces (outputs). The executor runs every stage as soon as
+the stages producing its inputs have finished, so independent stages run
+concurrently. When a stage completes, its outputs and timing are written
+to a checkpoint store, and each stage run is a tracing span.
+
+When the same pipeline runs again for the same work (same fingerprint),
+stages whose checkpoint is still valid are restored instead of re-run. A
+checkpoint is valid if the stage and all stages it depends on completed,
+and every file listed in its file outputs still exists. A failed or
+interrupted run therefore resumes from the last completed stages, and a
+retry only pays for the stages that did not finish.
+
+Stage outputs are persisted as JSON, so they must be JSON-serializable
+(paths, dicts, lists, numbers), not live objects.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class StageGraphError(ValueError):
+    """The stages do not form a valid DAG (unknown input, duplicate output, cycle)."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of a pipeline."""
+
+    name: str
+    run: StageFunc  # receives {input name: value}, returns {output name: value}
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    files: Tuple[str, ...] = ()  # outputs holding file paths (str or list of str) that must exist to resume
+    checkpoint: bool = True  # False: always re-run (cheap or side-effect-only stages)
+
+
+class StageGraph:
+    """Validated dependency graph of stages."""
+
+    def __init__(self, stages: Iterable[Stage], initial_inputs: Iterable[str] = ()):
+        """
+        Args:
+            stages: Pipeline stages, in any order
+            initial_inputs: Names of values provided when the pipeline starts
+
+        Raises:
+            StageGraphError: If a name is reused, an input has no producer, or there is a cycle
+        """
+        self.stages: Dict[str, Stage] = {}
+        self.initial_inputs = frozenset(initial_inputs)
+        producers: Dict[str, str] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise StageGraphError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+            for output in stage.outputs:
+                if output in producers or output in self.initial_inputs:
+                    raise StageGraphError(f"Output '{output}' of stage {stage.name} is already provided")
+                producers[output] = stage.name
+            unknown_files = set(stage.files) - set(stage.outputs)
+            if unknown_files:
+                raise StageGraphError(f"Stage {stage.name} lists files that are not outputs: {sorted(unknown_files)}")
+
+        self.dependencies: Dict[str, Set[str]] = {}
+        for stage in self.stages.values():
+            deps = set()
+            for name in stage.inputs:
+                if name in self.initial_inputs:
+                    continue
+                if name not in producers:
+                    raise StageGraphError(f"Input '{name}' of stage {stage.name} is not produced by any stage")
+                deps.add(producers[name])
+            self.dependencies[stage.name] = deps
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, remaining = [], dict(self.dependencies)
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if deps <= set(order))
+            if not ready:
+                raise StageGraphError(f"Cycle between stages: {sorted(remaining)}")
+            order.extend(ready)
+            for name in ready:
+                del remaining[name]
+        return order
+
+
+class CheckpointStore:
+    """Where checkpoint state is kept between runs (in memory by default)."""
+
+    def __init__(self):
+        self._state: Optional[Dict[str, Any]] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._state)
+
+    def save(self, state: Dict[str, Any]) -> None:
+        self._state = copy.deepcopy(state)
+
+
+class ModelCheckpointStore(CheckpointStore):
+    """Checkpoint state kept in a JSON column of a database row."""
+
+    def __init__(self, db, instance, attribute: str):
+        super().__init__()
+        self.db = db
+        self.instance = instance
+        self.attribute = attribute
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(getattr(self.instance, self.attribute))
+
+    def save(self, state: Dict[str, Any]) -> None:
+        # Assign a new object so the JSON column is flagged as modified
+        with span("checkpoint", "db"):
+            setattr(self.instance, self.attribute, copy.deepcopy(state))
+            self.db.commit()
+
+
+def fingerprint(values: Dict[str, Any]) -> str:
+    """Stable hash of the values a pipeline run depends on."""
+    encoded = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _files_exist(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return os.path.exists(value)
+    if isinstance(value, (list, tuple)):
+        return all(_files_exist(item) for item in value)
+    return True
+
+
+class StageExecutor:
+    """Runs a StageGraph with checkpointing, resume and per-stage timings."""
+
+    def __init__(self, graph: StageGraph, store: Optional[CheckpointStore] = None, label: str = "pipeline"):
+        self.graph = graph
+        self.store = store or CheckpointStore()
+        self.label = label
+        self.timings: Dict[str, float] = {}
+        self.restored: List[str] = []
+        self.failed_stage: Optional[str] = None
+
+    def _restorable(self, state: Dict[str, Any], run_fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        """Checkpointed stages that can be reused, keyed by name."""
+        if state.get("fingerprint") != run_fingerprint:
+            return {}
+        records = state.get("stages", {})
+        reusable: Dict[str, Dict[str, Any]] = {}
+        for name in self.graph.order:
+            stage = self.graph.stages[name]
+            record = records.get(name)
+            if (
+                stage.checkpoint
+                and record is not None
+                and self.graph.dependencies[name] <= set(reusable)
+                and all(_files_exist(record["outputs"].get(output)) for output in stage.files)
+            ):
+                reusable[name] = record
+        return reusable
+
+    async def run(self, initial: Dict[str, Any], run_fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run all stages, restoring valid checkpoints from a previous run.
+
+        Args:
+            initial: Values for the graph's initial inputs (JSON-serializable;
+                stored with the checkpoint so the run can be resumed later)
+            run_fingerprint: Identifies the work; checkpoints from a different
+                fingerprint are discarded (defaults to a hash of initial)
+
+        Returns:
+            All values: initial inputs plus every stage output
+
+        Raises:
+            Whatever a stage raises; running stages are cancelled first and
+            completed stages stay checkpointed
+        """
+        run_fingerprint = run_fingerprint or fingerprint(initial)
+        previous = self.store.load() or {}
+        reusable = self._restorable(previous, run_fingerprint)
+
+        self.failed_stage = None
+        state = {
+            "fingerprint": run_fingerprint,
+            "inputs": initial,
+            "stages": dict(reusable),
+            "timings": {name: record["seconds"] for name, record in reusable.items()},
+            "started_at": datetime.utcnow().isoformat(),
+            "resumed_from": sorted(reusable),
+            "failed_stage": None,
+        }
+        self.store.save(state)
+
+        values = dict(initial)
+        done: Set[str] = set()
+        for name in self.graph.order:
+            if name in reusable:
+                values.update(reusable[name]["outputs"])
+                done.add(name)
+                self.timings[name] = reusable[name]["seconds"]
+        self.restored = [name for name in self.graph.order if name in reusable]
+        if self.restored:
+            logger.info(f"[{self.label}] Resuming: restored stages {', '.join(self.restored)} from checkpoint")
+
+        running: Dict[asyncio.Task, Tuple[str, float]] = {}
+        try:
+            while len(done) < len(self.graph.stages):
+                started = {name for name, _ in running.values()}
+                for name in self.graph.order:
+                    if name in done or name in started or not self.graph.dependencies[name] <= done:
+                        continue
+                    stage = self.graph.stages[name]
+                    stage_inputs = {key: values[key] for key in stage.inputs}
+                    logger.info(f"[{self.label}] Stage {name} started")
+                    running[asyncio.create_task(self._run_stage(stage, stage_inputs))] = (name, time.perf_counter())
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name, started_at = running.pop(task)
+                    try:
+                        outputs = self._checked_outputs(self.graph.stages[name], task.result())
+                    except BaseException:
+                        self.failed_stage = state["failed_stage"] = name
+                        self.store.save(state)
+                        logger.warning(f"[{self.label}] Stage {name} failed after {time.perf_counter() - started_at:.1f}s")
+                        raise
+                    seconds = round(time.perf_counter() - started_at, 3)
+                    values.update(outputs)
+                    done.add(name)
+                    self.timings[name] = seconds
+                    state["timings"][name] = seconds
+                    if self.graph.stages[name].checkpoint:
+                        state["stages"][name] = {
+                            "outputs": outputs,
+                            "seconds": seconds,
+                            "completed_at": datetime.utcnow().isoformat(),
+                        }
+                    self.store.save(state)
+                    logger.info(f"[{self.label}] Stage {name} completed in {seconds:.1f}s")
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        state["completed_at"] = datetime.utcnow().isoformat()
+        self.store.save(state)
+        return values
+
+    @staticmethod
+    async def _run_stage(stage: Stage, stage_inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # Each stage is a span of the active trace; spans opened inside it become its children
+        with span(stage.name, "stage"):
+            return await stage.run(stage_inputs)
+
+    @staticmethod
+    def _checked_outputs(stage: Stage, outputs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        outputs = outputs or {}
+        missing = set(stage.outputs) - set(outputs)
+        if missing:
+            raise StageGraphError(f"Stage {stage.name} did not return outputs: {sorted(missing)}")
+        return {key: outputs[key] for key in stage.outputs}
@@ -0,0 +1,263 @@
+"""
+Recorded pipeline stage timings.
+
+Every completed generation stage is recorded by stage, video model,
+resolution (aspect ratio), target duration and clip count. Each bucket keeps
+streaming p50/p90 estimates (P² quantile sketches, constant memory per
+bucket) and an exponentially weighted recent mean, which tracks the current
+provider latency more closely than the all-time quantiles.
+
+Lookups back off from the exact bucket to the same stage and model, then to
+the stage alone. The coarser buckets store per-clip seconds for stages whose
+cost grows with the clip count, so they scale to any number of clips.
+
+The store is persisted as one JSON file (STAGE_TIMING_PATH) and shared by all
+generations in the process.
+"""
+import json
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stages whose duration grows with the number of clips/scenes
+PER_CLIP_STAGES = frozenset({"images", "clips", "overlays"})
+
+# Samples a bucket needs before lookups use it instead of a coarser one
+MIN_SAMPLES = 3
+
+# Weight of the newest sample in the recent mean
+RECENT_WEIGHT = 0.3
+
+
+class P2Quantile:
+    """Streaming quantile estimate with the P² algorithm (Jain & Chlamtac, 1985)."""
+
+    def __init__(self, quantile: float):
+        self.quantile = quantile
+        self.heights: List[float] = []  # marker heights; raw samples until there are 5
+        self.positions: List[float] = [0, 1, 2, 3, 4]
+        self.desired: List[float] = [0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4]
+        self.increments: List[float] = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float) -> None:
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        positions = self.positions
+        for i in range(1, 4):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        heights = self.heights
+        if not heights:
+            return None
+        if self.positions[4] == 4:
+            # Exact quantile of the few samples seen so far
+            rank = self.quantile * (len(heights) - 1)
+            low, high = math.floor(rank), math.ceil(rank)
+            return heights[low] + (heights[high] - heights[low]) * (rank - low)
+        return heights[2]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"q": self.quantile, "heights": self.heights, "positions": self.positions, "desired": self.desired}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "P2Quantile":
+        sketch = cls(data["q"])
+        sketch.heights = list(data["heights"])
+        sketch.positions = list(data["positions"])
+        sketch.desired = list(data["desired"])
+        return sketch
+
+
+class StageSketch:
+    """Timing statistics of one bucket."""
+
+    def __init__(self):
+        self.count = 0
+        self.p50 = P2Quantile(0.5)
+        self.p90 = P2Quantile(0.9)
+        self.recent: Optional[float] = None
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.p50.add(seconds)
+        self.p90.add(seconds)
+        self.recent = seconds if self.recent is None else RECENT_WEIGHT * seconds + (1 - RECENT_WEIGHT) * self.recent
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "p50": self.p50.to_dict(), "p90": self.p90.to_dict(), "recent": self.recent}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StageSketch":
+        sketch = cls()
+        sketch.count = data["count"]
+        sketch.p50 = P2Quantile.from_dict(data["p50"])
+        sketch.p90 = P2Quantile.from_dict(data["p90"])
+        sketch.recent = data.get("recent")
+        return sketch
+
+
+@dataclass
+class StageEstimate:
+    """Expected duration of a stage, in seconds."""
+
+    p50: float
+    p90: float
+    recent: float  # recent mean, reflects the current provider latency
+    samples: int
+
+
+def _key(*parts: Any) -> str:
+    return "|".join("" if part is None else str(part) for part in parts)
+
+
+class StageTimingStore:
+    """Stage timing sketches, persisted to a JSON file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._sketches: Dict[str, StageSketch] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+            self._sketches = {key: StageSketch.from_dict(value) for key, value in data.items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable stage timings at {self.path}: {e}")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+            temp_path.write_text(json.dumps({key: sketch.to_dict() for key, sketch in self._sketches.items()}))
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.debug(f"Could not persist stage timings: {e}")
+
+    def record(
+        self,
+        timings: Dict[str, float],
+        model: Optional[str] = None,
+        resolution: Optional[str] = None,
+        duration: Optional[int] = None,
+        clips: Optional[int] = None,
+    ) -> None:
+        """
+        Record the durations of the stages of one run.
+
+        Args:
+            timings: Seconds per stage name
+            model: Video model used
+            resolution: Output resolution or aspect ratio
+            duration: Target video duration in seconds
+            clips: Number of clips/scenes generated
+        """
+        with self._lock:
+            for stage, seconds in timings.items():
+                if seconds is None or seconds < 0:
+                    continue
+                per_clip = seconds / clips if stage in PER_CLIP_STAGES and clips else seconds
+                buckets = (
+                    (_key(stage, model, resolution, duration, clips), seconds),
+                    (_key(stage, model), per_clip),
+                    (_key(stage), per_clip),
+                )
+                for key, value in buckets:
+                    self._sketches.setdefault(key, StageSketch()).add(value)
+            self._save()
+
+    def estimate(
+        self,
+        stage: str,
+        model: Optional[str] = None,
+        resolution: Optional[str] = None,
+        duration: Optional[int] = None,
+        clips: Optional[int] = None,
+    ) -> Optional[StageEstimate]:
+        """
+        Expected duration of a stage, from the most specific bucket with enough samples.
+
+        Returns:
+            StageEstimate, or None if the stage has not been recorded often enough
+        """
+        scale = clips if stage in PER_CLIP_STAGES and clips else 1
+        candidates = (
+            (_key(stage, model, resolution, duration, clips), 1),
+            (_key(stage, model), scale),
+            (_key(stage), scale),
+        )
+        with self._lock:
+            for key, factor in candidates:
+                sketch = self._sketches.get(key)
+                if sketch is not None and sketch.count >= MIN_SAMPLES:
+                    return StageEstimate(
+                        p50=sketch.p50.value() * factor,
+                        p90=sketch.p90.value() * factor,
+                        recent=sketch.recent * factor,
+                        samples=sketch.count,
+                    )
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sketches.clear()
+            self._save()
+
+
+_store: Optional[StageTimingStore] = None
+
+
+def get_stage_timing_store() -> StageTimingStore:
+    """Process-wide store, loaded from STAGE_TIMING_PATH on first use."""
+    global _store
+    if _store is None:
+        _store = StageTimingStore(settings.STAGE_TIMING_PATH)
+    return _store
@@ -12,16 +12,47 @@ from moviepy.video.fx.FadeIn import FadeIn
 from moviepy.video.fx.FadeOut import FadeOut
 import numpy as np
 
+from app.core.tracing import traced
+from app.services.media.probe import MediaProbe, MediaProbeError, probe_media_sync
+
 logger = logging.getLogger(__name__)
 
 
-def _validate_clip(clip: VideoFileClip, clip_name: str = "clip") -> bool:
+def _validate_probe(probe: MediaProbe, clip_name: str = "clip") -> bool:
+    """
+    Validate a clip file from its media probe (no frames are decoded).
+
+    The probe decodes every keyframe, so a video stream with keyframes,
+    dimensions and a duration is readable.
+
+    Args:
+        probe: Media probe of the clip file
+        clip_name: Name for logging purposes
+
+    Returns:
+        bool: True if clip is valid, False otherwise
+    """
+    if probe.width <= 0 or probe.height <= 0:
+        logger.warning(f"{clip_name} has invalid dimensions: {probe.width}x{probe.height}")
+        return False
+    if probe.duration <= 0:
+        logger.warning(f"{clip_name} has invalid duration: {probe.duration}")
+        return False
+    if not probe.keyframes:
+        logger.warning(f"{clip_name} has no decodable keyframes")
+        return False
+    return True
+
+
+def _validate_clip(clip: VideoFileClip, clip_name: str = "clip", check_frames: bool = True) -> bool:
     """
     Validate that a clip has valid dimensions and can be processed.
 
     Args:
         clip: Video clip to validate
         clip_name: Name for logging purposes
+        check_frames: Also render the first and last frames (for composited clips;
+            clips loaded from files are checked with _validate_probe instead)
 
     Returns:
         bool: True if clip is valid, False otherwise
@@ -49,6 +80,9 @@ def _validate_clip(clip: VideoFileClip, clip_name: str = "clip") -> bool:
             logger.warning(f"{clip_name} has invalid duration: {clip.duration if hasattr(clip, 'duration') else 'N/A'}")
             return False
 
+        if not check_frames:
+            return True
+
         # Try to read first and last frames to verify clip is readable
         try:
             first_frame = clip.get_frame(0)
@@ -344,6 +378,7 @@ def apply_transition(clip1: VideoFileClip, clip2: VideoFileClip, transition_type
         return _apply_crossfade_transition(clip1, clip2, duration)
 
 
+@traced("encode")
 def stitch_video_clips(
     clip_paths: List[str],
     output_path: str,
@@ -415,11 +450,21 @@ def stitch_video_clips(
             if not clip_path_obj.exists():
                 raise RuntimeError(f"Clip file not found: {clip_path}")
             
+            # Validate clip integrity from its probe (memoized since generation-time validation)
+            try:
+                probe = probe_media_sync(str(clip_path))
+            except MediaProbeError as e:
+                logger.warning(f"clip_{i} cannot be probed: {e}")
+                probe = None
+            if probe is None or not _validate_probe(probe, f"clip_{i}"):
+                logger.error(f"Clip {i} ({clip_path}) is corrupted or invalid")
+                raise RuntimeError(f"Clip {i} is corrupted or has invalid frames. Please regenerate this video clip.")
+
             logger.debug(f"Loading clip {i}/{len(clip_paths)}: {clip_path}")
             clip = VideoFileClip(str(clip_path))
 
-            # Validate clip integrity
-            if not _validate_clip(clip, f"clip_{i}"):
+            if not _validate_clip(clip, f"clip_{i}", check_frames=False):
+                clip.close()
                 logger.error(f"Clip {i} ({clip_path}) is corrupted or invalid")
                 raise RuntimeError(f"Clip {i} is corrupted or has invalid frames. Please regenerate this video clip.")
 
@@ -378,15 +378,18 @@ def get_template_ids() -> List[str]:
 
 def get_templates_summary() -> List[Dict[str, Any]]:
     """Get summary of all templates for selection."""
-    return [
-        {
-            "template_id": template["template_id"],
-            "name": template["name"],
-            "description": template["description"],
-            "best_for": template["best_for"],
-            "keywords": template["keywords"],
-            "emotional_tone": template["emotional_tone"]
-        }
-        for template in STORY_TEMPLATES.values()
-    ]
+    return list(_TEMPLATES_SUMMARY)
 
+
+# Built once; the template definitions are static
+_TEMPLATES_SUMMARY: List[Dict[str, Any]] = [
+    {
+        "template_id": template["template_id"],
+        "name": template["name"],
+        "description": template["description"],
+        "best_for": template["best_for"],
+        "keywords": template["keywords"],
+        "emotional_tone": template["emotional_tone"]
+    }
+    for template in STORY_TEMPLATES.values()
+]
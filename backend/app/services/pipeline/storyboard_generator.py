@@ -6,13 +6,14 @@ import base64
 import json
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 import openai
 from pydantic import ValidationError
 
 from app.core.config import settings
 from app.schemas.generation import AdSpecification, AdSpec, BrandGuidelines, Scene, TextOverlay
+from app.services.pipeline.scene_stream import StreamedScenesParser
 
 logger = logging.getLogger(__name__)
 
@@ -309,6 +310,7 @@ async def generate_storyboard(
     user_prompt: str,
     reference_image_paths: Optional[List[str]] = None,
     max_retries: int = 3,
+    on_scene: Optional[Callable[[int, Scene], None]] = None,
 ) -> AdSpecification:
     """
     Generate storyboard using OpenAI Vision API.
@@ -317,6 +319,11 @@ async def generate_storyboard(
         user_prompt: User's text prompt
         reference_image_paths: List of reference image paths (can be reused across scenes)
         max_retries: Maximum retry attempts
+        on_scene: If set, the response is streamed and on_scene is called with
+            each scene's 1-based position and the scene as soon as it has been
+            parsed, before the rest of the storyboard arrives.
+            Once a scene has been handed out the request is no longer retried,
+            and a scene count other than 4 is only logged.
     
     Returns:
         AdSpecification with storyboard scenes including reference images
@@ -336,13 +343,14 @@ async def generate_storyboard(
     messages = _prepare_image_messages(user_prompt, reference_image_paths)
     
     last_error = None
+    streamed_scenes: List[Scene] = []
     
     try:
         for attempt in range(1, max_retries + 1):
             try:
                 logger.info(f"[Storyboard Generator] Attempt {attempt}/{max_retries} using {model}")
                 
-                response = await async_client.chat.completions.create(
+                request = dict(
                     model=model,
                     messages=[
                         {"role": "system", "content": STORYBOARD_SYSTEM_PROMPT},
@@ -353,20 +361,26 @@ async def generate_storyboard(
                     max_tokens=4000,  # More tokens for detailed storyboard
                 )
                 
-                content = response.choices[0].message.content
+                if on_scene is None:
+                    response = await async_client.chat.completions.create(**request)
+                    content = response.choices[0].message.content
+                else:
+                    content = await _stream_scenes(async_client, request, on_scene, streamed_scenes)
                 
                 # Parse JSON
                 try:
                     storyboard = json.loads(content)
                 except json.JSONDecodeError:
-                    if attempt < max_retries:
+                    if attempt < max_retries and not streamed_scenes:
                         logger.warning(f"Invalid JSON response, retrying...")
                         continue
                     raise
                 
                 # Validate scene count
                 scenes = storyboard.get("scenes", [])
-                if len(scenes) != 4:
+                if len(scenes) != 4 and streamed_scenes:
+                    logger.warning(f"Expected 4 scenes, got {len(scenes)}; keeping the scenes already streamed")
+                elif len(scenes) != 4:
                     if attempt < max_retries:
                         logger.warning(f"Expected 4 scenes, got {len(scenes)}, retrying...")
                         continue
@@ -378,6 +392,9 @@ async def generate_storyboard(
             except Exception as e:
                 last_error = e
                 logger.warning(f"[Storyboard Generator Error] {e}")
+                if streamed_scenes:
+                    # Work has already started on the streamed scenes; a retry would produce different ones
+                    raise
                 if attempt < max_retries:
                     import asyncio
                     await asyncio.sleep(min(2 ** attempt, 20))
@@ -389,6 +406,72 @@ async def generate_storyboard(
         await async_client.close()
 
 
+async def _stream_scenes(
+    async_client: openai.AsyncOpenAI,
+    request: dict,
+    on_scene: Callable[[int, Scene], None],
+    streamed_scenes: List[Scene],
+) -> str:
+    """Stream the completion, handing each scene to on_scene as it completes; returns the full text."""
+    parser = StreamedScenesParser()
+    stream = await async_client.chat.completions.create(**request, stream=True)
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        for scene_data in parser.feed(delta):
+            scene = _convert_scene(scene_data, len(streamed_scenes) + 1)
+            streamed_scenes.append(scene)
+            logger.info(f"[Storyboard Generator] Scene {scene.scene_number} streamed")
+            on_scene(len(streamed_scenes), scene)
+    return parser.text
+
+
+def _convert_scene(scene_data: dict, idx: int) -> Scene:
+    """Convert one storyboard scene (1-based position idx) to a Scene."""
+    desc = scene_data.get("scene_description") or {}
+    sound_design = scene_data.get("sound_design") or ""
+    reference_image_path = scene_data.get("reference_image_path")
+    
+    # Build base visual prompt from scene description
+    visual_parts = [
+        desc.get("visual", ""),
+        desc.get("action", ""),
+        desc.get("camera", ""),
+        desc.get("lighting", ""),
+        desc.get("mood", ""),
+        desc.get("product_usage", ""),
+    ]
+    visual_prompt = ", ".join([p for p in visual_parts if p])
+    
+    # Overlay text
+    overlay_text_value = (scene_data.get("overlay_text") or "").strip()
+    text_overlay = TextOverlay(
+        text=overlay_text_value,
+        position="center",
+        font_size=48,
+        color="#FFFFFF",
+        animation="fade_in",
+    )
+    
+    # Extract transition
+    transition_to_next = scene_data.get("transition_to_next", "crossfade")
+    
+    return Scene(
+        scene_number=scene_data.get("scene_number") or idx,
+        scene_type=scene_data.get("aida_stage") or "Scene",
+        visual_prompt=visual_prompt,
+        model_prompts={},  # Will be populated by model-specific generator
+        reference_image_path=reference_image_path,
+        text_overlay=text_overlay,
+        duration=int(scene_data.get("duration_seconds") or 4),
+        sound_design=sound_design,
+        transition_to_next=transition_to_next,
+    )
+
+
 def _convert_storyboard_to_ad_spec(
     storyboard: dict,
     user_prompt: str,
@@ -398,50 +481,9 @@ def _convert_storyboard_to_ad_spec(
     style_tone = storyboard.get("style_tone") or "cinematic, modern"
     ad_framework = storyboard.get("ad_framework") or "AIDA"
     
-    scenes: List[Scene] = []
-    
-    for idx, scene_data in enumerate(scenes_data, start=1):
-        desc = scene_data.get("scene_description") or {}
-        sound_design = scene_data.get("sound_design") or ""
-        reference_image_path = scene_data.get("reference_image_path")
-        
-        # Build base visual prompt from scene description
-        visual_parts = [
-            desc.get("visual", ""),
-            desc.get("action", ""),
-            desc.get("camera", ""),
-            desc.get("lighting", ""),
-            desc.get("mood", ""),
-            desc.get("product_usage", ""),
-        ]
-        visual_prompt = ", ".join([p for p in visual_parts if p])
-        
-        # Overlay text
-        overlay_text_value = (scene_data.get("overlay_text") or "").strip()
-        text_overlay = TextOverlay(
-            text=overlay_text_value,
-            position="center",
-            font_size=48,
-            color="#FFFFFF",
-            animation="fade_in",
-        )
-        
-        # Extract transition
-        transition_to_next = scene_data.get("transition_to_next", "crossfade")
-        
-        scenes.append(
-            Scene(
-                scene_number=scene_data.get("scene_number") or idx,
-                scene_type=scene_data.get("aida_stage") or "Scene",
-                visual_prompt=visual_prompt,
-                model_prompts={},  # Will be populated by model-specific generator
-                reference_image_path=reference_image_path,
-                text_overlay=text_overlay,
-                duration=int(scene_data.get("duration_seconds") or 4),
-                sound_design=sound_design,
-                transition_to_next=transition_to_next,
-            )
-        )
+    scenes: List[Scene] = [
+        _convert_scene(scene_data, idx) for idx, scene_data in enumerate(scenes_data, start=1)
+    ]
     
     call_to_action = scenes[-1].text_overlay.text if scenes else ""
     
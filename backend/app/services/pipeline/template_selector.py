@@ -5,6 +5,7 @@ Analyzes user prompt to intelligently select the best story template.
 
 import json
 import logging
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
 import openai
@@ -15,8 +16,9 @@ from app.services.pipeline.story_templates import get_templates_summary, get_tem
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def get_template_selector_prompt() -> str:
-    """Generate system prompt for template selection."""
+    """Generate system prompt for template selection (built once; templates are static)."""
     templates_summary = get_templates_summary()
     
     templates_desc = "\n".join([
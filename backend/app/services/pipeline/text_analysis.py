@@ -0,0 +1,253 @@
+"""
+Compiled prompt text analysis.
+
+Prompt and scene text is inspected by several consumers: the rule-based
+quick scorers of the prompt enhancement loops, the scene metadata
+extractor, brand name and target duration extraction, and the appearance
+sanitizer. All their lexicons are compiled once, at import, into a single
+trie-shaped alternation regex, and analyze_prompt() extracts every feature
+(term and group hits, camera movement, durations, brand candidates, word
+count) in one scan of the text. Results are cached, since the same prompts
+are re-analyzed on every scene, variation and enhancement iteration.
+
+Term hits keep the substring semantics of the checks they replace
+("light" is found in "lighting").
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+# Number of distinct prompts whose analysis is kept in memory
+ANALYSIS_CACHE_SIZE = 512
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Build a regex alternation matching any of terms, factored as a prefix trie.
+
+    At any position the longest matching term wins (optional suffixes are
+    greedy), as with a longest-first alternation, but the regex engine only
+    explores the branch for the next character instead of every term.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of term
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def compile_alternation(terms: Iterable[str], whole_words: bool = False, flags: int = re.IGNORECASE) -> re.Pattern:
+    """
+    Compile terms into one regex matching the longest term at each position.
+
+    Args:
+        terms: Literal terms (duplicates are ignored)
+        whole_words: Only match terms delimited by word boundaries
+        flags: Regex flags (case-insensitive by default)
+
+    Returns:
+        Compiled pattern
+    """
+    pattern = _trie_pattern(set(terms))
+    if whole_words:
+        pattern = rf"\b(?:{pattern})\b"
+    return re.compile(pattern, flags)
+
+
+class Lexicon:
+    """Named groups of terms, found in a text with a single regex scan."""
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups: Dict[str, FrozenSet[str]] = {
+            name: frozenset(term.lower() for term in terms) for name, terms in groups.items()
+        }
+        terms = set().union(*self.groups.values())
+        # Zero-width lookahead so matches can overlap ("pan" inside "company", "push-in" after "push")
+        self._pattern = re.compile(f"(?=({_trie_pattern(terms)}))")
+        # The terms present at a position are the longest one there and those of its prefixes that are terms
+        self._prefixes = {term: frozenset(p for p in terms if term.startswith(p)) for term in terms}
+        self._term_groups = {
+            term: frozenset(name for name, members in self.groups.items() if term in members) for term in terms
+        }
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Terms occurring anywhere in text (case-insensitive substring match)."""
+        longest = {match.group(1) for match in self._pattern.finditer(text.lower())}
+        found = set()
+        for term in longest:
+            found |= self._prefixes[term]
+        return frozenset(found)
+
+    def groups_of(self, terms: Iterable[str]) -> FrozenSet[str]:
+        """Names of the groups with at least one of terms."""
+        hit = set()
+        for term in terms:
+            hit |= self._term_groups[term]
+        return frozenset(hit)
+
+
+# Camera movements, in the order they are preferred when several are described
+CAMERA_MOVEMENTS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("push-in", ("push-in", "push in", "dolly in")),
+    ("pull-out", ("pull-out", "pull out", "dolly out")),
+    ("pan-left", ("pan left", "panning left")),
+    ("pan-right", ("pan right", "panning right")),
+    ("tilt-up", ("tilt up",)),
+    ("tilt-down", ("tilt down",)),
+)
+
+# Well-known brands, matched before falling back to capitalized words
+KNOWN_BRANDS = (
+    "nike", "adidas", "puma", "reebok", "converse", "vans",
+    "apple", "samsung", "google", "microsoft", "amazon",
+    "coca-cola", "pepsi", "starbucks", "mcdonald's",
+    "tesla", "ford", "toyota", "bmw", "mercedes",
+    "gucci", "prada", "versace", "louis vuitton",
+    "sony", "lg", "dell", "hp", "lenovo",
+)
+
+# Capitalized words that are not brand names
+NON_BRAND_WORDS = frozenset({
+    # Articles and pronouns
+    "The", "This", "That", "These", "Those", "A", "An", "And", "Or", "But", "For", "With", "From", "About",
+    # Adjectives
+    "Slow", "Fast", "Quick", "Easy", "Hard", "New", "Old", "Big", "Small", "High", "Low", "Hot", "Cold",
+    "Good", "Bad", "Best", "Worst", "First", "Last", "Next", "Previous", "Same", "Different", "Similar",
+    "More", "Less", "Most", "Least", "Many", "Few", "Some", "Any", "All", "Each", "Every", "Other",
+    # Action verbs
+    "Create", "Make", "Show", "Display", "Present", "Feature", "Highlight", "Showcase", "Demonstrate",
+    "Start", "Begin", "End", "Stop", "Finish", "Complete", "Continue", "Pause", "Play", "Run", "Walk",
+    # Video/media terms
+    "Video", "Image", "Picture", "Photo", "Scene", "Shot", "Frame", "Clip", "Movie", "Film",
+    # Product terms
+    "Product", "Item", "Object", "Thing", "Piece", "Part", "Element", "Component",
+    # Marketing terms
+    "Ad", "Advertisement", "Commercial", "Promo", "Promotion", "Marketing", "Campaign",
+    # Style descriptors
+    "Cinematic", "Professional", "Modern", "Classic", "Vintage", "Retro", "Contemporary",
+    # Quality descriptors
+    "Beautiful", "Stunning", "Amazing", "Incredible", "Wonderful", "Fantastic", "Perfect",
+    # Common verbs
+    "Get", "Take", "Give", "Put", "Set", "Let", "Try", "Use", "See", "Look", "Watch", "Find",
+    # Time/sequence words
+    "Now", "Then", "When", "While", "During", "After", "Before",
+    # Common nouns
+    "Day", "Night", "Time", "Place", "Way", "Thing", "Person", "People", "Man", "Woman", "Child",
+})
+
+# Term groups used by the quick scorers and extractors
+PROMPT_LEXICON = Lexicon({
+    # Image/video quick scorers
+    "subject": ["product", "service", "item", "person", "object", "subject", "character", "model", "portrait", "thing"],
+    "visual": ["image", "photo", "picture", "visual", "scene", "shot", "camera", "cinematic", "view"],
+    "video": ["video"],
+    "style": ["style", "mood", "tone", "aesthetic", "look", "feel", "atmosphere", "grading", "color"],
+    "awkward": ["framed by a", "using a", "all in a", "to evoke"],
+    "professional": ["cinematic", "professional", "elegant", "sophisticated", "polished", "refined"],
+    "camera": ["camera", "lens", "canon", "sony", "eos", "f/", "mm"],
+    "shot_type": ["angle", "shot", "framing", "aerial", "close-up", "closeup", "telephoto", "macro", "portrait", "wide"],
+    "lighting": ["lighting", "light", "glow", "illumination", "diffused", "dramatic", "soft", "harsh", "golden", "neon"],
+    "motion": ["motion", "movement", "move", "transition", "dolly", "pan", "tilt", "tracking", "push", "pull"],
+    "temporal": ["smooth", "continuous", "seamless", "temporal", "coherence", "progression", "flow"],
+    "frame_rate": ["fps", "frame rate", "24fps", "30fps", "60fps"],
+    "brand_terms": ["brand", "logo", "identity", "guidelines"],
+    "style_coherence": ["color", "palette", "aesthetic", "style", "mood", "tone"],
+    # Ad prompt quick scorer
+    "ad_product": ["product", "service", "item", "brand", "ad", "advertisement"],
+    "ad_visual": ["video", "visual", "scene", "shot", "camera", "cinematic"],
+    "ad_style": ["style", "mood", "tone", "aesthetic", "look", "feel"],
+    "ad_camera": ["camera", "lens", "angle", "shot", "framing"],
+    "ad_brand": ["brand", "logo", "color", "identity"],
+    # Scene metadata
+    "subject_absent": ["subject does not appear", "no subject"],
+    "known_brand": KNOWN_BRANDS,
+    **{f"camera_movement:{name}": phrases for name, phrases in CAMERA_MOVEMENTS},
+})
+
+# "Scene 1: Attention (6 seconds)"
+SCENE_DURATION_PATTERN = re.compile(r'\((\d+)\s*seconds?\)')
+
+# "make a 30 second video", "15-second ad", "create a 20s advertisement", in order of preference
+DURATION_PATTERNS = (
+    re.compile(r'(\d+)\s*[-\s]?seconds?(?:\s+(?:video|ad|advertisement|commercial))?'),
+    re.compile(r'(\d+)s(?:\s+(?:video|ad|advertisement|commercial))?'),
+    re.compile(r'(?:video|ad|advertisement|commercial)\s+(?:of|with)?\s*(\d+)\s*seconds?'),
+)
+
+CAPITALIZED_WORD_PATTERN = re.compile(r'\b[A-Z][a-z]+\b')
+
+
+@dataclass(frozen=True)
+class PromptFeatures:
+    """Everything the rule-based consumers need to know about a prompt."""
+
+    word_count: int
+    terms: FrozenSet[str]  # lexicon terms found in the text
+    groups: FrozenSet[str]  # lexicon groups with at least one term found
+    camera_movement: Optional[str]  # preferred described movement, e.g. "push-in"
+    scene_duration: Optional[int]  # seconds, from a "(N seconds)" scene header
+    duration_mentions: Tuple[int, ...]  # seconds, first match of each DURATION_PATTERNS entry
+    known_brand: Optional[str]  # first KNOWN_BRANDS entry found (lowercase)
+    brand_candidates: Tuple[str, ...]  # capitalized words that may be brand names, longest first
+
+    def has(self, *groups: str) -> bool:
+        """Whether any of the named lexicon groups was found."""
+        return any(group in self.groups for group in groups)
+
+
+def _brand_candidates(text: str) -> Tuple[str, ...]:
+    candidates = [
+        word for word in CAPITALIZED_WORD_PATTERN.findall(text)
+        if word not in NON_BRAND_WORDS
+        and 3 <= len(word) <= 20
+        # Gerunds ("Running") and past tense ("Started") are rarely brands
+        and not word.lower().endswith(("ing", "ed"))
+    ]
+    # Longer words are more likely to be brand names
+    return tuple(sorted(candidates, key=len, reverse=True))
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def analyze_prompt(text: str) -> PromptFeatures:
+    """
+    Extract all rule-based features of a prompt in one pass.
+
+    Args:
+        text: Prompt or scene text
+
+    Returns:
+        PromptFeatures (cached per distinct text)
+    """
+    lowered = text.lower()
+    terms = PROMPT_LEXICON.scan(text)
+    groups = PROMPT_LEXICON.groups_of(terms)
+
+    camera_movement = next(
+        (name for name, _ in CAMERA_MOVEMENTS if f"camera_movement:{name}" in groups), None
+    )
+    scene_match = SCENE_DURATION_PATTERN.search(lowered)
+    duration_mentions = tuple(
+        int(match.group(1)) for match in (p.search(lowered) for p in DURATION_PATTERNS) if match
+    )
+
+    return PromptFeatures(
+        word_count=len(text.split()),
+        terms=terms,
+        groups=groups,
+        camera_movement=camera_movement,
+        scene_duration=int(scene_match.group(1)) if scene_match else None,
+        duration_mentions=duration_mentions,
+        known_brand=next((brand for brand in KNOWN_BRANDS if brand in terms), None),
+        brand_candidates=_brand_candidates(text),
+    )
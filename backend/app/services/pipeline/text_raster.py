@@ -0,0 +1,174 @@
+"""
+Text overlay rasterizer.
+
+Captions and brand overlays are rendered with Pillow once per distinct
+(text, font, size, color, width, shadow, box) combination into a
+premultiplied RGBA float buffer and kept in an LRU cache. Overlays repeat
+across variations and re-exports, so most renders are cache hits. Cached
+rasters are composited onto video frames with vectorized alpha blending,
+restricted to the region the text covers.
+"""
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+SHADOW_OFFSET = 2  # px, shadow drawn down-right of the text
+LINE_SPACING = 0.2  # extra space between lines, as a fraction of font size
+EDGE_PADDING = 4  # px around the text block so antialiased edges are not clipped
+
+# Number of distinct rasters kept in memory
+RASTER_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class TextRaster:
+    """Rendered text as a premultiplied RGBA float32 buffer (read-only)."""
+
+    rgba: np.ndarray  # (height, width, 4); RGB premultiplied by alpha, alpha in [0, 1]
+
+    @property
+    def width(self) -> int:
+        return self.rgba.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.rgba.shape[0]
+
+    @property
+    def color(self) -> np.ndarray:
+        return self.rgba[..., :3]
+
+    @property
+    def alpha(self) -> np.ndarray:
+        return self.rgba[..., 3:]
+
+
+@lru_cache(maxsize=32)
+def _load_font(font_path: Optional[str], font_size: int) -> ImageFont.FreeTypeFont:
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except OSError as e:
+            logger.warning(f"Could not load font {font_path}: {e}. Using default font.")
+    return ImageFont.load_default(size=font_size)
+
+
+def _wrap_lines(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+    """Greedy word wrap so each line fits max_width (explicit newlines are kept)."""
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and font.getlength(candidate) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _parse_color(color: str) -> Tuple[int, int, int]:
+    try:
+        return ImageColor.getrgb(color)[:3]
+    except ValueError:
+        logger.warning(f"Unknown text color '{color}', using white")
+        return (255, 255, 255)
+
+
+@lru_cache(maxsize=RASTER_CACHE_SIZE)
+def render_text(
+    text: str,
+    font_path: Optional[str],
+    font_size: int,
+    color: str,
+    max_width: int,
+    shadow: bool = True,
+    shadow_color: str = "black",
+    box_opacity: float = 0.0,
+    box_padding: Tuple[float, float] = (0.0, 0.0),
+) -> TextRaster:
+    """
+    Render centered, word-wrapped text (cached).
+
+    The raster is sized to the text block plus padding.
+
+    Args:
+        text: Text to render
+        font_path: TrueType font path (None = Pillow default font)
+        font_size: Font size in pixels
+        color: Text color (hex code or color name)
+        max_width: Lines wrap to fit this width
+        shadow: Draw a drop shadow behind the text
+        shadow_color: Drop shadow color (hex code or color name)
+        box_opacity: Opacity of a black background box (0 = no box)
+        box_padding: Box padding as fractions of the text block (x, y)
+
+    Returns:
+        TextRaster (shared between callers; do not modify)
+    """
+    font = _load_font(font_path, font_size)
+    lines = _wrap_lines(text, font, max_width - 2 * EDGE_PADDING - SHADOW_OFFSET)
+
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    line_step = line_height + int(font_size * LINE_SPACING)
+    block_width = max((int(font.getlength(line)) for line in lines), default=0) + SHADOW_OFFSET
+    block_height = line_step * (len(lines) - 1) + line_height + SHADOW_OFFSET
+
+    if box_opacity > 0:
+        pad_x = int(block_width * box_padding[0])
+        pad_y = int(block_height * box_padding[1])
+        background = (0, 0, 0, round(box_opacity * 255))
+    else:
+        pad_x = pad_y = EDGE_PADDING
+        background = (0, 0, 0, 0)
+    width = block_width + 2 * pad_x
+    height = block_height + 2 * pad_y
+    image = Image.new("RGBA", (width, height), background)
+
+    layers = [(_parse_color(shadow_color), SHADOW_OFFSET)] if shadow else []
+    layers.append((_parse_color(color), 0))
+    for fill, offset in layers:
+        layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        for index, line in enumerate(lines):
+            x = (width - SHADOW_OFFSET - font.getlength(line)) / 2 + offset
+            draw.text((x, pad_y + index * line_step + offset), line, font=font, fill=(*fill, 255))
+        image = Image.alpha_composite(image, layer)
+
+    rgba = np.asarray(image, dtype=np.float32)
+    alpha = rgba[..., 3:] / 255.0
+    premultiplied = np.concatenate([rgba[..., :3] * alpha, alpha], axis=2)
+    premultiplied.setflags(write=False)
+    return TextRaster(rgba=premultiplied)
+
+
+def blend(frame: np.ndarray, raster: TextRaster, x: int, y: int, opacity: float = 1.0) -> np.ndarray:
+    """
+    Alpha-blend a raster onto an RGB frame with its top-left corner at (x, y).
+
+    Only the covered region is computed; parts outside the frame are clipped.
+
+    Returns:
+        New uint8 frame (the input frame is not modified)
+    """
+    frame_height, frame_width = frame.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + raster.width, frame_width), min(y + raster.height, frame_height)
+    if opacity <= 0 or x0 >= x1 or y0 >= y1:
+        return frame
+
+    region = raster.rgba[y0 - y:y1 - y, x0 - x:x1 - x]
+    out = np.array(frame, dtype=np.uint8, copy=True)
+    base = out[y0:y1, x0:x1, :3].astype(np.float32)
+    blended = region[..., :3] * opacity + base * (1.0 - region[..., 3:] * opacity)
+    out[y0:y1, x0:x1, :3] = np.clip(blended + 0.5, 0, 255).astype(np.uint8)
+    return out
@@ -6,11 +6,21 @@ Calculates estimated generation time based on:
 - Duration per clip
 - Model selection
 - Coherence settings (LLM, quality control, etc.)
+
+Stage durations come from recorded timings (see stage_timing) once a stage
+has been seen often enough for the model/resolution/duration/clip count,
+and from the base constants below until then. Live ETAs for running
+generations subtract the stages already completed and add the wait for the
+generations ahead in the queue.
 """
 
+import heapq
 import logging
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
 from app.schemas.generation import GenerateRequest
+from app.services.pipeline.stage_timing import StageTimingStore, get_stage_timing_store
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +46,72 @@ MODEL_TIME_MULTIPLIERS = {
 # Average clip duration (seconds) - used when not specified
 DEFAULT_CLIP_DURATION = 5
 
+# Scenes assumed before the storyboard has planned them
+DEFAULT_NUM_CLIPS = 4
+
+# Pipeline stages in run order; stages in the same group run concurrently
+GENERATION_STAGE_GROUPS = (
+    ("storyboard",),
+    ("images", "video_style"),
+    ("scene_plan",),
+    ("clips",),
+    ("overlays",),
+    ("stitch",),
+    ("audio",),
+    ("brand_overlay",),
+    ("export",),
+)
+
+# Unrecorded stages: base seconds and whether they are paid once per clip
+STAGE_DEFAULT_TIMES = {
+    "storyboard": (BASE_LLM_TIME, False),
+    "images": (BASE_LLM_TIME, True),
+    "video_style": (BASE_LLM_TIME, False),
+    "scene_plan": (BASE_SCENE_PLANNING_TIME, False),
+    "clips": (BASE_CLIP_GENERATION_TIME, True),
+    "overlays": (1, True),
+    "stitch": (BASE_STITCHING_TIME, False),
+    "audio": (BASE_AUDIO_TIME, False),
+    "brand_overlay": (1, False),
+    "export": (BASE_EXPORT_TIME, False),
+}
+
+# A running stage that overruns its estimate is assumed to need at least this share of it again
+RUNNING_STAGE_MIN_REMAINING = 0.1
+
+
+def estimate_stage_time(
+    stage: str,
+    model: Optional[str] = None,
+    resolution: Optional[str] = None,
+    duration: Optional[int] = None,
+    clips: Optional[int] = None,
+    store: Optional[StageTimingStore] = None,
+) -> Dict[str, Any]:
+    """
+    Estimate one stage from recorded timings, or from the base constants.
+
+    The recent mean is used as the expected time when it is above the median,
+    so a provider that is currently slow lengthens the estimate right away.
+
+    Returns:
+        Dict with "seconds" (expected), "p90_seconds" and "source" ("measured" or "default")
+    """
+    estimate = (store or get_stage_timing_store()).estimate(stage, model, resolution, duration, clips)
+    if estimate is not None:
+        slowdown = max(1.0, estimate.recent / estimate.p50) if estimate.p50 > 0 else 1.0
+        return {
+            "seconds": estimate.p50 * slowdown,
+            "p90_seconds": max(estimate.p90, estimate.p50) * slowdown,
+            "source": "measured",
+        }
+
+    base, per_clip = STAGE_DEFAULT_TIMES.get(stage, (0, False))
+    if stage == "clips":
+        base *= MODEL_TIME_MULTIPLIERS.get(model, 1.0)
+    seconds = base * (clips or DEFAULT_NUM_CLIPS) if per_clip else base
+    return {"seconds": seconds, "p90_seconds": seconds, "source": "default"}
+
 
 def estimate_generation_time(
     variations: List[GenerateRequest],
@@ -99,9 +175,8 @@ def _estimate_single_generation_time(variation: GenerateRequest) -> float:
     elif hasattr(variation, 'num_clips') and variation.num_clips == 1 and not use_llm:
         use_single_clip = True
     
-    if use_llm and not use_single_clip:
-        time += BASE_LLM_TIME
-        time += BASE_SCENE_PLANNING_TIME
+    resolution = getattr(variation, "aspect_ratio", None)
+    duration = getattr(variation, "target_duration", None)
     
     # Determine number of clips
     if use_single_clip:
@@ -110,7 +185,14 @@ def _estimate_single_generation_time(variation: GenerateRequest) -> float:
         num_clips = variation.num_clips
     else:
         # Default: estimate based on typical scene plan (3-5 scenes)
-        num_clips = 4
+        num_clips = DEFAULT_NUM_CLIPS
+    
+    def stage_time(stage: str) -> float:
+        return estimate_stage_time(stage, variation.model, resolution, duration, num_clips)["seconds"]
+    
+    if use_llm and not use_single_clip:
+        time += stage_time("storyboard")
+        time += stage_time("scene_plan")
     
     # Model selection affects generation time
     model_multiplier = 1.0
@@ -120,9 +202,8 @@ def _estimate_single_generation_time(variation: GenerateRequest) -> float:
             1.0  # Default multiplier
         )
     
-    # Clip generation time (per clip, model-dependent)
-    clip_time = BASE_CLIP_GENERATION_TIME * model_multiplier
-    time += clip_time * num_clips
+    # Clip generation time (recorded for this model, else per clip model-dependent)
+    time += stage_time("clips")
     
     # Quality control time (per clip, if enabled)
     coherence_settings = variation.coherence_settings
@@ -142,13 +223,154 @@ def _estimate_single_generation_time(variation: GenerateRequest) -> float:
     
     # Post-processing steps (only if not single clip)
     if not use_single_clip:
-        time += BASE_STITCHING_TIME
-        time += BASE_AUDIO_TIME
-        time += BASE_EXPORT_TIME
+        time += stage_time("stitch")
+        time += stage_time("audio")
+        time += stage_time("export")
     
     return time
 
 
+def record_generation_timings(
+    timings: Dict[str, float],
+    model: Optional[str] = None,
+    resolution: Optional[str] = None,
+    duration: Optional[int] = None,
+    clips: Optional[int] = None,
+    store: Optional[StageTimingStore] = None,
+) -> None:
+    """Record the stage durations of a finished generation so later estimates use them."""
+    try:
+        (store or get_stage_timing_store()).record(timings, model, resolution, duration, clips)
+    except Exception as e:
+        logger.warning(f"Failed to record stage timings: {e}")
+
+
+def estimate_remaining_time(
+    generation: Any,
+    now: Optional[datetime] = None,
+    store: Optional[StageTimingStore] = None,
+) -> Dict[str, Any]:
+    """
+    Estimate the time left for a pending or processing generation.
+
+    Completed stages are read from the generation's pipeline checkpoint. The
+    running stage is credited with the time since the previous stage finished.
+
+    Args:
+        generation: Generation row (model, aspect_ratio, duration, num_scenes,
+            num_clips and pipeline_checkpoint are used)
+        now: Current UTC time (defaults to utcnow)
+        store: Timing store (defaults to the process-wide store)
+
+    Returns:
+        Dict with "seconds", "p90_seconds", "stages_remaining" and "source"
+    """
+    now = now or datetime.utcnow()
+    checkpoint = generation.pipeline_checkpoint if isinstance(generation.pipeline_checkpoint, dict) else {}
+    completed = set(checkpoint.get("timings") or {})
+    stage_records = checkpoint.get("stages") or {}
+
+    # The running stage started when the last stage finished (or when the run started)
+    stage_started = None
+    for value in [checkpoint.get("started_at")] + [record.get("completed_at") for record in stage_records.values()]:
+        try:
+            moment = datetime.fromisoformat(value) if value else None
+        except (TypeError, ValueError):
+            moment = None
+        if moment and (stage_started is None or moment > stage_started):
+            stage_started = moment
+    running_elapsed = (now - stage_started).total_seconds() if stage_started and not checkpoint.get("completed_at") else 0.0
+
+    clips = generation.num_scenes or generation.num_clips or None
+    seconds = p90_seconds = 0.0
+    remaining: List[str] = []
+    sources = set()
+    running_credited = False
+    for group in GENERATION_STAGE_GROUPS:
+        pending = [stage for stage in group if stage not in completed]
+        if not pending:
+            continue
+        group_seconds = group_p90 = 0.0
+        for stage in pending:
+            estimate = estimate_stage_time(
+                stage, generation.model, generation.aspect_ratio, generation.duration, clips, store=store
+            )
+            sources.add(estimate["source"])
+            stage_seconds, stage_p90 = estimate["seconds"], estimate["p90_seconds"]
+            if not running_credited and running_elapsed > 0:
+                stage_seconds = max(stage_seconds - running_elapsed, stage_seconds * RUNNING_STAGE_MIN_REMAINING)
+                stage_p90 = max(stage_p90 - running_elapsed, stage_p90 * RUNNING_STAGE_MIN_REMAINING)
+            group_seconds = max(group_seconds, stage_seconds)
+            group_p90 = max(group_p90, stage_p90)
+        # Only the first unfinished group can be running
+        running_credited = True
+        seconds += group_seconds
+        p90_seconds += group_p90
+        remaining.extend(pending)
+
+    return {
+        "seconds": seconds,
+        "p90_seconds": p90_seconds,
+        "stages_remaining": remaining,
+        "source": "measured" if sources == {"measured"} else "default" if sources == {"default"} else "mixed",
+    }
+
+
+def estimate_queue_etas(
+    active_generations: List[Any],
+    slots: Optional[int] = None,
+    now: Optional[datetime] = None,
+    store: Optional[StageTimingStore] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Live ETAs for all active generations, including the wait in the queue.
+
+    Processing generations hold a slot until their estimated finish. Pending
+    generations take the earliest free slot in creation order, so their ETA
+    is the wait for that slot plus their own estimated run time.
+
+    Args:
+        active_generations: Pending and processing Generation rows (all users)
+        slots: Generations run at once (defaults to GENERATION_ETA_SLOTS)
+        now: Current UTC time
+        store: Timing store
+
+    Returns:
+        Dict of generation id -> {"eta_seconds", "eta_p90_seconds", "eta_formatted",
+        "queue_position", "stages_remaining", "source"}
+    """
+    slots = max(1, slots or settings.GENERATION_ETA_SLOTS)
+    ordered = sorted(
+        active_generations,
+        key=lambda gen: (gen.status != "processing", gen.created_at or datetime.min),
+    )
+    free_at: List[float] = []
+    etas: Dict[str, Dict[str, Any]] = {}
+    queue_position = 0
+    for generation in ordered:
+        remaining = estimate_remaining_time(generation, now=now, store=store)
+        wait = 0.0
+        if generation.status == "processing":
+            position = 0
+        else:
+            queue_position += 1
+            position = queue_position
+            # Wait until enough of the generations ahead have finished to free a slot
+            while len(free_at) >= slots:
+                wait = heapq.heappop(free_at)
+        heapq.heappush(free_at, wait + remaining["seconds"])
+        eta = int(round(wait + remaining["seconds"]))
+        etas[generation.id] = {
+            "eta_seconds": eta,
+            "eta_p90_seconds": int(round(wait + remaining["p90_seconds"])),
+            "eta_formatted": format_estimated_time(eta),
+            "queue_position": position,
+            "stages_remaining": remaining["stages_remaining"],
+            "source": remaining["source"],
+        }
+    return etas
+
+
 def format_estimated_time(seconds: int) -> str:
     """
     Format estimated time in a human-readable format.
@@ -11,7 +11,9 @@ import replicate
 import httpx
 
 from app.core.config import settings
+from app.core.tracing import record_prediction, traced
 from app.schemas.generation import Scene, ScenePlan
+from app.services.media.probe import MediaProbeError, probe_media
 
 logger = logging.getLogger(__name__)
 
@@ -929,6 +931,8 @@ async def _generate_with_retry(
                         # Otherwise, continue trying
                         continue
             
+            record_prediction(prediction, model_name, "video")
+
             # Handle result
             if prediction.status == "succeeded":
                 if not prediction.output:
@@ -1172,6 +1176,7 @@ async def _generate_with_retry(
     )
 
 
+@traced("prediction", name="video.download")
 async def _download_video(video_url: str, output_path: Path) -> None:
     """
     Download video from URL to local file.
@@ -1223,119 +1228,51 @@ async def _validate_video(video_path: Path, expected_duration: int) -> None:
         if file_size == 0:
             raise RuntimeError(f"Video file is empty: {video_path}")
         
-        # Validate duration and aspect ratio using ffprobe (via subprocess)
-        # ffprobe is available as part of ffmpeg, which MoviePy requires
-        import subprocess
-        import json
-        
+        # Validate duration and aspect ratio from the shared (memoized) media probe;
+        # stitching and the editor reuse the same probe result
         try:
-            # Use ffprobe to get video metadata
-            cmd = [
-                "ffprobe",
-                "-v", "error",
-                "-show_entries", "stream=width,height,duration",
-                "-of", "json",
-                str(video_path)
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
+            probe = await probe_media(str(video_path))
+        except MediaProbeError as e:
+            logger.warning(f"Could not probe {video_path}: {e}. Skipping detailed validation.")
+            # Fallback: basic validation passed
+            logger.debug(
+                f"Video validation passed (basic): {video_path} "
+                f"(size: {file_size} bytes, expected duration: {expected_duration}s)"
             )
+            return
+        
+        # Validate aspect ratio (9:16 for MVP)
+        width, height = probe.width, probe.height
+        aspect_ratio = probe.aspect_ratio
+        if aspect_ratio is not None:
+            expected_aspect = 9 / 16  # 0.5625
+            tolerance = 0.1  # Allow 10% tolerance
             
-            if result.returncode != 0:
+            if abs(aspect_ratio - expected_aspect) > tolerance:
                 logger.warning(
-                    f"ffprobe failed for {video_path}: {result.stderr}. "
-                    f"Skipping detailed validation."
-                )
-                # Fallback: basic validation passed
-                logger.debug(
-                    f"Video validation passed (basic): {video_path} "
-                    f"(size: {file_size} bytes, expected duration: {expected_duration}s)"
+                    f"Video aspect ratio {width}:{height} ({aspect_ratio:.3f}) "
+                    f"does not match expected 9:16 ({expected_aspect:.3f}) "
+                    f"for {video_path}"
                 )
-                return
-            
-            # Parse ffprobe output
-            metadata = json.loads(result.stdout)
-            
-            if "streams" not in metadata or len(metadata["streams"]) == 0:
-                logger.warning(f"No video streams found in {video_path}")
-                return
-            
-            # Get first video stream
-            video_stream = None
-            for stream in metadata["streams"]:
-                if stream.get("width") and stream.get("height"):
-                    video_stream = stream
-                    break
-            
-            if not video_stream:
-                logger.warning(f"No valid video stream found in {video_path}")
-                return
-            
-            # Validate aspect ratio (9:16 for MVP)
-            width = int(video_stream.get("width", 0))
-            height = int(video_stream.get("height", 0))
-            
-            if width > 0 and height > 0:
-                aspect_ratio = width / height
-                expected_aspect = 9 / 16  # 0.5625
-                tolerance = 0.1  # Allow 10% tolerance
-                
-                if abs(aspect_ratio - expected_aspect) > tolerance:
-                    logger.warning(
-                        f"Video aspect ratio {width}:{height} ({aspect_ratio:.3f}) "
-                        f"does not match expected 9:16 ({expected_aspect:.3f}) "
-                        f"for {video_path}"
-                    )
-                    # Don't fail for aspect ratio mismatch in MVP, just warn
-            
-            # Validate duration
-            duration_str = video_stream.get("duration")
-            if duration_str:
-                try:
-                    actual_duration = float(duration_str)
-                    # Allow 2 seconds tolerance (videos can be slightly off)
-                    duration_tolerance = 2.0
-                    
-                    if abs(actual_duration - expected_duration) > duration_tolerance:
-                        logger.warning(
-                            f"Video duration {actual_duration:.2f}s does not match "
-                            f"expected {expected_duration}s (tolerance: {duration_tolerance}s) "
-                            f"for {video_path}"
-                        )
-                        # Don't fail for duration mismatch in MVP, just warn
-                    
-                    logger.debug(
-                        f"Video validation passed: {video_path} "
-                        f"(duration: {actual_duration:.2f}s, "
-                        f"resolution: {width}x{height}, "
-                        f"aspect: {aspect_ratio:.3f})"
-                    )
-                except (ValueError, TypeError):
-                    logger.warning(f"Could not parse duration from ffprobe output: {duration_str}")
-            else:
-                logger.warning(f"No duration found in video stream for {video_path}")
+                # Don't fail for aspect ratio mismatch in MVP, just warn
         
-        except FileNotFoundError:
-            # ffprobe not found - fallback to basic validation
+        # Validate duration
+        # Allow 2 seconds tolerance (videos can be slightly off)
+        duration_tolerance = 2.0
+        if abs(probe.duration - expected_duration) > duration_tolerance:
             logger.warning(
-                "ffprobe not found. Video validation limited to file existence check. "
-                "Install ffmpeg for full validation."
-            )
-            logger.debug(
-                f"Video validation passed (basic): {video_path} "
-                f"(size: {file_size} bytes, expected duration: {expected_duration}s)"
+                f"Video duration {probe.duration:.2f}s does not match "
+                f"expected {expected_duration}s (tolerance: {duration_tolerance}s) "
+                f"for {video_path}"
             )
-        except subprocess.TimeoutExpired:
-            logger.warning(f"ffprobe timeout for {video_path}. Skipping detailed validation.")
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse ffprobe output for {video_path}: {e}")
-        except Exception as e:
-            logger.warning(f"Unexpected error during video validation for {video_path}: {e}")
-            # Don't fail validation if ffprobe has issues
+            # Don't fail for duration mismatch in MVP, just warn
+        
+        logger.debug(
+            f"Video validation passed: {video_path} "
+            f"(duration: {probe.duration:.2f}s, "
+            f"resolution: {width}x{height}, "
+            f"aspect: {aspect_ratio or 0:.3f})"
+        )
         
     except Exception as e:
         logger.error(f"Video validation failed: {e}")
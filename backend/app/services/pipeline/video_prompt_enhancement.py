@@ -17,6 +17,7 @@ import openai
 from PIL import Image
 
 from app.core.config import settings
+from app.services.pipeline.text_analysis import analyze_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -458,13 +459,13 @@ def _quick_score_prompt(prompt: str, video_mode: bool = True) -> Dict[str, float
     Fast rule-based prompt scoring (no LLM call).
     Used for initial assessment to decide if enhancement is needed.
     """
-    prompt_lower = prompt.lower()
+    features = analyze_prompt(prompt)
     
     # Rule-based checks for video prompts
-    has_subject = any(word in prompt_lower for word in ["product", "service", "item", "person", "object", "subject", "character", "model", "portrait", "thing", "item"])
-    has_visual = any(word in prompt_lower for word in ["image", "photo", "picture", "visual", "scene", "shot", "camera", "cinematic", "view", "video"])
-    has_style = any(word in prompt_lower for word in ["style", "mood", "tone", "aesthetic", "look", "feel", "atmosphere", "grading", "color"])
-    has_details = len(prompt.split()) > 10  # Has some detail
+    has_subject = features.has("subject")
+    has_visual = features.has("visual", "video")
+    has_style = features.has("style")
+    has_details = features.word_count > 10  # Has some detail
     
     # Calculate completeness
     completeness = (
@@ -475,13 +476,11 @@ def _quick_score_prompt(prompt: str, video_mode: bool = True) -> Dict[str, float
     ) * 100
     
     # Specificity: more words = more specific, but cap at reasonable level
-    word_count = len(prompt.split())
-    specificity = min(word_count / 25.0, 1.0) * 100
+    specificity = min(features.word_count / 25.0, 1.0) * 100
     
     # Professionalism: check for professional language patterns
-    awkward_patterns = ["framed by a", "using a", "all in a", "to evoke"]
-    has_awkward = any(pattern in prompt_lower for pattern in awkward_patterns)
-    has_professional_terms = any(word in prompt_lower for word in ["cinematic", "professional", "elegant", "sophisticated", "polished", "refined"])
+    has_awkward = features.has("awkward")
+    has_professional_terms = features.has("professional")
     
     professionalism_base = completeness * 0.9
     if has_awkward and not has_professional_terms:
@@ -492,9 +491,9 @@ def _quick_score_prompt(prompt: str, video_mode: bool = True) -> Dict[str, float
         professionalism = professionalism_base
     
     # Cinematography: check for camera/lighting details
-    has_camera = any(word in prompt_lower for word in ["camera", "lens", "canon", "sony", "eos", "f/", "mm"])
-    has_shot_type = any(word in prompt_lower for word in ["angle", "shot", "framing", "aerial", "close-up", "closeup", "telephoto", "macro", "portrait", "wide"])
-    has_lighting = any(word in prompt_lower for word in ["lighting", "light", "glow", "illumination", "diffused", "dramatic", "soft", "harsh", "golden", "neon"])
+    has_camera = features.has("camera")
+    has_shot_type = features.has("shot_type")
+    has_lighting = features.has("lighting")
     
     cinematography = (
         (1.0 if has_camera else 0.0) * 0.4 +
@@ -503,9 +502,9 @@ def _quick_score_prompt(prompt: str, video_mode: bool = True) -> Dict[str, float
     ) * 100
     
     # Temporal coherence: check for motion/temporal details (VIDEO-SPECIFIC)
-    has_motion = any(word in prompt_lower for word in ["motion", "movement", "move", "transition", "dolly", "pan", "tilt", "tracking", "push", "pull"])
-    has_temporal = any(word in prompt_lower for word in ["smooth", "continuous", "seamless", "temporal", "coherence", "progression", "flow"])
-    has_frame_rate = any(word in prompt_lower for word in ["fps", "frame rate", "24fps", "30fps", "60fps"])
+    has_motion = features.has("motion")
+    has_temporal = features.has("temporal")
+    has_frame_rate = features.has("frame_rate")
     
     temporal_coherence = (
         (1.0 if has_motion else 0.0) * 0.5 +
@@ -514,8 +513,8 @@ def _quick_score_prompt(prompt: str, video_mode: bool = True) -> Dict[str, float
     ) * 100 if video_mode else 50.0  # Default to 50 if not video mode
     
     # Brand alignment: check for brand/style coherence
-    has_brand_terms = any(word in prompt_lower for word in ["brand", "logo", "identity", "guidelines"])
-    has_style_coherence = any(word in prompt_lower for word in ["color", "palette", "aesthetic", "style", "mood", "tone"])
+    has_brand_terms = features.has("brand_terms")
+    has_style_coherence = features.has("style_coherence")
     brand_alignment = (1.0 if (has_brand_terms or has_style_coherence) else 0.5) * 100
     
     overall = (
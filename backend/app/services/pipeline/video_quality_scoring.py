@@ -11,6 +11,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 from app.services.pipeline.quality_control import evaluate_vbench
+from app.services.pipeline.video_scoring_pool import map_video_scoring
 
 logger = logging.getLogger(__name__)
 
@@ -165,7 +166,7 @@ def score_videos_batch(
     vbench_available: Optional[bool] = None,
 ) -> List[Dict[str, float]]:
     """
-    Score multiple videos in batch.
+    Score multiple videos in batch, in parallel worker processes.
     
     Args:
         video_paths: List of video file paths
@@ -189,13 +190,17 @@ def score_videos_batch(
     scores_list = []
     failed_videos = []
     
-    for i, (video_path, prompt_text) in enumerate(zip(video_paths, prompt_texts)):
-        try:
-            scores = score_video(video_path, prompt_text, vbench_available)
-            scores_list.append(scores)
-        except Exception as e:
-            logger.error(f"Failed to score video {i+1}/{len(video_paths)} ({video_path}): {e}")
-            failed_videos.append((video_path, str(e)))
+    # Videos are scored in parallel in the video scoring pool (in input order)
+    outcomes = map_video_scoring(
+        score_video,
+        [(video_path, prompt_text, vbench_available) for video_path, prompt_text in zip(video_paths, prompt_texts)],
+        return_exceptions=True,
+    )
+    
+    for i, (video_path, outcome) in enumerate(zip(video_paths, outcomes)):
+        if isinstance(outcome, Exception):
+            logger.error(f"Failed to score video {i+1}/{len(video_paths)} ({video_path}): {outcome}")
+            failed_videos.append((video_path, str(outcome)))
             # Add default scores for failed videos
             scores_list.append({
                 "temporal_quality": 50.0,
@@ -209,6 +214,8 @@ def score_videos_batch(
                 "text_video_alignment": 50.0,
                 "overall_quality": 50.0,
             })
+        else:
+            scores_list.append(outcome)
     
     if failed_videos:
         logger.warning(f"Failed to score {len(failed_videos)} videos:")
@@ -0,0 +1,159 @@
+"""
+Video quality scoring in the shared media process pool.
+
+evaluate_vbench is CPU-bound OpenCV work. Run from async pipeline code it
+blocked the event loop for the whole evaluation, freezing the progress
+updates of every other generation. run_video_scoring runs it in the media
+worker pool (clip_pool), which is shared by all generations and by clip
+rendering, and can be awaited; map_video_scoring scores a batch of clips in
+parallel from synchronous code (CLI).
+
+VIDEO_SCORING_WORKERS limits how many evaluations occupy the shared workers
+at once, so scoring cannot hold every worker while an export waits
+(0 = no limit of its own: up to every worker of the media pool). With VIDEO_SCORING_WORKERS=1, or when the media pool has a
+single worker, there is no pool: async callers run the scoring in a thread,
+sync callers inline.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.media.clip_pool import discard_broken_executor, get_media_executor
+
+logger = logging.getLogger(__name__)
+
+_sync_slots: Optional[threading.BoundedSemaphore] = None
+_sync_slots_lock = threading.Lock()
+_async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def get_video_scoring_executor() -> Optional[ProcessPoolExecutor]:
+    """Get the shared media pool, or None when scoring runs in the calling process."""
+    if settings.VIDEO_SCORING_WORKERS == 1:
+        return None
+    return get_media_executor()
+
+
+def _max_running() -> Optional[int]:
+    """Evaluations allowed in the pool at once (None = as many as it has workers)."""
+    return settings.VIDEO_SCORING_WORKERS if settings.VIDEO_SCORING_WORKERS > 1 else None
+
+
+def _get_sync_slots() -> Optional[threading.BoundedSemaphore]:
+    global _sync_slots
+    limit = _max_running()
+    if limit is None:
+        return None
+    with _sync_slots_lock:
+        if _sync_slots is None:
+            _sync_slots = threading.BoundedSemaphore(limit)
+        return _sync_slots
+
+
+def _get_async_slots() -> Optional[asyncio.Semaphore]:
+    # asyncio primitives are bound to one event loop
+    limit = _max_running()
+    if limit is None:
+        return None
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = asyncio.Semaphore(limit)
+        _async_slots[loop] = slots
+    return slots
+
+
+async def run_video_scoring(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run func(*args) in the media pool without blocking the event loop.
+
+    func and its arguments must be picklable (module-level function, plain data).
+
+    Raises:
+        Whatever func raises; BrokenProcessPool if the worker process died
+    """
+    executor = get_video_scoring_executor()
+    if executor is None:
+        return await asyncio.to_thread(func, *args)
+    slots = _get_async_slots()
+    try:
+        if slots is None:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        async with slots:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        discard_broken_executor(executor)
+        raise
+
+
+def map_video_scoring(
+    func: Callable[..., Any],
+    calls: Sequence[Tuple[Any, ...]],
+    return_exceptions: bool = False,
+) -> List[Any]:
+    """
+    Run func(*args) for each args tuple in the media pool, blocking until all are done.
+
+    Args:
+        func: Module-level function scoring one clip
+        calls: Positional arguments of each call
+        return_exceptions: Return a failed call's exception in its place instead of raising it
+
+    Returns:
+        Results in the same order as calls
+
+    Raises:
+        The first exception raised by a call, in call order (unless return_exceptions)
+    """
+    executor = get_video_scoring_executor()
+    if executor is None or len(calls) <= 1:
+        outcomes = []
+        for args in calls:
+            try:
+                outcomes.append(func(*args))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                outcomes.append(e)
+        return outcomes
+
+    slots = _get_sync_slots()
+    futures = []
+    for args in calls:
+        if slots is not None:
+            slots.acquire()
+        try:
+            future = executor.submit(func, *args)
+        except BaseException:
+            if slots is not None:
+                slots.release()
+            for future in futures:
+                future.cancel()
+            raise
+        if slots is not None:
+            future.add_done_callback(lambda _: slots.release())
+        futures.append(future)
+
+    outcomes = []
+    try:
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                outcomes.append(e)
+        return outcomes
+    except BrokenProcessPool:
+        discard_broken_executor(executor)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,452 @@
+"""
+Storage janitor for generated artifacts on local disk.
+
+Generations, Master Mode runs, the interactive pipeline and editor exports
+all leave files behind (intermediate clips, stitched/overlay/audio passes,
+scene folders, temp export dirs). The janitor removes them in the
+background:
+
+- Retention: each artifact class has its own retention (hours since the
+  newest file in the entry was written; <= 0 disables the class).
+- High-water mark: when the disk holding the output directory is more
+  than JANITOR_HIGH_WATER_PERCENT full, the least recently written
+  evictable entries are removed until usage is back under
+  JANITOR_LOW_WATER_PERCENT, regardless of retention.
+
+Entries are never removed while they are in use: entries of
+pending/processing generations, interactive session folders whose session
+still exists, editor export/preview temp dirs held by this process
+(create_temp_dir) and cache files a class reports as in use (e.g. the PCM of
+indexed audio tracks).
+Scanning and deletion run in worker threads, in batches of
+JANITOR_DELETE_BATCH entries, so the event loop keeps serving requests.
+Reclaimed bytes are counted per class and exposed through stats() and, in
+the Prometheus text format, render_metrics() (served at /metrics).
+"""
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import BACKEND_DIR, settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArtifactClass:
+    """A family of disposable artifacts: entries at a fixed depth under a root directory."""
+
+    name: str
+    root: Path
+    retention_hours: float
+    depth: int = 1  # entries are the paths this many levels below root
+    prefixes: Tuple[str, ...] = ()  # only entries whose name starts with one of these
+    evictable: bool = True  # may be removed early when the disk is above the high-water mark
+    in_use: Optional[Callable[[], Set[str]]] = None  # names of entries that must be kept
+    session_entries: bool = False  # entries are named by interactive session ID; kept while it exists
+
+
+@dataclass
+class Artifact:
+    """One removable entry (a file or a whole directory)."""
+
+    path: Path
+    artifact_class: str
+    size: int
+    last_written: float  # newest mtime within the entry
+    evictable: bool
+
+    @property
+    def generation_id(self) -> str:
+        """Generation the entry belongs to, for entries named "<generation_id>[_suffix]"."""
+        return self.path.name.split("_")[0]
+
+
+@dataclass
+class JanitorStats:
+    """Counters published by the janitor."""
+
+    runs: int = 0
+    entries_removed: int = 0
+    bytes_reclaimed: int = 0
+    evictions: int = 0
+    errors: int = 0
+    bytes_reclaimed_by_class: Dict[str, int] = field(default_factory=dict)
+    last_run_at: Optional[float] = None
+    last_run_bytes: int = 0
+    disk_used_percent: Optional[float] = None
+
+
+# Editor export/preview temp dirs in use by this process, by name
+_held_temp_dirs: Set[str] = set()
+_held_temp_dirs_lock = threading.Lock()
+
+
+def create_temp_dir(prefix: str) -> str:
+    """
+    Create a temp dir that the janitor keeps until remove_temp_dir is called.
+
+    Args:
+        prefix: "export-" or "preview-" (the export_tmp class only scans these)
+
+    Returns:
+        Path of the new directory
+    """
+    path = tempfile.mkdtemp(prefix=prefix)
+    with _held_temp_dirs_lock:
+        _held_temp_dirs.add(os.path.basename(path))
+    return path
+
+
+def remove_temp_dir(path: str) -> None:
+    """Remove a directory created by create_temp_dir and stop protecting it."""
+    shutil.rmtree(path, ignore_errors=True)
+    with _held_temp_dirs_lock:
+        _held_temp_dirs.discard(os.path.basename(path))
+
+
+def held_temp_dir_names() -> Set[str]:
+    """Names of the temp dirs currently held by this process."""
+    with _held_temp_dirs_lock:
+        return set(_held_temp_dirs)
+
+
+def _indexed_audio_files() -> Set[str]:
+    from app.services.pipeline.audio_library import indexed_cache_files
+
+    return indexed_cache_files()
+
+
+def default_artifact_classes() -> List[ArtifactClass]:
+    """Artifact classes for this deployment, with retention from settings."""
+    # In local storage mode, Master Mode folders and delivery packages hold the delivered videos
+    s3_backed = settings.STORAGE_MODE == "s3"
+    return [
+        ArtifactClass("generation_temp", Path("output/temp"), settings.JANITOR_GENERATION_TEMP_HOURS),
+        ArtifactClass("clip_cache", Path("output/cache"), settings.JANITOR_CLIP_CACHE_HOURS),
+        ArtifactClass(
+            "interactive_outputs",
+            Path(settings.OUTPUT_BASE_DIR) / "interactive",
+            settings.JANITOR_INTERACTIVE_HOURS,
+            session_entries=True,
+        ),
+        ArtifactClass(
+            "master_mode_temp",
+            BACKEND_DIR / "temp" / "master_mode",
+            settings.JANITOR_MASTER_MODE_HOURS,
+            depth=2,
+            evictable=s3_backed,
+        ),
+        ArtifactClass(
+            "export_tmp",
+            Path(tempfile.gettempdir()),
+            settings.JANITOR_EXPORT_TMP_HOURS,
+            prefixes=("export-", "preview-"),
+            in_use=held_temp_dir_names,
+        ),
+        ArtifactClass("editor_clip_cache", Path(settings.EDITOR_CLIP_CACHE_DIR), settings.JANITOR_EDITOR_CACHE_HOURS),
+        ArtifactClass("media_probe_cache", Path(settings.MEDIA_PROBE_CACHE_DIR), settings.JANITOR_PROBE_CACHE_HOURS),
+        ArtifactClass(
+            "audio_cache",
+            Path(settings.AUDIO_CACHE_DIR),
+            settings.JANITOR_AUDIO_CACHE_HOURS,
+            in_use=_indexed_audio_files,
+        ),
+        ArtifactClass("traces", Path(settings.TRACE_DIR), settings.JANITOR_TRACE_HOURS if settings.TRACE_DIR else 0),
+        # Locally served HLS packages are the delivered ads; only S3-backed copies are disposable
+        ArtifactClass(
+            "delivery",
+            Path(settings.DELIVERY_DIR),
+            settings.JANITOR_DELIVERY_HOURS if s3_backed else 0,
+        ),
+    ]
+
+
+def active_generation_ids() -> Set[str]:
+    """IDs of generations that are still pending or processing."""
+    from app.db.base import SessionLocal
+    from app.db.models.generation import Generation
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Generation.id).filter(Generation.status.in_(["pending", "processing"])).all()
+        return {row[0] for row in rows}
+    finally:
+        db.close()
+
+
+async def interactive_session_exists(session_id: str) -> bool:
+    """Whether an interactive pipeline session is still stored (not finished or expired)."""
+    from app.services.pipeline.session_storage import get_session_storage
+
+    return await get_session_storage().exists(session_id)
+
+
+def _measure(path: Path) -> Tuple[int, float]:
+    """Total size and newest mtime of a file or directory tree."""
+    stat = path.stat()
+    if not path.is_dir():
+        return stat.st_size, stat.st_mtime
+    # Directory mtimes change when entries are added or removed, so only files count
+    size, newest = 0, None
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                file_stat = os.stat(os.path.join(dirpath, filename))
+            except OSError:
+                continue  # removed while scanning
+            size += file_stat.st_size
+            newest = file_stat.st_mtime if newest is None else max(newest, file_stat.st_mtime)
+    return size, stat.st_mtime if newest is None else newest
+
+
+def _entries(root: Path, depth: int) -> Iterable[Path]:
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for directory in level:
+            try:
+                next_level.extend(directory.iterdir())
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        level = next_level
+    return level
+
+
+class StorageJanitor:
+    """Retention and high-water-mark garbage collector for artifact directories."""
+
+    def __init__(
+        self,
+        artifact_classes: Optional[List[ArtifactClass]] = None,
+        active_ids: Callable[[], Set[str]] = active_generation_ids,
+        disk_path: str = "output",
+        session_exists: Callable[[str], Awaitable[bool]] = interactive_session_exists,
+    ):
+        self._artifact_classes = artifact_classes
+        self._active_ids = active_ids
+        self._session_exists = session_exists
+        self.disk_path = disk_path
+        self._stats = JanitorStats()
+        self._stats_lock = threading.Lock()
+        self._run_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def artifact_classes(self) -> List[ArtifactClass]:
+        return self._artifact_classes if self._artifact_classes is not None else default_artifact_classes()
+
+    def scan(self) -> List[Artifact]:
+        """List the entries of every enabled artifact class, except those reported in use."""
+        artifacts = []
+        for artifact_class in self.artifact_classes:
+            if artifact_class.retention_hours <= 0:
+                continue
+            in_use = artifact_class.in_use() if artifact_class.in_use else set()
+            for path in _entries(artifact_class.root, artifact_class.depth):
+                if artifact_class.prefixes and not path.name.startswith(artifact_class.prefixes):
+                    continue
+                if path.name in in_use:
+                    continue
+                try:
+                    size, last_written = _measure(path)
+                except OSError:
+                    continue
+                artifacts.append(Artifact(path, artifact_class.name, size, last_written, artifact_class.evictable))
+        return artifacts
+
+    async def _live_sessions(self, artifacts: List[Artifact]) -> Set[str]:
+        """Names of session entries whose interactive session still exists."""
+        session_classes = {c.name for c in self.artifact_classes if c.session_entries}
+        live = set()
+        for artifact in artifacts:
+            if artifact.artifact_class not in session_classes:
+                continue
+            try:
+                exists = await self._session_exists(artifact.path.name)
+            except Exception as e:
+                logger.warning(f"Janitor could not look up session {artifact.path.name}, keeping it: {e}")
+                exists = True
+            if exists:
+                live.add(artifact.path.name)
+        return live
+
+    def plan(
+        self,
+        artifacts: List[Artifact],
+        active: Set[str],
+        now: float,
+        disk_used: int,
+        disk_total: int,
+    ) -> List[Tuple[Artifact, str]]:
+        """
+        Choose which entries to remove.
+
+        Returns:
+            (artifact, reason) pairs; reason is "expired" or "evicted"
+        """
+        retention = {c.name: c.retention_hours * 3600 for c in self.artifact_classes}
+        candidates = [a for a in artifacts if a.generation_id not in active and a.path.name not in active]
+
+        removals = [(a, "expired") for a in candidates if now - a.last_written > retention[a.artifact_class]]
+        removed = {a.path for a, _ in removals}
+
+        high_water = disk_total * settings.JANITOR_HIGH_WATER_PERCENT / 100
+        low_water = disk_total * settings.JANITOR_LOW_WATER_PERCENT / 100
+        projected = disk_used - sum(a.size for a, _ in removals)
+        if disk_used > high_water:
+            lru = sorted(
+                (a for a in candidates if a.evictable and a.path not in removed),
+                key=lambda a: a.last_written,
+            )
+            for artifact in lru:
+                if projected <= low_water:
+                    break
+                removals.append((artifact, "evicted"))
+                projected -= artifact.size
+        return removals
+
+    def _delete_batch(self, batch: List[Tuple[Artifact, str]]) -> Tuple[int, int]:
+        """Delete one batch; returns (bytes reclaimed, errors)."""
+        reclaimed, errors = 0, 0
+        for artifact, reason in batch:
+            try:
+                if artifact.path.is_dir():
+                    shutil.rmtree(artifact.path)
+                else:
+                    artifact.path.unlink()
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                errors += 1
+                logger.warning(f"Janitor could not remove {artifact.path}: {e}")
+                continue
+            reclaimed += artifact.size
+            with self._stats_lock:
+                self._stats.entries_removed += 1
+                self._stats.bytes_reclaimed += artifact.size
+                if reason == "evicted":
+                    self._stats.evictions += 1
+                by_class = self._stats.bytes_reclaimed_by_class
+                by_class[artifact.artifact_class] = by_class.get(artifact.artifact_class, 0) + artifact.size
+            logger.debug(f"Janitor removed {artifact.path} ({reason}, {artifact.size} bytes)")
+        return reclaimed, errors
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        Run one sweep: scan, plan and delete in batches.
+
+        Returns:
+            Dict with entries_removed and bytes_reclaimed for this sweep
+        """
+        async with self._run_lock:
+            artifacts = await asyncio.to_thread(self.scan)
+            active = await asyncio.to_thread(self._active_ids)
+            active |= await self._live_sessions(artifacts)
+            usage = await asyncio.to_thread(shutil.disk_usage, self.disk_path)
+            removals = self.plan(artifacts, active, time.time(), usage.used, usage.total)
+
+            reclaimed, errors = 0, 0
+            batch_size = max(1, settings.JANITOR_DELETE_BATCH)
+            for start in range(0, len(removals), batch_size):
+                batch_bytes, batch_errors = await asyncio.to_thread(
+                    self._delete_batch, removals[start:start + batch_size]
+                )
+                reclaimed += batch_bytes
+                errors += batch_errors
+
+            usage = await asyncio.to_thread(shutil.disk_usage, self.disk_path)
+            with self._stats_lock:
+                self._stats.runs += 1
+                self._stats.errors += errors
+                self._stats.last_run_at = time.time()
+                self._stats.last_run_bytes = reclaimed
+                self._stats.disk_used_percent = round(100 * usage.used / usage.total, 1)
+
+        if removals:
+            logger.info(
+                f"Janitor removed {len(removals) - errors} entries, reclaimed {reclaimed / 1024 / 1024:.1f} MB "
+                f"(disk {self._stats.disk_used_percent}% used)"
+            )
+        return {"entries_removed": len(removals) - errors, "bytes_reclaimed": reclaimed}
+
+    def stats(self) -> Dict:
+        """Snapshot of the janitor counters."""
+        with self._stats_lock:
+            return asdict(self._stats)
+
+    def render_metrics(self) -> str:
+        """Janitor counters in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = [
+            "# HELP admint_janitor_runs_total Storage janitor sweeps",
+            "# TYPE admint_janitor_runs_total counter",
+            f"admint_janitor_runs_total {stats['runs']}",
+            "# HELP admint_janitor_entries_removed_total Artifact entries removed by the storage janitor",
+            "# TYPE admint_janitor_entries_removed_total counter",
+            f"admint_janitor_entries_removed_total {stats['entries_removed']}",
+            "# HELP admint_janitor_evictions_total Entries removed early because the disk was above the high-water mark",
+            "# TYPE admint_janitor_evictions_total counter",
+            f"admint_janitor_evictions_total {stats['evictions']}",
+            "# HELP admint_janitor_errors_total Entries the storage janitor failed to remove",
+            "# TYPE admint_janitor_errors_total counter",
+            f"admint_janitor_errors_total {stats['errors']}",
+            "# HELP admint_janitor_bytes_reclaimed_total Bytes reclaimed by the storage janitor per artifact class",
+            "# TYPE admint_janitor_bytes_reclaimed_total counter",
+        ]
+        for name, reclaimed in sorted(stats["bytes_reclaimed_by_class"].items()):
+            lines.append(f'admint_janitor_bytes_reclaimed_total{{artifact_class="{name}"}} {reclaimed}')
+        if stats["disk_used_percent"] is not None:
+            lines += [
+                "# HELP admint_disk_used_percent Usage of the disk holding the output directory at the last sweep",
+                "# TYPE admint_disk_used_percent gauge",
+                f"admint_disk_used_percent {stats['disk_used_percent']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def start(self) -> None:
+        """Start the periodic sweep (no-op if JANITOR_INTERVAL_SECONDS <= 0)."""
+        if settings.JANITOR_INTERVAL_SECONDS <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def close(self) -> None:
+        """Stop the periodic sweep."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sweep_loop(self) -> None:
+        interval = settings.JANITOR_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Storage janitor sweep failed: {e}")
+
+
+# Global janitor (initialized on first use)
+_janitor: Optional[StorageJanitor] = None
+
+
+def get_storage_janitor() -> StorageJanitor:
+    """Get or create the storage janitor."""
+    global _janitor
+    if _janitor is None:
+        _janitor = StorageJanitor()
+    return _janitor
@@ -1,17 +1,49 @@
 """
 S3 storage service for video and thumbnail files.
 """
+import hashlib
 import logging
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError, BotoCoreError
 from botocore.config import Config
+from s3transfer.utils import ChunksizeAdjuster
 
 from app.core.config import settings
+from app.core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+ETAG_READ_SIZE = 8 * MB
+
+
+def compute_etag(local_path: str, multipart_threshold: int, multipart_chunksize: int) -> str:
+    """
+    Compute the ETag S3 assigns to an upload of a file with the given transfer settings.
+
+    Single-part uploads get the MD5 of the content; multipart uploads get the
+    MD5 of the concatenated part MD5s followed by "-<part count>". Part sizes
+    are adjusted the same way s3transfer adjusts them (5 MB minimum, at most
+    10,000 parts).
+    """
+    size = os.path.getsize(local_path)
+    with open(local_path, "rb") as f:
+        if size < multipart_threshold:
+            digest = hashlib.md5()
+            for block in iter(lambda: f.read(ETAG_READ_SIZE), b""):
+                digest.update(block)
+            return digest.hexdigest()
+
+        part_size = ChunksizeAdjuster().adjust_chunksize(multipart_chunksize, size)
+        part_digests = []
+        for part in iter(lambda: f.read(part_size), b""):
+            part_digests.append(hashlib.md5(part).digest())
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
 
 class S3Storage:
     """S3 storage service for uploading and downloading video files."""
@@ -42,22 +74,42 @@ class S3Storage:
             # Use IAM role (for EC2 instance)
             self.s3_client = boto3.client('s3', config=config)
         
+        # Multipart transfer settings (parts upload in parallel within one file)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * MB,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_MB * MB,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+            use_threads=True,
+        )
+        
         logger.info(f"S3 storage initialized for bucket: {self.bucket_name} (region: {self.region})")
     
-    def upload_file(self, local_path: str, s3_key: str, content_type: Optional[str] = None) -> str:
+    @traced("s3", name="upload")
+    def upload_file(
+        self,
+        local_path: str,
+        s3_key: str,
+        content_type: Optional[str] = None,
+        callback: Optional[Callable[[int], None]] = None,
+    ) -> str:
         """
-        Upload a file to S3.
+        Upload a file to S3 (multipart above S3_MULTIPART_THRESHOLD_MB).
+        
+        When S3_VERIFY_ETAG is enabled, the stored object's ETag is compared
+        with the ETag computed from the local file.
         
         Args:
             local_path: Local file path to upload
             s3_key: S3 object key (path in bucket)
             content_type: Optional content type (e.g., 'video/mp4', 'image/jpeg')
+            callback: Optional progress callback, called with the number of bytes
+                transferred since the previous call
         
         Returns:
             str: S3 object URL
         
         Raises:
-            RuntimeError: If upload fails
+            RuntimeError: If upload fails or the ETag does not match
         """
         try:
             local_file = Path(local_path)
@@ -73,9 +125,14 @@ class S3Storage:
                 str(local_file),
                 self.bucket_name,
                 s3_key,
-                ExtraArgs=extra_args
+                ExtraArgs=extra_args,
+                Callback=callback,
+                Config=self.transfer_config
             )
             
+            if settings.S3_VERIFY_ETAG:
+                self._verify_etag(str(local_file), s3_key)
+            
             # Generate S3 URL
             s3_url = f"s3://{self.bucket_name}/{s3_key}"
             logger.info(f"File uploaded successfully: {s3_url}")
@@ -92,6 +149,27 @@ class S3Storage:
             logger.error(f"Unexpected error during S3 upload: {e}", exc_info=True)
             raise RuntimeError(f"S3 upload failed: {str(e)}")
     
+    def _verify_etag(self, local_path: str, s3_key: str) -> None:
+        """
+        Compare the uploaded object's ETag with the local file's.
+        
+        Objects encrypted with SSE-KMS do not have MD5-based ETags and are skipped.
+        
+        Raises:
+            RuntimeError: If the ETags differ
+        """
+        head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        if head.get('ServerSideEncryption') == 'aws:kms':
+            return
+        remote_etag = head.get('ETag', '').strip('"')
+        local_etag = compute_etag(
+            local_path,
+            self.transfer_config.multipart_threshold,
+            self.transfer_config.multipart_chunksize,
+        )
+        if remote_etag != local_etag:
+            raise RuntimeError(f"ETag mismatch for {s3_key}: local {local_etag}, S3 {remote_etag}")
+    
     def generate_presigned_url(self, s3_key: str, expiration: int = 3600) -> str:
         """
         Generate a presigned URL for downloading a file from S3.
@@ -0,0 +1,144 @@
+"""
+Background S3 upload manager.
+
+Uploads run on a dedicated thread pool (S3_UPLOAD_WORKERS files at once,
+each split into S3_MAX_CONCURRENCY parallel parts by the transfer
+config), so pipeline code can hand off a clip or thumbnail as soon as it
+is written and keep working while it uploads. Async callers await the
+upload without blocking the event loop.
+
+Progress is tracked per generation (files and bytes) and exposed through
+get_progress() for the status endpoint.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UploadProgress:
+    """Upload counters for one generation."""
+
+    files_total: int = 0
+    files_done: int = 0
+    files_failed: int = 0
+    bytes_total: int = 0
+    bytes_uploaded: int = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data["percent"] = round(100.0 * self.bytes_uploaded / self.bytes_total, 1) if self.bytes_total else 100.0
+        return data
+
+
+class UploadManager:
+    """Runs S3 uploads on a dedicated thread pool and tracks their progress."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.S3_UPLOAD_WORKERS,
+            thread_name_prefix="s3-upload",
+        )
+        self._progress: Dict[str, UploadProgress] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        local_path: str,
+        s3_key: str,
+        content_type: Optional[str] = None,
+        generation_id: Optional[str] = None,
+    ) -> Future:
+        """
+        Start uploading a file in the background.
+
+        The file must not be modified or deleted until the returned future
+        completes.
+
+        Args:
+            local_path: Local file path to upload
+            s3_key: S3 object key
+            content_type: Optional content type
+            generation_id: Generation to count the upload towards (for progress)
+
+        Returns:
+            Future resolving to s3_key once the upload is verified; it raises
+            RuntimeError if the upload fails
+        """
+        size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+        progress = None
+        if generation_id:
+            with self._lock:
+                progress = self._progress.setdefault(generation_id, UploadProgress())
+                progress.files_total += 1
+                progress.bytes_total += size
+
+        def on_bytes(count: int) -> None:
+            if progress is not None:
+                with self._lock:
+                    progress.bytes_uploaded += count
+
+        def upload() -> str:
+            from app.services.storage.s3_storage import get_s3_storage
+
+            try:
+                get_s3_storage().upload_file(local_path, s3_key, content_type=content_type, callback=on_bytes)
+            except Exception:
+                if progress is not None:
+                    with self._lock:
+                        progress.files_failed += 1
+                raise
+            if progress is not None:
+                with self._lock:
+                    progress.files_done += 1
+            return s3_key
+
+        logger.debug(f"Queued upload of {local_path} to {s3_key}")
+        return self._executor.submit(upload)
+
+    async def upload(
+        self,
+        local_path: str,
+        s3_key: str,
+        content_type: Optional[str] = None,
+        generation_id: Optional[str] = None,
+    ) -> str:
+        """Upload a file without blocking the event loop (see submit)."""
+        return await asyncio.wrap_future(self.submit(local_path, s3_key, content_type, generation_id))
+
+    def get_progress(self, generation_id: str) -> Optional[Dict[str, float]]:
+        """Get upload progress for a generation, or None if it has no uploads."""
+        with self._lock:
+            progress = self._progress.get(generation_id)
+            return progress.to_dict() if progress else None
+
+    def clear_progress(self, generation_id: str) -> None:
+        """Forget a generation's upload counters."""
+        with self._lock:
+            self._progress.pop(generation_id, None)
+
+    def shutdown(self) -> None:
+        """Wait for queued uploads and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+
+# Global upload manager (initialized on first use)
+_upload_manager: Optional[UploadManager] = None
+_upload_manager_lock = threading.Lock()
+
+
+def get_upload_manager() -> UploadManager:
+    """Get or create the upload manager."""
+    global _upload_manager
+    with _upload_manager_lock:
+        if _upload_manager is None:
+            _upload_manager = UploadManager()
+        return _upload_manager
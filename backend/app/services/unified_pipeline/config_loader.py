@@ -3,10 +3,20 @@ Configuration loader for unified pipeline.
 
 Loads and validates pipeline configurations and prompt templates from YAML files.
 Implements Pydantic validation to ensure configuration correctness before execution.
+
+Parsed configs and compiled prompt templates are kept in a process-wide
+registry keyed by file path. Each lookup only stats the file; it is re-read
+when its mtime changes. preload() validates every file at startup so a broken
+template fails the boot instead of a generation.
 """
+import hashlib
 import logging
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 import yaml
 
 from app.schemas.unified_pipeline import PipelineConfig
@@ -18,6 +28,214 @@ CONFIG_DIR = Path(__file__).parent.parent.parent / "config"
 PROMPTS_DIR = CONFIG_DIR / "prompts"
 PIPELINES_DIR = CONFIG_DIR / "pipelines"
 
+# {variable} placeholders; anything else in braces (e.g. JSON examples) is literal text
+_PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+_MISSING = object()
+
+
+class CompiledTemplate:
+    """
+    Prompt template pre-split into literal text and {variable} placeholders.
+
+    Rendering is a single join. Placeholders without a value are left as-is,
+    matching substitute_variables().
+    """
+
+    __slots__ = ("source", "variables", "_literals", "_names")
+
+    def __init__(self, source: str):
+        self.source = source
+        pieces = _PLACEHOLDER_RE.split(source)
+        # split() alternates literal, name, literal, ... and always ends on a literal
+        self._literals: Tuple[str, ...] = tuple(pieces[0::2])
+        self._names: Tuple[str, ...] = tuple(pieces[1::2])
+        self.variables = frozenset(self._names)
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        """Render the template with the given variables."""
+        out = [self._literals[0]]
+        for name, literal in zip(self._names, self._literals[1:]):
+            value = variables.get(name, _MISSING)
+            out.append(f"{{{name}}}" if value is _MISSING else str(value))
+            out.append(literal)
+        return "".join(out)
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> CompiledTemplate:
+    """Compile a template string (cached by content)."""
+    return CompiledTemplate(template)
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Validated prompt template for an agent."""
+
+    agent_name: str
+    system_prompt: str
+    user_prompt: CompiledTemplate
+
+    def as_dict(self) -> Dict[str, str]:
+        return {
+            "system_prompt": self.system_prompt,
+            "user_prompt_template": self.user_prompt.source,
+        }
+
+
+@dataclass(frozen=True)
+class _Entry:
+    mtime_ns: int
+    checksum: str
+    value: Any
+
+
+def _build_pipeline_config_dict(config_data: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Map the YAML pipeline structure onto PipelineConfig fields."""
+    # Extract pipeline section
+    pipeline_config = config_data.get("pipeline", {})
+
+    # Build PipelineConfig from YAML structure
+    # Map stage configs to PipelineConfig fields
+    stages = {stage["name"]: stage for stage in pipeline_config.get("stages", [])}
+
+    config_dict = {
+        "pipeline_name": pipeline_config.get("name", name),
+    }
+
+    # Story stage settings
+    if "story" in stages:
+        config_dict["story_max_iterations"] = stages["story"].get("max_iterations", 3)
+        config_dict["story_timeout_seconds"] = stages["story"].get("timeout_seconds", 120)
+
+    # Reference stage settings
+    if "reference_images" in stages:
+        config_dict["reference_count"] = stages["reference_images"].get("count", 3)
+        config_dict["reference_quality_threshold"] = stages["reference_images"].get("quality_threshold", 0.7)
+
+    # Scene stage settings
+    if "scenes" in stages:
+        config_dict["scene_max_iterations"] = stages["scenes"].get("max_iterations", 2)
+        config_dict["scene_timeout_seconds"] = stages["scenes"].get("timeout_seconds", 180)
+
+    # Video stage settings
+    if "videos" in stages:
+        config_dict["video_parallel"] = stages["videos"].get("parallel", True)
+        config_dict["video_max_concurrent"] = stages["videos"].get("max_concurrent", 5)
+        config_dict["video_timeout_seconds"] = stages["videos"].get("timeout_seconds", 600)
+
+    # Quality scoring settings
+    quality_config = config_data.get("quality", {}).get("vbench", {})
+    config_dict["vbench_enabled"] = quality_config.get("enabled", True)
+    config_dict["vbench_run_in_background"] = quality_config.get("run_in_background", True)
+    config_dict["vbench_threshold_good"] = quality_config.get("threshold_good", 80.0)
+    config_dict["vbench_threshold_acceptable"] = quality_config.get("threshold_acceptable", 60.0)
+
+    return config_dict
+
+
+def _parse_pipeline_config(path: Path, raw: bytes) -> PipelineConfig:
+    config_data = yaml.safe_load(raw) or {}
+    try:
+        return PipelineConfig(**_build_pipeline_config_dict(config_data, path.stem))
+    except Exception as e:
+        logger.error(f"Configuration validation failed: {e}")
+        raise ValueError(f"Invalid pipeline configuration: {e}")
+
+
+def _parse_prompt_template(path: Path, raw: bytes) -> PromptTemplate:
+    prompt_data = yaml.safe_load(raw) or {}
+
+    system_prompt = prompt_data.get("system_prompt", "")
+    user_prompt_template = prompt_data.get("user_prompt_template", "")
+
+    if not system_prompt or not user_prompt_template:
+        raise ValueError(f"Invalid prompt template: missing system_prompt or user_prompt_template in {path}")
+
+    return PromptTemplate(
+        agent_name=path.stem,
+        system_prompt=system_prompt,
+        user_prompt=CompiledTemplate(user_prompt_template),
+    )
+
+
+class ConfigRegistry:
+    """
+    Process-wide cache of validated pipeline configs and compiled prompts.
+
+    Entries are keyed by file path and reloaded when the file's mtime changes.
+    """
+
+    def __init__(self, pipelines_dir: Path = PIPELINES_DIR, prompts_dir: Path = PROMPTS_DIR):
+        self.pipelines_dir = pipelines_dir
+        self.prompts_dir = prompts_dir
+        self._entries: Dict[Path, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, path: Path, parse: Callable[[Path, bytes], Any]) -> _Entry:
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._entries.pop(path, None)
+            raise
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == mtime_ns:
+                return entry
+
+            logger.info(f"Loading configuration from {path}")
+            raw = path.read_bytes()
+            checksum = hashlib.sha256(raw).hexdigest()
+            entry = _Entry(mtime_ns=mtime_ns, checksum=checksum, value=parse(path, raw))
+            self._entries[path] = entry
+            return entry
+
+    def get_pipeline_config(self, name: str = "default") -> PipelineConfig:
+        """Get the validated base configuration (callers must not mutate it)."""
+        config_path = self.pipelines_dir / f"{name}.yaml"
+        if not config_path.exists():
+            raise FileNotFoundError(f"Pipeline configuration not found: {config_path}")
+        return self._get(config_path, _parse_pipeline_config).value
+
+    def get_prompt_template(self, agent_name: str) -> PromptTemplate:
+        """Get the compiled prompt template for an agent."""
+        prompt_path = self.prompts_dir / f"{agent_name}.yaml"
+        if not prompt_path.exists():
+            raise FileNotFoundError(f"Prompt template not found: {prompt_path}")
+        return self._get(prompt_path, _parse_prompt_template).value
+
+    def preload(self) -> None:
+        """
+        Load and validate every pipeline config and prompt template.
+
+        Raises:
+            ValueError: If any config or template is invalid
+        """
+        for path in sorted(self.pipelines_dir.glob("*.yaml")):
+            self.get_pipeline_config(path.stem)
+        for path in sorted(self.prompts_dir.glob("*.yaml")):
+            self.get_prompt_template(path.stem)
+        logger.info(f"✓ Pipeline configuration registry loaded ({len(self._entries)} files)")
+
+    def checksums(self) -> Dict[str, str]:
+        """SHA-256 of every loaded file, keyed by path relative to the config dir."""
+        result = {}
+        for path, entry in list(self._entries.items()):
+            try:
+                key = str(path.relative_to(CONFIG_DIR))
+            except ValueError:
+                key = str(path)
+            result[key] = entry.checksum
+        return dict(sorted(result.items()))
+
+
+config_registry = ConfigRegistry()
+
 
 class ConfigLoader:
     """Loads and validates pipeline configurations and prompt templates."""
@@ -38,65 +256,15 @@ class ConfigLoader:
             FileNotFoundError: If configuration file doesn't exist
             ValueError: If configuration validation fails
         """
-        config_path = PIPELINES_DIR / f"{name}.yaml"
-
-        if not config_path.exists():
-            raise FileNotFoundError(f"Pipeline configuration not found: {config_path}")
-
-        logger.info(f"Loading pipeline configuration from {config_path}")
-
-        with open(config_path, "r") as f:
-            config_data = yaml.safe_load(f)
+        base_config = config_registry.get_pipeline_config(name)
 
-        # Extract pipeline section
-        pipeline_config = config_data.get("pipeline", {})
-
-        # Build PipelineConfig from YAML structure
-        # Map stage configs to PipelineConfig fields
-        stages = {stage["name"]: stage for stage in pipeline_config.get("stages", [])}
-
-        config_dict = {
-            "pipeline_name": pipeline_config.get("name", name),
-        }
-
-        # Story stage settings
-        if "story" in stages:
-            config_dict["story_max_iterations"] = stages["story"].get("max_iterations", 3)
-            config_dict["story_timeout_seconds"] = stages["story"].get("timeout_seconds", 120)
-
-        # Reference stage settings
-        if "reference_images" in stages:
-            config_dict["reference_count"] = stages["reference_images"].get("count", 3)
-            config_dict["reference_quality_threshold"] = stages["reference_images"].get("quality_threshold", 0.7)
-
-        # Scene stage settings
-        if "scenes" in stages:
-            config_dict["scene_max_iterations"] = stages["scenes"].get("max_iterations", 2)
-            config_dict["scene_timeout_seconds"] = stages["scenes"].get("timeout_seconds", 180)
-
-        # Video stage settings
-        if "videos" in stages:
-            config_dict["video_parallel"] = stages["videos"].get("parallel", True)
-            config_dict["video_max_concurrent"] = stages["videos"].get("max_concurrent", 5)
-            config_dict["video_timeout_seconds"] = stages["videos"].get("timeout_seconds", 600)
-
-        # Quality scoring settings
-        quality_config = config_data.get("quality", {}).get("vbench", {})
-        config_dict["vbench_enabled"] = quality_config.get("enabled", True)
-        config_dict["vbench_run_in_background"] = quality_config.get("run_in_background", True)
-        config_dict["vbench_threshold_good"] = quality_config.get("threshold_good", 80.0)
-        config_dict["vbench_threshold_acceptable"] = quality_config.get("threshold_acceptable", 60.0)
+        if not overrides:
+            return base_config.model_copy()
 
         # Apply overrides from API request
-        if overrides:
-            logger.info(f"Applying configuration overrides: {overrides}")
-            config_dict.update(overrides)
-
-        # Validate with Pydantic
+        logger.info(f"Applying configuration overrides: {overrides}")
         try:
-            config = PipelineConfig(**config_dict)
-            logger.info(f"✓ Pipeline configuration loaded and validated: {config.pipeline_name}")
-            return config
+            return PipelineConfig(**{**base_config.model_dump(), **overrides})
         except Exception as e:
             logger.error(f"Configuration validation failed: {e}")
             raise ValueError(f"Invalid pipeline configuration: {e}")
@@ -115,27 +283,7 @@ class ConfigLoader:
         Raises:
             FileNotFoundError: If prompt template doesn't exist
         """
-        prompt_path = PROMPTS_DIR / f"{agent_name}.yaml"
-
-        if not prompt_path.exists():
-            raise FileNotFoundError(f"Prompt template not found: {prompt_path}")
-
-        logger.info(f"Loading prompt template from {prompt_path}")
-
-        with open(prompt_path, "r") as f:
-            prompt_data = yaml.safe_load(f)
-
-        system_prompt = prompt_data.get("system_prompt", "")
-        user_prompt_template = prompt_data.get("user_prompt_template", "")
-
-        if not system_prompt or not user_prompt_template:
-            raise ValueError(f"Invalid prompt template: missing system_prompt or user_prompt_template in {prompt_path}")
-
-        logger.info(f"✓ Prompt template loaded: {agent_name}")
-        return {
-            "system_prompt": system_prompt,
-            "user_prompt_template": user_prompt_template
-        }
+        return config_registry.get_prompt_template(agent_name).as_dict()
 
     @staticmethod
     def substitute_variables(template: str, variables: Dict[str, Any]) -> str:
@@ -154,12 +302,7 @@ class ConfigLoader:
             variables = {"framework": "AIDA", "product": "EcoBottle"}
             result = "Create a AIDA story for EcoBottle"
         """
-        result = template
-        for key, value in variables.items():
-            placeholder = f"{{{key}}}"
-            result = result.replace(placeholder, str(value))
-
-        return result
+        return compile_template(template).render(variables)
 
 
 # Convenience functions for easy import
@@ -176,3 +319,13 @@ def load_prompt_template(agent_name: str) -> Dict[str, str]:
 def substitute_variables(template: str, variables: Dict[str, Any]) -> str:
     """Substitute variables in template."""
     return ConfigLoader.substitute_variables(template, variables)
+
+
+def get_prompt_template(agent_name: str) -> PromptTemplate:
+    """Get compiled prompt template."""
+    return config_registry.get_prompt_template(agent_name)
+
+
+def get_config_checksums() -> Dict[str, str]:
+    """Get checksums of loaded configuration files."""
+    return config_registry.checksums()
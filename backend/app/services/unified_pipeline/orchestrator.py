@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from uuid import uuid4
 
+from app.core.tracing import span, trace
 from app.schemas.unified_pipeline import (
     GenerationRequest,
     GenerationResponse,
@@ -17,7 +18,7 @@ from app.schemas.unified_pipeline import (
     ReferenceImage,
     ReferenceImagesReadyMessage
 )
-from app.services.unified_pipeline.config_loader import load_pipeline_config
+from app.services.unified_pipeline.config_loader import get_config_checksums, load_pipeline_config
 from app.services.unified_pipeline.reference_stage import ReferenceStage
 from app.db.models.generation import Generation
 from sqlalchemy.orm import Session
@@ -82,7 +83,7 @@ class PipelineOrchestrator:
             status="pending",
             current_step="initialization",
             brand_assets=request.brand_assets.dict() if request.brand_assets else None,
-            config=config.dict(),  # Store config snapshot (AC-7)
+            config={**config.dict(), "config_checksums": get_config_checksums()},  # Store config snapshot (AC-7)
         )
 
         self.db.add(generation)
@@ -141,22 +142,23 @@ class PipelineOrchestrator:
         generation.status = stage_name
         self.db.commit()
 
-        # Execute stage based on stage name
-        if stage_name == "references":
-            # Execute reference stage (Story 1.2)
-            return await self._execute_reference_stage(generation, config, inputs)
-        elif stage_name == "story":
-            # Story stage implementation (Story 1.1, 1.5)
-            return {"status": "not_implemented", "stage": stage_name}
-        elif stage_name == "scenes":
-            # Scene stage implementation (Story 1.1, 1.5)
-            return {"status": "not_implemented", "stage": stage_name}
-        elif stage_name == "videos":
-            # Video stage implementation (Story 1.3)
-            return {"status": "not_implemented", "stage": stage_name}
-        else:
-            logger.warning(f"Unknown stage: {stage_name}")
-            return {"status": "unknown_stage", "stage": stage_name}
+        # Execute stage based on stage name; each stage run is saved as its own trace
+        with trace(f"{generation.id}-{stage_name}", "unified"), span(stage_name, "stage"):
+            if stage_name == "references":
+                # Execute reference stage (Story 1.2)
+                return await self._execute_reference_stage(generation, config, inputs)
+            elif stage_name == "story":
+                # Story stage implementation (Story 1.1, 1.5)
+                return {"status": "not_implemented", "stage": stage_name}
+            elif stage_name == "scenes":
+                # Scene stage implementation (Story 1.1, 1.5)
+                return {"status": "not_implemented", "stage": stage_name}
+            elif stage_name == "videos":
+                # Video stage implementation (Story 1.3)
+                return {"status": "not_implemented", "stage": stage_name}
+            else:
+                logger.warning(f"Unknown stage: {stage_name}")
+                return {"status": "unknown_stage", "stage": stage_name}
 
     async def _execute_reference_stage(
         self,
@@ -23,6 +23,7 @@ import time
 import replicate
 import httpx
 
+from app.core.tracing import record_prediction
 from app.schemas.unified_pipeline import (
     BrandAssets,
     ReferenceImage,
@@ -397,6 +398,8 @@ class ReferenceStage:
                     # Refresh prediction status
                     prediction = client.predictions.get(prediction.id)
 
+                record_prediction(prediction, NANO_BANANA_MODEL, "image")
+
                 # Check final status
                 if prediction.status == "succeeded":
                     # Nano Banana returns a list of image URLs
@@ -0,0 +1,213 @@
+"""
+Pub/sub backplane for WebSocket fan-out across API workers.
+
+A message for a session is published once to the backplane and delivered by
+every worker that holds a connection for that session, so a pipeline running
+on one uvicorn worker can notify clients connected to another.
+
+Backends:
+- Redis (multi-worker / multi-node)
+- In-process (single worker, development and tests)
+
+Usage:
+    backplane = get_backplane()
+    await backplane.start(deliver)          # deliver(session_id, message_json)
+    await backplane.subscribe(session_id)
+    await backplane.publish(session_id, message_json)
+    await backplane.publish(None, message_json)  # broadcast to all sessions
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# deliver(session_id, message_json); session_id is None for broadcasts
+DeliverCallback = Callable[[Optional[str], str], None]
+
+
+# ============================================================================
+# Abstract Base Class
+# ============================================================================
+
+class WebSocketBackplane(ABC):
+    """Abstract base class for WebSocket pub/sub backplanes."""
+
+    @abstractmethod
+    async def start(self, deliver: DeliverCallback) -> None:
+        """Start receiving messages; deliver is called for each one (must not block)."""
+        pass
+
+    @abstractmethod
+    async def publish(self, session_id: Optional[str], message: str) -> None:
+        """Publish a serialized message to a session (None = all sessions)."""
+        pass
+
+    @abstractmethod
+    async def subscribe(self, session_id: str) -> None:
+        """Receive messages for a session that has local connections."""
+        pass
+
+    @abstractmethod
+    async def unsubscribe(self, session_id: str) -> None:
+        """Stop receiving messages for a session with no local connections."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Stop receiving messages and release resources."""
+        pass
+
+
+# ============================================================================
+# In-Process Backplane (single worker)
+# ============================================================================
+
+class InProcessBackplane(WebSocketBackplane):
+    """Delivers published messages directly to this process's connections."""
+
+    def __init__(self):
+        self._deliver: Optional[DeliverCallback] = None
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+
+    async def publish(self, session_id: Optional[str], message: str) -> None:
+        if self._deliver is not None:
+            self._deliver(session_id, message)
+
+    async def subscribe(self, session_id: str) -> None:
+        pass
+
+    async def unsubscribe(self, session_id: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        self._deliver = None
+
+
+# ============================================================================
+# Redis Backplane (multi-worker)
+# ============================================================================
+
+class RedisBackplane(WebSocketBackplane):
+    """
+    Redis pub/sub backplane.
+
+    Each worker holds one pub/sub connection subscribed to the broadcast
+    channel plus one channel per session with local connections.
+    """
+
+    def __init__(self, redis_url: str, channel_prefix: str = "ws:session:"):
+        """
+        Initialize Redis backplane.
+
+        Args:
+            redis_url: Redis connection URL
+            channel_prefix: Channel prefix for per-session channels
+        """
+        self.redis_url = redis_url
+        self.channel_prefix = channel_prefix
+        self.broadcast_channel = f"{channel_prefix}*broadcast"
+        self._client = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._deliver: Optional[DeliverCallback] = None
+        self._subscribed: Set[str] = set()
+
+    def _channel(self, session_id: Optional[str]) -> str:
+        if session_id is None:
+            return self.broadcast_channel
+        return f"{self.channel_prefix}{session_id}"
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        import redis.asyncio as redis
+
+        self._deliver = deliver
+        if self._client is None:
+            self._client = redis.from_url(
+                self.redis_url, encoding="utf-8", decode_responses=True
+            )
+            self._pubsub = self._client.pubsub()
+            await self._pubsub.subscribe(self.broadcast_channel)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        logger.info("Redis WebSocket backplane started")
+
+    async def _listen(self) -> None:
+        """Forward pub/sub messages to local connections."""
+        prefix_len = len(self.channel_prefix)
+        while True:
+            try:
+                msg = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if msg is None or self._deliver is None:
+                    continue
+                channel = msg["channel"]
+                session_id = None if channel == self.broadcast_channel else channel[prefix_len:]
+                self._deliver(session_id, msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket backplane listener error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def publish(self, session_id: Optional[str], message: str) -> None:
+        await self._client.publish(self._channel(session_id), message)
+
+    async def subscribe(self, session_id: str) -> None:
+        if session_id not in self._subscribed:
+            self._subscribed.add(session_id)
+            await self._pubsub.subscribe(self._channel(session_id))
+
+    async def unsubscribe(self, session_id: str) -> None:
+        if session_id in self._subscribed:
+            self._subscribed.discard(session_id)
+            await self._pubsub.unsubscribe(self._channel(session_id))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        self._subscribed.clear()
+
+
+# ============================================================================
+# Backplane Factory
+# ============================================================================
+
+def get_backplane() -> WebSocketBackplane:
+    """
+    Create the backplane for this process.
+
+    Priority:
+    1. Redis (if configured and the redis package is installed)
+    2. In-process (single worker only)
+    """
+    redis_url = getattr(settings, "REDIS_URL", None)
+    if redis_url:
+        try:
+            import redis.asyncio  # noqa: F401
+
+            logger.info("Using Redis WebSocket backplane")
+            return RedisBackplane(redis_url)
+        except ImportError:
+            logger.warning("redis package not installed - Redis backplane unavailable")
+
+    logger.info("Using in-process WebSocket backplane (single worker only)")
+    return InProcessBackplane()
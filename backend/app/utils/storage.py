@@ -143,6 +143,9 @@ async def save_uploaded_images(user_id: str, files: List[UploadFile], folder_typ
     """
     Save uploaded images to user's directory.
     
+    See app.services.media.image_ingest.ingest_uploaded_images for the
+    content hashes and pre-generated derivatives.
+    
     Args:
         user_id: User ID
         files: List of uploaded files
@@ -158,63 +161,11 @@ async def save_uploaded_images(user_id: str, files: List[UploadFile], folder_typ
     if folder_type not in ("brand_styles", "products"):
         raise ValueError(f"Invalid folder_type: {folder_type}. Must be 'brand_styles' or 'products'")
     
-    # Ensure directory exists
-    user_dir = ensure_user_directory(user_id, folder_type)
-    
-    saved_paths = []
-    
-    for file in files:
-        # Validate file
-        if not validate_image_file(file):
-            logger.warning(f"Skipping invalid file: {file.filename}")
-            continue
-        
-        # Sanitize filename (preserve original but remove special characters that could cause issues)
-        # When using webkitdirectory, filenames may include path separators - extract just the filename
-        filename = file.filename or "image"
-        # Extract just the filename (remove any path components from webkitdirectory)
-        filename = Path(filename).name
-        # Replace potentially dangerous characters but preserve valid characters
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in (".", "-", "_")).strip()
-        
-        # Ensure filename has extension
-        if not Path(safe_filename).suffix:
-            # Add extension based on content type
-            if file.content_type == "image/webp":
-                safe_filename += ".webp"
-            elif file.content_type in ("image/jpeg", "image/jpg"):
-                safe_filename += ".jpg"
-            elif file.content_type == "image/png":
-                safe_filename += ".png"
-        
-        # Handle duplicate filenames by appending number
-        file_path = user_dir / safe_filename
-        counter = 1
-        while file_path.exists():
-            stem = Path(safe_filename).stem
-            suffix = Path(safe_filename).suffix
-            safe_filename = f"{stem}_{counter}{suffix}"
-            file_path = user_dir / safe_filename
-            counter += 1
-        
-        # Read file contents
-        content = await file.read()
-        
-        # Save file
-        file_path.write_bytes(content)
-        
-        # Store path relative to BACKEND_DIR for consistency
-        # This ensures the path works regardless of where the app is run from
-        try:
-            relative_path = str(file_path.relative_to(BACKEND_DIR))
-        except ValueError:
-            # If not relative to BACKEND_DIR, use absolute path as fallback
-            relative_path = str(file_path.absolute())
-        saved_paths.append(relative_path)
-        
-        logger.info(f"Saved image: {relative_path} (absolute: {file_path.absolute()})")
-    
-    return saved_paths
+    # Streaming, dedup and derivative generation live in the ingest service
+    from app.services.media.image_ingest import ingest_uploaded_images
+
+    ingested = await ingest_uploaded_images(user_id, files, folder_type)
+    return [image.relative_path for image in ingested]
 
 
 def delete_user_folder(user_id: str, folder_type: str) -> None:
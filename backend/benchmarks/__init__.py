@@ -0,0 +1,5 @@
+"""
+Hermetic end-to-end benchmarks against local fake Replicate and OpenAI servers.
+
+Run with `python -m benchmarks.run --help` from the backend directory.
+"""
@@ -0,0 +1,471 @@
+"""
+Local stand-ins for the Replicate and OpenAI APIs.
+
+Both servers speak enough of the real wire protocol for the official SDKs
+(pointed at them with REPLICATE_BASE_URL / OPENAI_BASE_URL) to run the full
+pipelines unchanged. Latency is sampled from a configurable distribution,
+and a fraction of requests can be answered with 429s or failures to exercise
+the retry paths.
+
+Latency specs:
+    fixed:2            always 2 seconds
+    uniform:1,3        between 1 and 3 seconds
+    normal:20,5        mean 20, standard deviation 5 (clamped at 0)
+    lognormal:3,0.4    exp(N(3, 0.4)) seconds, a long-tailed provider queue
+"""
+import json
+import logging
+import random
+import re
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Model name keywords that produce video rather than image output
+VIDEO_MODEL_KEYWORDS = ("video", "kling", "veo", "sora", "wan", "hailuo", "minimax", "seedance", "gen3", "gen4", "ltx", "pixverse")
+
+
+@dataclass
+class LatencyModel:
+    """Latency distribution parsed from a spec such as "lognormal:3,0.4"."""
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+    scale: float = 1.0  # multiplies every sample, to shrink runs for smoke tests
+
+    @classmethod
+    def parse(cls, spec: str, scale: float = 1.0) -> "LatencyModel":
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value.strip()] if params else []
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}' (expected e.g. fixed:2, uniform:1,3, lognormal:3,0.4)")
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0, scale)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            seconds = self.a
+        elif self.kind == "uniform":
+            seconds = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            seconds = rng.gauss(self.a, self.b)
+        else:
+            seconds = rng.lognormvariate(self.a, self.b)
+        return max(0.0, seconds) * self.scale
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _png(width: int, height: int, rgb: Tuple[int, int, int] = (128, 128, 128)) -> bytes:
+    """A solid-colour PNG, built without an imaging library."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgb) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _ffmpeg_binary() -> Optional[str]:
+    binary = shutil.which("ffmpeg")
+    if binary:
+        return binary
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def prepare_media(media_dir: Path, video_seconds: int = 5) -> Dict[str, Path]:
+    """
+    Canned outputs served for every prediction.
+
+    Existing image.png / video.mp4 / audio.mp3 files in media_dir are reused,
+    so real sample clips can be dropped in. Missing ones are generated: the
+    image directly, video and audio with ffmpeg.
+
+    Returns:
+        Dict of kind ("image", "video", "audio") to file path
+    """
+    media_dir.mkdir(parents=True, exist_ok=True)
+    media = {
+        "image": media_dir / "image.png",
+        "video": media_dir / "video.mp4",
+        "audio": media_dir / "audio.mp3",
+    }
+    if not media["image"].exists():
+        media["image"].write_bytes(_png(720, 1280))
+
+    ffmpeg = _ffmpeg_binary()
+    commands = {
+        "video": [
+            "-f", "lavfi", "-i", f"color=c=gray:s=720x1280:d={video_seconds}:r=24",
+            "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo",
+            "-shortest", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac",
+        ],
+        "audio": ["-f", "lavfi", "-i", f"sine=frequency=440:duration={video_seconds}", "-c:a", "libmp3lame"],
+    }
+    for kind, args in commands.items():
+        if media[kind].exists():
+            continue
+        if not ffmpeg:
+            raise RuntimeError(f"ffmpeg not found: place a canned {media[kind].name} in {media_dir}")
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", *args, str(media[kind])], check=True)
+    return media
+
+
+class _FakeServer:
+    """Threaded HTTP server with latency and fault injection shared by both fakes."""
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        rate_limit_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.counters: Dict[str, int] = {"requests": 0, "rate_limited": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _draw(self) -> Tuple[float, bool, bool]:
+        """Sample (latency, rate limited, failed) for one request."""
+        with self._lock:
+            self.counters["requests"] += 1
+            latency = self.latency.sample(self.rng)
+            limited = self.rng.random() < self.rate_limit_rate
+            failed = not limited and self.rng.random() < self.failure_rate
+            if limited:
+                self.counters["rate_limited"] += 1
+            if failed:
+                self.counters["failed"] += 1
+        return latency, limited, failed
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug(f"{type(server).__name__}: {format % args}")
+
+            def _body(self) -> bytes:
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_bytes(status, json.dumps(payload).encode(), "application/json", headers)
+
+            def send_bytes(self, status: int, data: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                server.handle(self, "GET", self.path, b"")
+
+            def do_POST(self):
+                server.handle(self, "POST", self.path, self._body())
+
+        return Handler
+
+    def handle(self, request, method: str, path: str, body: bytes) -> None:
+        raise NotImplementedError
+
+
+class FakeReplicateServer(_FakeServer):
+    """
+    Replicate predictions API.
+
+    Predictions move from "starting" to "processing" to "succeeded" (or
+    "failed") as wall-clock time passes, so the SDK's polling loops see the
+    same sequence of states as against the real service. Queue and run
+    latencies are sampled separately and reported through created_at,
+    started_at and completed_at like real predictions.
+    """
+
+    def __init__(self, media: Dict[str, Path], queue_latency: Optional[LatencyModel] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.media = media
+        self.queue_latency = queue_latency or LatencyModel("fixed", 0.0)
+        self.predictions: Dict[str, Dict[str, Any]] = {}
+
+    def _create(self, model: str, version: Optional[str], payload: Dict[str, Any], run_seconds: float, failed: bool) -> Dict[str, Any]:
+        with self._lock:
+            queue_seconds = self.queue_latency.sample(self.rng)
+        prediction = {
+            "id": uuid.uuid4().hex[:20],
+            "model": model,
+            "version": version or "fake",
+            "input": payload.get("input", {}),
+            "created": time.time(),
+            "queue_seconds": queue_seconds,
+            "run_seconds": run_seconds,
+            "fail": failed,
+            "canceled": None,
+        }
+        with self._lock:
+            self.predictions[prediction["id"]] = prediction
+        return prediction
+
+    def _output(self, model: str) -> Any:
+        name = model.lower()
+        if any(keyword in name for keyword in ("music", "audio", "sound", "tts")):
+            return f"{self.base_url}/files/audio.mp3"
+        if any(keyword in name for keyword in VIDEO_MODEL_KEYWORDS):
+            return f"{self.base_url}/files/video.mp4"
+        return [f"{self.base_url}/files/image.png"]
+
+    def render(self, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        created = prediction["created"]
+        started = created + prediction["queue_seconds"]
+        completed = started + prediction["run_seconds"]
+        if prediction["canceled"] is not None:
+            status, completed = "canceled", prediction["canceled"]
+        elif now < started:
+            status = "starting"
+        elif now < completed:
+            status = "processing"
+        else:
+            status = "failed" if prediction["fail"] else "succeeded"
+
+        terminal = status in ("succeeded", "failed", "canceled")
+        url = f"{self.base_url}/v1/predictions/{prediction['id']}"
+        return {
+            "id": prediction["id"],
+            "model": prediction["model"],
+            "version": prediction["version"],
+            "input": prediction["input"],
+            "status": status,
+            "output": self._output(prediction["model"]) if status == "succeeded" else None,
+            "error": "Injected failure from the fake Replicate server" if status == "failed" else None,
+            "logs": "",
+            "metrics": {"predict_time": prediction["run_seconds"]} if terminal else {},
+            "created_at": _iso(created),
+            "started_at": _iso(min(started, completed)) if status != "starting" else None,
+            "completed_at": _iso(completed) if terminal else None,
+            "urls": {"get": url, "cancel": f"{url}/cancel"},
+        }
+
+    def handle(self, request, method: str, path: str, body: bytes) -> None:
+        path = path.split("?", 1)[0]
+
+        if method == "GET" and path.startswith("/files/"):
+            kind = Path(path).stem
+            media = self.media.get(kind)
+            if media is None or not media.exists():
+                request.send_json(404, {"detail": "Not found"})
+                return
+            content_type = {"image": "image/png", "video": "video/mp4", "audio": "audio/mpeg"}[kind]
+            request.send_bytes(200, media.read_bytes(), content_type)
+            return
+
+        if method == "POST" and path == "/v1/files":
+            # SDK upload of file inputs (reference images); the content is not needed
+            file_id = uuid.uuid4().hex[:20]
+            request.send_json(201, {
+                "id": file_id,
+                "name": "upload",
+                "content_type": "application/octet-stream",
+                "size": len(body),
+                "etag": file_id,
+                "checksums": {},
+                "metadata": {},
+                "created_at": _iso(time.time()),
+                "expires_at": None,
+                "urls": {"get": f"{self.base_url}/files/image.png"},
+            })
+            return
+
+        model_match = re.fullmatch(r"/v1/models/([^/]+)/([^/]+)/predictions", path)
+        if method == "POST" and (model_match or path == "/v1/predictions"):
+            run_seconds, limited, failed = self._draw()
+            if limited:
+                request.send_json(429, {"detail": "Request was throttled.", "status": 429}, {"Retry-After": "1"})
+                return
+            payload = json.loads(body or b"{}")
+            if model_match:
+                model, version = f"{model_match.group(1)}/{model_match.group(2)}", None
+            else:
+                version = payload.get("version", "")
+                model = version.split(":", 1)[0] if ":" in version else version
+            prediction = self._create(model, version, payload, run_seconds, failed)
+            request.send_json(201, self.render(prediction))
+            return
+
+        prediction_match = re.fullmatch(r"/v1/predictions/([^/]+)(/cancel)?", path)
+        if prediction_match:
+            with self._lock:
+                prediction = self.predictions.get(prediction_match.group(1))
+            if prediction is None:
+                request.send_json(404, {"detail": "Not found"})
+                return
+            if method == "POST" and prediction_match.group(2):
+                if self.render(prediction)["status"] in ("starting", "processing"):
+                    prediction["canceled"] = time.time()
+            request.send_json(200, self.render(prediction))
+            return
+
+        request.send_json(404, {"detail": f"Fake Replicate server has no route for {method} {path}"})
+
+
+class ResponseLibrary:
+    """
+    Canned chat completion content.
+
+    Rules are checked in order; the first whose "match" substrings all occur
+    in the (lower-cased) request messages supplies the content. Requests that
+    match no rule get default_json when they ask for JSON (response_format or
+    a "json" instruction) and default_text otherwise.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        data = json.loads((path or FIXTURES_DIR / "chat_responses.json").read_text())
+        self.rules: List[Dict[str, Any]] = data.get("rules", [])
+        self.default_json: Any = data["default_json"]
+        self.default_text: str = data["default_text"]
+
+    @staticmethod
+    def _text(messages: List[Dict[str, Any]]) -> str:
+        parts = []
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, list):
+                parts.extend(part.get("text", "") for part in content if isinstance(part, dict))
+            elif content:
+                parts.append(str(content))
+        return "\n".join(parts).lower()
+
+    def respond(self, payload: Dict[str, Any]) -> str:
+        text = self._text(payload.get("messages", []))
+        for rule in self.rules:
+            if all(needle.lower() in text for needle in rule["match"]):
+                content = rule["content"]
+                return content if isinstance(content, str) else json.dumps(content)
+        response_format = (payload.get("response_format") or {}).get("type")
+        if response_format in ("json_object", "json_schema") or "json" in text:
+            return json.dumps(self.default_json)
+        return self.default_text
+
+
+class FakeOpenAIServer(_FakeServer):
+    """OpenAI chat completions, including streamed responses."""
+
+    def __init__(self, responses: Optional[ResponseLibrary] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.responses = responses or ResponseLibrary()
+
+    def handle(self, request, method: str, path: str, body: bytes) -> None:
+        path = path.split("?", 1)[0]
+        if not (method == "POST" and path.endswith("/chat/completions")):
+            request.send_json(404, {"error": {"message": f"Fake OpenAI server has no route for {method} {path}"}})
+            return
+
+        latency, limited, failed = self._draw()
+        if limited:
+            request.send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": "1"},
+            )
+            return
+        time.sleep(latency)
+        if failed:
+            request.send_json(500, {"error": {"message": "Injected failure from the fake OpenAI server", "type": "server_error"}})
+            return
+
+        payload = json.loads(body or b"{}")
+        content = self.responses.respond(payload)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = payload.get("model", "gpt-4o")
+        usage = {"prompt_tokens": len(json.dumps(payload.get("messages", []))) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not payload.get("stream"):
+            request.send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }],
+                "usage": usage,
+            })
+            return
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(data)}\n\n".encode()
+
+        pieces = [chunk({"role": "assistant", "content": ""})]
+        pieces += [chunk({"content": content[i:i + 64]}) for i in range(0, len(content), 64)]
+        pieces += [chunk({}, "stop"), b"data: [DONE]\n\n"]
+        request.send_bytes(200, b"".join(pieces), "text/event-stream")
@@ -0,0 +1,125 @@
+"""
+Benchmark result summaries and baseline comparison.
+"""
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Direction of each compared metric: 1 if lower is better, -1 if higher is better
+METRIC_DIRECTIONS = {
+    "throughput_per_min": -1,
+    "latency_p50": 1,
+    "latency_p99": 1,
+    "error_rate": 1,
+    "cpu_seconds_per_request": 1,
+    "rss_peak_mb": 1,
+    "db_queries_per_request": 1,
+}
+
+# Absolute slack on top of the relative tolerance, for metrics whose baseline can be 0
+ABSOLUTE_SLACK = {
+    "error_rate": 0.01,
+    "db_queries_per_request": 1.0,
+}
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (q in 0-100) of the values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(
+    latencies: List[float],
+    errors: int,
+    wall_seconds: float,
+    cpu_seconds: float,
+    rss_peak_mb: float,
+    db_queries: int,
+) -> Dict[str, Any]:
+    """
+    Summary of one scenario run.
+
+    Args:
+        latencies: End-to-end seconds of the successful requests
+        errors: Number of failed requests
+        wall_seconds: Wall-clock duration of the whole run
+        cpu_seconds: CPU time of the server process (and its ffmpeg children)
+        rss_peak_mb: Peak resident set size of the server process
+        db_queries: SQL statements executed during the run
+    """
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_min": round(len(latencies) / wall_seconds * 60, 3) if wall_seconds > 0 else 0.0,
+        "latency_p50": _round(percentile(latencies, 50)),
+        "latency_p99": _round(percentile(latencies, 99)),
+        "latency_max": _round(max(latencies) if latencies else None),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "cpu_seconds_per_request": round(cpu_seconds / total, 3) if total else 0.0,
+        "cpu_utilization": round(cpu_seconds / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "rss_peak_mb": round(rss_peak_mb, 1),
+        "db_queries": db_queries,
+        "db_queries_per_request": round(db_queries / total, 2) if total else 0.0,
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """
+    Regressions of a report against a baseline report.
+
+    A metric regresses when it is worse than the baseline by more than the
+    relative tolerance (plus a small absolute slack for metrics that are
+    usually 0). Scenarios missing from either side are skipped, and runs
+    against a differently configured fake provider are not comparable.
+
+    Returns:
+        Human-readable regression messages (empty if there are none)
+    """
+    if report.get("config") != baseline.get("config"):
+        return ["Fake provider configuration differs from the baseline; re-record it with --write-baseline"]
+
+    regressions = []
+    for scenario, current in report.get("scenarios", {}).items():
+        reference = baseline.get("scenarios", {}).get(scenario)
+        if not reference:
+            continue
+        for metric, direction in METRIC_DIRECTIONS.items():
+            value, expected = current.get(metric), reference.get(metric)
+            if value is None or expected is None:
+                continue
+            slack = ABSOLUTE_SLACK.get(metric, 0.0)
+            if direction > 0 and value > expected * (1 + tolerance) + slack:
+                regressions.append(f"{scenario}.{metric}: {value} > baseline {expected} (+{tolerance:.0%})")
+            elif direction < 0 and value < expected * (1 - tolerance) - slack:
+                regressions.append(f"{scenario}.{metric}: {value} < baseline {expected} (-{tolerance:.0%})")
+    return regressions
+
+
+def load_report(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text table of the scenario summaries."""
+    columns = ("requests", "errors", "throughput_per_min", "latency_p50", "latency_p99", "cpu_utilization", "rss_peak_mb", "db_queries_per_request")
+    header = ["scenario", "reqs", "errs", "thru/min", "p50 s", "p99 s", "cpu", "rss MB", "db q/req"]
+    rows = [header]
+    for scenario, summary in report.get("scenarios", {}).items():
+        rows.append([scenario] + ["-" if summary.get(column) is None else str(summary[column]) for column in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Hermetic end-to-end benchmark of the generation pipelines.
+
+Starts the fake Replicate and OpenAI servers, points the SDKs at them, runs
+the FastAPI app in-process on a throwaway SQLite database and output
+directory, and drives the public API at a configurable concurrency. Each
+scenario reports throughput, p50/p99 end-to-end latency, CPU time, peak RSS
+and the number of SQL statements executed, and the whole report is compared
+against a recorded baseline.
+
+Usage:
+    python -m benchmarks.run [--scenario NAME ...] [--concurrency N] [--requests N] [options]
+
+Scenarios:
+    generate        POST /api/generate, polled until the generation finishes
+    parallel        POST /api/generate/parallel with two variations
+    master_mode     POST /api/master-mode/generate-story with scenes and videos
+    interactive     POST /api/v1/interactive/start in auto mode, polled until complete
+    editor_export   Editor load and POST /api/editor/{id}/export of a finished generation
+
+Examples:
+    # Smoke run: every scenario once, provider latencies shrunk 20x
+    python -m benchmarks.run --scenario all --requests 1 --latency-scale 0.05
+
+    # Load /generate with 8 concurrent users and a long-tailed video queue
+    python -m benchmarks.run --scenario generate --concurrency 8 --requests 32 \\
+        --replicate-queue-latency lognormal:2,0.6 --rate-limit-rate 0.05
+
+    # Record the baseline that later runs are compared against
+    python -m benchmarks.run --scenario all --requests 4 --write-baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.fakes import FakeOpenAIServer, FakeReplicateServer, LatencyModel, prepare_media  # noqa: E402
+from benchmarks.report import compare_to_baseline, format_report, load_report, summarize  # noqa: E402
+
+logger = logging.getLogger("benchmarks")
+
+SCENARIOS = ("generate", "parallel", "master_mode", "interactive", "editor_export")
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+PROMPT = "A 15 second vertical ad for a cold-pressed orange juice brand: a calm, sunlit morning kitchen ritual."
+
+# Token of the user the current request runs as (None: the client's default user)
+_request_token: ContextVar[Optional[str]] = ContextVar("request_token", default=None)
+
+
+class BenchmarkRequestError(RuntimeError):
+    """A benchmarked request ended in a failed state."""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    # Children: ffmpeg/ffprobe subprocesses spawned by the pipelines
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+class ResourceSampler:
+    """Samples the process RSS in the background and tracks the peak."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = _rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _rss_mb())
+
+
+class QueryCounter:
+    """Counts SQL statements executed through an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        with self._lock:
+            self.count += 1
+
+
+class Scenarios:
+    """The benchmarked user flows; each method runs one request end to end."""
+
+    # Scenarios whose requests act on what setup_<name> created, as its owner (the default user).
+    # Every other request runs as a user of its own, so the per-user hourly generation limit
+    # never throttles a run.
+    SHARED_USER = ("editor_export",)
+
+    def __init__(self, client, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.editor_generation_id: Optional[str] = None
+
+    def _generate_payload(self) -> Dict[str, Any]:
+        payload = {"prompt": PROMPT, "target_duration": self.args.target_duration}
+        if self.args.model:
+            payload["model"] = self.args.model
+        return payload
+
+    @staticmethod
+    def _auth() -> Dict[str, str]:
+        token = _request_token.get()
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    async def _post(self, url: str, **kwargs) -> Dict[str, Any]:
+        response = await self.client.post(url, headers=self._auth(), **kwargs)
+        if response.status_code >= 400:
+            raise BenchmarkRequestError(f"POST {url} returned {response.status_code}: {response.text[:300]}")
+        return response.json()
+
+    async def _poll(self, url: str, done: Callable[[Dict[str, Any]], Optional[bool]]) -> Dict[str, Any]:
+        """Poll url until done() returns True (finished) or False (failed)."""
+        deadline = time.monotonic() + self.args.timeout
+        while time.monotonic() < deadline:
+            response = await self.client.get(url, headers=self._auth())
+            if response.status_code >= 400:
+                raise BenchmarkRequestError(f"GET {url} returned {response.status_code}: {response.text[:300]}")
+            data = response.json()
+            finished = done(data)
+            if finished is True:
+                return data
+            if finished is False:
+                raise BenchmarkRequestError(f"{url}: {data.get('status')} {data.get('error') or ''}".strip())
+            await asyncio.sleep(self.args.poll_interval)
+        raise BenchmarkRequestError(f"{url}: timed out after {self.args.timeout}s")
+
+    @staticmethod
+    def _generation_done(data: Dict[str, Any]) -> Optional[bool]:
+        if data.get("status") == "completed":
+            return True
+        if data.get("status") in ("failed", "cancelled"):
+            return False
+        return None
+
+    async def _wait_for_generation(self, generation_id: str) -> None:
+        await self._poll(f"/api/status/{generation_id}", self._generation_done)
+
+    async def generate(self) -> None:
+        created = await self._post("/api/generate", json=self._generate_payload())
+        await self._wait_for_generation(created["generation_id"])
+
+    async def parallel(self) -> None:
+        variation = self._generate_payload()
+        created = await self._post(
+            "/api/generate/parallel",
+            json={"variations": [variation, dict(variation)], "comparison_type": "settings"},
+        )
+        await asyncio.gather(*(self._wait_for_generation(gid) for gid in created["generation_ids"]))
+
+    async def master_mode(self) -> None:
+        # Synchronous endpoint: the response arrives once the videos are stitched
+        await self._post(
+            "/api/master-mode/generate-story",
+            data={
+                "prompt": PROMPT,
+                "client_generation_id": str(uuid.uuid4()),
+                "max_iterations": "1",
+                "generate_scenes": "true",
+                "generate_videos": "true",
+            },
+        )
+
+    async def interactive(self) -> None:
+        created = await self._post(
+            "/api/v1/interactive/start",
+            json={"prompt": PROMPT, "target_duration": self.args.target_duration, "mode": "auto"},
+        )
+
+        def done(data: Dict[str, Any]) -> Optional[bool]:
+            return {"complete": True, "error": False}.get(data.get("status"))
+
+        await self._poll(f"/api/v1/interactive/{created['session_id']}/status", done)
+
+    async def setup_editor_export(self) -> None:
+        """Editor export needs a finished generation to edit; it is created untimed."""
+        created = await self._post("/api/generate", json=self._generate_payload())
+        await self._wait_for_generation(created["generation_id"])
+        self.editor_generation_id = created["generation_id"]
+
+    async def editor_export(self) -> None:
+        generation_id = self.editor_generation_id
+        response = await self.client.get(f"/api/editor/{generation_id}")
+        if response.status_code >= 400:
+            raise BenchmarkRequestError(f"Editor load returned {response.status_code}: {response.text[:300]}")
+        created = await self._post(f"/api/editor/{generation_id}/export", json={})
+
+        def done(data: Dict[str, Any]) -> Optional[bool]:
+            return {"completed": True, "failed": False}.get(data.get("status"))
+
+        await self._poll(f"/api/editor/export/{created['export_id']}/status", done)
+
+
+async def run_scenario(
+    scenarios: Scenarios,
+    name: str,
+    concurrency: int,
+    requests: int,
+    queries: QueryCounter,
+) -> Dict[str, Any]:
+    """Run `requests` requests of one scenario, `concurrency` at a time, and summarize them."""
+    setup: Optional[Callable[[], Awaitable[None]]] = getattr(scenarios, f"setup_{name}", None)
+    if setup:
+        await setup()
+
+    request = getattr(scenarios, name)
+    # Users are created before the measurement so their inserts are not counted
+    tokens = [None if name in scenarios.SHARED_USER else _create_user_token() for _ in range(requests)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures: List[str] = []
+
+    async def one(token: Optional[str]) -> None:
+        async with semaphore:
+            # Each request runs in its own task, so the user is set for this request only
+            _request_token.set(token)
+            started = time.perf_counter()
+            try:
+                await request()
+            except Exception as e:
+                failures.append(str(e))
+                logger.warning(f"[{name}] request failed: {e}")
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    queries_before, cpu_before = queries.count, _cpu_seconds()
+    with ResourceSampler() as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(token) for token in tokens))
+        wall = time.perf_counter() - started
+
+    summary = summarize(
+        latencies,
+        errors=len(failures),
+        wall_seconds=wall,
+        cpu_seconds=_cpu_seconds() - cpu_before,
+        rss_peak_mb=sampler.peak_mb,
+        db_queries=queries.count - queries_before,
+    )
+    if failures:
+        summary["sample_errors"] = failures[:3]
+    return summary
+
+
+def _configure_environment(args: argparse.Namespace, workdir: Path, replicate_url: str, openai_url: str) -> None:
+    """Point the app at the fakes and a throwaway database; must run before `app` is imported."""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{workdir / 'benchmark.db'}",
+        "REPLICATE_API_TOKEN": "r8_fake_benchmark_token",
+        "REPLICATE_BASE_URL": replicate_url,
+        "OPENAI_API_KEY": "sk-fake-benchmark-key",
+        "OPENAI_BASE_URL": f"{openai_url}/v1",
+        "STORAGE_MODE": "local",
+        "OUTPUT_BASE_DIR": str(workdir / "cli_output"),
+        "TRACE_DIR": str(workdir / "traces"),
+        "STAGE_TIMING_PATH": str(workdir / "stage_timings.json"),
+        "STATIC_BASE_URL": "",
+    })
+    for name in ("REDIS_URL", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.pop(name, None)
+
+
+def _create_user_token() -> str:
+    from app.core.security import create_access_token, hash_password
+    from app.db.base import Base, SessionLocal, engine
+    from app.db.models import User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(username=f"bench-{uuid.uuid4().hex[:8]}", password_hash=hash_password("benchmark"), email=None)
+        db.add(user)
+        db.commit()
+        return create_access_token(data={"sub": user.id, "username": user.username})
+    finally:
+        db.close()
+
+
+def _start_app(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("Benchmark app server did not start")
+        time.sleep(0.05)
+    return server, thread
+
+
+async def _drive(args: argparse.Namespace, base_url: str, token: str, queries: QueryCounter) -> Dict[str, Any]:
+    import httpx
+
+    results = {}
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=httpx.Timeout(args.timeout),
+    ) as client:
+        scenarios = Scenarios(client, args)
+        for name in args.scenarios:
+            logger.info(f"Running {name}: {args.requests} requests at concurrency {args.concurrency}")
+            results[name] = await run_scenario(scenarios, name, args.concurrency, args.requests, queries)
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected scenarios against the fakes and return the report."""
+    workdir = Path(tempfile.mkdtemp(prefix="admint-bench-"))
+    media = prepare_media(Path(args.media_dir) if args.media_dir else workdir / "media")
+
+    replicate_latency = LatencyModel.parse(args.replicate_latency, args.latency_scale)
+    replicate = FakeReplicateServer(
+        media,
+        queue_latency=LatencyModel.parse(args.replicate_queue_latency, args.latency_scale),
+        latency=replicate_latency,
+        rate_limit_rate=args.rate_limit_rate,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    openai = FakeOpenAIServer(
+        latency=LatencyModel.parse(args.openai_latency, args.latency_scale),
+        rate_limit_rate=args.rate_limit_rate,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+
+    with replicate, openai:
+        _configure_environment(args, workdir, replicate.base_url, openai.base_url)
+        # The app writes pipeline output relative to the working directory
+        os.chdir(workdir)
+
+        from app.db.base import engine
+        from app.main import app
+
+        if not args.verbose:
+            # setup_logging() ran on import; keep the pipelines' INFO chatter out of the run
+            logging.getLogger("app").setLevel(logging.WARNING)
+        queries = QueryCounter(engine)
+        token = _create_user_token()
+        port = _free_port()
+        server, thread = _start_app(app, port)
+        try:
+            scenarios = asyncio.run(_drive(args, f"http://127.0.0.1:{port}", token, queries))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=30)
+
+    return {
+        "recorded_at": datetime.utcnow().isoformat(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "model": args.model,
+            "target_duration": args.target_duration,
+            "replicate_latency": args.replicate_latency,
+            "replicate_queue_latency": args.replicate_queue_latency,
+            "openai_latency": args.openai_latency,
+            "latency_scale": args.latency_scale,
+            "rate_limit_rate": args.rate_limit_rate,
+            "failure_rate": args.failure_rate,
+        },
+        "providers": {"replicate": dict(replicate.counters), "openai": dict(openai.counters)},
+        "scenarios": scenarios,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Hermetic end-to-end benchmark against fake Replicate/OpenAI servers",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS + ("all",), help="Scenario to run (repeatable, default: generate)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Concurrent requests (default: 2)")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per scenario (default: 4)")
+    parser.add_argument("--model", default=None, help="Video model to request (default: the app default)")
+    parser.add_argument("--target-duration", type=int, default=15, help="Target video duration in seconds (default: 15)")
+    parser.add_argument("--replicate-latency", default="lognormal:3.0,0.3", help="Prediction run time (default: lognormal:3.0,0.3, ~20s)")
+    parser.add_argument("--replicate-queue-latency", default="uniform:1,5", help="Prediction queue time (default: uniform:1,5)")
+    parser.add_argument("--openai-latency", default="lognormal:1.0,0.4", help="Chat completion latency (default: lognormal:1.0,0.4, ~3s)")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="Multiplier for all provider latencies (default: 0.1)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of provider requests answered with 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of provider requests that fail")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for latency and fault sampling")
+    parser.add_argument("--timeout", type=float, default=900, help="Per-request timeout in seconds (default: 900)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Status polling interval in seconds (default: 1)")
+    parser.add_argument("--media-dir", default=None, help="Directory with canned image.png / video.mp4 / audio.mp3")
+    parser.add_argument("--report", default=None, help="Write the JSON report to this file")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help=f"Baseline report (default: {DEFAULT_BASELINE.name})")
+    parser.add_argument("--write-baseline", action="store_true", help="Save this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default: 0.2)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show app logs")
+    args = parser.parse_args()
+
+    scenarios = args.scenario or ["generate"]
+    args.scenarios = list(SCENARIOS) if "all" in scenarios else list(dict.fromkeys(scenarios))
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    report = run(args)
+
+    print(format_report(report))
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.write_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nBaseline written to {baseline_path}")
+        return 0
+
+    baseline = load_report(baseline_path)
+    if baseline is None:
+        print(f"\nNo baseline at {baseline_path}; record one with --write-baseline")
+        return 0
+    regressions = compare_to_baseline(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"\nNo regressions against {baseline_path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+PyTorch vs quantized ONNX Runtime image scoring on this machine.
+
+Each runtime is measured in its own process: model load (including the
+one-off ONNX export and calibration), per-image latency of
+compute_scores_batch at several batch sizes, and peak RSS. Scores of both
+runtimes are compared image by image.
+
+From the backend/ directory:
+
+    python -m benchmarks.scoring_runtime --batch-sizes 1,4,16 --repeats 3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def _measure(runtime: str, image_paths: List[str], prompts: List[str], batch_sizes: List[int], repeats: int) -> Dict[str, Any]:
+    """Runs in a fresh process so that settings and peak RSS belong to one runtime."""
+    os.environ["SCORING_RUNTIME"] = runtime
+    os.environ["SCORING_SERVICE_SOCKET"] = ""
+    from app.services.pipeline import image_quality_scoring as scoring
+    from app.services.pipeline import scoring_runtime
+
+    started = time.perf_counter()
+    # Exports and calibrates the quantized encoders (cached on disk afterwards)
+    scoring.warm_up_models()
+    scores = scoring.compute_scores_batch(list(zip(image_paths, prompts)))
+    load_seconds = time.perf_counter() - started
+
+    latency = {}
+    for batch_size in batch_sizes:
+        items = [(image_paths[i % len(image_paths)], prompts[i % len(prompts)]) for i in range(batch_size)]
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            scoring.compute_scores_batch(items)
+            timings.append(time.perf_counter() - started)
+        latency[str(batch_size)] = round(min(timings) / batch_size * 1000, 1)
+
+    return {
+        # Whether any scorer passed calibration and actually ran quantized
+        "quantized": any(encoder is not None for encoder in scoring_runtime._encoders.values()),
+        "load_seconds": round(load_seconds, 2),
+        "ms_per_image": latency,
+        "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "overall": [round(score["overall"], 2) for score in scores],
+    }
+
+
+def _run_isolated(runtime: str, *args) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(_measure, (runtime,) + args)
+
+
+def _model_sizes() -> Dict[str, float]:
+    from app.core.config import settings
+
+    sizes = {}
+    for path in sorted(Path(settings.SCORING_ONNX_DIR).glob("*/*.onnx*")):
+        sizes[f"{path.parent.name}/{path.name}"] = round(path.stat().st_size / 2**20, 1)
+    return sizes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", default="1,4,16", help="Comma-separated batch sizes")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per batch size (best is reported)")
+    parser.add_argument("--report", type=Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    from app.services.pipeline.scoring_runtime import calibration_set
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    images, prompts = calibration_set()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_paths = []
+        for i, image in enumerate(images):
+            image_paths.append(str(Path(temp_dir) / f"{i}.png"))
+            image.save(image_paths[-1])
+        results = {
+            runtime: _run_isolated(runtime, image_paths, prompts, batch_sizes, args.repeats)
+            for runtime in ("torch", "onnx")
+        }
+
+    torch_result, onnx_result = results["torch"], results["onnx"]
+    report = {
+        "runtimes": results,
+        "max_overall_deviation": max(abs(a - b) for a, b in zip(torch_result["overall"], onnx_result["overall"])),
+        "onnx_model_mb": _model_sizes(),
+    }
+    if not onnx_result["quantized"]:
+        print("Quantized scoring is not enabled (onnxruntime missing or calibration failed); both runs used PyTorch")
+    print(f"{'batch':<8}{'torch ms/img':>14}{'onnx ms/img':>14}{'speedup':>10}")
+    for batch_size in batch_sizes:
+        key = str(batch_size)
+        torch_ms, onnx_ms = torch_result["ms_per_image"][key], onnx_result["ms_per_image"][key]
+        print(f"{batch_size:<8}{torch_ms:>14}{onnx_ms:>14}{torch_ms / onnx_ms:>9.2f}x")
+    print(f"peak RSS MB: torch {torch_result['rss_peak_mb']}, onnx {onnx_result['rss_peak_mb']}")
+    print(f"max overall score deviation: {report['max_overall_deviation']:.2f}")
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,20 @@
 """
 Pytest configuration and fixtures.
 """
+import os
+
+# Run per-clip media work inline so patched MoviePy objects apply
+os.environ.setdefault("MEDIA_POOL_WORKERS", "1")
+# Score videos in a thread of the test process so patched evaluate_vbench applies
+os.environ.setdefault("VIDEO_SCORING_WORKERS", "1")
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.core.config import settings
+
 # Import all models to ensure they're registered with Base.metadata
 from app.db.base import Base
 from app.db.models.editing_session import EditingSession
@@ -20,6 +29,14 @@ _ = EditingSession
 _ = QualityMetric
 
 
+@pytest.fixture(scope="session", autouse=True)
+def media_probe_cache_dir(tmp_path_factory):
+    """Persist media probes under a temporary directory instead of MEDIA_PROBE_CACHE_DIR."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "MEDIA_PROBE_CACHE_DIR", str(tmp_path_factory.mktemp("probe_cache")))
+        yield
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """
@@ -1,15 +1,20 @@
 """
 Unit tests for audio layer service.
 """
+import wave
+
+import numpy as np
 import pytest
 from pathlib import Path
 from unittest.mock import MagicMock, patch, Mock
 
 from app.services.pipeline.audio import (
+    MUSIC_VOLUME,
     add_audio_layer,
     _select_music_file,
     _select_sfx_file
 )
+from app.services.pipeline.audio_library import SAMPLE_RATE, AudioLibrary
 
 
 @pytest.fixture
@@ -36,61 +41,57 @@ def mock_audio_clip():
     return clip
 
 
+@pytest.fixture
+def music_library(tmp_path):
+    """Audio library with a 2s stereo music track at -26 LUFS (0.05 amplitude 997 Hz sine)."""
+    music_dir = tmp_path / "music"
+    music_dir.mkdir()
+    t = np.arange(2 * SAMPLE_RATE) / SAMPLE_RATE
+    tone = np.repeat(0.05 * np.sin(2 * np.pi * 997 * t) * 32767, 2).astype("<i2")
+    with wave.open(str(music_dir / "professional.wav"), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(tone.tobytes())
+    library = AudioLibrary(music_dir, tmp_path / "sfx", tmp_path / "cache")
+    with patch('app.services.pipeline.audio.get_audio_library', return_value=library):
+        yield music_dir / "professional.wav"
+
+
+def _mock_video(duration):
+    video = MagicMock()
+    video.duration = duration
+    video.fps = 24.0
+    video.audio = None
+    video.with_audio = MagicMock(return_value=video)
+    return video
+
+
 @patch('app.services.pipeline.audio.VideoFileClip')
-@patch('app.services.pipeline.audio.AudioFileClip')
-@patch('app.services.pipeline.audio.CompositeAudioClip')
-def test_add_audio_layer_basic(
-    mock_composite_audio,
-    mock_audio_clip_class,
-    mock_video_clip_class,
-    tmp_path
-):
-    """Test basic audio layer addition."""
-    # Setup video mock
-    mock_video = MagicMock()
-    mock_video.duration = 15.0
-    mock_video.fps = 24.0
-    mock_video.set_audio = MagicMock(return_value=mock_video)
-    mock_video.write_videofile = MagicMock()
-    mock_video.close = MagicMock()
+def test_add_audio_layer_basic(mock_video_clip_class, music_library, tmp_path):
+    """Test basic audio layer addition from the indexed library (no per-export decode)."""
+    mock_video = _mock_video(1.5)
     mock_video_clip_class.return_value = mock_video
     
-    # Setup music mock
-    mock_music = MagicMock()
-    mock_music.duration = 20.0
-    mock_music.volumex = MagicMock(return_value=mock_music)
-    mock_music.subclip = MagicMock(return_value=mock_music)
-    mock_music.close = MagicMock()
-    mock_audio_clip_class.return_value = mock_music
-    
-    # Mock music file exists - patch the exists check on the returned path
-    with patch('app.services.pipeline.audio._select_music_file') as mock_select:
-        music_path = Path("backend/assets/music/professional.mp3")
-        # Create a mock path that returns True for exists()
-        mock_music_path = MagicMock(spec=Path)
-        mock_music_path.exists.return_value = True
-        mock_music_path.__str__ = lambda x: str(music_path)
-        mock_select.return_value = mock_music_path
-        
-        # Test
+    with patch('app.services.pipeline.audio._select_music_file', return_value=music_library):
         output_path = str(tmp_path / "with_audio.mp4")
         result = add_audio_layer(
             video_path=str(tmp_path / "input.mp4"),
             music_style="professional",
             output_path=output_path
         )
-        
-        # Assertions
-        assert result == output_path
-        assert mock_video_clip_class.called
-        assert mock_audio_clip_class.called
-        assert mock_music.volumex.called  # Volume adjustment
-        assert mock_video.set_audio.called  # Audio attached
-        assert mock_video.write_videofile.called
-        
-        # Verify cleanup
-        mock_video.close.assert_called()
-        mock_music.close.assert_called()
+    
+    # Assertions
+    assert result == output_path
+    assert mock_video.write_videofile.called
+    audio = mock_video.with_audio.call_args[0][0]
+    assert audio.duration == pytest.approx(1.5)
+    # Loudness-normalized to -16 LUFS (+10 dB), then mixed at MUSIC_VOLUME
+    peak = np.abs(audio.to_soundarray()).max()
+    assert peak == pytest.approx(0.05 * 10 ** (10 / 20) * MUSIC_VOLUME, rel=0.05)
+    
+    # Verify cleanup
+    mock_video.close.assert_called()
 
 
 @patch('app.services.pipeline.audio.Path.exists')
@@ -148,49 +149,23 @@ def test_select_sfx_file_not_found(mock_exists):
 
 
 @patch('app.services.pipeline.audio.VideoFileClip')
-@patch('app.services.pipeline.audio.AudioFileClip')
-def test_add_audio_layer_music_trimming(
-    mock_audio_clip_class,
-    mock_video_clip_class,
-    tmp_path
-):
-    """Test that music is trimmed to video duration."""
-    # Setup video (15s)
-    mock_video = MagicMock()
-    mock_video.duration = 15.0
-    mock_video.fps = 24.0
-    mock_video.set_audio = MagicMock(return_value=mock_video)
-    mock_video.write_videofile = MagicMock()
-    mock_video.close = MagicMock()
-    mock_video_clip_class.return_value = mock_video
-    
-    # Setup music (longer than video - 30s)
-    mock_music = MagicMock()
-    mock_music.duration = 30.0
-    mock_music.volumex = MagicMock(return_value=mock_music)
-    mock_music.subclip = MagicMock(return_value=mock_music)
-    mock_music.close = MagicMock()
-    mock_audio_clip_class.return_value = mock_music
-    
-    # Mock music file exists - patch the exists check on the returned path
-    with patch('app.services.pipeline.audio._select_music_file') as mock_select:
-        music_path = Path("backend/assets/music/professional.mp3")
-        # Create a mock path that returns True for exists()
-        mock_music_path = MagicMock(spec=Path)
-        mock_music_path.exists.return_value = True
-        mock_music_path.__str__ = lambda x: str(music_path)
-        mock_select.return_value = mock_music_path
+def test_add_audio_layer_music_trimming(mock_video_clip_class, music_library, tmp_path):
+    """Test that music is trimmed to shorter videos and looped for longer ones."""
+    for video_duration in (1.0, 5.0):
+        mock_video = _mock_video(video_duration)
+        mock_video_clip_class.return_value = mock_video
         
-        # Test
-        output_path = str(tmp_path / "with_audio.mp4")
-        add_audio_layer(
-            video_path=str(tmp_path / "input.mp4"),
-            music_style="professional",
-            output_path=output_path
-        )
+        with patch('app.services.pipeline.audio._select_music_file', return_value=music_library):
+            add_audio_layer(
+                video_path=str(tmp_path / "input.mp4"),
+                music_style="professional",
+                output_path=str(tmp_path / "with_audio.mp4")
+            )
         
-        # Verify music was trimmed
-        mock_music.subclip.assert_called_with(0, 15.0)
+        audio = mock_video.with_audio.call_args[0][0]
+        assert audio.duration == pytest.approx(video_duration)
+        # Music is audible through the final second (looped past its 2s length)
+        assert np.abs(audio.to_soundarray()[-SAMPLE_RATE // 2:]).max() > 0.01
 
 
 def test_add_audio_layer_cancellation(tmp_path):
@@ -0,0 +1,95 @@
+"""
+Unit tests for the indexed audio library.
+"""
+import os
+import wave
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.pipeline.audio_library import (
+    SAMPLE_RATE,
+    AudioLibrary,
+    estimate_bpm,
+    integrated_loudness,
+    mix_into,
+)
+
+
+def _sine(seconds, frequency=997.0, amplitude=0.1, sample_rate=SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    return np.stack([tone, tone], axis=1)
+
+
+def _write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+def test_integrated_loudness_matches_bs1770_reference():
+    """Test the BS.1770 calibration: a 997 Hz stereo sine at -20 dBFS reads -20 LUFS."""
+    assert integrated_loudness(_sine(5.0, sample_rate=48000), 48000) == pytest.approx(-20.0, abs=0.1)
+    assert integrated_loudness(_sine(5.0), SAMPLE_RATE) == pytest.approx(-20.0, abs=0.1)
+    # 20 dB quieter reads 20 LU lower; silence has no loudness
+    assert integrated_loudness(_sine(5.0, amplitude=0.01), SAMPLE_RATE) == pytest.approx(-40.0, abs=0.1)
+    assert integrated_loudness(np.zeros((SAMPLE_RATE, 2), dtype=np.float32), SAMPLE_RATE) is None
+
+
+def test_estimate_bpm_from_click_track():
+    """Test that a 120 BPM click track is detected, and short clips are skipped."""
+    clicks = np.zeros((10 * SAMPLE_RATE, 2), dtype=np.float32)
+    burst = _sine(0.02, frequency=2000.0, amplitude=0.8)
+    for beat in range(20):
+        start = int(beat * 0.5 * SAMPLE_RATE)
+        clicks[start:start + len(burst)] = burst
+
+    assert estimate_bpm(clicks, SAMPLE_RATE) == pytest.approx(120.0, abs=2.0)
+    assert estimate_bpm(clicks[:SAMPLE_RATE], SAMPLE_RATE) is None
+
+
+def test_mix_into_loops_and_clips_to_buffer():
+    """Test that tracks loop to fill the duration and never write past the buffer."""
+    buffer = np.zeros((10, 2), dtype=np.float32)
+    pcm = np.ones((3, 2), dtype=np.float32)
+
+    with patch("app.services.pipeline.audio_library.SAMPLE_RATE", 1):
+        assert mix_into(buffer, pcm, start=2, duration=7, gain=0.5, loop=True) == 7
+        assert mix_into(buffer, pcm, start=8, duration=5, gain=1.0) == 2
+
+    assert list(buffer[:, 0]) == [0, 0, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 1.5, 1.0]
+
+
+def test_library_index_caches_pcm_and_refreshes_on_change(tmp_path):
+    """Test name/tag lookup, the persistent PCM cache and directory-mtime refresh."""
+    music_dir, sfx_dir, cache_dir = tmp_path / "music", tmp_path / "sfx", tmp_path / "cache"
+    music_dir.mkdir()
+    sfx_dir.mkdir()
+    _write_wav(music_dir / "Calm_Piano.wav", _sine(1.0, amplitude=0.05))
+    (music_dir / "README.md").write_text("not audio")
+
+    library = AudioLibrary(music_dir, sfx_dir, cache_dir)
+    track = library.find("music", "calm")
+
+    assert track is not None and track.name == "calm_piano"
+    assert track.tags == {"calm", "piano"}
+    assert track.duration == pytest.approx(1.0, abs=0.01)
+    assert track.loudness_lufs == pytest.approx(-26.0, abs=0.2)
+    assert track.normalization_gain() == pytest.approx(10 ** (10 / 20), rel=0.03)
+    pcm = library.load_pcm(track)
+    assert isinstance(pcm, np.memmap) and pcm.shape == (SAMPLE_RATE, 2)
+
+    # A new process reuses the cached PCM instead of decoding again
+    with patch("app.services.pipeline.audio_library.decode_pcm", side_effect=AssertionError("decoded")):
+        assert AudioLibrary(music_dir, sfx_dir, cache_dir).find("music", "calm_piano").pcm_path == track.pcm_path
+
+    # Files added to a library directory are picked up on the next lookup
+    _write_wav(sfx_dir / "transition.wav", _sine(0.3))
+    stat = sfx_dir.stat()
+    os.utime(sfx_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert library.find("sfx", "transition").duration == pytest.approx(0.3, abs=0.01)
+    assert library.find("sfx", "whoosh") is None
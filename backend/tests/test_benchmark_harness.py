@@ -0,0 +1,123 @@
+"""
+Unit tests for the benchmark fake providers and baseline comparison.
+"""
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.fakes import FakeOpenAIServer, FakeReplicateServer, LatencyModel, ResponseLibrary, prepare_media
+from benchmarks.report import compare_to_baseline, percentile, summarize
+
+
+def request(method, url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+@pytest.fixture
+def media(tmp_path):
+    # Pre-placed canned files are reused, so no ffmpeg is needed
+    (tmp_path / "video.mp4").write_bytes(b"mp4")
+    (tmp_path / "audio.mp3").write_bytes(b"mp3")
+    return prepare_media(tmp_path)
+
+
+def test_latency_model_specs():
+    rng = random.Random(1)
+    assert LatencyModel.parse("fixed:2", scale=0.5).sample(rng) == 1.0
+    assert all(1 <= LatencyModel.parse("uniform:1,3").sample(rng) <= 3 for _ in range(100))
+    assert LatencyModel.parse("normal:-50,1").sample(rng) == 0.0
+    assert LatencyModel.parse("lognormal:0,0.1").sample(rng) > 0
+    for spec in ("gamma:1,2", "uniform:1", "fixed"):
+        with pytest.raises(ValueError):
+            LatencyModel.parse(spec)
+
+
+def test_fake_replicate_prediction_lifecycle(media):
+    with FakeReplicateServer(
+        media, queue_latency=LatencyModel("fixed", 0.1), latency=LatencyModel("fixed", 0.2)
+    ) as server:
+        status, body = request("POST", f"{server.base_url}/v1/models/kwaivgi/kling-v2.1/predictions", {"input": {"prompt": "x"}})
+        created = json.loads(body)
+        assert status == 201 and created["status"] == "starting" and created["output"] is None
+
+        time.sleep(0.15)
+        assert json.loads(request("GET", created["urls"]["get"])[1])["status"] == "processing"
+
+        time.sleep(0.25)
+        done = json.loads(request("GET", created["urls"]["get"])[1])
+        assert done["status"] == "succeeded"
+        assert done["created_at"] < done["started_at"] < done["completed_at"]
+        assert request("GET", done["output"]) == (200, b"mp4")
+
+        status, body = request("POST", f"{server.base_url}/v1/models/google/nano-banana/predictions", {"input": {}})
+        image = json.loads(body)
+        canceled = json.loads(request("POST", image["urls"]["cancel"], {})[1])
+        assert canceled["status"] == "canceled"
+
+
+def test_fake_replicate_injects_throttling_and_failures(media):
+    with FakeReplicateServer(media, latency=LatencyModel("fixed", 0), rate_limit_rate=1.0) as server:
+        status, _ = request("POST", f"{server.base_url}/v1/models/a/video/predictions", {"input": {}})
+        assert status == 429 and server.counters["rate_limited"] == 1
+
+    with FakeReplicateServer(media, latency=LatencyModel("fixed", 0), failure_rate=1.0) as server:
+        created = json.loads(request("POST", f"{server.base_url}/v1/models/a/video/predictions", {"input": {}})[1])
+        failed = json.loads(request("GET", created["urls"]["get"])[1])
+        assert failed["status"] == "failed" and failed["error"]
+
+
+def test_fake_openai_completions_and_streaming():
+    with FakeOpenAIServer(latency=LatencyModel("fixed", 0)) as server:
+        url = f"{server.base_url}/v1/chat/completions"
+        status, body = request("POST", url, {
+            "model": "gpt-4o",
+            "messages": [{"role": "user", "content": "Plan the storyboard"}],
+            "response_format": {"type": "json_object"},
+        })
+        content = json.loads(json.loads(body)["choices"][0]["message"]["content"])
+        assert status == 200
+        assert all(3 <= scene["duration_seconds"] <= 7 for scene in content["scenes"])
+
+        _, body = request("POST", url, {"messages": [{"role": "user", "content": "Write the story"}], "stream": True})
+        events = [line[len("data: "):] for line in body.decode().split("\n\n") if line]
+        assert events[-1] == "[DONE]"
+        streamed = "".join(json.loads(event)["choices"][0]["delta"].get("content") or "" for event in events[:-1])
+        assert streamed == ResponseLibrary().default_text
+
+
+def test_response_rules_match_in_order(tmp_path):
+    fixtures = tmp_path / "responses.json"
+    fixtures.write_text(json.dumps({
+        "rules": [{"match": ["story critic"], "content": {"approval_status": "approved"}}],
+        "default_json": {"ok": True},
+        "default_text": "text",
+    }))
+    library = ResponseLibrary(fixtures)
+    assert json.loads(library.respond({"messages": [{"role": "system", "content": "You are the Story Critic"}]})) == {"approval_status": "approved"}
+    assert library.respond({"messages": [{"role": "user", "content": "hello"}]}) == "text"
+
+
+def test_summary_and_baseline_comparison():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    summary = summarize([10.0, 12.0, 30.0], errors=1, wall_seconds=60, cpu_seconds=8, rss_peak_mb=512, db_queries=40)
+    assert summary["throughput_per_min"] == 3.0
+    assert summary["error_rate"] == 0.25 and summary["db_queries_per_request"] == 10.0
+
+    baseline = {"config": {"concurrency": 2}, "scenarios": {"generate": dict(summary)}}
+    report = {"config": {"concurrency": 2}, "scenarios": {"generate": dict(summary, latency_p99=summary["latency_p99"] * 1.5)}}
+    assert compare_to_baseline(baseline, baseline) == []
+    regressions = compare_to_baseline(report, baseline, tolerance=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("generate.latency_p99")
+
+    report["config"] = {"concurrency": 8}
+    assert "configuration differs" in compare_to_baseline(report, baseline)[0]
@@ -0,0 +1,99 @@
+"""
+Unit tests for the processed editor clip cache.
+"""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.services.editor import export_service
+from app.services.editor.clip_cache import ProcessedClipCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ProcessedClipCache(tmp_path / "cache", max_bytes=13_000)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"source video")
+    return str(path)
+
+
+def test_key_depends_on_content_and_params(cache, source, tmp_path):
+    """Test that keys change with the edit but not with the source's location."""
+    key = cache.make_key(source, {"trim_start": 1.0, "trim_end": 3.0})
+
+    copy = tmp_path / "copy.mp4"
+    copy.write_bytes(b"source video")
+    assert cache.make_key(str(copy), {"trim_end": 3.0, "trim_start": 1.0}) == key
+    assert cache.make_key(source, {"trim_start": 1.5, "trim_end": 3.0}) != key
+
+
+def test_put_and_get(cache, source, tmp_path):
+    """Test that a stored clip can be fetched and missing clips are not cached."""
+    produced = tmp_path / "processed.mp4"
+    produced.write_bytes(b"processed")
+
+    assert cache.get("missing") is None
+    assert cache.put("missing", str(tmp_path / "nope.mp4")) is None
+
+    cached = cache.put("abc", str(produced))
+    assert cache.get("abc") == cached
+    assert cached.read_bytes() == b"processed"
+
+
+def test_evicts_least_recently_used(cache, tmp_path):
+    """Test that the oldest clips are evicted once the size limit is exceeded."""
+    def produce(key):
+        produced = tmp_path / f"{key}.mp4"
+        produced.write_bytes(b"x" * 4_000)
+        return str(produced)
+
+    for index, key in enumerate(["a", "b", "c"]):
+        cache.put(key, produce(key))
+        os.utime(cache.get(key), (index, index))
+    cache.get("a")  # most recently used
+
+    cache.put("d", produce("d"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
+
+
+def test_unchanged_clip_is_not_reprocessed(cache, source, tmp_path):
+    """Test that re-exporting an unchanged clip reuses the cached result."""
+    clip_state = {"id": "clip-1", "original_path": source, "trim_start": 0.5, "trim_end": 2.0}
+
+    def fake_cut(source_path, output_path, *args):
+        with open(output_path, "wb") as f:
+            f.write(b"cut")
+        return output_path
+
+    with patch.object(export_service, "get_clip_cache", return_value=cache), \
+            patch.object(export_service, "_smart_cut_clip", side_effect=fake_cut) as cut:
+        for run in range(2):
+            temp_dir = tmp_path / f"export-{run}"
+            temp_dir.mkdir()
+            output = export_service.process_clip_with_edits(clip_state, str(temp_dir))
+            assert open(output, "rb").read() == b"cut"
+        assert cut.call_count == 1
+
+        clip_state["trim_end"] = 1.5
+        export_service.process_clip_with_edits(clip_state, str(tmp_path / "export-0"))
+        assert cut.call_count == 2
+
+
+def test_encode_settings_are_part_of_the_key(cache, source):
+    """Test that changing how clips are encoded does not reuse clips encoded the old way."""
+    clip_state = {"trim_start": 0.5, "trim_end": 2.0}
+    key = export_service._clip_cache_key(cache, source, clip_state, False, True)
+
+    with patch.dict(export_service.CLIP_ENCODE, {"preset": "slow"}):
+        assert export_service._clip_cache_key(cache, source, clip_state, False, True) != key
+    with patch.dict(export_service.BOUNDARY_ENCODE, {"crf": 23}):
+        assert export_service._clip_cache_key(cache, source, clip_state, False, True) != key
+    assert export_service._clip_cache_key(cache, source, clip_state, False, True) == key
@@ -0,0 +1,116 @@
+"""
+Unit tests for the per-clip media process pool.
+"""
+import subprocess
+import textwrap
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.media.clip_pool import (
+    CANCEL_GRACE_SECONDS,
+    ClipTaskCancelled,
+    ClipTaskError,
+    get_media_executor,
+    resolve_pool_size,
+    run_per_clip,
+    shutdown_media_executor,
+)
+
+
+def test_pool_size_splits_cpus_between_workers():
+    """Test that workers are capped by the batch size and split the CPUs of the pool."""
+    with patch("app.services.media.clip_pool.os.cpu_count", return_value=16), \
+            patch.object(settings, "MEDIA_POOL_WORKERS", 0):
+        # Threads are the share of a full pool, whatever the batch size
+        assert resolve_pool_size(4) == (4, 1)
+        assert resolve_pool_size(32) == (16, 1)
+    with patch("app.services.media.clip_pool.os.cpu_count", return_value=16), \
+            patch.object(settings, "MEDIA_POOL_WORKERS", 2):
+        assert resolve_pool_size(4) == (2, 8)
+
+
+def test_worker_processes_keep_result_order():
+    """Test that results from worker processes come back in task order."""
+    tasks = [{"text": f"clip {i}", "prefix": "> "} for i in range(4)]
+    progress = []
+
+    try:
+        with patch.object(settings, "MEDIA_POOL_WORKERS", 2):
+            results = run_per_clip(
+                textwrap.indent, tasks,
+                progress_callback=lambda done, total: progress.append((done, total)),
+            )
+    finally:
+        shutdown_media_executor()
+
+    assert results == [f"> clip {i}" for i in range(4)]
+    assert progress[-1] == (4, 4)
+
+
+def test_batches_share_one_executor():
+    """Test that the pool is created once, reused across batches and replaced after shutdown."""
+    try:
+        with patch.object(settings, "MEDIA_POOL_WORKERS", 2):
+            executor = get_media_executor()
+            assert run_per_clip(textwrap.indent, [{"text": "a", "prefix": "-"}] * 2) == ["-a", "-a"]
+            assert get_media_executor() is executor
+            shutdown_media_executor()
+            assert get_media_executor() is not executor
+        with patch.object(settings, "MEDIA_POOL_WORKERS", 1):
+            assert get_media_executor() is None
+    finally:
+        shutdown_media_executor()
+
+
+def test_cancellation_stops_processing():
+    """Test that a cancellation request stops before remaining clips run."""
+    calls = []
+
+    def process(index):
+        calls.append(index)
+        return index
+
+    with pytest.raises(ClipTaskCancelled):
+        run_per_clip(
+            process, [{"index": i} for i in range(3)],
+            cancellation_check=lambda: len(calls) == 1,
+        )
+    assert calls == [0]
+
+
+def _run_subprocess(seconds):
+    """Module-level so that spawned workers can import it."""
+    return subprocess.run(["sleep", str(seconds)]).returncode
+
+
+def test_cancellation_stops_running_clips():
+    """Test that cancelling a batch kills the subprocesses of clips already running."""
+    started = time.monotonic()
+    try:
+        with patch.object(settings, "MEDIA_POOL_WORKERS", 2), \
+                patch("app.services.media.clip_pool.CANCELLATION_POLL_SECONDS", 0.1):
+            with pytest.raises(ClipTaskCancelled):
+                run_per_clip(
+                    _run_subprocess, [{"seconds": 60}] * 2,
+                    cancellation_check=lambda: time.monotonic() - started > 3,
+                )
+    finally:
+        shutdown_media_executor()
+    # Cancelled after 3s; unstopped clips would hold the batch for CANCEL_GRACE_SECONDS more
+    assert time.monotonic() - started < 3 + CANCEL_GRACE_SECONDS
+
+
+def test_failure_reports_clip_index():
+    """Test that a failing clip is reported with its position."""
+    def process(index):
+        if index == 1:
+            raise ValueError("bad clip")
+        return index
+
+    with pytest.raises(ClipTaskError) as exc_info:
+        run_per_clip(process, [{"index": i} for i in range(3)])
+    assert exc_info.value.index == 1
+    assert isinstance(exc_info.value.__cause__, ValueError)
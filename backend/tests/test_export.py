@@ -69,6 +69,7 @@ def test_export_final_video_basic(
     write_args = mock_video.write_videofile.call_args
     assert write_args[1]['codec'] == 'libx264'
     assert write_args[1]['fps'] == 24
+    assert write_args[1]['ffmpeg_params'] == ['-movflags', '+faststart']
     
     # Verify thumbnail generation
     assert mock_imwrite.called
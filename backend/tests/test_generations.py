@@ -573,3 +573,33 @@ def test_delete_generation_file_not_found_graceful(db_session: Session, test_use
     
     app.dependency_overrides.clear()
 
+
+
+def test_queue_etas_count_only_generations_ahead(db_session: Session, test_user, test_user2, auth_token):
+    """Test that /queue and /status ETAs load the processing and earlier pending generations only."""
+    from app.api.routes.generations import _load_queue_ahead
+    from app.db.session import get_db
+    app.dependency_overrides[get_db] = lambda: db_session
+    
+    now = datetime.utcnow()
+    running = Generation(user_id=test_user2.id, prompt="Running", status="processing", created_at=now - timedelta(minutes=9))
+    earlier = Generation(user_id=test_user2.id, prompt="Earlier", status="pending", created_at=now - timedelta(minutes=5))
+    mine = Generation(user_id=test_user.id, prompt="Mine", status="pending", created_at=now - timedelta(minutes=3))
+    later = Generation(user_id=test_user2.id, prompt="Later", status="pending", created_at=now - timedelta(minutes=1))
+    db_session.add_all([running, earlier, mine, later])
+    db_session.commit()
+    
+    assert {row.id for row in _load_queue_ahead(db_session, mine.created_at)} == {running.id, earlier.id, mine.id}
+    assert {row.id for row in _load_queue_ahead(db_session, None)} == {running.id}
+    
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    queue = client.get("/api/queue", headers=headers).json()
+    assert [gen["eta"]["queue_position"] for gen in queue["pending"]] == [2]
+    
+    response = client.get(f"/api/status/{mine.id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    eta = response.json()["eta"]
+    assert eta["queue_position"] == 2
+    assert eta["eta_seconds"] > 0
+    
+    app.dependency_overrides.clear()
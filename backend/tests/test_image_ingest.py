@@ -0,0 +1,93 @@
+"""
+Unit tests for the uploaded image ingest service.
+"""
+import hashlib
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.services.media.image_ingest import (
+    MODEL_INPUT_MAX_SIZE,
+    THUMBNAIL_MAX_SIZE,
+    get_derived_dir,
+    ingest_uploaded_images,
+    remove_orphaned_derivatives,
+    resolve_model_input,
+)
+from app.utils.storage import delete_user_folder
+
+
+def _png_bytes(size=(2000, 1000), color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _upload(filename: str, content: bytes) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(content),
+        filename=filename,
+        headers=Headers({"content-type": "image/png"}),
+    )
+
+
+@pytest.fixture
+def storage_dir(tmp_path):
+    with patch("app.utils.storage.STORAGE_BASE_DIR", tmp_path):
+        yield tmp_path
+
+
+@pytest.mark.asyncio
+async def test_ingest_writes_original_and_derivatives(storage_dir):
+    """Test that uploads are hashed and get model-input and thumbnail derivatives."""
+    content = _png_bytes()
+
+    [image] = await ingest_uploaded_images("user-1", [_upload("logo.png", content)], "brand_styles")
+
+    assert image.path.read_bytes() == content
+    assert image.content_hash == hashlib.sha256(content).hexdigest()
+    assert image.file_size == len(content)
+    assert (image.width, image.height) == (2000, 1000)
+    assert len(image.perceptual_hash) == 16
+
+    derived = get_derived_dir("user-1", image.content_hash)
+    with Image.open(derived / "model.jpg") as model_input:
+        assert max(model_input.size) == MODEL_INPUT_MAX_SIZE
+    with Image.open(derived / "thumb.jpg") as thumbnail:
+        assert max(thumbnail.size) == THUMBNAIL_MAX_SIZE
+    assert resolve_model_input("user-1", image.path, image.content_hash) == derived / "model.jpg"
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_skipped_in_batch_and_linked_across_folders(storage_dir):
+    """Test that identical content is stored once per batch and shared across folders."""
+    content = _png_bytes()
+    brand = await ingest_uploaded_images(
+        "user-1", [_upload("a.png", content), _upload("b.png", content)], "brand_styles"
+    )
+    assert len(brand) == 1
+
+    [product] = await ingest_uploaded_images("user-1", [_upload("shot.png", content)], "products")
+
+    assert product.deduplicated
+    assert product.path.parent.name == "products"
+    assert product.path.stat().st_ino == brand[0].path.stat().st_ino
+    assert product.perceptual_hash == brand[0].perceptual_hash
+
+
+@pytest.mark.asyncio
+async def test_orphaned_derivatives_are_removed(storage_dir):
+    """Test that derivatives are kept while any source remains."""
+    [image] = await ingest_uploaded_images("user-1", [_upload("a.png", _png_bytes())], "products")
+    assert remove_orphaned_derivatives("user-1") == 0
+
+    delete_user_folder("user-1", "products")
+
+    assert remove_orphaned_derivatives("user-1") == 1
+    assert not get_derived_dir("user-1", image.content_hash).exists()
+    assert resolve_model_input("user-1", "missing.png", image.content_hash) == Path("missing.png")
@@ -55,9 +55,7 @@ def test_error_handling_stitching_failure(
 
 
 @patch('app.services.pipeline.audio.VideoFileClip')
-@patch('app.services.pipeline.audio.AudioFileClip')
 def test_error_handling_audio_failure(
-    mock_audio_clip,
     mock_video_clip,
     tmp_path
 ):
@@ -69,8 +67,6 @@ def test_error_handling_audio_failure(
     mock_video.close = MagicMock()
     mock_video_clip.return_value = mock_video
     
-    mock_audio_clip.side_effect = FileNotFoundError("Music file not found")
-    
     # Test error handling
     with patch('app.services.pipeline.audio._select_music_file') as mock_select:
         mock_select.side_effect = FileNotFoundError("Music file not found")
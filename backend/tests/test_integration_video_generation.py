@@ -9,6 +9,7 @@ from pathlib import Path
 from app.schemas.generation import ScenePlan, Scene, TextOverlay
 from app.services.video_generation_standalone import generate_all_clips
 from app.services.pipeline.overlays import add_overlays_to_clips
+from app.services.pipeline.text_raster import render_text
 
 
 @pytest.fixture
@@ -82,42 +83,36 @@ async def test_complete_flow_scene_plan_to_clips_with_overlays(sample_scene_plan
         
         # Mock MoviePy for overlay addition
         with patch('app.services.pipeline.overlays.VideoFileClip') as mock_video:
-            with patch('app.services.pipeline.overlays.TextClip') as mock_text:
-                with patch('app.services.pipeline.overlays.CompositeVideoClip') as mock_composite:
-                    # Setup mocks
-                    mock_video_clip = MagicMock()
-                    mock_video_clip.duration = 5.0
-                    mock_video_clip.size = (1080, 1920)
-                    mock_video_clip.fps = 24.0
-                    mock_video_clip.close = MagicMock()
-                    mock_video.return_value = mock_video_clip
-                    
-                    mock_text_clip = MagicMock()
-                    mock_text_clip.h = 100
-                    mock_text_clip.set_duration.return_value = mock_text_clip
-                    mock_text_clip.with_position.return_value = mock_text_clip
-                    mock_text_clip.fx.return_value = mock_text_clip
-                    mock_text.return_value = mock_text_clip
-                    
-                    mock_composite_clip = MagicMock()
-                    mock_composite_clip.write_videofile = MagicMock()
-                    mock_composite_clip.close = MagicMock()
-                    mock_composite.return_value = mock_composite_clip
-                    
-                    # Test overlay addition
-                    overlay_paths = add_overlays_to_clips(
-                        clip_paths=clip_paths,
-                        scene_plan=sample_scene_plan,
-                        output_dir=overlay_output_dir
-                    )
-                    
-                    # Verify overlays were created
-                    assert len(overlay_paths) == len(clip_paths)
-                    assert all(Path(p).exists() or True for p in overlay_paths)  # Paths may be mocked
-                    
-                    # Verify MoviePy was called correctly
-                    assert mock_video.call_count == len(clip_paths)
-                    assert mock_text.call_count >= len(clip_paths)  # At least one per clip
+            with patch('app.services.pipeline.overlays.render_text', wraps=render_text) as mock_render:
+                # Setup mocks
+                mock_video_clip = MagicMock()
+                mock_video_clip.duration = 5.0
+                mock_video_clip.size = (1080, 1920)
+                mock_video_clip.fps = 24.0
+                mock_video_clip.close = MagicMock()
+                mock_video.return_value = mock_video_clip
+                
+                # Text is blended onto the frames of the transformed clip
+                mock_overlay_clip = MagicMock()
+                mock_overlay_clip.write_videofile = MagicMock()
+                mock_overlay_clip.close = MagicMock()
+                mock_video_clip.transform.return_value = mock_overlay_clip
+                
+                # Test overlay addition
+                overlay_paths = add_overlays_to_clips(
+                    clip_paths=clip_paths,
+                    scene_plan=sample_scene_plan,
+                    output_dir=overlay_output_dir
+                )
+                
+                # Verify overlays were created
+                assert len(overlay_paths) == len(clip_paths)
+                assert all(Path(p).exists() or True for p in overlay_paths)  # Paths may be mocked
+                
+                # Verify MoviePy was called correctly
+                assert mock_video.call_count == len(clip_paths)
+                assert mock_render.call_count >= len(clip_paths)  # At least one per clip
+                assert mock_overlay_clip.write_videofile.call_count == len(clip_paths)
 
 
 @pytest.mark.asyncio
@@ -8,10 +8,13 @@ Tests cover:
 - Session state management
 - Stage transitions
 """
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
 from app.services.pipeline.interactive_pipeline import InteractivePipelineOrchestrator
+from app.schemas.generation import Scene
 from app.schemas.interactive import PipelineSessionState
 from app.core.config import Settings
 
@@ -217,11 +220,32 @@ class TestManualReferenceBypass:
             result = await orchestrator.approve_stage("sess_manual", "story")
 
         assert result["next_stage"] == "storyboard"
-        mock_storyboard.assert_called_once_with("sess_manual")
+        mock_storyboard.assert_called_once_with("sess_manual", chain_video=False)
         mock_notify.assert_called_once()
         assert story_session.status == "storyboard"
         assert story_session.outputs["reference_image"]["manual_upload"] is True
 
+    @pytest.mark.asyncio
+    async def test_streaming_session_chains_video_after_storyboard(
+        self,
+        orchestrator,
+        story_session,
+    ):
+        story_session.mode = "streaming"
+        story_session.stage_data["manual_reference_images"] = [
+            {"index": 1, "path": "/tmp/manual.png", "url": "/manual.png", "prompt": "Manual prompt"},
+        ]
+
+        with patch.object(orchestrator, "get_session", AsyncMock(return_value=story_session)), \
+             patch.object(orchestrator, "_save_session", new_callable=AsyncMock), \
+             patch.object(orchestrator, "_notify_stage_complete", new_callable=AsyncMock), \
+             patch.object(orchestrator, "_generate_storyboard_stage", new_callable=AsyncMock) as mock_storyboard:
+
+            result = await orchestrator.approve_stage("sess_manual", "story")
+
+        assert result["next_stage"] == "storyboard"
+        mock_storyboard.assert_called_once_with("sess_manual", chain_video=True)
+
 
 class TestStoryboardStage:
     """Test suite for storyboard generation stage."""
@@ -387,6 +411,56 @@ class TestStoryboardStage:
             assert "/output/ref_1.png" in ref_paths
             assert "/output/ref_2.png" in ref_paths
 
+    @pytest.mark.asyncio
+    async def test_streaming_storyboard_chains_frames_into_video(
+        self, orchestrator, mock_session_with_images
+    ):
+        """Test that a streamed scene gets its frames and video before the storyboard finishes."""
+        scenes = [
+            Scene(scene_number=i, scene_type="Scene", visual_prompt=f"Scene {i}", duration=4)
+            for i in (1, 2)
+        ]
+        first_video_started = asyncio.Event()
+        progress_when_storyboard_done = {}
+
+        async def stream_storyboard(user_prompt, reference_image_paths, on_scene):
+            on_scene(1, scenes[0])
+            await asyncio.wait_for(first_video_started.wait(), timeout=5)
+            progress_when_storyboard_done["images"] = mock_gen_image.call_count
+            on_scene(2, scenes[1])
+            return {"scenes": [scene.model_dump() for scene in scenes]}
+
+        async def fake_image(prompt, output_dir, generation_id, scene_number):
+            return f"/output/{generation_id}.png"
+
+        async def fake_video(scene, **kwargs):
+            first_video_started.set()
+            return f"/output/video_{scene.scene_number}.mp4", "google/veo-3"
+
+        with patch.object(orchestrator, 'get_session', return_value=mock_session_with_images), \
+             patch.object(orchestrator, '_save_session', new_callable=AsyncMock) as mock_save, \
+             patch.object(orchestrator, '_notify_stage_complete', new_callable=AsyncMock) as mock_notify, \
+             patch('app.services.pipeline.storyboard_generator.generate_storyboard', side_effect=stream_storyboard), \
+             patch('app.services.pipeline.image_generation.generate_image', side_effect=fake_image) as mock_gen_image, \
+             patch('app.services.pipeline.image_quality_scoring.score_image', new_callable=AsyncMock, return_value={"overall": 80}), \
+             patch('app.services.pipeline.interactive_pipeline.generate_video_clip', side_effect=fake_video) as mock_gen_video, \
+             patch('app.services.pipeline.interactive_pipeline.stitch_video_clips', return_value="/output/final.mp4"), \
+             patch('app.core.config.settings.OUTPUT_BASE_DIR', '/tmp/test_output'):
+
+            await orchestrator._generate_storyboard_stage("test_session_123", chain_video=True)
+
+            # Scene 1 reached the video stage while scene 2 was still being streamed
+            assert progress_when_storyboard_done == {"images": 2}
+            assert mock_gen_image.call_count == 4
+            assert mock_gen_video.call_count == 2
+
+            saved_session = mock_save.call_args[0][0]
+            assert saved_session.status == "complete"
+            assert len(saved_session.outputs["storyboard"]["clips"]) == 2
+            assert [clip["clip_number"] for clip in saved_session.outputs["video"]["clips"]] == [1, 2]
+            assert saved_session.outputs["video"]["final_video"]["path"] == "/output/final.mp4"
+            assert [call.args[1] for call in mock_notify.call_args_list] == ["storyboard", "video"]
+
 
 class TestSessionManagement:
     """Test suite for session state management."""
@@ -0,0 +1,120 @@
+"""
+Unit tests for delivery packaging (fast start, poster, HLS ladder).
+"""
+import shutil
+import subprocess
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+from moviepy.config import FFMPEG_BINARY
+
+from app.core.config import settings
+from app.services.media.packaging import (
+    PackagingError,
+    faststart_remux,
+    is_faststart,
+    package_for_delivery,
+    select_rungs,
+)
+from app.services.media.probe import probe_media_sync
+
+
+@pytest.fixture(scope="module")
+def final_video(tmp_path_factory):
+    """2s 24fps 9:16 H.264 clip with AAC audio, moov atom at the end (ffmpeg's default)."""
+    path = tmp_path_factory.mktemp("packaging") / "final.mp4"
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=360x640:rate=24",
+            "-f", "lavfi", "-i", "sine=frequency=440",
+            "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-shortest", str(path),
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        pytest.skip("ffmpeg with libx264 not available")
+    return str(path)
+
+
+@pytest.fixture
+def video(final_video, tmp_path):
+    path = tmp_path / "final.mp4"
+    shutil.copy(final_video, path)
+    return str(path)
+
+
+def test_faststart_remux_moves_moov_first_once(video):
+    """Test that the remux is lossless, in place, and skipped for fast-start files."""
+    before = probe_media_sync(video)
+    assert not is_faststart(video)
+
+    assert faststart_remux(video) is True
+    assert is_faststart(video)
+    after = probe_media_sync(video)
+    assert (after.duration, after.width, after.height, after.audio_codec) == (
+        before.duration, before.width, before.height, before.audio_codec
+    )
+
+    with patch("app.services.media.packaging.subprocess.run", side_effect=AssertionError("remuxed again")):
+        assert faststart_remux(video) is False
+
+
+def test_faststart_remux_keeps_original_on_failure(tmp_path):
+    """Test that a failed remux raises and leaves no partial file behind."""
+    broken = tmp_path / "broken.mp4"
+    broken.write_bytes(b"\x00\x00\x00\x10mdat" + b"\x00" * 8)
+
+    with pytest.raises(PackagingError):
+        faststart_remux(str(broken))
+    assert broken.read_bytes().startswith(b"\x00\x00\x00\x10mdat")
+    assert list(tmp_path.iterdir()) == [broken]
+
+
+def test_select_rungs_preserves_aspect_and_skips_upscaling():
+    """Test rung selection for portrait, landscape and low-resolution sources."""
+    assert [(r["name"], r["width"], r["height"]) for r in select_rungs(1080, 1920)] == [
+        ("360p", 360, 640), ("720p", 720, 1280), ("1080p", 1080, 1920),
+    ]
+    assert [(r["name"], r["width"], r["height"]) for r in select_rungs(1280, 720)] == [
+        ("360p", 640, 360), ("720p", 1280, 720),
+    ]
+    assert [r["name"] for r in select_rungs(240, 426)] == ["360p"]
+
+
+def test_package_for_delivery_builds_hls_ladder_and_poster(video, tmp_path, monkeypatch):
+    """Test the manifest for a local package with HLS enabled."""
+    monkeypatch.setattr(settings, "STORAGE_MODE", "local")
+    monkeypatch.setattr(settings, "DELIVERY_HLS_SEGMENT_SECONDS", 1)
+    out = tmp_path / "delivery" / "gen-1"
+
+    manifest = package_for_delivery(video, str(out), "delivery/gen-1", s3_prefix="delivery/gen-1", hls=True)
+
+    assert is_faststart(video)
+    assert (manifest["faststart"], manifest["width"], manifest["height"]) == (True, 360, 640)
+    assert manifest["poster"] == "delivery/gen-1/poster.jpg"
+    assert (out / "poster.jpg").stat().st_size > 0
+
+    hls = manifest["hls"]
+    assert hls["master"] == "delivery/gen-1/hls/master.m3u8"
+    assert [(r["name"], r["playlist"]) for r in hls["renditions"]] == [("360p", "delivery/gen-1/hls/360p/index.m3u8")]
+    master = (out / "hls" / "master.m3u8").read_text()
+    assert "360p/index.m3u8" in master and "RESOLUTION=360x640" in master
+    assert len(list((out / "hls" / "360p").glob("segment_*.ts"))) == 2
+
+
+def test_package_for_delivery_uploads_to_s3(video, tmp_path, monkeypatch):
+    """Test that packaged files are uploaded under the S3 prefix with their content types."""
+    monkeypatch.setattr(settings, "STORAGE_MODE", "s3")
+    monkeypatch.setattr(settings, "DELIVERY_HLS_ENABLED", False)
+    storage = MagicMock()
+
+    with patch("app.services.storage.s3_storage.get_s3_storage", return_value=storage):
+        manifest = package_for_delivery(video, str(tmp_path / "out"), "delivery/gen-2", s3_prefix="delivery/gen-2")
+
+    assert manifest["poster"] == "delivery/gen-2/poster.jpg"
+    assert manifest["hls"] is None
+    storage.upload_file.assert_called_once_with(
+        str(tmp_path / "out" / "poster.jpg"), "delivery/gen-2/poster.jpg", content_type="image/jpeg", callback=ANY
+    )
@@ -0,0 +1,165 @@
+"""
+Unit tests for editor timeline media precompute.
+"""
+import asyncio
+import subprocess
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from moviepy.config import FFMPEG_BINARY
+from PIL import Image
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models.generation import Generation
+from app.db.models.user import User
+from app.services.editor.editor_service import extract_clips_from_generation, get_clip_media, probe_clip_durations
+from app.services.editor.media_precompute import (
+    WAVEFORM_PEAKS_PER_SECOND,
+    compute_waveform_peaks,
+    precompute_clip_media,
+    precompute_editor_media,
+    precompute_editor_media_in_session,
+)
+
+
+@pytest.fixture(scope="module")
+def clip_video(tmp_path_factory):
+    """3.5s 24fps 9:16 H.264 + AAC clip."""
+    path = tmp_path_factory.mktemp("editor_media") / "clip.mp4"
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=360x640:rate=24",
+            "-f", "lavfi", "-i", "sine=frequency=440",
+            "-t", "3.5", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest",
+            str(path),
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        pytest.skip("ffmpeg with libx264 not available")
+    return str(path)
+
+
+def test_waveform_peaks_are_bucketed_and_scaled():
+    """Test that each bucket keeps its absolute peak scaled to one byte."""
+    samples = np.array([0, 100, -32768, 5, 32767, 0, 0, -16384], dtype="<i2")
+
+    peaks = compute_waveform_peaks(samples.tobytes(), sample_rate=4, peaks_per_second=1)
+
+    assert list(peaks) == [255, 255]
+    assert list(compute_waveform_peaks(samples.tobytes(), sample_rate=8, peaks_per_second=4)) == [0, 255, 255, 127]
+
+
+def test_precompute_clip_media(clip_video, tmp_path):
+    """Test that one pass produces proxy, sprite sheet, poster and waveform."""
+    entry = precompute_clip_media(clip_video, str(tmp_path / "scene-1"))
+
+    assert entry["duration"] == pytest.approx(3.5, abs=0.1)
+    assert entry["sprite"]["count"] == 4
+    with Image.open(entry["sprite_path"]) as sprite:
+        assert sprite.width == entry["sprite"]["columns"] * entry["sprite"]["tile_width"]
+    with open(entry["waveform_path"], "rb") as f:
+        assert len(f.read()) == pytest.approx(3.5 * WAVEFORM_PEAKS_PER_SECOND, abs=5)
+    assert (tmp_path / "scene-1" / "proxy.mp4").stat().st_size > 0
+    assert (tmp_path / "scene-1" / "poster.jpg").exists()
+
+
+def test_editor_uses_probed_durations(clip_video, tmp_path, db_session, monkeypatch):
+    """Test that editor clips use precomputed durations and media URLs."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "EDITOR_MEDIA_DIR", str(tmp_path / "editor_media"))
+    db_session.add(User(id="user-1", username="media", password_hash="hashed"))
+    generation = Generation(
+        id="gen-media",
+        user_id="user-1",
+        prompt="Test prompt",
+        status="completed",
+        temp_clip_paths=[clip_video, str(tmp_path / "missing.mp4")],
+    )
+    db_session.add(generation)
+    db_session.commit()
+
+    precompute_editor_media(generation, db_session)
+    clips = extract_clips_from_generation(generation, db_session)
+
+    assert set(generation.editor_media["clips"]) == {"1"}
+    assert clips[0].duration == pytest.approx(3.5, abs=0.1)
+    assert clips[0].media.sprite.count == 4
+    assert clips[0].media.proxy_url.endswith("scene-1/proxy.mp4")
+    assert clips[0].thumbnail_url.endswith("scene-1/poster.jpg")
+    assert clips[1].duration == 5.0
+    assert clips[1].media is None
+
+
+def test_editor_media_is_served_locally_in_s3_mode(monkeypatch):
+    """Test that editor media URLs point at the static mount, not presigned S3 URLs."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "STORAGE_MODE", "s3")
+    monkeypatch.setattr(settings, "STATIC_BASE_URL", "http://localhost:8000/output")
+    entry = {
+        "duration": 3.5,
+        "proxy_path": "output/editor_media/gen-1/scene-1/proxy.mp4",
+        "sprite_path": "output/editor_media/gen-1/scene-1/sprite.jpg",
+        "sprite": {"columns": 4, "rows": 1, "count": 4, "tile_width": 160, "tile_height": 284, "interval": 1.0},
+        "waveform_path": "output/editor_media/gen-1/scene-1/waveform.bin",
+        "waveform_peaks_per_second": 100,
+    }
+
+    with patch("app.services.storage.s3_storage.get_s3_storage") as get_s3_storage:
+        media = get_clip_media(entry)
+
+    get_s3_storage.assert_not_called()
+    assert media.proxy_url == "http://localhost:8000/output/editor_media/gen-1/scene-1/proxy.mp4"
+    assert media.sprite.url.endswith("/output/editor_media/gen-1/scene-1/sprite.jpg")
+    assert media.waveform_url.endswith("/output/editor_media/gen-1/scene-1/waveform.bin")
+
+
+@pytest.mark.asyncio
+async def test_editor_probes_clips_without_media(clip_video, tmp_path, db_session):
+    """Test that clips without precomputed media are probed asynchronously."""
+    broken = tmp_path / "broken.mp4"
+    broken.write_bytes(b"not a video")
+    generation = Generation(
+        id="gen-probe",
+        user_id="user-1",
+        prompt="Test prompt",
+        status="completed",
+        temp_clip_paths=[clip_video, str(broken), str(tmp_path / "missing.mp4")],
+    )
+
+    durations = await probe_clip_durations(generation)
+    clips = extract_clips_from_generation(generation, db_session, durations)
+
+    assert set(durations) == {1}
+    assert clips[0].duration == pytest.approx(3.5, abs=0.1)
+    assert clips[0].media is None
+    assert clips[1].duration == 5.0
+    assert clips[2].start_time == pytest.approx(clips[1].end_time)
+
+
+@pytest.mark.asyncio
+async def test_precompute_in_worker_thread_uses_own_session(clip_video, tmp_path, db_session, monkeypatch):
+    """Test that precompute can run off the event loop with a session of its own."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "EDITOR_MEDIA_DIR", str(tmp_path / "editor_media"))
+    monkeypatch.setattr(
+        "app.services.editor.media_precompute.SessionLocal", sessionmaker(bind=db_session.get_bind())
+    )
+    db_session.add(User(id="user-1", username="media", password_hash="hashed"))
+    generation = Generation(
+        id="gen-thread", user_id="user-1", prompt="Test prompt", status="completed", temp_clip_paths=[clip_video]
+    )
+    db_session.add(generation)
+    db_session.commit()
+
+    editor_media = await asyncio.to_thread(precompute_editor_media_in_session, "gen-thread")
+    db_session.refresh(generation)
+
+    assert set(editor_media["clips"]) == {"1"}
+    assert generation.editor_media == editor_media
+    assert await asyncio.to_thread(precompute_editor_media_in_session, "missing") is None
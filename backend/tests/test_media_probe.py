@@ -0,0 +1,146 @@
+"""
+Unit tests for the memoized media probe service.
+"""
+import asyncio
+import os
+import shutil
+import subprocess
+from unittest.mock import patch
+
+import pytest
+from moviepy.config import FFMPEG_BINARY
+
+from app.core.config import settings
+from app.services.media import probe as probe_module
+from app.services.media.probe import (
+    MediaProbeError,
+    clear_probe_cache,
+    parse_probe_output,
+    probe_media,
+    probe_media_sync,
+)
+
+
+@pytest.fixture(scope="module")
+def clip_video(tmp_path_factory):
+    """3s 24fps 9:16 H.264 clip (keyframe every second) with stereo AAC."""
+    path = tmp_path_factory.mktemp("probe") / "clip.mp4"
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=360x640:rate=24",
+            "-f", "lavfi", "-i", "sine=frequency=440",
+            "-t", "3", "-c:v", "libx264", "-g", "24", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-ac", "2", "-shortest", str(path),
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        pytest.skip("ffmpeg with libx264 not available")
+    return str(path)
+
+
+@pytest.fixture
+def probe_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_PROBE_CACHE_DIR", str(tmp_path / "probe_cache"))
+    clear_probe_cache()
+    yield tmp_path / "probe_cache"
+    clear_probe_cache()
+
+
+def test_probe_reports_streams_keyframes_and_audio_layout(clip_video, probe_cache_dir):
+    """Test the typed probe result for a real clip."""
+    probe = probe_media_sync(clip_video)
+
+    assert probe.duration == pytest.approx(3.0, abs=0.05)
+    assert (probe.video_codec, probe.width, probe.height, probe.fps) == ("h264", 360, 640, 24.0)
+    assert probe.aspect_ratio == pytest.approx(9 / 16)
+    assert probe.keyframes == pytest.approx([0.0, 1.0, 2.0])
+    assert (probe.audio_codec, probe.audio_channels, probe.audio_sample_rate) == ("aac", 2, 44100)
+    assert [(stream.kind, stream.codec) for stream in probe.streams] == [("video", "h264"), ("audio", "aac")]
+
+
+def test_parse_ignores_output_streams_and_reads_surround_layout():
+    """Test parsing of ffmpeg stderr: only input streams count, channel layouts map to counts."""
+    stderr = (
+        "Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'in.mp4':\n"
+        "  Duration: 00:00:04.50, start: 0.000000, bitrate: 900 kb/s\n"
+        "  Stream #0:0[0x1](und): Video: hevc (Main) (hvc1 / 0x31637668), yuv420p(tv), "
+        "1080x1920 [SAR 1:1 DAR 9:16], 800 kb/s, 30 fps, 30 tbr, 15360 tbn (default)\n"
+        "  Stream #0:1[0x2](und): Audio: eac3 (ec-3 / 0x332D6365), 48000 Hz, 5.1(side), fltp, 384 kb/s\n"
+        "Output #0, null, to 'pipe:':\n"
+        "  Stream #0:0(und): Video: wrapped_avframe, yuv420p, 1080x1920, q=2-31, 200 kb/s, 30 fps\n"
+        "[Parsed_showinfo_0 @ 0x1] n:   0 pts:      0 pts_time:0       duration: 512\n"
+        "[Parsed_showinfo_0 @ 0x1] n:   1 pts:  30720 pts_time:2       duration: 512\n"
+    )
+
+    probe = parse_probe_output(stderr, "in.mp4")
+
+    assert (probe.video_codec, probe.width, probe.height, probe.fps, probe.timescale) == ("hevc", 1080, 1920, 30.0, 15360)
+    assert (probe.audio_channels, probe.audio_channel_layout) == (6, "5.1(side)")
+    assert probe.keyframes == [0.0, 2.0]
+    assert len(probe.streams) == 2
+    assert parse_probe_output(stderr.replace("15360 tbn", "90k tbn"), "in.mp4").timescale == 90000
+    with pytest.raises(MediaProbeError):
+        parse_probe_output("Input #0, mp3, from 'a.mp3':\n  Duration: 00:00:01.00\n", "a.mp3")
+
+
+def test_probe_is_memoized_by_size_and_mtime(clip_video, probe_cache_dir, tmp_path):
+    """Test that repeat probes (also after a restart) skip ffmpeg until the file changes."""
+    clip = str(tmp_path / "clip.mp4")
+    shutil.copy(clip_video, clip)
+    first = probe_media_sync(clip)
+
+    with patch("app.services.media.probe.subprocess.run", side_effect=AssertionError("probed again")):
+        assert probe_media_sync(clip) is first
+        clear_probe_cache()  # new process: only the persistent cache is left
+        assert probe_media_sync(clip) == first
+    assert len(list(probe_cache_dir.glob("*.json"))) == 1
+
+    stat = os.stat(clip)
+    os.utime(clip, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with patch("app.services.media.probe.subprocess.run", wraps=subprocess.run) as mock_run:
+        assert probe_media_sync(clip) == first
+    assert mock_run.call_count == 1
+
+    with pytest.raises(MediaProbeError, match="not found"):
+        probe_media_sync(str(tmp_path / "missing.mp4"))
+
+
+@pytest.mark.asyncio
+async def test_async_probes_respect_concurrency_cap(clip_video, probe_cache_dir, tmp_path, monkeypatch):
+    """Test that async probes run through asyncio subprocesses, at most MEDIA_PROBE_CONCURRENCY at a time."""
+    monkeypatch.setattr(settings, "MEDIA_PROBE_CONCURRENCY", 1)
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f"clip{i}.mp4"))
+        shutil.copy(clip_video, paths[-1])
+
+    running = 0
+    max_running = 0
+    spawn = asyncio.create_subprocess_exec
+
+    async def tracked_spawn(*args, **kwargs):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        process = await spawn(*args, **kwargs)
+        original_communicate = process.communicate
+
+        async def communicate(*a, **kw):
+            nonlocal running
+            try:
+                return await original_communicate(*a, **kw)
+            finally:
+                running -= 1
+
+        process.communicate = communicate
+        return process
+
+    with patch.object(probe_module.asyncio, "create_subprocess_exec", side_effect=tracked_spawn) as mock_spawn:
+        probes = await asyncio.gather(*(probe_media(path) for path in paths))
+        assert await probe_media(paths[0]) is probes[0]
+
+    assert mock_spawn.call_count == 3
+    assert max_running == 1
+    assert all(probe.keyframes == pytest.approx([0.0, 1.0, 2.0]) for probe in probes)
@@ -0,0 +1,89 @@
+"""
+Unit tests for reference image consistency topologies.
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.services.pipeline.image_generation_batch import (
+    generate_images_with_sequential_references,
+    plan_reference_topology,
+    reference_waves,
+)
+
+
+def test_plan_reference_topology_parents():
+    assert plan_reference_topology(4, "chain") == [None, 0, 1, 2]
+    assert plan_reference_topology(4, "star") == [None, 0, 0, 0]
+    assert plan_reference_topology(4, "star", has_initial_reference=True) == [None, None, None, None]
+    assert plan_reference_topology(7, "tree", fan_out=2) == [None, 0, 0, 1, 1, 2, 2]
+    assert plan_reference_topology(6, "tree", fan_out=3) == [None, 0, 0, 0, 1, 1]
+    assert plan_reference_topology(6, "waves", wave_size=2) == [None, 0, 0, 2, 2, 4]
+    assert plan_reference_topology(0, "tree") == []
+
+
+def test_plan_reference_topology_rejects_unknown():
+    with pytest.raises(ValueError):
+        plan_reference_topology(3, "ring")
+
+
+def test_reference_waves():
+    assert reference_waves(plan_reference_topology(4, "chain")) == [[0], [1], [2], [3]]
+    assert reference_waves(plan_reference_topology(4, "star")) == [[0], [1, 2, 3]]
+    assert reference_waves(plan_reference_topology(7, "tree", fan_out=2)) == [[0], [1, 2], [3, 4, 5, 6]]
+    assert reference_waves(plan_reference_topology(5, "waves", wave_size=2)) == [[0], [1, 2], [3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_tree_topology_generates_waves_concurrently(tmp_path):
+    references = {}
+    active, peak = 0, 0
+
+    async def fake_generate_image(prompt, output_dir, generation_id, scene_number, reference_image_path, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        path = tmp_path / f"scene_{scene_number}.png"
+        path.write_bytes(b"png")
+        references[scene_number] = reference_image_path
+        return str(path)
+
+    with patch("app.services.pipeline.image_generation_batch.generate_image", side_effect=fake_generate_image), \
+         patch("app.core.config.settings.STORYBOARD_CLIP_CONCURRENCY", 4):
+        paths = await generate_images_with_sequential_references(
+            prompts=[f"Scene {i}" for i in range(1, 6)],
+            output_dir=str(tmp_path),
+            generation_id="gen-tree",
+            topology="tree",
+            fan_out=2,
+        )
+
+    assert paths == [str(tmp_path / f"scene_{i}.png") for i in range(1, 6)]
+    # Scene 1 has no reference; 2-3 reference scene 1; 4-5 reference scene 2
+    assert references[1] is None
+    assert references[2] == references[3] == str(tmp_path / "scene_1.png")
+    assert references[4] == references[5] == str(tmp_path / "scene_2.png")
+    assert peak >= 2
+
+
+@pytest.mark.asyncio
+async def test_failed_image_cancels_the_rest(tmp_path):
+    async def fake_generate_image(prompt, output_dir, generation_id, scene_number, **kwargs):
+        if scene_number == 2:
+            raise RuntimeError("provider error")
+        await asyncio.sleep(0.01)
+        path = tmp_path / f"scene_{scene_number}.png"
+        path.write_bytes(b"png")
+        return str(path)
+
+    with patch("app.services.pipeline.image_generation_batch.generate_image", side_effect=fake_generate_image):
+        with pytest.raises(RuntimeError, match="provider error"):
+            await generate_images_with_sequential_references(
+                prompts=["Scene 1", "Scene 2", "Scene 3"],
+                output_dir=str(tmp_path),
+                generation_id="gen-star",
+                topology="star",
+            )
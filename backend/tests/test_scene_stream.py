@@ -0,0 +1,86 @@
+"""
+Unit tests for per-scene streaming helpers.
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.services.pipeline.scene_stream import SceneChains, StreamedScenesParser, provider_slot
+
+
+STORYBOARD = {
+    "ad_framework": "AIDA",
+    "reference_images": [{"scene_number": 1, "image_path": "a.jpg"}],
+    "style_tone": "warm {not a brace} \"quoted\" [x]",
+    "scenes": [
+        {"scene_number": 1, "scene_description": {"visual": "desk", "tags": ["a", "}"]}},
+        {"scene_number": 2, "scene_description": {"visual": "street \\ \"rain\""}},
+        {"scene_number": 3, "overlay_text": "Go [now]"},
+    ],
+    "music": {"scenes": [{"scene_number": 99}]},
+}
+
+
+def test_parser_yields_each_scene_as_it_completes():
+    text = json.dumps(STORYBOARD, indent=2)
+    parser = StreamedScenesParser()
+    seen = []
+    for i in range(0, len(text), 7):
+        seen.extend(parser.feed(text[i:i + 7]))
+    assert seen == STORYBOARD["scenes"]
+    assert json.loads(parser.text) == STORYBOARD
+
+
+def test_parser_returns_scene_before_rest_of_document():
+    text = json.dumps(STORYBOARD)
+    first_end = text.index('{"scene_number": 2')
+    parser = StreamedScenesParser()
+    assert parser.feed(text[:first_end]) == [STORYBOARD["scenes"][0]]
+    assert parser.feed(text[first_end:]) == STORYBOARD["scenes"][1:]
+
+
+def test_parser_ignores_scenes_key_outside_top_level():
+    parser = StreamedScenesParser()
+    assert parser.feed(json.dumps({"music": {"scenes": [{"a": 1}]}, "note": "scenes"})) == []
+
+
+@pytest.mark.asyncio
+async def test_scene_chains_run_independently():
+    chains = SceneChains()
+    order = []
+
+    async def chain(index, delay, fail=False):
+        await asyncio.sleep(delay)
+        order.append(index)
+        if fail:
+            raise RuntimeError(f"scene {index} failed")
+        return index * 10
+
+    chains.start(1, lambda: chain(1, 0.05))
+    chains.start(2, lambda: chain(2, 0.0, fail=True))
+    chains.start(3, lambda: chain(3, 0.01))
+    chains.start(3, lambda: chain(3, 0.0))  # duplicate is ignored
+
+    results = await chains.results()
+    assert order == [2, 3, 1]
+    assert results[1] == 10 and results[3] == 30
+    assert isinstance(results[2], RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_provider_slot_is_shared_and_limits_concurrency(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.VIDEO_CLIP_CONCURRENCY", 2)
+    active, peak = 0, 0
+
+    async def call():
+        nonlocal active, peak
+        async with provider_slot("video"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert provider_slot("video") is provider_slot("video")
+    assert peak == 2
@@ -0,0 +1,115 @@
+"""
+Unit tests for the quantized image-scorer runtime selection and calibration.
+"""
+import sys
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.pipeline import scoring_runtime
+from app.services.pipeline.scoring_runtime import (
+    MIN_CALIBRATION_IMAGES,
+    calibrate,
+    get_quantized_encoder,
+    prepare_quantized_encoder,
+    runtime_enabled,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_encoders():
+    scoring_runtime._encoders.clear()
+    scoring_runtime._preparing.clear()
+    yield
+    for thread in list(scoring_runtime._preparing.values()):
+        thread.join(timeout=5)
+    scoring_runtime._encoders.clear()
+    scoring_runtime._preparing.clear()
+
+
+def scores(image_features, text_features):
+    return [float(row.sum()) for row in image_features]
+
+
+class FakeEncoder:
+    image_session = SimpleNamespace(get_providers=lambda: ["CPUExecutionProvider"])
+
+    def __init__(self, offset):
+        self.offset = offset
+
+    def encode(self, images, prompts=None):
+        return np.array([[10.0 * i + self.offset] for i in range(len(images))]), None
+
+
+def reference(model, processor, images, prompts=None):
+    return np.array([[10.0 * i] for i in range(len(images))]), None
+
+
+def test_torch_runtime_keeps_pytorch():
+    with patch("app.core.config.settings.SCORING_RUNTIME", "torch"), \
+         patch.object(scoring_runtime, "_prepare") as prepare:
+        assert prepare_quantized_encoder("clip", SimpleNamespace(name_or_path="m"), None, reference, scores) is None
+    prepare.assert_not_called()
+
+
+def test_missing_onnxruntime_keeps_pytorch():
+    with patch("app.core.config.settings.SCORING_RUNTIME", "onnx"), \
+         patch.dict(sys.modules, {"onnxruntime": None}):
+        assert runtime_enabled() is False
+
+
+def test_auto_runtime_needs_real_calibration_images(tmp_path):
+    from PIL import Image
+
+    with patch("app.core.config.settings.SCORING_RUNTIME", "auto"), \
+         patch("app.core.config.settings.SCORING_CALIBRATION_DIR", str(tmp_path)), \
+         patch.object(scoring_runtime.importlib.util, "find_spec", return_value=object()), \
+         patch.dict(sys.modules, {"torch": SimpleNamespace(cuda=SimpleNamespace(is_available=lambda: False))}):
+        for i in range(MIN_CALIBRATION_IMAGES - 1):
+            Image.new("RGB", (8, 8)).save(tmp_path / f"{i}.png")
+        assert runtime_enabled() is False
+        Image.new("RGB", (8, 8)).save(tmp_path / "last.png")
+        assert runtime_enabled() is True
+
+
+@pytest.mark.parametrize("offset,passed", [(1.5, True), (3.0, False)])
+def test_calibration_checks_score_deviation(offset, passed):
+    with patch("app.core.config.settings.SCORING_ONNX_TOLERANCE", 2.0), \
+         patch.object(scoring_runtime, "calibration_set", return_value=([object()] * 4, ["a", "b", "c", "d"])):
+        result = calibrate(FakeEncoder(offset), None, None, reference, scores, with_text=False)
+
+    assert result["samples"] == 4
+    assert result["max_deviation"] == pytest.approx(offset)
+    assert result["passed"] is passed
+
+
+def test_failed_preparation_is_remembered():
+    model = SimpleNamespace(name_or_path="openai/clip-vit-large-patch14")
+    with patch.object(scoring_runtime, "runtime_enabled", return_value=True), \
+         patch.object(scoring_runtime, "_prepare", side_effect=RuntimeError("export failed")) as prepare:
+        assert prepare_quantized_encoder("clip", model, None, reference, scores) is None
+        assert prepare_quantized_encoder("clip", model, None, reference, scores) is None
+    assert prepare.call_count == 1
+
+
+def test_scoring_does_not_wait_for_preparation():
+    model = SimpleNamespace(name_or_path="openai/clip-vit-large-patch14")
+    encoder = FakeEncoder(0.0)
+    release = threading.Event()
+
+    def slow_prepare(*args):
+        release.wait(timeout=5)
+        return encoder
+
+    with patch.object(scoring_runtime, "runtime_enabled", return_value=True), \
+         patch.object(scoring_runtime, "_prepare", side_effect=slow_prepare) as prepare:
+        # PyTorch scores the requests while the export runs in the background
+        assert get_quantized_encoder("clip", model, None, reference, scores) is None
+        assert get_quantized_encoder("clip", model, None, reference, scores) is None
+        release.set()
+        scoring_runtime._preparing["clip:openai/clip-vit-large-patch14"].join(timeout=5)
+        assert get_quantized_encoder("clip", model, None, reference, scores) is encoder
+    assert prepare.call_count == 1
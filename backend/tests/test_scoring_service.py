@@ -0,0 +1,99 @@
+"""
+Unit tests for the shared image-scoring service and its client.
+"""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.services.pipeline.scoring_service import (
+    ScoringClient,
+    ScoringServer,
+    ScoringServiceError,
+    ScoringServiceUnavailable,
+)
+
+
+def make_handlers(batch_sizes):
+    def score_images(payloads):
+        batch_sizes.append(len(payloads))
+        time.sleep(0.05)  # a forward pass; requests arriving meanwhile form the next batch
+        return [{"overall": float(len(payload["prompt"]))} for payload in payloads]
+
+    def fail(payloads):
+        raise RuntimeError("CUDA out of memory")
+
+    def short(payloads):
+        return [{"overall": 1.0}] * (len(payloads) - 1)
+
+    return {"score_image": score_images, "broken": fail, "short": short}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched(tmp_path):
+    batch_sizes = []
+    socket_path = str(tmp_path / "scoring.sock")
+    server = ScoringServer(socket_path, handlers=make_handlers(batch_sizes), max_batch=8, max_wait_ms=20, warm_up=False)
+    await server.start()
+    try:
+        client = ScoringClient(socket_path, timeout=5)
+        prompts = ["x" * n for n in range(1, 13)]
+        results = await asyncio.gather(*(client.score_image(f"/img/{n}.png", prompt) for n, prompt in enumerate(prompts)))
+    finally:
+        await server.stop()
+
+    assert [result["overall"] for result in results] == [float(len(prompt)) for prompt in prompts]
+    assert sum(batch_sizes) == 12
+    assert max(batch_sizes) <= 8 and len(batch_sizes) < 12
+    assert server.stats["requests"] == 12 and server.stats["largest_batch"] == max(batch_sizes)
+
+
+@pytest.mark.asyncio
+async def test_errors_are_returned_to_the_caller(tmp_path):
+    socket_path = str(tmp_path / "scoring.sock")
+    server = ScoringServer(socket_path, handlers=make_handlers([]), warm_up=False)
+    await server.start()
+    try:
+        client = ScoringClient(socket_path, timeout=5)
+        with pytest.raises(ScoringServiceError, match="CUDA out of memory"):
+            await client._request("broken", {})
+        with pytest.raises(ScoringServiceError, match="returned 0 results for 1 requests"):
+            await client._request("short", {})
+        with pytest.raises(ScoringServiceError, match="Unknown operation"):
+            await client._request("caption", {})
+        # The service keeps serving after a failed batch
+        assert (await client.score_image("/img/a.png", "abc"))["overall"] == 3.0
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_service_is_skipped_for_a_while(tmp_path):
+    client = ScoringClient(str(tmp_path / "missing.sock"), timeout=5)
+    with pytest.raises(ScoringServiceUnavailable):
+        await client.score_image("/img/a.png", "prompt")
+    with patch("asyncio.open_unix_connection") as connect:
+        with pytest.raises(ScoringServiceUnavailable, match="retrying later"):
+            await client.score_image("/img/a.png", "prompt")
+    connect.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_score_image_falls_back_in_process(tmp_path):
+    from PIL import Image
+
+    from app.services.pipeline.image_quality_scoring import score_image
+
+    image_path = tmp_path / "image.png"
+    Image.new("RGB", (32, 32), color="red").save(image_path)
+    with patch("app.core.config.settings.SCORING_SERVICE_SOCKET", str(tmp_path / "missing.sock")), \
+         patch("app.services.pipeline.scoring_service._client", None), \
+         patch("app.services.pipeline.image_quality_scoring._compute_clip_score", return_value=60.0), \
+         patch("app.services.pipeline.image_quality_scoring._compute_pickscore", return_value=80.0), \
+         patch("app.services.pipeline.image_quality_scoring._compute_vqa_score", return_value=None), \
+         patch("app.services.pipeline.image_quality_scoring._compute_aesthetic_score", return_value=50.0):
+        scores = await score_image(str(image_path), "A red square")
+
+    assert scores["pickscore"] == 80.0 and scores["vqa_score"] is None
+    assert scores["overall"] == pytest.approx(80.0 * 0.575 + 60.0 * 0.295 + 50.0 * 0.13)
@@ -3,9 +3,13 @@ Unit tests for config_loader module.
 
 Tests AC-2, AC-3, AC-4: YAML configuration loading and Pydantic validation.
 """
+import os
+
 import pytest
 from app.services.unified_pipeline.config_loader import (
     ConfigLoader,
+    ConfigRegistry,
+    CompiledTemplate,
     load_pipeline_config,
     load_prompt_template,
     substitute_variables
@@ -104,5 +108,47 @@ class TestConfigLoader:
             PipelineConfig(video_max_concurrent=15)
 
 
+
+class TestConfigRegistry:
+    """Test cached, compiled configuration loading."""
+
+    def _write_prompt(self, directory, name, user_prompt, mtime_ns):
+        path = directory / f"{name}.yaml"
+        path.write_text(f"system_prompt: You are a director\nuser_prompt_template: '{user_prompt}'\n")
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def test_prompt_is_cached_until_mtime_changes(self, tmp_path):
+        """Test that templates are parsed once and reloaded when the file changes."""
+        registry = ConfigRegistry(pipelines_dir=tmp_path, prompts_dir=tmp_path)
+        self._write_prompt(tmp_path, "director", "Story for {product}", 1_000_000_000)
+
+        first = registry.get_prompt_template("director")
+        assert registry.get_prompt_template("director") is first
+        checksum = registry.checksums()
+
+        self._write_prompt(tmp_path, "director", "Ad for {product}", 2_000_000_000)
+        reloaded = registry.get_prompt_template("director")
+
+        assert reloaded is not first
+        assert reloaded.user_prompt.render({"product": "EcoBottle"}) == "Ad for EcoBottle"
+        assert registry.checksums() != checksum
+
+    def test_preload_rejects_invalid_template(self, tmp_path):
+        """Test that an invalid template fails preload."""
+        (tmp_path / "broken.yaml").write_text("system_prompt: only a system prompt\n")
+        registry = ConfigRegistry(pipelines_dir=tmp_path / "none", prompts_dir=tmp_path)
+
+        with pytest.raises(ValueError):
+            registry.preload()
+
+    def test_compiled_template_keeps_literal_braces(self):
+        """Test that JSON braces and missing variables survive rendering."""
+        template = CompiledTemplate('Return {"title": "..."} for {product} in {style}')
+
+        assert template.variables == {"product", "style"}
+        assert template.render({"product": "EcoBottle"}) == 'Return {"title": "..."} for EcoBottle in {style}'
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,266 @@
+"""
+Unit tests for interactive pipeline session storage.
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from app.schemas.interactive import ChatMessage, PipelineSessionState
+from app.services.pipeline.session_storage import (
+    InMemorySessionStorage,
+    SessionConflictError,
+    SessionStorage,
+    _assemble_session,
+    _serialize_header,
+    _serialize_value,
+)
+
+
+@pytest.fixture
+def storage():
+    """Storage instance used only for its delta helpers."""
+    return InMemorySessionStorage()
+
+
+@pytest.fixture
+def session():
+    """Create a session with one stage output."""
+    now = datetime.utcnow()
+    return PipelineSessionState(
+        session_id="sess_delta",
+        user_id="user_1",
+        status="story",
+        current_stage="Story Generation",
+        created_at=now,
+        updated_at=now,
+        expires_at=now + timedelta(hours=1),
+        prompt="Create a product video",
+        target_duration=15,
+        mode="interactive",
+        outputs={"story": {"narrative": "A story"}},
+    )
+
+
+def _message(content: str) -> ChatMessage:
+    return ChatMessage(type="user", content=content, timestamp=datetime.utcnow())
+
+
+def test_first_save_writes_everything(storage, session):
+    """Test that an untracked session produces a full delta."""
+    session.conversation_history.append(_message("hello"))
+
+    delta = storage._compute_delta(session)
+
+    assert delta.full
+    assert delta.header
+    assert set(delta.outputs) == {"story"}
+    assert delta.reset_conversation
+    assert len(delta.new_messages) == 1
+
+
+def test_chat_message_only_appends(storage, session):
+    """Test that adding a message writes only the new message."""
+    storage._compute_delta(session)
+
+    session.conversation_history.append(_message("make it brighter"))
+    delta = storage._compute_delta(session)
+
+    assert not delta.full
+    assert delta.header is None
+    assert delta.outputs == {}
+    assert not delta.reset_conversation
+    assert len(delta.new_messages) == 1
+
+
+def test_changed_and_removed_outputs(storage, session):
+    """Test that only changed stage outputs are written."""
+    session.outputs["reference_image"] = {"images": [1, 2, 3]}
+    storage._compute_delta(session)
+
+    session.outputs["story"] = {"narrative": "A new story"}
+    del session.outputs["reference_image"]
+    delta = storage._compute_delta(session)
+
+    assert set(delta.outputs) == {"story"}
+    assert delta.removed_outputs == ["reference_image"]
+
+
+def test_conversation_reset_rewrites_log(storage, session):
+    """Test that clearing the history on stage transition resets the log."""
+    session.conversation_history = [_message("a"), _message("b")]
+    storage._compute_delta(session)
+
+    session.conversation_history = []
+    session.status = "reference_image"
+    delta = storage._compute_delta(session)
+
+    assert delta.header
+    assert delta.reset_conversation
+    assert delta.new_messages == []
+
+
+def test_partial_snapshot_keeps_unloaded_parts(storage, session):
+    """Test that a session loaded without outputs or history never deletes them."""
+    header = session.model_dump_json(exclude={"outputs", "conversation_history"})
+    storage._remember(session.session_id, storage._snapshot_from_parts(header, {}, None))
+
+    partial = _assemble_session(header, {}, None, stages=[])
+    partial.conversation_history.append(_message("new"))
+    delta = storage._compute_delta(partial)
+
+    assert delta.removed_outputs == []
+    assert not delta.reset_conversation
+    assert len(delta.new_messages) == 1
+
+
+def _apply(log, delta):
+    """Apply a delta's conversation changes to a stored message log."""
+    if delta.reset_conversation:
+        log.clear()
+    log.extend(delta.new_messages)
+
+
+def test_partial_load_keeps_full_snapshot(storage, session):
+    """Test that a partial load after a full load does not re-append the conversation."""
+    session.conversation_history = [_message("a"), _message("b")]
+    log = [msg.model_dump_json() for msg in session.conversation_history]
+    header = _serialize_header(session)
+    outputs = {stage: _serialize_value(value) for stage, value in session.outputs.items()}
+
+    # load(full), then load(stages=[], include_conversation=False) e.g. from the status route
+    storage._remember_loaded(session.session_id, header, outputs, list(log), all_outputs=True)
+    storage._remember_loaded(session.session_id, header, {}, None, all_outputs=False)
+
+    for content in ("c", "d"):
+        session.conversation_history.append(_message(content))
+        delta = storage._compute_delta(session)
+        assert delta.outputs == {} and delta.removed_outputs == []
+        _apply(log, delta)
+
+    assert log == [msg.model_dump_json() for msg in session.conversation_history]
+
+
+def test_saves_without_loaded_conversation_append_once(storage, session):
+    """Test that repeated saves of a partially loaded session append each message once."""
+    header = session.model_dump_json(exclude={"outputs", "conversation_history"})
+    storage._remember_loaded(session.session_id, header, {}, None, all_outputs=False)
+    partial = _assemble_session(header, {}, None, stages=[])
+    log = []
+
+    partial.conversation_history.append(_message("new"))
+    _apply(log, storage._compute_delta(partial))
+    _apply(log, storage._compute_delta(partial))
+    partial.conversation_history.append(_message("newer"))
+    _apply(log, storage._compute_delta(partial))
+
+    assert log == [msg.model_dump_json() for msg in partial.conversation_history]
+
+
+class _PartsStorage(SessionStorage):
+    """Stores sessions as separate parts, like the Redis and PostgreSQL backends."""
+
+    def __init__(self):
+        self.headers, self.outputs, self.logs = {}, {}, {}
+
+    async def save(self, session, check_version=False):
+        delta = self._compute_delta(session)
+        outputs = self.outputs.setdefault(session.session_id, {})
+        log = self.logs.setdefault(session.session_id, [])
+        if delta.full:
+            outputs.clear()
+        if delta.header:
+            self.headers[session.session_id] = delta.header
+        outputs.update(delta.outputs)
+        for stage in delta.removed_outputs:
+            outputs.pop(stage, None)
+        _apply(log, delta)
+        session.version += 1
+
+    async def load(self, session_id, stages=None, include_conversation=True):
+        header = self.headers[session_id]
+        outputs = {
+            stage: data for stage, data in self.outputs[session_id].items()
+            if stages is None or stage in stages
+        }
+        messages = list(self.logs[session_id]) if include_conversation else None
+        self._remember_loaded(session_id, header, outputs, messages, all_outputs=stages is None)
+        return _assemble_session(header, outputs, messages, stages=stages)
+
+    async def delete(self, session_id):
+        pass
+
+    async def exists(self, session_id):
+        return session_id in self.headers
+
+    async def cleanup_expired(self):
+        return 0
+
+
+@pytest.mark.asyncio
+async def test_saving_partially_loaded_session_keeps_unloaded_parts(session):
+    """Test that saving a session loaded with a subset of stages and no messages loses nothing."""
+    storage = _PartsStorage()
+    session.outputs["reference_image"] = {"images": [1, 2]}
+    session.conversation_history = [_message("a"), _message("b")]
+    await storage.save(session)
+
+    partial = await storage.load(session.session_id, stages=["story"], include_conversation=False)
+    partial.outputs["story"] = {"narrative": "Edited story"}
+    partial.conversation_history.append(_message("c"))
+    await storage.save(partial)
+    await storage.save(partial)
+
+    full = await storage.load(session.session_id)
+    assert full.outputs == {"story": {"narrative": "Edited story"}, "reference_image": {"images": [1, 2]}}
+    assert [msg.content for msg in full.conversation_history] == ["a", "b", "c"]
+
+    # Removing a stage that was loaded is still persisted
+    partial = await storage.load(session.session_id, stages=["reference_image"], include_conversation=False)
+    del partial.outputs["reference_image"]
+    await storage.save(partial)
+    full = await storage.load(session.session_id)
+    assert set(full.outputs) == {"story"}
+    assert len(full.conversation_history) == 3
+
+
+@pytest.mark.asyncio
+async def test_save_increments_version(storage, session):
+    """Test that every save bumps the session version."""
+    await storage.save(session)
+    await storage.save(session, check_version=True)
+
+    assert session.version == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_version_check_raises_conflict(storage, session):
+    """Test that a version-checked save of a stale copy is rejected."""
+    await storage.save(session)
+    stale = session.model_copy(deep=True)
+    await storage.save(session)
+
+    with pytest.raises(SessionConflictError):
+        await storage.save(stale, check_version=True)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loaded_copies_conflict(storage, session):
+    """Test that of two callers saving the same loaded version, the second is rejected."""
+    await storage.save(session)
+    first = await storage.load(session.session_id)
+    second = await storage.load(session.session_id)
+
+    first.outputs["story"] = {"narrative": "First edit"}
+    await storage.save(first, check_version=True)
+    second.outputs["story"] = {"narrative": "Second edit"}
+    with pytest.raises(SessionConflictError):
+        await storage.save(second, check_version=True)
+
+    assert (await storage.load(session.session_id)).outputs["story"] == {"narrative": "First edit"}
+
+
+def test_header_excludes_version(storage, session):
+    """Test that a version bump alone does not rewrite the header."""
+    storage._compute_delta(session)
+    session.version += 1
+
+    assert storage._compute_delta(session).header is None
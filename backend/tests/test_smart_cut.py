@@ -0,0 +1,128 @@
+"""
+Unit tests for the keyframe-aware smart cut used by editor export.
+"""
+import subprocess
+from unittest.mock import patch
+
+import pytest
+from moviepy.config import FFMPEG_BINARY
+
+from app.services.editor.smart_cut import (
+    SmartCutError,
+    probe_video,
+    read_splice_parameters,
+    read_x264_options,
+    smart_cut,
+    x264_params_for,
+)
+
+
+def _encode_source(path, *video_args):
+    """4s 24fps H.264 + AAC clip with a keyframe every second."""
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=320x240:rate=24",
+            "-f", "lavfi", "-i", "sine=frequency=440",
+            "-t", "4", "-c:v", "libx264", "-g", "24", "-keyint_min", "24",
+            "-sc_threshold", "0", "-pix_fmt", "yuv420p", *video_args, "-c:a", "aac", "-shortest",
+            str(path),
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        pytest.skip("ffmpeg with libx264 not available")
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def source_video(tmp_path_factory):
+    return _encode_source(tmp_path_factory.mktemp("smart_cut") / "source.mp4")
+
+
+@pytest.fixture(scope="module")
+def main_profile_video(tmp_path_factory):
+    """Source with a non-default profile, level and timebase."""
+    return _encode_source(
+        tmp_path_factory.mktemp("smart_cut") / "main.mp4",
+        "-profile:v", "main", "-level:v", "4.0", "-video_track_timescale", "90000",
+    )
+
+
+def _frame_times(path):
+    result = subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-i", path, "-map", "0:v", "-vf", "showinfo", "-f", "null", "-"],
+        capture_output=True, text=True,
+    )
+    return [float(part.split(":")[1].split()[0]) for part in result.stderr.split("pts_time")[1:]]
+
+
+def test_probe_finds_keyframes(source_video):
+    """Test that probing returns codec and one keyframe per second."""
+    probe = probe_video(source_video)
+
+    assert probe.video_codec == "h264"
+    assert probe.fps == 24
+    assert probe.has_audio
+    assert probe.keyframes == pytest.approx([0.0, 1.0, 2.0, 3.0])
+
+
+def test_frame_accurate_cut_has_exact_frames(source_video, tmp_path):
+    """Test that a mid-GOP cut keeps exactly the requested frames without gaps."""
+    output = smart_cut(source_video, str(tmp_path / "cut.mp4"), 0.5, 3.5)
+
+    times = _frame_times(output)
+    assert len(times) == 72  # 3.0s at 24fps
+    assert max(b - a for a, b in zip(times, times[1:])) < 0.05
+    assert probe_video(output).keyframes == pytest.approx([0.0, 0.5, 1.5, 2.5])
+
+
+def test_boundary_segments_keep_source_parameters(main_profile_video, tmp_path):
+    """Test that re-encoded boundaries use the source profile, level and timebase."""
+    source = read_splice_parameters(main_profile_video)
+    assert (source.x264_profile, source.x264_level, source.timescale) == ("main", "4", 90000)
+
+    output = smart_cut(main_profile_video, str(tmp_path / "cut.mp4"), 0.5, 3.5)
+
+    assert read_splice_parameters(output) == source
+    assert len(_frame_times(output)) == 72
+
+
+def test_x264_options_are_read_from_the_source(main_profile_video):
+    """Test that the SEI options map to x264 params with the psy chroma offset undone."""
+    options = read_x264_options(main_profile_video)
+    assert options["ref"] == "3" and options["chroma_qp_offset"] == "-2"
+
+    params = dict(item.split("=", 1) for item in x264_params_for(options).split(":"))
+    assert params["ref"] == "3" and params["crf"] == "23.0"
+    assert params["chroma-qp-offset"] == "0"  # x264 subtracts 2 again for psy-rd
+    assert params["deblock"] == "0,0"
+    assert x264_params_for({}) is None
+
+
+def test_mismatched_boundary_segment_raises(main_profile_video, tmp_path):
+    """Test that a boundary that cannot match the source falls back instead of splicing."""
+    output = tmp_path / "cut.mp4"
+    # Without the source's x264 options the boundaries get other parameter sets
+    with patch("app.services.editor.smart_cut.read_x264_options", return_value={}):
+        with pytest.raises(SmartCutError, match="does not match the source"):
+            smart_cut(main_profile_video, str(output), 0.5, 3.5)
+
+    assert not output.exists()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_keyframe_snapped_cut_copies_whole_gops(source_video, tmp_path):
+    """Test that without frame accuracy the cut snaps outwards to keyframes."""
+    output = smart_cut(source_video, str(tmp_path / "cut.mp4"), 1.4, 2.6, frame_accurate=False)
+
+    assert len(_frame_times(output)) == 48  # keyframes 1.0 to 3.0
+
+
+def test_unreadable_source_raises(tmp_path):
+    """Test that a file that is not a video raises SmartCutError."""
+    bogus = tmp_path / "clip.mp4"
+    bogus.write_bytes(b"not a video")
+
+    with pytest.raises(SmartCutError):
+        smart_cut(str(bogus), str(tmp_path / "out.mp4"), 0.0, 1.0)
@@ -0,0 +1,132 @@
+"""
+Unit tests for the checkpointed stage-DAG executor.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.pipeline.stage_dag import (
+    CheckpointStore,
+    Stage,
+    StageExecutor,
+    StageGraph,
+    StageGraphError,
+)
+
+
+def _pipeline(calls, tmp_path, fail_at=None):
+    """plan -> (images || style) -> render, recording which stages ran."""
+    async def plan(inputs):
+        calls.append("plan")
+        return {"scenes": [f"{inputs['prompt']} {i}" for i in range(2)]}
+
+    async def images(inputs):
+        calls.append("images")
+        await asyncio.sleep(0.05)
+        paths = []
+        for i, _ in enumerate(inputs["scenes"]):
+            path = tmp_path / f"image_{i}.png"
+            path.write_bytes(b"png")
+            paths.append(str(path))
+        return {"image_paths": paths}
+
+    async def style(inputs):
+        calls.append("style")
+        await asyncio.sleep(0.05)
+        return {"style": "warm"}
+
+    async def render(inputs):
+        calls.append("render")
+        if fail_at == "render":
+            raise RuntimeError("render failed")
+        return {"video": f"{len(inputs['image_paths'])} clips, {inputs['style']}"}
+
+    return StageGraph(
+        [
+            Stage("render", render, inputs=("image_paths", "style"), outputs=("video",)),
+            Stage("plan", plan, inputs=("prompt",), outputs=("scenes",)),
+            Stage("images", images, inputs=("scenes",), outputs=("image_paths",), files=("image_paths",)),
+            Stage("style", style, inputs=("scenes",), outputs=("style",)),
+        ],
+        initial_inputs=("prompt",),
+    )
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently(tmp_path):
+    """Test dependency order, concurrency of independent stages and recorded timings."""
+    calls = []
+    executor = StageExecutor(_pipeline(calls, tmp_path))
+
+    started = time.perf_counter()
+    values = await executor.run({"prompt": "bottle"})
+    elapsed = time.perf_counter() - started
+
+    assert values["video"] == "2 clips, warm"
+    assert calls[0] == "plan" and calls[-1] == "render"
+    # images and style both sleep 0.05s; run one after the other they would take 0.1s
+    assert elapsed < 0.09
+    assert executor.timings["images"] >= 0.05 and executor.timings["style"] >= 0.05
+    state = executor.store.load()
+    assert set(state["stages"]) == {"plan", "images", "style", "render"}
+    assert state["inputs"] == {"prompt": "bottle"}
+
+
+@pytest.mark.asyncio
+async def test_resume_reruns_only_failed_and_invalidated_stages(tmp_path):
+    """Test resume after a failure, file-based invalidation and fingerprint changes."""
+    store = CheckpointStore()
+    calls = []
+    with pytest.raises(RuntimeError, match="render failed"):
+        await StageExecutor(_pipeline(calls, tmp_path, fail_at="render"), store).run({"prompt": "bottle"})
+    assert calls[0] == "plan" and calls[-1] == "render"
+    assert store.load()["failed_stage"] == "render"
+
+    # Retry: only the failed stage runs again
+    calls.clear()
+    executor = StageExecutor(_pipeline(calls, tmp_path), store)
+    assert (await executor.run({"prompt": "bottle"}))["video"] == "2 clips, warm"
+    assert calls == ["render"]
+    assert executor.restored == ["plan", "images", "style"]  # topological order
+
+    # A missing image invalidates its stage and everything downstream of it
+    (tmp_path / "image_1.png").unlink()
+    calls.clear()
+    await StageExecutor(_pipeline(calls, tmp_path), store).run({"prompt": "bottle"})
+    assert sorted(calls) == ["images", "render"]
+
+    # Different work: nothing is reused
+    calls.clear()
+    await StageExecutor(_pipeline(calls, tmp_path), store).run({"prompt": "perfume"})
+    assert sorted(calls) == ["images", "plan", "render", "style"]
+
+
+def test_graph_validation():
+    """Test unknown inputs, duplicate outputs and cycles."""
+    async def noop(inputs):
+        return {}
+
+    with pytest.raises(StageGraphError, match="not produced"):
+        StageGraph([Stage("a", noop, inputs=("missing",))])
+    with pytest.raises(StageGraphError, match="already provided"):
+        StageGraph([Stage("a", noop, outputs=("x",)), Stage("b", noop, outputs=("x",))])
+    with pytest.raises(StageGraphError, match="Cycle"):
+        StageGraph([
+            Stage("a", noop, inputs=("y",), outputs=("x",)),
+            Stage("b", noop, inputs=("x",), outputs=("y",)),
+        ])
+
+
+@pytest.mark.asyncio
+async def test_missing_outputs_mark_the_stage_failed():
+    """Test that a stage returning incomplete outputs is recorded as the failed stage."""
+    async def plan(inputs):
+        return {}
+
+    store = CheckpointStore()
+    executor = StageExecutor(StageGraph([Stage("plan", plan, outputs=("scenes",))]), store)
+    with pytest.raises(StageGraphError, match="did not return outputs"):
+        await executor.run({})
+    assert executor.failed_stage == "plan"
+    assert store.load()["failed_stage"] == "plan"
@@ -0,0 +1,129 @@
+"""
+Unit tests for recorded stage timings and live generation ETAs.
+"""
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.pipeline.stage_timing import P2Quantile, StageTimingStore
+from app.services.pipeline.time_estimation import (
+    BASE_CLIP_GENERATION_TIME,
+    estimate_queue_etas,
+    estimate_remaining_time,
+    estimate_stage_time,
+)
+
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def make_generation(gen_id, status="processing", checkpoint=None, created_offset=0, num_scenes=4):
+    return SimpleNamespace(
+        id=gen_id,
+        status=status,
+        model="kling-v1",
+        aspect_ratio="9:16",
+        duration=15,
+        num_scenes=num_scenes,
+        num_clips=None,
+        pipeline_checkpoint=checkpoint,
+        created_at=NOW - timedelta(minutes=10) + timedelta(seconds=created_offset),
+    )
+
+
+def test_p2_quantile_tracks_distribution():
+    rng = random.Random(7)
+    samples = [rng.uniform(0, 100) for _ in range(5000)]
+    p50, p90 = P2Quantile(0.5), P2Quantile(0.9)
+    for value in samples:
+        p50.add(value)
+        p90.add(value)
+    assert p50.value() == pytest.approx(50, abs=3)
+    assert p90.value() == pytest.approx(90, abs=3)
+
+
+def test_p2_quantile_exact_for_few_samples():
+    sketch = P2Quantile(0.5)
+    assert sketch.value() is None
+    for value in (30, 10, 20):
+        sketch.add(value)
+    assert sketch.value() == 20
+
+
+def test_store_backs_off_and_scales_per_clip(tmp_path):
+    store = StageTimingStore(str(tmp_path / "timings.json"))
+    for seconds in (80, 100, 120):
+        store.record({"clips": seconds, "stitch": 6}, model="kling-v1", resolution="9:16", duration=15, clips=4)
+
+    exact = store.estimate("clips", "kling-v1", "9:16", 15, 4)
+    assert exact.p50 == pytest.approx(100)
+    assert exact.samples == 3
+
+    # Unseen clip count: per-clip seconds of the same model, scaled
+    assert store.estimate("clips", "kling-v1", "9:16", 15, 6).p50 == pytest.approx(150)
+    # Unseen model: stage-wide bucket
+    assert store.estimate("stitch", "runway-gen3").p50 == pytest.approx(6)
+    assert store.estimate("audio", "kling-v1") is None
+
+    reloaded = StageTimingStore(str(tmp_path / "timings.json"))
+    assert reloaded.estimate("clips", "kling-v1", "9:16", 15, 4).p50 == pytest.approx(100)
+
+
+def test_stage_estimate_defaults_and_recent_slowdown(tmp_path):
+    store = StageTimingStore()
+    default = estimate_stage_time("clips", "kling-v1", clips=2, store=store)
+    assert default["source"] == "default"
+    assert default["seconds"] == pytest.approx(BASE_CLIP_GENERATION_TIME * 1.1 * 2)
+
+    for seconds in (60, 60, 60, 60, 60, 180, 180):
+        store.record({"clips": seconds}, model="kling-v1", clips=2)
+    measured = estimate_stage_time("clips", "kling-v1", clips=2, store=store)
+    assert measured["source"] == "measured"
+    # The provider got slower recently, so the estimate is above the median
+    assert measured["seconds"] > 60
+
+
+def test_remaining_time_skips_completed_stages_and_credits_running_one():
+    store = StageTimingStore()
+    for _ in range(3):
+        store.record({"storyboard": 10, "images": 40, "video_style": 5, "scene_plan": 3, "clips": 100,
+                      "overlays": 8, "stitch": 5, "audio": 4, "brand_overlay": 1, "export": 9},
+                     model="kling-v1", resolution="9:16", duration=15, clips=4)
+
+    fresh = estimate_remaining_time(make_generation("a", checkpoint=None), now=NOW, store=store)
+    # video_style runs alongside images, so only the longer of the two counts
+    assert fresh["seconds"] == pytest.approx(10 + 40 + 3 + 100 + 8 + 5 + 4 + 1 + 9)
+    assert fresh["source"] == "measured"
+
+    checkpoint = {
+        "started_at": (NOW - timedelta(seconds=90)).isoformat(),
+        "timings": {"storyboard": 10, "images": 40, "video_style": 5, "scene_plan": 3},
+        "stages": {"scene_plan": {"completed_at": (NOW - timedelta(seconds=30)).isoformat()}},
+    }
+    running = estimate_remaining_time(make_generation("a", checkpoint=checkpoint), now=NOW, store=store)
+    assert running["stages_remaining"][0] == "clips"
+    assert running["seconds"] == pytest.approx((100 - 30) + 8 + 5 + 4 + 1 + 9)
+
+
+def test_queue_etas_add_wait_for_generations_ahead():
+    store = StageTimingStore()
+    active = [
+        make_generation("p1", status="processing", created_offset=0),
+        make_generation("p2", status="processing", created_offset=1),
+        make_generation("q2", status="pending", created_offset=3),
+        make_generation("q1", status="pending", created_offset=2),
+    ]
+    etas = estimate_queue_etas(active, slots=2, now=NOW, store=store)
+
+    run_time = etas["p1"]["eta_seconds"]
+    assert etas["p1"]["queue_position"] == 0
+    assert etas["q1"]["queue_position"] == 1 and etas["q2"]["queue_position"] == 2
+    # Both slots are busy: each pending generation starts when a running one finishes
+    assert etas["q1"]["eta_seconds"] == pytest.approx(2 * run_time, abs=1)
+    assert etas["q2"]["eta_seconds"] == pytest.approx(2 * run_time, abs=1)
+
+    etas = estimate_queue_etas(active, slots=1, now=NOW, store=store)
+    assert etas["q1"]["eta_seconds"] == pytest.approx(2 * run_time, abs=1)
+    assert etas["q2"]["eta_seconds"] == pytest.approx(3 * run_time, abs=1)
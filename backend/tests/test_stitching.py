@@ -5,6 +5,7 @@ import pytest
 from pathlib import Path
 from unittest.mock import MagicMock, patch, Mock
 
+from app.services.media.probe import MediaProbe, MediaProbeError
 from app.services.pipeline.stitching import stitch_video_clips
 
 
@@ -34,6 +35,17 @@ def sample_clip_paths(tmp_path):
     return [str(clip1), str(clip2), str(clip3)]
 
 
+@pytest.fixture
+def valid_probe():
+    """Patch the media probe so the fake clip files probe as valid videos."""
+    probe = MediaProbe(
+        duration=5.0, video_codec="h264", pix_fmt="yuv420p", fps=24.0, timescale=12288,
+        audio_codec=None, keyframes=[0.0, 2.0, 4.0], width=1080, height=1920,
+    )
+    with patch('app.services.pipeline.stitching.probe_media_sync', return_value=probe) as mock_probe:
+        yield mock_probe
+
+
 @patch('app.services.pipeline.stitching.VideoFileClip')
 @patch('app.services.pipeline.stitching.concatenate_videoclips')
 @patch('app.services.pipeline.stitching.FadeIn')
@@ -44,6 +56,7 @@ def test_stitch_video_clips_basic(
     mock_concatenate,
     mock_video_clip_class,
     sample_clip_paths,
+    valid_probe,
     tmp_path
 ):
     """Test basic video stitching with multiple clips."""
@@ -134,6 +147,7 @@ def test_stitch_video_clips_frame_rate_normalization(
     mock_concatenate,
     mock_video_clip_class,
     sample_clip_paths,
+    valid_probe,
     tmp_path
 ):
     """Test that clips with different frame rates are normalized to 24 fps."""
@@ -187,6 +201,7 @@ def test_stitch_video_clips_frame_rate_normalization(
 def test_stitch_video_clips_corrupted_clip(
     mock_video_clip_class,
     sample_clip_paths,
+    valid_probe,
     tmp_path
 ):
     """Test stitching with corrupted clip that fails validation."""
@@ -219,18 +234,8 @@ def test_stitch_video_clips_unreadable_frames(
     sample_clip_paths,
     tmp_path
 ):
-    """Test stitching with clip that has unreadable frames."""
-    # Setup mock with unreadable frames
-    corrupted_clip = MagicMock()
-    corrupted_clip.duration = 5.0
-    corrupted_clip.fps = 24.0
-    corrupted_clip.size = (1920, 1080)
-    corrupted_clip.get_frame = MagicMock(side_effect=Exception("Cannot read frame"))
-    corrupted_clip.close = MagicMock()
-
-    mock_video_clip_class.return_value = corrupted_clip
-
-    # Test
+    """Test stitching with a clip file that cannot be probed (unreadable stream)."""
+    # The fake clip data is not a video, so probing it fails
     output_path = str(tmp_path / "stitched.mp4")
 
     with pytest.raises(RuntimeError, match="corrupted or has invalid frames"):
@@ -240,6 +245,35 @@ def test_stitch_video_clips_unreadable_frames(
             transitions=False
         )
 
-    # Verify get_frame was called during validation
-    assert corrupted_clip.get_frame.called
+    # Rejected from the probe, before MoviePy opens or decodes the clip
+    assert not mock_video_clip_class.called
+
+
+def test_stitch_video_clips_validates_from_probe_without_decoding(
+    sample_clip_paths,
+    valid_probe,
+    tmp_path
+):
+    """Test that source clips are validated from their probe, not by decoding frames."""
+    with patch('app.services.pipeline.stitching.VideoFileClip') as mock_video_clip_class, \
+            patch('app.services.pipeline.stitching.concatenate_videoclips') as mock_concatenate:
+        clip = MagicMock()
+        clip.duration = 5.0
+        clip.fps = 24.0
+        clip.size = (1080, 1920)
+        mock_video_clip_class.return_value = clip
+        mock_concatenate.return_value.fps = 24.0
+
+        stitch_video_clips(
+            clip_paths=[sample_clip_paths[0]],
+            output_path=str(tmp_path / "stitched.mp4"),
+            transitions=False
+        )
+
+    valid_probe.assert_called_once_with(sample_clip_paths[0])
+    assert not clip.get_frame.called
+
+    valid_probe.side_effect = MediaProbeError("moov atom not found")
+    with pytest.raises(RuntimeError, match="corrupted or has invalid frames"):
+        stitch_video_clips(clip_paths=[sample_clip_paths[0]], output_path=str(tmp_path / "stitched.mp4"))
 
@@ -0,0 +1,156 @@
+"""
+Unit tests for the storage janitor (retention, high-water eviction, metrics).
+"""
+import os
+import time
+from collections import namedtuple
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.storage.janitor import (
+    ArtifactClass,
+    StorageJanitor,
+    create_temp_dir,
+    default_artifact_classes,
+    held_temp_dir_names,
+    remove_temp_dir,
+)
+
+DiskUsage = namedtuple("DiskUsage", "total used free")
+HOUR = 3600
+
+
+def _make(path, size, age_hours):
+    """Create a file (and parents) of size bytes, last written age_hours ago."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age_hours * HOUR
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def tree(tmp_path):
+    temp, master, exports = tmp_path / "temp", tmp_path / "master_mode", tmp_path / "tmp"
+    _make(temp / "gen-old" / "clip.mp4", 1000, age_hours=30)
+    _make(temp / "gen-old_stitched" / "final.mp4", 500, age_hours=30)
+    _make(temp / "gen-running_audio" / "mix.mp4", 700, age_hours=30)
+    # Old directory with one fresh file: still in use
+    _make(temp / "gen-fresh" / "old.mp4", 100, age_hours=30)
+    _make(temp / "gen-fresh" / "new.mp4", 100, age_hours=1)
+    _make(master / "user-1" / "gen-master" / "final.mp4", 2000, age_hours=10)
+    _make(exports / "export-abc" / "clip_0.mp4", 300, age_hours=8)
+    _make(exports / "unrelated.txt", 300, age_hours=100)
+
+    classes = [
+        ArtifactClass("generation_temp", temp, retention_hours=24),
+        ArtifactClass("master_mode_temp", master, retention_hours=168, depth=2, evictable=False),
+        ArtifactClass("export_tmp", exports, retention_hours=6, prefixes=("export-", "preview-")),
+    ]
+    janitor = StorageJanitor(classes, active_ids=lambda: {"gen-running"}, disk_path=str(tmp_path))
+    return tmp_path, janitor
+
+
+@pytest.mark.asyncio
+async def test_retention_removes_expired_entries_except_active(tree):
+    """Test per-class retention, prefix filtering and active-generation protection."""
+    root, janitor = tree
+
+    with patch("app.services.storage.janitor.shutil.disk_usage", return_value=DiskUsage(100_000, 10_000, 90_000)):
+        result = await janitor.run_once()
+
+    assert result == {"entries_removed": 3, "bytes_reclaimed": 1800}
+    assert not (root / "temp" / "gen-old").exists()
+    assert not (root / "temp" / "gen-old_stitched").exists()
+    assert not (root / "tmp" / "export-abc").exists()
+    for kept in ["temp/gen-running_audio", "temp/gen-fresh", "master_mode/user-1/gen-master", "tmp/unrelated.txt"]:
+        assert (root / kept).exists(), kept
+
+    stats = janitor.stats()
+    assert (stats["runs"], stats["entries_removed"], stats["bytes_reclaimed"], stats["evictions"]) == (1, 3, 1800, 0)
+    assert stats["bytes_reclaimed_by_class"] == {"generation_temp": 1500, "export_tmp": 300}
+    assert stats["disk_used_percent"] == 10.0
+
+
+@pytest.mark.asyncio
+async def test_high_water_mark_evicts_least_recently_written(tree, monkeypatch):
+    """Test LRU eviction of evictable entries until usage is under the low-water mark."""
+    root, janitor = tree
+    monkeypatch.setattr(settings, "JANITOR_HIGH_WATER_PERCENT", 90)
+    monkeypatch.setattr(settings, "JANITOR_LOW_WATER_PERCENT", 80)
+    monkeypatch.setattr(settings, "JANITOR_DELETE_BATCH", 1)
+
+    # 99% used: retention frees 1800 bytes, eviction must free another 100 to reach 80%
+    with patch("app.services.storage.janitor.shutil.disk_usage", return_value=DiskUsage(10_000, 9_900, 100)):
+        result = await janitor.run_once()
+
+    assert result["entries_removed"] == 4
+    assert not (root / "temp" / "gen-fresh").exists()  # least recently written evictable entry
+    assert (root / "temp" / "gen-running_audio").exists()  # active generation
+    assert (root / "master_mode" / "user-1" / "gen-master").exists()  # not evictable
+    assert janitor.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_in_use_entries_and_live_sessions_are_kept(tmp_path):
+    """Test that entries reported in use and folders of existing sessions survive retention."""
+    interactive, cache = tmp_path / "interactive", tmp_path / "audio_cache"
+    _make(interactive / "sess_live" / "video" / "clip.mp4", 100, age_hours=200)
+    _make(interactive / "sess_gone" / "video" / "clip.mp4", 100, age_hours=200)
+    _make(cache / "indexed.npy", 100, age_hours=1000)
+    _make(cache / "stale.npy", 100, age_hours=1000)
+
+    async def session_exists(session_id):
+        return session_id == "sess_live"
+
+    classes = [
+        ArtifactClass("interactive_outputs", interactive, retention_hours=168, session_entries=True),
+        ArtifactClass("audio_cache", cache, retention_hours=720, in_use=lambda: {"indexed.npy"}),
+    ]
+    janitor = StorageJanitor(classes, active_ids=set, disk_path=str(tmp_path), session_exists=session_exists)
+    with patch("app.services.storage.janitor.shutil.disk_usage", return_value=DiskUsage(100_000, 10_000, 90_000)):
+        result = await janitor.run_once()
+
+    assert result["entries_removed"] == 2
+    assert (interactive / "sess_live").exists() and not (interactive / "sess_gone").exists()
+    assert (cache / "indexed.npy").exists() and not (cache / "stale.npy").exists()
+
+
+def test_held_temp_dirs_are_reported_until_removed():
+    """Test that export/preview temp dirs are protected while held."""
+    path = create_temp_dir("export-")
+    try:
+        assert os.path.basename(path) in held_temp_dir_names()
+    finally:
+        remove_temp_dir(path)
+    assert os.path.basename(path) not in held_temp_dir_names()
+    assert not os.path.exists(path)
+
+
+def test_default_classes_cover_runtime_directories(monkeypatch):
+    """Test that interactive outputs are scanned per session and every runtime cache has a class."""
+    monkeypatch.setattr(settings, "STORAGE_MODE", "local")
+    classes = {c.name: c for c in default_artifact_classes()}
+
+    assert classes["interactive_outputs"].root.parts[-1] == "interactive"
+    assert classes["interactive_outputs"].session_entries
+    assert classes["export_tmp"].in_use is held_temp_dir_names
+    assert {"editor_clip_cache", "media_probe_cache", "audio_cache", "traces", "delivery"} <= set(classes)
+    # Locally served delivery packages are never collected
+    assert classes["delivery"].retention_hours == 0
+
+
+@pytest.mark.asyncio
+async def test_render_metrics_exports_reclaimed_bytes(tree):
+    """Test that janitor counters are rendered for /metrics."""
+    _, janitor = tree
+    with patch("app.services.storage.janitor.shutil.disk_usage", return_value=DiskUsage(100_000, 10_000, 90_000)):
+        await janitor.run_once()
+
+    metrics = janitor.render_metrics()
+
+    assert "admint_janitor_runs_total 1" in metrics
+    assert 'admint_janitor_bytes_reclaimed_total{artifact_class="generation_temp"} 1500' in metrics
+    assert "admint_disk_used_percent 10.0" in metrics
@@ -0,0 +1,71 @@
+"""
+Unit tests for the compiled prompt text-analysis engine and its consumers.
+"""
+from app.api.routes.master_mode import extract_target_duration_from_prompt
+from app.services.master_mode.appearance_sanitizer import sanitize_appearance_from_prompt
+from app.services.master_mode.scene_to_video import extract_scene_metadata
+from app.services.pipeline.overlays import extract_brand_name
+from app.services.pipeline.text_analysis import Lexicon, analyze_prompt, compile_alternation
+
+
+def test_lexicon_finds_overlapping_and_nested_terms():
+    """Test substring semantics: terms inside words, prefixes of longer terms and overlaps."""
+    lexicon = Lexicon({
+        "motion": ["pan", "push", "move"],
+        "push_in": ["push-in", "push in"],
+        "lighting": ["light", "lighting"],
+    })
+
+    terms = lexicon.scan("Our COMPANY logo, push in; the lighting MOVES")
+    assert terms == {"pan", "push", "push in", "light", "lighting", "move"}
+    assert lexicon.groups_of(terms) == {"motion", "push_in", "lighting"}
+    assert lexicon.scan("static wide shot") == frozenset()
+
+
+def test_compile_alternation_prefers_longest_whole_word():
+    """Test that the longest listed phrase wins and word boundaries are respected."""
+    pattern = compile_alternation(["hair", "hair color", "eyes"], whole_words=True)
+
+    assert pattern.sub("_", "Hair color, blue EYES, hairline") == "_, blue _, hairline"
+
+
+def test_analyze_prompt_extracts_all_features_in_one_pass():
+    """Test camera movement priority, durations, brand candidates and caching."""
+    text = "Scene 2: Interest (7 seconds). Slow pan left, then push in on the Zephyrline bottle for a 15s ad."
+    features = analyze_prompt(text)
+
+    assert features.word_count == 19
+    assert features.camera_movement == "push-in"  # preferred over pan-left
+    assert features.scene_duration == 7
+    assert features.duration_mentions == (7, 15)  # first match of each pattern
+    assert features.brand_candidates == ("Zephyrline", "Interest")  # "Scene" is a common word
+    assert features.known_brand is None
+    assert features.has("motion", "video") and not features.has("video")
+    assert analyze_prompt(text) is features
+
+
+def test_extractors_use_shared_features():
+    """Test the scene metadata, brand and target duration extractors."""
+    assert extract_scene_metadata("Scene 1 (3 seconds): slow TILT DOWN. The subject does not appear.") == {
+        "duration": 4,
+        "camera_movement": "tilt-down",
+        "subject_present": False,
+    }
+    assert extract_brand_name("Running shoes by nike on a Beautiful track") == "Nike"
+    assert extract_brand_name("Introducing Aurora, the Smartwatch") == "Smartwatch"
+    assert extract_brand_name("a quiet morning") is None
+    # First pattern finds an out-of-range 5s, the "Ns" pattern finds nothing better, fall through
+    assert extract_target_duration_from_prompt("5 seconds of calm then a 20s video") == 20
+    assert extract_target_duration_from_prompt("a 90 second commercial") is None
+
+
+def test_sanitizer_removes_appearance_in_single_term_pass():
+    """Test that sanitization removes patterns and terms and tidies punctuation."""
+    prompt = (
+        "The exact same 28-year-old woman from Reference Image 1, with wavy hair color and green eyes, "
+        "picks up the bottle. Soft light, ( ) warm tones."
+    )
+
+    assert sanitize_appearance_from_prompt(prompt) == (
+        "the exact same woman, with and, picks up the bottle. Soft light, warm tones."
+    )
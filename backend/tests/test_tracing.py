@@ -0,0 +1,103 @@
+"""
+Unit tests for tracing spans and the Prometheus metrics surface.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import tracing
+from app.core.tracing import load_trace, record_prediction, render_metrics, span, trace, traced
+
+
+@pytest.fixture(autouse=True)
+def trace_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.TRACE_DIR", str(tmp_path))
+    tracing.span_seconds.clear()
+    return tmp_path
+
+
+def test_spans_nest_and_trace_is_saved(trace_dir):
+    with trace("gen-1", "generation", model="kling-v1") as active:
+        with span("clips", "stage") as attributes:
+            attributes["clips"] = 3
+            with span("video.download", "prediction"):
+                pass
+
+    saved = json.loads((trace_dir / "gen-1.json").read_text())
+    assert saved == load_trace("gen-1")
+    assert saved["status"] == "ok" and saved["pipeline"] == "generation"
+    spans = {s["name"]: s for s in saved["spans"]}
+    assert spans["video.download"]["parent"] == spans["clips"]["id"]
+    assert spans["clips"]["parent"] is None
+    assert spans["clips"]["attributes"] == {"clips": 3}
+    assert spans["clips"]["model"] == "kling-v1"  # inherited from the trace
+    assert set(saved["seconds_by_kind"]) == {"stage", "prediction"}
+    assert tracing.current_trace() is None and active.status == "ok"
+
+
+def test_failed_span_marks_error_status(trace_dir):
+    with pytest.raises(RuntimeError):
+        with trace("gen-2", "generation"):
+            with span("stitch", "encode"):
+                raise RuntimeError("ffmpeg exited 1")
+
+    saved = load_trace("gen-2")
+    assert saved["status"] == "error"
+    assert saved["spans"][0]["status"] == "error"
+    assert "ffmpeg exited 1" in saved["spans"][0]["attributes"]["error"]
+    assert 'kind="encode",name="stitch",model="",status="error"' in render_metrics()
+
+
+def test_traced_decorator_and_histogram_render():
+    @traced("db")
+    def write():
+        return "done"
+
+    @traced("llm", name="chat.completions")
+    async def call():
+        await asyncio.sleep(0)
+        return "reply"
+
+    assert write() == "done"
+    assert asyncio.run(call()) == "reply"
+
+    metrics = render_metrics()
+    assert "# TYPE admint_span_seconds histogram" in metrics
+    labels = 'pipeline="",kind="db",name="write",model="",status="ok"'
+    assert f'admint_span_seconds_bucket{{{labels},le="+Inf"}} 1' in metrics
+    assert f"admint_span_seconds_count{{{labels}}} 1" in metrics
+    assert 'name="chat.completions"' in metrics
+
+
+def test_spans_follow_into_tasks(trace_dir):
+    async def run():
+        with trace("gen-3", "generation"):
+            with span("images", "stage"):
+                async def one(index):
+                    with span(f"image.{index}", "prediction"):
+                        await asyncio.sleep(0)
+                await asyncio.gather(one(1), one(2))
+
+    asyncio.run(run())
+    spans = load_trace("gen-3")["spans"]
+    parent = next(s["id"] for s in spans if s["name"] == "images")
+    assert sorted(s["name"] for s in spans if s["parent"] == parent) == ["image.1", "image.2"]
+
+
+def test_record_prediction_splits_queue_and_run(trace_dir):
+    prediction = SimpleNamespace(
+        id="p1",
+        status="succeeded",
+        created_at="2026-01-01T12:00:00.000Z",
+        started_at="2026-01-01T12:00:20.000Z",
+        completed_at="2026-01-01T12:01:50.000Z",
+    )
+    with trace("gen-4", "generation"):
+        record_prediction(prediction, "kwaivgi/kling-v2.1", "video")
+
+    spans = {s["name"]: s for s in load_trace("gen-4")["spans"]}
+    assert spans["video.queue"]["seconds"] == pytest.approx(20)
+    assert spans["video.run"]["seconds"] == pytest.approx(90)
+    assert spans["video.run"]["model"] == "kwaivgi/kling-v2.1"
@@ -0,0 +1,120 @@
+"""
+Unit tests for S3 multipart uploads, ETag verification and the background upload manager.
+"""
+import hashlib
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.storage.s3_storage import MB, S3Storage, compute_etag
+from app.services.storage.upload_manager import UploadManager
+
+
+@pytest.fixture
+def s3_client():
+    client = MagicMock()
+    with patch("app.services.storage.s3_storage.boto3.client", return_value=client):
+        yield client
+
+
+def test_compute_etag_matches_s3_single_and_multipart(tmp_path):
+    """Test the local ETag for single-part and multipart uploads."""
+    small = tmp_path / "thumb.jpg"
+    small.write_bytes(b"x" * 1000)
+    large = tmp_path / "video.mp4"
+    content = bytes(range(256)) * (12 * MB // 256)
+    large.write_bytes(content)
+
+    assert compute_etag(str(small), 5 * MB, 5 * MB) == hashlib.md5(b"x" * 1000).hexdigest()
+
+    parts = [content[i:i + 5 * MB] for i in range(0, len(content), 5 * MB)]
+    expected = hashlib.md5(b"".join(hashlib.md5(p).digest() for p in parts)).hexdigest() + "-3"
+    assert compute_etag(str(large), 5 * MB, 5 * MB) == expected
+    # Part sizes below the S3 minimum are raised to 5 MB, as s3transfer does
+    assert compute_etag(str(large), 1 * MB, 1 * MB) == expected
+
+
+def test_upload_file_uses_transfer_config_and_verifies_etag(tmp_path, s3_client, monkeypatch):
+    """Test multipart settings, progress callback and ETag verification."""
+    monkeypatch.setattr(settings, "S3_VERIFY_ETAG", True)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"frames" * 100)
+    etag = hashlib.md5(b"frames" * 100).hexdigest()
+    callback = MagicMock()
+    storage = S3Storage()
+
+    s3_client.head_object.return_value = {"ETag": f'"{etag}"'}
+    assert storage.upload_file(str(video), "videos/a.mp4", "video/mp4", callback=callback) == (
+        f"s3://{storage.bucket_name}/videos/a.mp4"
+    )
+    kwargs = s3_client.upload_file.call_args.kwargs
+    assert kwargs["Callback"] is callback
+    assert kwargs["Config"].multipart_chunksize == settings.S3_MULTIPART_CHUNK_MB * MB
+    assert kwargs["Config"].max_concurrency == settings.S3_MAX_CONCURRENCY
+    assert kwargs["ExtraArgs"] == {"ContentType": "video/mp4"}
+
+    s3_client.head_object.return_value = {"ETag": '"0000"'}
+    with pytest.raises(RuntimeError, match="ETag mismatch"):
+        storage.upload_file(str(video), "videos/a.mp4")
+
+    # SSE-KMS objects have no MD5 ETag
+    s3_client.head_object.return_value = {"ETag": '"0000"', "ServerSideEncryption": "aws:kms"}
+    storage.upload_file(str(video), "videos/a.mp4")
+
+
+def test_upload_manager_tracks_progress_and_failures(tmp_path):
+    """Test per-generation file/byte counters for completed and failed uploads."""
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"c" * 400)
+    thumb = tmp_path / "thumb.jpg"
+    thumb.write_bytes(b"t" * 100)
+    release = threading.Event()
+
+    def fake_upload(local_path, s3_key, content_type=None, callback=None):
+        release.wait(5)
+        if s3_key.endswith(".jpg"):
+            raise RuntimeError("S3 upload failed: AccessDenied")
+        callback(400)
+        return f"s3://bucket/{s3_key}"
+
+    storage = MagicMock()
+    storage.upload_file.side_effect = fake_upload
+    manager = UploadManager(max_workers=2)
+
+    with patch("app.services.storage.s3_storage.get_s3_storage", return_value=storage):
+        clip_upload = manager.submit(str(clip), "clips/clip.mp4", "video/mp4", generation_id="gen-1")
+        thumb_upload = manager.submit(str(thumb), "thumbs/thumb.jpg", "image/jpeg", generation_id="gen-1")
+        assert manager.get_progress("gen-1") == {
+            "files_total": 2, "files_done": 0, "files_failed": 0,
+            "bytes_total": 500, "bytes_uploaded": 0, "percent": 0.0,
+        }
+        release.set()
+
+        assert clip_upload.result(5) == "clips/clip.mp4"
+        with pytest.raises(RuntimeError, match="AccessDenied"):
+            thumb_upload.result(5)
+
+    progress = manager.get_progress("gen-1")
+    assert (progress["files_done"], progress["files_failed"], progress["percent"]) == (1, 1, 80.0)
+    manager.clear_progress("gen-1")
+    assert manager.get_progress("gen-1") is None
+    manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_async_upload_runs_off_the_event_loop(tmp_path):
+    """Test that awaiting an upload runs it on the upload pool, not the loop thread."""
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"c")
+    threads = []
+    storage = MagicMock()
+    storage.upload_file.side_effect = lambda *args, **kwargs: threads.append(threading.current_thread().name)
+    manager = UploadManager(max_workers=1)
+
+    with patch("app.services.storage.s3_storage.get_s3_storage", return_value=storage):
+        assert await manager.upload(str(clip), "clips/clip.mp4") == "clips/clip.mp4"
+
+    assert threads[0].startswith("s3-upload")
+    manager.shutdown()
@@ -0,0 +1,91 @@
+"""
+Unit tests for scoring in the shared media pool and the shared frame decode of the fallback metrics.
+"""
+import math
+import operator
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.media.clip_pool import get_media_executor, shutdown_media_executor
+from app.services.pipeline.video_scoring_pool import (
+    _get_sync_slots,
+    get_video_scoring_executor,
+    map_video_scoring,
+    run_video_scoring,
+)
+
+
+@pytest.fixture
+def two_workers():
+    with patch.object(settings, "MEDIA_POOL_WORKERS", 2), \
+            patch.object(settings, "VIDEO_SCORING_WORKERS", 2):
+        yield
+    shutdown_media_executor()
+
+
+def test_scoring_shares_the_media_pool(two_workers):
+    """Test that scoring uses the media workers unless it is configured to run in-process."""
+    assert get_video_scoring_executor() is get_media_executor()
+    with patch.object(settings, "VIDEO_SCORING_WORKERS", 1):
+        assert get_video_scoring_executor() is None
+
+
+def test_map_keeps_order_and_returns_failures(two_workers):
+    """Test that batch results come back in call order, with failures in place."""
+    results = map_video_scoring(math.sqrt, [(16,), (-1,), (9,)], return_exceptions=True)
+
+    assert results[0] == 4.0 and results[2] == 3.0
+    assert isinstance(results[1], ValueError)
+    with pytest.raises(ValueError):
+        map_video_scoring(math.sqrt, [(16,), (-1,)])
+
+
+def test_map_releases_slots_when_submit_fails(two_workers):
+    """Test that a call that could not be submitted does not keep its scoring slot."""
+    executor = get_video_scoring_executor()
+    submit = executor.submit
+    with patch.object(executor, "submit", side_effect=[submit(math.sqrt, 4), RuntimeError("shut down")]):
+        with pytest.raises(RuntimeError):
+            map_video_scoring(math.sqrt, [(4,), (9,)])
+
+    slots = _get_sync_slots()
+    assert slots.acquire(timeout=10) and slots.acquire(timeout=10)
+    slots.release()
+    slots.release()
+
+
+@pytest.mark.asyncio
+async def test_run_video_scoring_in_pool_and_in_thread(two_workers):
+    """Test that scoring can be awaited with and without worker processes."""
+    assert await run_video_scoring(operator.add, 2, 3) == 5
+
+    calls = []
+    with patch.object(settings, "VIDEO_SCORING_WORKERS", 1):
+        # Runs in a thread of this process, so unpicklable (patched) functions work
+        assert await run_video_scoring(lambda path: calls.append(path) or 1.0, "clip.mp4") == 1.0
+    assert calls == ["clip.mp4"]
+
+
+def test_frames_are_decoded_once_at_reduced_resolution(tmp_path):
+    """Test that sampled frames are grayscale, downscaled and keep the source resolution."""
+    import cv2
+
+    from app.services.pipeline.quality_control import _compute_imaging_quality, _decode_frames
+
+    video_path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 24, (1280, 720))
+    for i in range(48):
+        writer.write(np.full((720, 1280, 3), i * 5, dtype=np.uint8))
+    writer.release()
+
+    frames = _decode_frames(video_path, max_samples=12, max_side=320)
+
+    assert len(frames) == 12
+    assert frames.frames[0].shape == (180, 320)
+    assert frames.source_size == (1280, 720)
+    assert len(frames.differences) == 11 and all(diff > 0 for diff in frames.differences)
+    # Resolution is scored on the source clip, not the downscaled frames
+    assert _compute_imaging_quality(frames) > 70.0
@@ -0,0 +1,194 @@
+"""
+Tests for WebSocket ConnectionManager fan-out.
+
+Tests cover:
+- Delivery to every connection of a session
+- Cross-worker delivery through a shared backplane
+- Slow consumers being closed without delaying other subscribers
+- Subscriptions surviving a quick reconnect and backplane start failures
+"""
+import asyncio
+import json
+from typing import Optional
+
+import pytest
+
+from app.api.routes.websocket import ConnectionManager
+from app.services.websocket_backplane import InProcessBackplane, WebSocketBackplane
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in recording sent messages."""
+
+    def __init__(self, send_delay: float = 0.0):
+        self.sent = []
+        self.closed_code: Optional[int] = None
+        self.send_delay = send_delay
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed_code = code
+
+
+class SharedBackplane(WebSocketBackplane):
+    """Backplane shared by several managers, simulating separate workers."""
+
+    def __init__(self):
+        self.workers = []
+
+    async def start(self, deliver):
+        self.workers.append(deliver)
+
+    async def publish(self, session_id, message):
+        for deliver in self.workers:
+            deliver(session_id, message)
+
+    async def subscribe(self, session_id):
+        pass
+
+    async def unsubscribe(self, session_id):
+        pass
+
+    async def close(self):
+        self.workers.clear()
+
+
+class RecordingBackplane(SharedBackplane):
+    """Backplane tracking which sessions this worker is subscribed to."""
+
+    def __init__(self):
+        super().__init__()
+        self.subscriptions = set()
+
+    async def subscribe(self, session_id):
+        self.subscriptions.add(session_id)
+
+    async def unsubscribe(self, session_id):
+        self.subscriptions.discard(session_id)
+
+
+class UnstartableBackplane(SharedBackplane):
+    """Backplane that cannot connect."""
+
+    async def start(self, deliver):
+        raise ConnectionError("Redis unavailable")
+
+
+class FailingBackplane(SharedBackplane):
+    """Backplane whose publishes fail, as with Redis unreachable."""
+
+    async def publish(self, session_id, message):
+        raise ConnectionError("Redis unavailable")
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_send_message_reaches_all_session_connections():
+    """Test that every connection of a session receives the message."""
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    ws1, ws2, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(ws1, "sess_a")
+    await manager.connect(ws2, "sess_a")
+    await manager.connect(other, "sess_b")
+
+    await manager.send_message("sess_a", {"type": "stage_complete", "stage": "story"})
+    await _drain()
+
+    assert ws1.sent == ws2.sent == [{"type": "stage_complete", "stage": "story"}]
+    assert other.sent == []
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_message_from_one_worker_reaches_client_on_another():
+    """Test fan-out across managers sharing a backplane."""
+    backplane = SharedBackplane()
+    pipeline_worker = ConnectionManager(backplane=backplane)
+    client_worker = ConnectionManager(backplane=backplane)
+    await pipeline_worker._ensure_backplane()
+    ws = FakeWebSocket()
+    await client_worker.connect(ws, "sess_a")
+
+    await pipeline_worker.send_message("sess_a", {"type": "stage_complete"})
+    await _drain()
+
+    assert ws.sent == [{"type": "stage_complete"}]
+    await client_worker.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_closed_without_blocking_others():
+    """Test that a full queue closes the slow client while others keep receiving."""
+    manager = ConnectionManager(backplane=InProcessBackplane(), send_queue_size=2)
+    slow, fast = FakeWebSocket(send_delay=10), FakeWebSocket()
+    await manager.connect(slow, "sess_a")
+    await manager.connect(fast, "sess_a")
+
+    for i in range(5):
+        await manager.send_message("sess_a", {"seq": i})
+        await _drain()
+
+    assert [m["seq"] for m in fast.sent] == [0, 1, 2, 3, 4]
+    assert slow.closed_code == 1013
+    assert slow not in manager.active_connections["sess_a"]
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_backplane_falls_back_to_local_delivery():
+    """Test that a backplane error is not raised to the sender and local connections still receive."""
+    manager = ConnectionManager(backplane=FailingBackplane())
+    ws = FakeWebSocket()
+    await manager.connect(ws, "sess_a")
+
+    await manager.send_message("sess_a", {"type": "progress", "value": 50})
+    await manager.broadcast({"type": "notice"})
+    await _drain()
+
+    assert ws.sent == [{"type": "progress", "value": 50}, {"type": "notice"}]
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_keeps_session_subscribed():
+    """Test that a client reconnecting before the old unsubscribe runs stays subscribed."""
+    backplane = RecordingBackplane()
+    manager = ConnectionManager(backplane=backplane)
+    old, new = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(old, "sess_a")
+
+    manager.disconnect(old, "sess_a")
+    await manager.connect(new, "sess_a")
+    await _drain()
+
+    assert backplane.subscriptions == {"sess_a"}
+    manager.disconnect(new, "sess_a")
+    await _drain()
+    assert backplane.subscriptions == set()
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_backplane_start_failure_falls_back_to_local_delivery():
+    """Test that a connection is kept and served locally when the backplane cannot start."""
+    manager = ConnectionManager(backplane=UnstartableBackplane())
+    ws = FakeWebSocket()
+    await manager.connect(ws, "sess_a")
+
+    await manager.send_message("sess_a", {"type": "progress", "value": 10})
+    await _drain()
+
+    assert ws.sent == [{"type": "progress", "value": 10}]
+    manager.disconnect(ws, "sess_a")
+    await manager.close()
@@ -96,6 +96,7 @@ export interface StatusResponse {
   num_scenes: number | null;  // Total number of scenes planned
   available_clips: number;  // Number of clips currently available for download
   storyboard_plan?: StoryboardPlan;  // Storyboard plan with scenes and images
+  eta?: GenerationEta | null;  // Live ETA while pending/processing
 }
 
 /**
@@ -310,6 +311,15 @@ export const getComparisonGroup = async (
   return response.data;
 };
 
+export interface GenerationEta {
+  eta_seconds: number;
+  eta_p90_seconds: number;
+  eta_formatted: string;
+  queue_position: number;  // 0 once processing
+  stages_remaining: string[];
+  source: "measured" | "default" | "mixed";  // recorded stage timings or built-in defaults
+}
+
 export interface QueueItem {
   id: string;
   title: string | null;
@@ -320,6 +330,7 @@ export interface QueueItem {
   created_at: string | null;
   num_scenes: number | null;
   generation_group_id: string | null;
+  eta: GenerationEta | null;
 }
 
 export interface GenerationQueue {
@@ -148,6 +148,12 @@ export const Queue: React.FC = () => {
             <p className="text-xs text-gray-500 mt-1">
               {formatDate(item.created_at)}
             </p>
+            {item.eta && (
+              <p className="text-xs text-gray-500 mt-1">
+                ~{item.eta.eta_formatted} left
+                {item.eta.queue_position > 0 && ` (#${item.eta.queue_position} in queue)`}
+              </p>
+            )}
           </div>
         </div>
 
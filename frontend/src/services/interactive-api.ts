@@ -141,7 +141,7 @@ export const interactiveAPI = new InteractiveAPI();
 export async function startPipeline(
   prompt: string,
   targetDuration: number = 15,
-  mode: "interactive" | "auto" = "interactive",
+  mode: "interactive" | "auto" | "streaming" = "interactive",
   title?: string
 ): Promise<PipelineSession> {
   return interactiveAPI.startPipeline({
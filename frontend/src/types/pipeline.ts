@@ -27,7 +27,7 @@ export type OutputStage = "story" | "reference_image" | "storyboard" | "video";
 /**
  * Pipeline mode
  */
-export type PipelineMode = "interactive" | "auto";
+export type PipelineMode = "interactive" | "auto" | "streaming";
 
 /**
  * Chat message type